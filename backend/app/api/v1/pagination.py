@@ -0,0 +1,42 @@
+from typing import Optional
+
+from fastapi import Query, Response
+
+from app.crud.pagination import Page
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_ESTIMATED_HEADER = "X-Total-Count-Estimated"
+PAGE_HEADERS = [NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, TOTAL_ESTIMATED_HEADER]
+
+
+class PageParams:
+    """
+    Parâmetros comuns das listagens paginadas (Depends()). O corpo da resposta continua
+    a ser a lista; o cursor da página seguinte e o total vão nos headers X-Next-Cursor,
+    X-Total-Count e X-Total-Count-Estimated. skip mantém-se para clientes antigos.
+    """
+    def __init__(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor da página anterior"),
+        total: Optional[str] = Query(None, pattern="^(exact|estimate)$", description="Incluir o total (exact | estimate)"),
+    ):
+        self.skip = skip
+        self.limit = limit
+        self.cursor = cursor
+        self.total = total
+
+    def kwargs(self) -> dict:
+        return {"limit": self.limit, "cursor": self.cursor, "skip": self.skip, "total": self.total}
+
+
+def set_page_headers(response: Response, page: Page) -> list:
+    """Escreve os headers de paginação e devolve os itens da página."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.total)
+        response.headers[TOTAL_ESTIMATED_HEADER] = "true" if page.total_estimated else "false"
+    return page.items
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
@@ -6,6 +6,7 @@ from pydantic import BaseModel
 from app.crud.absence import AbsenceRepository
 from app.schemas.absence import Absence, AbsenceCreate, AbsenceUpdate, AbsenceRequestCreate
 from app.deps import get_db
+from app.api.v1.pagination import PageParams, set_page_headers
 
 router = APIRouter()
 
@@ -14,14 +15,16 @@ def get_absence_repo(db: Session = Depends(get_db)) -> AbsenceRepository:
 
 @router.get("/", response_model=List[Absence])
 def get_absences(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page_params: PageParams = Depends(),
     employee_id: Optional[int] = Query(None),
     status_id: Optional[int] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     repo: AbsenceRepository = Depends(get_absence_repo),
 ):
+    # Listagens filtradas continuam por skip; a listagem completa usa cursor (X-Next-Cursor)
+    skip, limit = page_params.skip, page_params.limit
     if start_date and end_date:
         return repo.get_by_date_range(start_date, end_date, employee_id, skip, limit)
     if employee_id and status_id:
@@ -32,7 +35,7 @@ def get_absences(
         return repo.get_by_employee(employee_id, skip, limit)
     if status_id:
         return repo.get_by_status(status_id, skip, limit)
-    return repo.get_all(skip, limit)
+    return set_page_headers(response, repo.page(**page_params.kwargs()))
 
 @router.get("/{absence_id}", response_model=Absence)
 def get_absence(absence_id: int, repo: AbsenceRepository = Depends(get_absence_repo)):
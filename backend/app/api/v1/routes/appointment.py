@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_db, get_read_db, ReadSession
+from app.api.v1.pagination import PageParams, set_page_headers
 from app.crud.appointment import AppointmentRepository
 from app.schemas.appointment import Appointment, AppointmentCreate, AppointmentUpdate
 from app.schemas.appointment_extra_service import AppointmentExtraService as AppointmentExtraServiceSchema, AppointmentExtraServiceCreate
@@ -11,7 +12,7 @@ from app.schemas.order_comment import CommentCreate, CommentOut
 from app.models.order_comment import OrderComment
 from app.models.appointment import Appointment as AppointmentModel
 from app.models.user import User
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_read_user
 from app.schemas.invoice import InvoiceBreakdown
 from app.services.notification_service import NotificationService
 
@@ -22,14 +23,17 @@ def get_appointment_repo(db: Session = Depends(get_db)) -> AppointmentRepository
     return AppointmentRepository(db)
 
 @router.get("/", response_model=List[Appointment])
-def list_appointments(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(get_current_user),
-    repo: AppointmentRepository = Depends(get_appointment_repo)
+async def list_appointments(
+    response: Response,
+    page_params: PageParams = Depends(),
+    current_user: User = Depends(get_read_user),
+    reads: ReadSession = Depends(get_read_db)
 ):
-    """List all appointments."""
-    return repo.get_all(skip=skip, limit=limit, user=current_user)
+    """List all appointments (newest first; next page cursor in X-Next-Cursor)."""
+    def load(db: Session):
+        page = AppointmentRepository(db).page(**page_params.kwargs(), user=current_user)
+        return [Appointment.model_validate(a, from_attributes=True) for a in set_page_headers(response, page)]
+    return await reads.run(load)
 
 @router.post("/", response_model=Appointment, status_code=status.HTTP_201_CREATED)
 def create_appointment(
@@ -86,17 +90,20 @@ def add_part_to_appointment(
     return appointment
 
 @router.get("/{appointment_id}", response_model=Appointment)
-def get_appointment_details(
+async def get_appointment_details(
     appointment_id: int,
-    repo: AppointmentRepository = Depends(get_appointment_repo)
+    reads: ReadSession = Depends(get_read_db)
 ):
     """
     Get details of a specific appointment (with relations loaded).
     """
-    db_appointment = repo.get_by_id_with_relations(appointment_id=appointment_id)
-    if not db_appointment:
+    def load(db: Session):
+        db_appointment = AppointmentRepository(db).get_by_id_with_relations(appointment_id=appointment_id)
+        return Appointment.model_validate(db_appointment, from_attributes=True) if db_appointment else None
+    appointment = await reads.run(load)
+    if not appointment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
-    return db_appointment
+    return appointment
 
 
 @router.patch("/{appointment_id}/start_work", status_code=200)
@@ -439,6 +446,7 @@ def delete_appointment(
     if not db_appointment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
     
+    repo.rollup.move(repo.rollup.key_for(db_appointment), None)
     repo.db.delete(db_appointment)
     repo.db.commit()
     
@@ -469,23 +477,6 @@ def delete_part(
     db: Session = Depends(get_db)
 ):
     """Apaga uma peça de uma ordem de serviço e devolve ao stock"""
-    from app.models.order_part import OrderPart
-    from app.models.product import Product
-    
-    part = db.query(OrderPart).filter(
-        OrderPart.id == part_id,
-        OrderPart.appointment_id == appointment_id
-    ).first()
-    
-    if not part:
+    if not AppointmentRepository(db).remove_part(appointment_id, part_id):
         raise HTTPException(status_code=404, detail="Part not found")
-    
-    
-    if part.product_id:
-        product = db.query(Product).filter(Product.id == part.product_id).first()
-        if product:
-            product.quantity += part.quantity
-    
-    db.delete(part)
-    db.commit()
     return None
\ No newline at end of file
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 import logging
 
 from app.database import get_db
+from app.api.v1.pagination import PageParams, set_page_headers
 from app.schemas.customer import Customer, CustomerCreate, CustomerUpdate
 from app.schemas.appointment import Appointment
 from app.core.security import get_current_user_id
 from app.services.customer_service import CustomerService
+from app.crud.pagination import InvalidCursorError
 from app.exceptions import (
     CustomerNotFoundError,
     CustomerAlreadyExistsError,
@@ -46,17 +48,19 @@ def create_customer(
 
 @router.get("/all-profiles")
 def get_all_customer_profiles(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page_params: PageParams = Depends(),
     service: CustomerService = Depends(get_customer_service)
 ):
     """
     Get all customer profiles with their complete information (admin endpoint).
     
-    Uses eager loading to avoid N+1 query problem.
+    Uses eager loading to avoid N+1 query problem. Next page cursor in X-Next-Cursor.
     """
     try:
-        return service.get_all_customer_profiles(skip=skip, limit=limit)
+        return set_page_headers(response, service.get_customer_profiles_page(**page_params.kwargs()))
+    except InvalidCursorError:
+        raise
     except Exception as e:
         logger.error(f"Error in get_all_customer_profiles: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch customer profiles")
@@ -167,11 +171,11 @@ def delete_customer(
 
 @router.get("/", response_model=List[Customer])
 def list_customers(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page_params: PageParams = Depends(),
     service: CustomerService = Depends(get_customer_service)
 ):
     """
-    Retrieve a list of customers with pagination.
+    Retrieve a list of customers with pagination (next page cursor in X-Next-Cursor).
     """
-    return service.list_customers(skip=skip, limit=limit)
\ No newline at end of file
+    return set_page_headers(response, service.list_customers_page(**page_params.kwargs()))
\ No newline at end of file
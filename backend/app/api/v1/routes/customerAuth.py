@@ -10,11 +10,13 @@ from app.core.security import SECRET_KEY, ALGORITHM
 from app.core.security import (
     oauth, 
     create_google_user_data, 
-    create_access_token, 
+    create_customer_token, 
     verify_password, 
+    verify_and_update_password,
     get_current_user_id,
     get_password_hash
 )
+from app.core.principal import CUSTOMER, revoke_tokens
 from app.crud import customerAuth as crud_customer_auth  
 from app.schemas import customerAuth as customer_auth_schema
 from app.models.customerAuth import CustomerAuth
@@ -80,7 +82,7 @@ def get_current_user_profile(
 
 #region Authentication endpoint
 @router.post("/token")
-async def login_for_access_token(
+def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -106,8 +108,9 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verify password
-    if not verify_password(form_data.password, user.password_hash):
+    # Verify password (e refaz o hash se o esquema/custo configurado mudou)
+    valid, new_hash = verify_and_update_password(form_data.password, user.password_hash)
+    if not valid:
         print(f"Invalid password for: {form_data.username}")
         user.failed_login_attempts += 1
         db.commit()
@@ -119,10 +122,12 @@ async def login_for_access_token(
     
     user.failed_login_attempts = 0
     user.last_login = datetime.now()
+    if new_hash:
+        user.password_hash = new_hash
     db.commit()
 
     # Create access token
-    access_token = create_access_token(data={"sub": str(user.id_customer)})
+    access_token = create_customer_token(user)
     
     print(f"Login successful for: {form_data.username}")
     
@@ -134,7 +139,7 @@ async def login_for_access_token(
 
 #region Registration endpoints
 @router.post("/register")
-async def register(
+def register(
     customer_data: CustomerAuthRegister,
     db: Session = Depends(get_db)
 ):
@@ -177,7 +182,7 @@ async def register(
     print(f"Registration completed - Customer ID: {db_customer.id}, Auth ID: {db_customer_auth.id}")
     
     # Generate token and return response
-    access_token = create_access_token(data={"sub": str(db_customer.id)})
+    access_token = create_customer_token(db_customer_auth)
     
     return {
         "access_token": access_token,
@@ -196,7 +201,7 @@ async def register(
     }
 
 @router.post("/google/register")
-async def google_register(
+def google_register(
     google_data: GoogleAuthRegister,
     db: Session = Depends(get_db)
 ):
@@ -224,7 +229,7 @@ async def google_register(
     db.commit()
     
     # Generate token and return response
-    access_token = create_access_token(data={"sub": str(db_customer.id)})
+    access_token = create_customer_token(db_customer_auth)
     
     return {
         "message": "User registered successfully",
@@ -245,7 +250,7 @@ async def google_register(
 
 # Facebook registration endpoint
 @router.post("/facebook/register")
-async def facebook_register(
+def facebook_register(
     facebook_data: FacebookAuthRegister,
     db: Session = Depends(get_db)
 ):
@@ -300,7 +305,7 @@ async def facebook_register(
     print(f"Facebook registration completed - Customer ID: {db_customer.id}, Auth ID: {db_customer_auth.id}")
     
     # Generate token and return response
-    access_token = create_access_token(data={"sub": str(db_customer.id)})
+    access_token = create_customer_token(db_customer_auth)
     
     return {
         "message": "User registered successfully with Facebook",
@@ -375,7 +380,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
             
             if existing_google_user:
                 print("✅ Found by Google ID - logging in")
-                access_token = create_access_token(data={"sub": str(existing_google_user.id_customer)})
+                access_token = create_customer_token(existing_google_user)
                 frontend_url = f"http://localhost:3000/auth/callback?token={access_token}&type=login"
                 print(f"Login redirect: {frontend_url}")
                 return RedirectResponse(url=frontend_url)
@@ -513,7 +518,7 @@ async def link_google_callback(request: Request, db: Session = Depends(get_db)):
         return RedirectResponse(url="http://localhost:3000/profile?google_linked=error")
     
 @router.delete("/unlink/google")
-async def unlink_google(
+def unlink_google(
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
@@ -585,7 +590,7 @@ async def facebook_callback(request: Request, db: Session = Depends(get_db)):
         
         if existing_facebook_user:
             # User exists, log them in
-            access_token = create_access_token(data={"sub": str(existing_facebook_user.id_customer)})
+            access_token = create_customer_token(existing_facebook_user)
             frontend_url = f"http://localhost:3000/auth/callback?token={access_token}&type=login"
             return RedirectResponse(url=frontend_url)
         
@@ -724,7 +729,7 @@ async def link_facebook_callback(request: Request, db: Session = Depends(get_db)
         return RedirectResponse(url="http://localhost:3000/profile?facebook_linked=error&reason=server_error")
 
 @router.delete("/unlink/facebook")
-async def unlink_facebook(
+def unlink_facebook(
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
@@ -777,7 +782,7 @@ def check_email_exists(email: str, db: Session = Depends(get_db)):
 
 #region Account relinking endpoint
 @router.post("/relink/confirm")
-async def confirm_relink(
+def confirm_relink(
     relink_data: dict,
     db: Session = Depends(get_db)
 ):
@@ -822,7 +827,7 @@ async def confirm_relink(
         db.commit()
         
         # Generate access token
-        access_token = create_access_token(data={"sub": str(user_id)})
+        access_token = create_customer_token(user_auth)
         
         return {
             "message": f"{provider.title()} account relinked successfully",
@@ -837,7 +842,7 @@ async def confirm_relink(
 
 #region Password management endpoints
 @router.post("/create-password")
-async def create_password(
+def create_password(
     password_data: dict,
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
@@ -875,7 +880,7 @@ async def create_password(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.put("/change-password")
-async def change_password(
+def change_password(
     password_data: dict,
     current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
@@ -907,10 +912,14 @@ async def change_password(
         # Update password
         new_password_hash = get_password_hash(new_password)
         user_auth.password_hash = new_password_hash
+        revoke_tokens(db, CUSTOMER, [user_auth.id_customer])  # faz commit da nova password
         
-        db.commit()
-        
-        return {"message": "Password changed successfully"}
+        # Os tokens anteriores foram revogados: novo token para esta sessão
+        return {
+            "message": "Password changed successfully",
+            "access_token": create_customer_token(user_auth),
+            "token_type": "bearer",
+        }
         
     except HTTPException:
         raise
@@ -944,7 +953,7 @@ def reset_password(
     hashed_password = get_password_hash(default_password)
     
     customer_auth.password_hash = hashed_password
-    db.commit()
+    revoke_tokens(db, CUSTOMER, [customer_auth.id_customer])  # faz commit da nova password
     
     return {"message": "Password reset successfully to default (check .env)"}
 #endregion
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
+from app.api.v1.pagination import PageParams, set_page_headers
 from app.crud.employee import EmployeeRepository
 from app.schemas.employee import Employee, EmployeeCreate, EmployeeUpdate
 
@@ -35,15 +36,14 @@ def create_employee(
 
 @router.get("/", response_model=List[Employee])
 def get_employees(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page_params: PageParams = Depends(),
     repo: EmployeeRepository = Depends(get_employee_repo)
 ):
     """
-    Obtém uma lista de funcionários com paginação.
+    Obtém uma lista de funcionários com paginação (cursor da página seguinte em X-Next-Cursor).
     """
-    employees = repo.get_all(skip=skip, limit=limit)
-    return employees
+    return set_page_headers(response, repo.page(**page_params.kwargs()))
 
 
 @router.get("/{employee_id}", response_model=Employee)
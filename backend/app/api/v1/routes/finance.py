@@ -1,13 +1,8 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
 from typing import Optional
-from datetime import datetime
 from app.database import get_db
-from app.models.invoice import Invoice
-from app.models.product import Product
-from app.models.appointment import Appointment
-from app.models.service import Service
+from app.crud.finance import FinanceRepository, parse_date_range
 
 router = APIRouter()
 
@@ -20,76 +15,64 @@ def get_finance_overview(
 ):
     """
     Retorna visão geral financeira:
-    - Receita total (faturas pagas)
+    - Receita total (faturas pagas no período; end_date inclui o dia inteiro)
     - Despesas (custo do inventário)
     - Lucro potencial
     - Total de faturas
     """
-    # Query base de invoices
-    invoice_query = db.query(Invoice).filter(Invoice.payment_status == "paid")
-    
-    # Aplicar filtro de data se fornecido
-    if start_date:
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        invoice_query = invoice_query.filter(Invoice.paid_at >= start_dt)
-    if end_date:
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-        invoice_query = invoice_query.filter(Invoice.paid_at <= end_dt)
-    
-    # Calcular receita total e número de faturas
-    invoices = invoice_query.all()
-    total_revenue = sum(inv.total for inv in invoices) if invoices else 0
-    total_invoices = len(invoices)
-    
-    # Calcular despesas e lucro potencial do inventário
-    products = db.query(Product).filter(Product.deleted_at.is_(None)).all()
-    total_expenses = sum(p.cost_value * p.quantity for p in products)
-    potential_revenue = sum(p.sale_value * p.quantity for p in products)
-    total_profit = potential_revenue - total_expenses
-    
-    return {
-        "total_revenue": round(total_revenue, 2),
-        "total_expenses": round(total_expenses, 2),
-        "total_profit": round(total_profit, 2),
-        "total_invoices": total_invoices
-    }
+    start, end = parse_date_range(start_date, end_date)
+    return FinanceRepository(db).overview(start, end)
 
 
 @router.get("/parts")
 def get_parts_finance(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
+    part_number: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db)
 ):
     """
-    Retorna dados financeiros por peça (inventário atual):
-    - Stock atual
-    - Custo total
-    - Valor de venda total
-    - Lucro potencial
+    Retorna dados financeiros por peça, ordenados por lucro decrescente:
+    - sem datas: inventário atual (quantity_sold = stock, custo/valor/lucro potencial)
+    - com datas: receita por part number nas faturas pagas no período (quantidade, custo, receita, lucro)
+    - part_number: só essa peça
+    """
+    start, end = parse_date_range(start_date, end_date)
+    return FinanceRepository(db).parts(start, end, skip, limit, part_number)
+
+
+@router.get("/parts/consumed")
+def get_parts_consumed(
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Peças consumidas pelas ordens de serviço no período (ledger de stock):
+    saídas menos devoluções por produto, com o custo no momento de cada saída.
+    """
+    start, end = parse_date_range(start_date, end_date)
+    return FinanceRepository(db).consumed(start, end, skip, limit)
+
+
+@router.get("/stock")
+def get_stock_at(
+    date: Optional[str] = Query(None, description="YYYY-MM-DD (fim do dia); omissão: agora"),
+    product_id: Optional[int] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Inventário numa data: quantidade e valor por produto e totais, a partir do
+    snapshot diário mais próximo e dos movimentos de stock seguintes.
     """
-    products = db.query(Product).filter(Product.deleted_at.is_(None)).all()
-    
-    parts_data = []
-    for product in products:
-        if product.quantity > 0:  # Apenas produtos em stock
-            total_cost = product.cost_value * product.quantity
-            total_revenue = product.sale_value * product.quantity
-            total_profit = total_revenue - total_cost
-            
-            parts_data.append({
-                "part_number": product.part_number,
-                "name": product.name,
-                "quantity_sold": product.quantity,  # Na verdade é stock atual
-                "total_cost": round(total_cost, 2),
-                "total_revenue": round(total_revenue, 2),
-                "total_profit": round(total_profit, 2)
-            })
-    
-    # Ordenar por lucro potencial decrescente
-    parts_data.sort(key=lambda x: x["total_profit"], reverse=True)
-    
-    return parts_data
+    _, at = parse_date_range(None, date)
+    return FinanceRepository(db).stock(at, skip, limit, product_id)
 
 
 @router.get("/services")
@@ -101,37 +84,5 @@ def get_services_finance(
     """
     Retorna receita por serviço baseado em appointments pagos.
     """
-    # Query base de appointments com invoices pagas
-    appt_query = db.query(
-        Appointment.service_id,
-        Service.name.label("service_name"),
-        func.count(Appointment.id).label("count"),
-        func.sum(Service.price).label("total_revenue")
-    ).join(Invoice, Invoice.appointment_id == Appointment.id)\
-     .join(Service, Service.id == Appointment.service_id)\
-     .filter(Invoice.payment_status == "paid")
-    
-    # Aplicar filtro de data se fornecido
-    if start_date:
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        appt_query = appt_query.filter(Invoice.paid_at >= start_dt)
-    if end_date:
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-        appt_query = appt_query.filter(Invoice.paid_at <= end_dt)
-    
-    # Agrupar por serviço
-    results = appt_query.group_by(Appointment.service_id, Service.name).all()
-    
-    services_data = []
-    for result in results:
-        services_data.append({
-            "service_id": result.service_id,
-            "service_name": result.service_name,
-            "count": result.count,
-            "total_revenue": round(float(result.total_revenue) if result.total_revenue else 0, 2)
-        })
-    
-    # Ordenar por receita decrescente
-    services_data.sort(key=lambda x: x["total_revenue"], reverse=True)
-    
-    return services_data
+    start, end = parse_date_range(start_date, end_date)
+    return FinanceRepository(db).services(start, end)
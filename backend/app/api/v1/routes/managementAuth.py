@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from typing import Optional
 from app.deps import get_db
 from app.crud import user as crud_user
 from app.models.user import User
-from app.core.security import create_access_token
+from app.models.employee import Employee
+from app.core.security import create_user_token, resolve_token
+from app.core.principal import USER, revoke_tokens
 from app.schemas.user import UserUpdate, PasswordChange
 from app.schemas.role import Role
 from app.services.notification_service import NotificationService
@@ -51,14 +53,19 @@ class MeResponse(BaseModel):
 def login(req: LoginRequest, db: Session = Depends(get_db)):
     user = crud_user.get_by_email(db, req.email)
     print(f"Tentativa de login: email={req.email}, usuário encontrado: {user is not None}")  
+    senha_valida, novo_hash = False, None
     if user:
-        senha_valida = crud_user.verify_password(req.password, user.password_hash)
+        senha_valida, novo_hash = crud_user.verify_and_update_password(req.password, user.password_hash)
         print(f"Verificação de senha para {req.email}: {senha_valida}")
-    if not user or not crud_user.verify_password(req.password, user.password_hash):
+    if not senha_valida:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if novo_hash:
+        # Hash com outro esquema/custo: guardado de novo com o configurado
+        user.password_hash = novo_hash
+        db.commit()
     
     # Always issue access token (no 2FA)
-    access_token = create_access_token({"sub": str(user.id), "role": user.role})
+    access_token = create_user_token(db, user)
     
     # Check for low stock and notify if user is Admin or Manager
     if user.role in ["Admin", "Manager"]:
@@ -74,17 +81,27 @@ def login(req: LoginRequest, db: Session = Depends(get_db)):
 
 # 2FA endpoint removed in simplified flow
 
+def _principal_from_header(authorization: str | None, db: Session):
+    """Principal do token Bearer (cache por hash do token, sem nova descodificação)."""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Missing bearer token")
+    principal = resolve_token(db, authorization.split(" ", 1)[1])
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return principal
+
 @router.get("/me", response_model=MeResponse)
 def me(authorization: str | None = Header(default=None), db: Session = Depends(get_db)):
     """Return current user info using Bearer token from Authorization header."""
-    from app.core.security import decode_token
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1]
+    principal = _principal_from_header(authorization, db)
     try:
-        payload = decode_token(token)
-        user_id = int(payload.get("sub"))
-        user: User | None = crud_user.get_user(db, user_id)
+        # Perfil atual numa só consulta (utilizador + funcionário + cargo)
+        user: User | None = (
+            db.query(User)
+            .options(joinedload(User.employee).joinedload(Employee.role))
+            .filter(User.id == principal.id)
+            .first()
+        )
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -122,13 +139,9 @@ def update_profile(
     db: Session = Depends(get_db)
 ):
     """Update current user profile information."""
-    from app.core.security import decode_token
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1]
+    principal = _principal_from_header(authorization, db)
     try:
-        payload = decode_token(token)
-        user_id = int(payload.get("sub"))
+        user_id = principal.id
         
         # Check if email is being changed and if it's already in use
         if user_update.email:
@@ -158,13 +171,9 @@ def change_password(
     db: Session = Depends(get_db)
 ):
     """Change current user password."""
-    from app.core.security import decode_token
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1]
+    principal = _principal_from_header(authorization, db)
     try:
-        payload = decode_token(token)
-        user_id = int(payload.get("sub"))
+        user_id = principal.id
         
         success = crud_user.change_password(
             db,
@@ -176,7 +185,12 @@ def change_password(
         if not success:
             raise HTTPException(status_code=400, detail="Current password is incorrect")
         
-        return {"message": "Password changed successfully"}
+        # Os tokens anteriores foram revogados: novo token para esta sessão
+        return {
+            "message": "Password changed successfully",
+            "access_token": create_user_token(db, crud_user.get_user(db, user_id)),
+            "token_type": "bearer",
+        }
     except HTTPException:
         raise
     except Exception:
@@ -192,13 +206,9 @@ def first_password_change(
     db: Session = Depends(get_db)
 ):
     """Change password for first-time login (doesn't require current password)."""
-    from app.core.security import decode_token
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing bearer token")
-    token = authorization.split(" ", 1)[1]
+    principal = _principal_from_header(authorization, db)
     try:
-        payload = decode_token(token)
-        user_id = int(payload.get("sub"))
+        user_id = principal.id
         
         user: User | None = crud_user.get_user(db, user_id)
         if not user:
@@ -213,13 +223,17 @@ def first_password_change(
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
         
         # Update password
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        user.password_hash = pwd_context.hash(password_data.new_password)
+        from app.core.security import get_password_hash
+        user.password_hash = get_password_hash(password_data.new_password)
         user.requires_password_change = False
-        db.commit()
+        revoke_tokens(db, USER, [user.id])  # faz commit da nova password
         
-        return {"message": "Password changed successfully"}
+        # Os tokens anteriores foram revogados: novo token para esta sessão
+        return {
+            "message": "Password changed successfully",
+            "access_token": create_user_token(db, user),
+            "token_type": "bearer",
+        }
     except HTTPException:
         raise
     except Exception:
@@ -1,16 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_, case
+from sqlalchemy import func, extract, and_, case, false
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-from app.database import get_db
+from datetime import date, datetime, timedelta
+from app.database import get_read_db, ReadSession
 from app.models.appointment import Appointment
 from app.models.status import Status
 from app.models.service import Service
 from app.models.user import User
 from app.models.employee import Employee
 from app.models.role import Role
-from app.core.security import get_current_user_optional
+from app.models.metrics_rollup import MetricsDailyRollup
+from app.core.security import get_read_user_optional
+from app.services.metrics_service import MetricsService, STATUS_COMPLETED
+from app.services.role_scope import resolve_role_scope
+from app.services.status_registry import status_registry
 
 router = APIRouter()
 
@@ -21,58 +25,25 @@ def filter_by_user_role(query, user: Optional[User], db: Session):
     Admin vê tudo, outros roles veem apenas appointments do seu serviço/área.
     Se user for None, retorna todos os dados (para testes).
     """
-    if not user:
-        # Se não tiver user, retorna tudo
-        return query
-    
-    # Verificar role do sistema
-    system_role = user.role.lower()
-    is_system_admin = system_role in ["admin", "manager"]
-    
-    # Busca o employee através do email do usuário
-    employee = db.query(Employee).filter(Employee.email == user.email).first()
-    
-    # Verificar se é admin por qualquer critério
-    is_admin = is_system_admin
-    if employee:
-        # Verificar flag is_manager
-        if employee.is_manager:
-            is_admin = True
-        # Verificar role/cargo do employee
-        if employee.role:
-            role_name = employee.role.name.lower()
-            if any(keyword in role_name for keyword in ["admin", "gestor", "gerente"]):
-                is_admin = True
-    
-    # Se é admin por qualquer critério, retorna tudo
-    if is_admin:
-        return query
-    
-    # Se não encontrar employee ou role, retorna tudo (usuário admin sem employee)
-    if not employee or not employee.role:
-        return query
-    
-    role_name = employee.role.name.lower()
-    
-    # Filtra por área do serviço
-    # Mecânico vê apenas serviços de mecânica, Elétrico vê apenas elétrico, etc.
-    if "mecanico" in role_name or "mecânico" in role_name:
-        query = query.join(Service).filter(Service.area.ilike("%Mecânica%"))
-    elif "eletric" in role_name or "elétric" in role_name:
-        query = query.join(Service).filter(Service.area.ilike("%Elétrica%"))
-    elif "chaparia" in role_name:
-        query = query.join(Service).filter(Service.area.ilike("%chaparia%"))
-    elif "pintura" in role_name:
-        query = query.join(Service).filter(Service.area.ilike("%pintura%"))
-    
-    return query
+    return resolve_role_scope(db, user).apply(query, Appointment.service_id)
+
+
+def filter_rollup(query, db: Session, user: Optional[User], start: Optional[date] = None, end: Optional[date] = None):
+    """
+    Aplica ao rollup diário o intervalo de dias (inclusivo) e o filtro de serviços da role.
+    """
+    if start:
+        query = query.filter(MetricsDailyRollup.day >= start)
+    if end:
+        query = query.filter(MetricsDailyRollup.day <= end)
+    return resolve_role_scope(db, user).apply(query, MetricsDailyRollup.service_id)
 
 
 @router.get("/daily")
-def get_daily_metrics(
+async def get_daily_metrics(
     date: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
+    current_user: Optional[User] = Depends(get_read_user_optional),
+    reads: ReadSession = Depends(get_read_db)
 ):
     """
     Retorna métricas do dia atual ou de uma data específica.
@@ -82,6 +53,10 @@ def get_daily_metrics(
     - Agendamentos pendentes
     - Tempo médio de atendimento
     """
+    return await reads.run(_daily_metrics, date, current_user)
+
+
+def _daily_metrics(db: Session, date: Optional[str], current_user: Optional[User]):
     if date:
         target_date = datetime.strptime(date, "%Y-%m-%d")
     else:
@@ -90,57 +65,25 @@ def get_daily_metrics(
     start_of_day = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
     end_of_day = target_date.replace(hour=23, minute=59, second=59, microsecond=999999)
     
-    # Query base filtrada por role
-    base_query = db.query(Appointment).filter(
-        Appointment.appointment_date >= start_of_day,
-        Appointment.appointment_date <= end_of_day
-    )
-    base_query = filter_by_user_role(base_query, current_user, db)
-    
-    total_appointments = base_query.count()
-    
-    # Buscar status
-    status_completed = db.query(Status).filter(Status.name.ilike("%concluído%")).first()
-    status_in_progress = db.query(Status).filter(Status.name.ilike("%em andamento%")).first()
-    status_pending = db.query(Status).filter(Status.name.ilike("%pendente%")).first()
-    
-    completed = base_query.filter(
-        Appointment.status_id == status_completed.id
-    ).count() if status_completed else 0
-    
-    in_progress = base_query.filter(
-        Appointment.status_id == status_in_progress.id
-    ).count() if status_in_progress else 0
-    
-    pending = base_query.filter(
-        Appointment.status_id == status_pending.id
-    ).count() if status_pending else 0
-    
-    # Tempo médio (usando duration_minutes do serviço)
-    avg_duration = db.query(
-        func.avg(Service.duration_minutes)
-    ).join(Appointment).filter(
-        Appointment.appointment_date >= start_of_day,
-        Appointment.appointment_date <= end_of_day,
-        Appointment.status_id == status_completed.id if status_completed else True
-    ).scalar() or 0
+    # Uma única agregação condicional (filtrada por role) para todos os contadores
+    metrics = MetricsService(db).single_window(start_of_day, end_of_day, user=current_user)
     
     return {
         "date": target_date.strftime("%Y-%m-%d"),
-        "total_appointments": total_appointments,
-        "completed": completed,
-        "in_progress": in_progress,
-        "pending": pending,
-        "average_duration_minutes": round(avg_duration, 2)
+        "total_appointments": metrics["total"],
+        "completed": metrics["completed"],
+        "in_progress": metrics["in_progress"],
+        "pending": metrics["pending"],
+        "average_duration_minutes": round(metrics["average_duration_minutes"], 2)
     }
 
 
 @router.get("/monthly")
-def get_monthly_metrics(
+async def get_monthly_metrics(
     year: Optional[int] = None,
     month: Optional[int] = None,
-    current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_read_user_optional),
+    reads: ReadSession = Depends(get_read_db)
 ):
     """
     Retorna métricas mensais:
@@ -148,6 +91,10 @@ def get_monthly_metrics(
     - Mês anterior
     - Comparativo
     """
+    return await reads.run(_monthly_metrics, year, month, current_user)
+
+
+def _monthly_metrics(db: Session, year: Optional[int], month: Optional[int], current_user: Optional[User]):
     if year is None or month is None:
         now = datetime.now()
         year = now.year
@@ -168,33 +115,19 @@ def get_monthly_metrics(
         previous_month_start = datetime(year, month - 1, 1)
         previous_month_end = datetime(year, month, 1) - timedelta(seconds=1)
     
-    # Query mês atual
-    current_query = db.query(Appointment).filter(
-        Appointment.appointment_date >= current_month_start,
-        Appointment.appointment_date <= current_month_end
-    )
-    current_query = filter_by_user_role(current_query, current_user, db)
-    
-    # Query mês anterior
-    previous_query = db.query(Appointment).filter(
-        Appointment.appointment_date >= previous_month_start,
-        Appointment.appointment_date <= previous_month_end
+    # Mês atual e anterior numa única agregação (uma janela por mês)
+    metrics = MetricsService(db).window_metrics(
+        {
+            "current": (current_month_start, current_month_end),
+            "previous": (previous_month_start, previous_month_end),
+        },
+        user=current_user
     )
-    previous_query = filter_by_user_role(previous_query, current_user, db)
     
-    current_total = current_query.count()
-    previous_total = previous_query.count()
-    
-    # Status
-    status_completed = db.query(Status).filter(Status.name.ilike("%concluído%")).first()
-    
-    current_completed = current_query.filter(
-        Appointment.status_id == status_completed.id
-    ).count() if status_completed else 0
-    
-    previous_completed = previous_query.filter(
-        Appointment.status_id == status_completed.id
-    ).count() if status_completed else 0
+    current_total = metrics["current"]["total"]
+    previous_total = metrics["previous"]["total"]
+    current_completed = metrics["current"]["completed"]
+    previous_completed = metrics["previous"]["completed"]
     
     # Cálculo de variação percentual
     total_variation = ((current_total - previous_total) / previous_total * 100) if previous_total > 0 else 0
@@ -223,55 +156,38 @@ def get_monthly_metrics(
 
 
 @router.get("/yearly")
-def get_yearly_metrics(
+async def get_yearly_metrics(
     year: Optional[int] = None,
-    current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_read_user_optional),
+    reads: ReadSession = Depends(get_read_db)
 ):
     """
     Retorna métricas anuais agrupadas por mês.
+    Lê do rollup diário (no máximo 365 x serviços x status linhas por ano).
     """
+    return await reads.run(_yearly_metrics, year, current_user)
+
+
+def _yearly_metrics(db: Session, year: Optional[int], current_user: Optional[User]):
     if year is None:
         year = datetime.now().year
     
-    # Primeiro, pegar o ID do status "Concluído"
-    completed_status = db.query(Status).filter(
-        Status.name.ilike("%concluído%")
-    ).first()
-    completed_status_id = completed_status.id if completed_status else None
-    
     # Definir a expressão do mês
-    month_expr = extract('month', Appointment.appointment_date)
+    month_expr = extract('month', MetricsDailyRollup.day)
+    completed_id = status_registry.get_id(db, STATUS_COMPLETED)
+    is_completed = MetricsDailyRollup.status_id == completed_id if completed_id is not None else false()
     
-    # Query base para o ano
     base_query = db.query(
         month_expr.label('month'),
-        func.count(Appointment.id).label('total'),
+        func.sum(MetricsDailyRollup.appointment_count).label('total'),
         func.sum(
             case(
-                (Appointment.status_id == completed_status_id, 1),
+                (is_completed, MetricsDailyRollup.appointment_count),
                 else_=0
             )
         ).label('completed')
-    ).filter(
-        extract('year', Appointment.appointment_date) == year
     )
-    
-    # Filtrar por role
-    if current_user:
-        employee = db.query(Employee).filter(Employee.email == current_user.email).first()
-        if employee and employee.role:
-            role_name = employee.role.name.lower()
-            if "admin" not in role_name:
-                base_query = base_query.join(Service)
-                if "mecanico" in role_name or "mecânico" in role_name:
-                    base_query = base_query.filter(Service.area.ilike("%mecânica%"))
-                elif "eletric" in role_name or "elétric" in role_name:
-                    base_query = base_query.filter(Service.area.ilike("%elétrica%"))
-                elif "chaparia" in role_name:
-                    base_query = base_query.filter(Service.area.ilike("%chaparia%"))
-                elif "pintura" in role_name:
-                    base_query = base_query.filter(Service.area.ilike("%pintura%"))
+    base_query = filter_rollup(base_query, db, current_user, date(year, 1, 1), date(year, 12, 31))
     
     results = base_query.group_by(month_expr).order_by(month_expr).all()
     
@@ -282,8 +198,8 @@ def get_yearly_metrics(
         monthly_data.append({
             "month": month_num,
             "month_name": datetime(year, month_num, 1).strftime("%B"),
-            "total_appointments": month_data.total if month_data else 0,
-            "completed": month_data.completed if month_data else 0
+            "total_appointments": int(month_data.total or 0) if month_data else 0,
+            "completed": int(month_data.completed or 0) if month_data else 0
         })
     
     total_year = sum(m["total_appointments"] for m in monthly_data)
@@ -301,94 +217,76 @@ def get_yearly_metrics(
 
 
 @router.get("/by-service")
-def get_metrics_by_service(
+async def get_metrics_by_service(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_read_user_optional),
+    reads: ReadSession = Depends(get_read_db)
 ):
     """
     Retorna métricas agrupadas por serviço.
     """
+    return await reads.run(_metrics_by_service, start_date, end_date, current_user)
+
+
+def _metrics_by_service(db: Session, start_date: Optional[str], end_date: Optional[str], current_user: Optional[User]):
+    total = func.sum(MetricsDailyRollup.appointment_count)
     query = db.query(
         Service.id,
         Service.name,
         Service.area,
-        func.count(Appointment.id).label('total_appointments'),
-        func.avg(Service.duration_minutes).label('avg_duration')
-    ).join(Appointment).join(Status)
-    
-    # Filtro por data
-    if start_date:
-        query = query.filter(Appointment.appointment_date >= datetime.strptime(start_date, "%Y-%m-%d"))
-    if end_date:
-        query = query.filter(Appointment.appointment_date <= datetime.strptime(end_date, "%Y-%m-%d"))
-    
-    # Filtrar por role
-    if current_user:
-        employee = db.query(Employee).filter(Employee.email == current_user.email).first()
-        if employee and employee.role:
-            role_name = employee.role.name.lower()
-            if "admin" not in role_name:
-                if "mecanico" in role_name or "mecânico" in role_name:
-                    query = query.filter(Service.area.ilike("%mecânica%"))
-                elif "eletric" in role_name or "elétric" in role_name:
-                    query = query.filter(Service.area.ilike("%elétrica%"))
-                elif "chaparia" in role_name:
-                    query = query.filter(Service.area.ilike("%chaparia%"))
-                elif "pintura" in role_name:
-                    query = query.filter(Service.area.ilike("%pintura%"))
+        total.label('total_appointments'),
+        Service.duration_minutes.label('avg_duration')
+    ).join(
+        MetricsDailyRollup, MetricsDailyRollup.service_id == Service.id
+    ).join(
+        Status, MetricsDailyRollup.status_id == Status.id
+    )
+    query = filter_rollup(
+        query, db, current_user,
+        datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None,
+        datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    )
     
-    results = query.group_by(Service.id, Service.name, Service.area).all()
+    results = query.group_by(
+        Service.id, Service.name, Service.area, Service.duration_minutes
+    ).having(total > 0).all()
     
     return [{
         "service_id": r.id,
         "service_name": r.name,
         "service_area": r.area,
-        "total_appointments": r.total_appointments,
+        "total_appointments": int(r.total_appointments),
         "average_duration_minutes": round(r.avg_duration, 2) if r.avg_duration else 0
     } for r in results]
 
 
 @router.get("/by-status")
-def get_metrics_by_status(
+async def get_metrics_by_status(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_read_user_optional),
+    reads: ReadSession = Depends(get_read_db)
 ):
     """
     Retorna métricas agrupadas por status.
     """
+    return await reads.run(_metrics_by_status, start_date, end_date, current_user)
+
+
+def _metrics_by_status(db: Session, start_date: Optional[str], end_date: Optional[str], current_user: Optional[User]):
+    total = func.sum(MetricsDailyRollup.appointment_count)
     query = db.query(
-        Status.id,
-        Status.name,
-        func.count(Appointment.id).label('total')
-    ).join(Appointment)
-    
-    # Filtro por data
-    if start_date:
-        query = query.filter(Appointment.appointment_date >= datetime.strptime(start_date, "%Y-%m-%d"))
-    if end_date:
-        query = query.filter(Appointment.appointment_date <= datetime.strptime(end_date, "%Y-%m-%d"))
-    
-    # Filtrar por role do usuário
-    if current_user:
-        employee = db.query(Employee).filter(Employee.email == current_user.email).first()
-        if employee and employee.role:
-            role_name = employee.role.name.lower()
-            if "admin" not in role_name:
-                query = query.join(Service)
-                if "mecanico" in role_name or "mecânico" in role_name:
-                    query = query.filter(Service.area.ilike("%mecânica%"))
-                elif "eletric" in role_name or "elétric" in role_name:
-                    query = query.filter(Service.area.ilike("%elétrica%"))
-                elif "chaparia" in role_name:
-                    query = query.filter(Service.area.ilike("%chaparia%"))
-                elif "pintura" in role_name:
-                    query = query.filter(Service.area.ilike("%pintura%"))
+        MetricsDailyRollup.status_id.label('id'),
+        total.label('total')
+    ).filter(MetricsDailyRollup.status_id.isnot(None))
+    query = filter_rollup(
+        query, db, current_user,
+        datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None,
+        datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    )
     
-    results = query.group_by(Status.id, Status.name).all()
+    results = query.group_by(MetricsDailyRollup.status_id).having(total > 0).order_by(MetricsDailyRollup.status_id).all()
     
     total_all = sum(r.total for r in results)
     
@@ -398,42 +296,36 @@ def get_metrics_by_status(
     
     return [{
         "status_id": r.id,
-        "status_name": r.name,
-        "total": r.total,
+        "status_name": status_registry.name_of(db, r.id),
+        "total": int(r.total),
         "percentage": round((r.total / total_all * 100), 2) if total_all > 0 else 0
     } for r in results]
 
 
 @router.get("/summary")
-def get_summary_metrics(
-    current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+async def get_summary_metrics(
+    current_user: Optional[User] = Depends(get_read_user_optional),
+    reads: ReadSession = Depends(get_read_db)
 ):
     """
     Retorna um resumo geral de todas as métricas principais.
     """
-    # Total de appointments
-    base_query = db.query(Appointment)
-    base_query = filter_by_user_role(base_query, current_user, db)
-    total_appointments = base_query.count()
-    
-    # Status
-    status_completed = db.query(Status).filter(Status.name.ilike("%concluído%")).first()
-    status_pending = db.query(Status).filter(Status.name.ilike("%pendente%")).first()
-    
-    completed = base_query.filter(
-        Appointment.status_id == status_completed.id
-    ).count() if status_completed else 0
-    
-    pending = base_query.filter(
-        Appointment.status_id == status_pending.id
-    ).count() if status_pending else 0
+    return await reads.run(_summary_metrics, current_user)
+
+
+def _summary_metrics(db: Session, current_user: Optional[User]):
+    # Totais globais a partir do rollup diário (agregação condicional)
+    metrics = MetricsService(db).all_time(user=current_user)
+    total_appointments = metrics["total"]
+    completed = metrics["completed"]
+    pending = metrics["pending"]
     
     # Serviços mais solicitados
+    count = func.sum(MetricsDailyRollup.appointment_count)
     top_services = db.query(
         Service.name,
-        func.count(Appointment.id).label('count')
-    ).join(Appointment).group_by(Service.name).order_by(func.count(Appointment.id).desc()).limit(5).all()
+        count.label('count')
+    ).join(MetricsDailyRollup, MetricsDailyRollup.service_id == Service.id).group_by(Service.name).order_by(count.desc()).limit(5).all()
     
     return {
         "total_appointments": total_appointments,
@@ -446,20 +338,26 @@ def get_summary_metrics(
 
 
 @router.get("/available-years")
-def get_available_years(
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
+async def get_available_years(
+    current_user: Optional[User] = Depends(get_read_user_optional),
+    reads: ReadSession = Depends(get_read_db)
 ):
     """
     Retorna a lista de anos que têm dados de agendamentos disponíveis.
     """
+    return await reads.run(_available_years, current_user)
+
+
+def _available_years(db: Session, current_user: Optional[User]):
+    year_expr = extract('year', MetricsDailyRollup.day)
+    
     # Query base filtrada por role
     base_query = db.query(
-        func.distinct(extract('year', Appointment.appointment_date)).label('year')
-    )
-    base_query = filter_by_user_role(base_query, current_user, db)
+        func.distinct(year_expr).label('year')
+    ).filter(MetricsDailyRollup.appointment_count > 0)
+    base_query = filter_rollup(base_query, db, current_user)
     
-    years = base_query.order_by(func.extract('year', Appointment.appointment_date).desc()).all()
+    years = base_query.order_by(year_expr.desc()).all()
     
     # Converter para lista de inteiros
     available_years = [int(year[0]) for year in years if year[0] is not None]
@@ -1,10 +1,12 @@
 import stripe
 import json
-from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, BackgroundTasks
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.core.config import settings
-from app.database import get_db
+from app.database import get_db, get_read_db, ReadSession
 from app.models.appointment import Appointment
 from app.models.customerAuth import CustomerAuth
 from app.models.customer import Customer
@@ -12,6 +14,17 @@ from app.models.vehicle import Vehicle
 from app.models.invoice import Invoice
 from app.models.status import Status
 from app.services.notification_service import NotificationService
+from app.services.status_registry import status_registry
+from app.services.invoice_service import create_invoice_from_session
+from app.services.stripe_webhook_service import (
+    StripeWebhookService,
+    process_stripe_event,
+    process_pending_stripe_events,
+)
+from app.crud.stripe_webhook_event import StripeWebhookEventRepository
+from app.crud.metrics_rollup import MetricsRollupRepository
+from app.core.security import get_current_user
+from app.models.user import User
 import json
 from datetime import datetime
 
@@ -24,7 +37,7 @@ class CheckoutRequest(BaseModel):
     appointment_id: int
 
 @router.get("/appointment/{appointment_id}/preview")
-async def preview_appointment_checkout(appointment_id: int, db: Session = Depends(get_db)):
+def preview_appointment_checkout(appointment_id: int, db: Session = Depends(get_db)):
     """Preview what services will be charged for an appointment"""
     from app.crud.appointment import AppointmentRepository
     
@@ -84,7 +97,7 @@ async def preview_appointment_checkout(appointment_id: int, db: Session = Depend
     }
 
 @router.post("/create-checkout-session")
-async def create_checkout_session(request: CheckoutRequest, db: Session = Depends(get_db)):
+def create_checkout_session(request: CheckoutRequest, db: Session = Depends(get_db)):
     try:
         from app.crud.appointment import AppointmentRepository
         
@@ -179,11 +192,15 @@ async def create_checkout_session(request: CheckoutRequest, db: Session = Depend
 # ==================== WEBHOOK ====================
 
 @router.post("/webhook")
-async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+async def stripe_webhook(request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """
     Handle Stripe webhook events.
     This endpoint is called by Stripe when payment events occur.
     CRITICAL: This ensures payments are confirmed even if user closes browser!
+    
+    O evento é apenas guardado (idempotente pelo id do evento Stripe) e
+    confirmado de imediato; a fatura é criada em background pelo
+    StripeWebhookService (com novas tentativas e replay em caso de falha).
     """
     payload = await request.body()
     sig_header = request.headers.get('stripe-signature')
@@ -195,282 +212,97 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
         # )
         
         # For development without signature verification:
-        event = json.loads(payload)
-        
-        print(f"🔔 Webhook received: {event['type']}")
-        
-        # Handle checkout.session.completed event
-        if event['type'] == 'checkout.session.completed':
-            session = event['data']['object']
-            print(f"✅ Payment successful for session: {session['id']}")
-            
-            # Get appointment ID from metadata
-            appointment_id = session['metadata'].get('appointment_id')
-            if not appointment_id:
-                print("❌ No appointment_id in session metadata")
-                return {"status": "error", "message": "No appointment_id"}
-            
-            print(f"📋 Creating invoice for appointment {appointment_id}")
-            
-            # Get appointment
-            appointment = db.query(Appointment).filter(
-                Appointment.id == int(appointment_id)
-            ).first()
-            
-            if not appointment:
-                print(f"❌ Appointment {appointment_id} not found")
-                return {"status": "error", "message": "Appointment not found"}
-            
-            # Check if invoice already exists
-            existing_invoice = db.query(Invoice).filter(
-                Invoice.appointment_id == appointment.id
-            ).first()
-            
-            if existing_invoice:
-                print(f"⚠️ Invoice already exists for appointment {appointment_id}")
-                return {"status": "success", "message": "Invoice already exists"}
-            
-            try:
-                # Create invoice
-                invoice = create_invoice_from_session(db, appointment, session)
-                
-                # Update appointment status to Concluido (ID=3)
-                appointment.status_id = 3
-                print(f"✅ Status updated to Concluido (id=3)")
-                
-                db.commit()
-                print(f"✅ Invoice created successfully: {invoice.invoice_number}")
-                print(f"✅ Payment confirmed for appointment {appointment_id}")
-                
-                # # Enviar email de confirmação simples
-                # try:
-                #     from app.email_service.email_service import EmailService
-                #     from app.models.vehicle import Vehicle
-                    
-                #     customer = db.query(Customer).filter(Customer.id == appointment.customer_id).first()
-                #     vehicle = db.query(Vehicle).filter(Vehicle.id == appointment.vehicle_id).first()
-                #     amount = session.get('amount_total', 0) / 100  # Stripe usa centavos
-                    
-                #     if customer and vehicle and customer.auth and customer.auth.email:
-                #         # Obter nome do serviço para incluir no email
-                #         service_name = appointment.service.name if appointment.service else None
-                        
-                #         print(f"📧 Preparando email de pagamento para {customer.auth.email}")
-                        
-                #         # Enviar email simples de confirmação
-                #         email_service = EmailService()
-                #         email_sent = email_service.send_payment_confirmation_email(
-                #             customer_email=customer.auth.email,
-                #             customer_name=customer.name,
-                #             invoice_number=invoice.invoice_number,
-                #             amount=amount,
-                #             vehicle_plate=vehicle.plate,
-                #             service_name=service_name
-                #         )
-                        
-                #         if email_sent:
-                #             print(f"✅ Email de confirmação enviado para {customer.auth.email}")
-                #         else:
-                #             print(f"⚠️ Falha ao enviar email para {customer.auth.email}")
-                        
-                #         # Enviar notificação interna
-                #         NotificationService.notify_payment_received(
-                #             db=db,
-                #             appointment_id=appointment.id,
-                #             amount=amount,
-                #             customer_name=customer.name
-                #         )
-                #         print(f"✅ Notification sent to customer {customer.name}")
-                #     else:
-                #         if not customer:
-                #             print(f"❌ Cliente não encontrado para appointment {appointment.id}")
-                #         elif not vehicle:
-                #             print(f"❌ Veículo não encontrado para appointment {appointment.id}")
-                #         elif not customer.auth:
-                #             print(f"❌ CustomerAuth não encontrado para cliente {customer.id}")
-                #         elif not customer.auth.email:
-                #             print(f"❌ Email não encontrado no CustomerAuth para cliente {customer.id}")
-                        
-                # except Exception as e:
-                #     print(f"⚠️ Erro ao enviar confirmação de pagamento: {e}")
-                #     import traceback
-                #     traceback.print_exc()
-                
-                return {
-                    "status": "success",
-                    "invoice_number": invoice.invoice_number,
-                    "appointment_id": appointment.id
-                }
-                
-            except Exception as e:
-                db.rollback()
-                print(f"❌ Error creating invoice: {str(e)}")
-                raise
+        # Escrita síncrona na BD fora do event loop
+        db_event, created = await run_in_threadpool(StripeWebhookService(db).ingest, payload)
         
-        return {"status": "success"}
-        
-    except json.JSONDecodeError as e:
-        print(f"❌ Invalid JSON payload: {str(e)}")
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"❌ Invalid webhook payload: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Invalid payload: {str(e)}")
-    except Exception as e:
-        print(f"❌ Webhook error: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not created:
+        # Reenvio do Stripe: já guardado (e processado ou em processamento)
+        print(f"🔁 Webhook duplicated: {db_event.event_id} ({db_event.status})")
+        return {"status": "success", "event_id": db_event.event_id, "duplicate": True}
+    
+    print(f"🔔 Webhook received: {db_event.event_type} ({db_event.event_id})")
+    background_tasks.add_task(process_stripe_event, db_event.event_id)
+    return {"status": "success", "event_id": db_event.event_id, "duplicate": False}
 
 
-def create_invoice_from_session(db: Session, appointment: Appointment, session):
+def _require_admin(current_user: User):
+    if not current_user or (current_user.role or "").lower() not in ["admin", "manager"]:
+        raise HTTPException(status_code=403, detail="Only admins can manage webhook events")
+
+
+@router.get("/webhook/events")
+def list_webhook_events(
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
-    Create an invoice from a successful Stripe checkout session.
-    Stores a snapshot of the payment at the time it was made.
-    Agora com discriminação de mão de obra e peças.
+    Lista os eventos do webhook guardados (ex.: ?status=failed).
     """
-    from app.crud.appointment import AppointmentRepository
-    
-    print(f"📝 Starting invoice creation for appointment {appointment.id}")
-    
-    # Verificar se já existe invoice para este appointment (proteção contra duplicação)
-    existing_invoice = db.query(Invoice).filter(
-        Invoice.appointment_id == appointment.id
-    ).first()
-    
-    if existing_invoice:
-        print(f"⚠️ Invoice já existe para appointment {appointment.id}: {existing_invoice.invoice_number}")
-        return existing_invoice
-    
-    # Usar o novo sistema de cálculo discriminado
-    repo = AppointmentRepository(db)
-    breakdown = repo.calculate_order_total(appointment.id)
-    
-    if not breakdown:
-        raise Exception("Could not calculate order breakdown")
-    
-    print(f"💰 Breakdown calculated: {breakdown['total']} EUR")
-    
-    line_items_data = []
-    subtotal = 0
-    
-    # Serviço base - Mão de obra
-    base_service = breakdown['base_service']
-    if base_service['labor_cost'] > 0:
-        line_items_data.append({
-            "name": f"{base_service['name']} - Mão de Obra",
-            "description": "Custo de mão de obra",
-            "quantity": 1,
-            "unit_price": float(base_service['labor_cost']),
-            "total": float(base_service['labor_cost'])
-        })
-        subtotal += base_service['labor_cost']
-    
-    # Serviço base - Peças
-    for part in base_service['parts']:
-        line_items_data.append({
-            "name": f"{part['name']} ({part['part_number'] or 'N/A'})",
-            "description": f"Peça - {base_service['name']}",
-            "quantity": part['quantity'],
-            "unit_price": float(part['unit_price']),
-            "total": float(part['total'])
-        })
-        subtotal += part['total']
-    
-    # Serviços extras
-    for extra in breakdown['extra_services']:
-        # Mão de obra do extra
-        if extra['labor_cost'] > 0:
-            line_items_data.append({
-                "name": f"{extra['name']} - Mão de Obra",
-                "description": "Custo de mão de obra (extra)",
-                "quantity": 1,
-                "unit_price": float(extra['labor_cost']),
-                "total": float(extra['labor_cost'])
-            })
-            subtotal += extra['labor_cost']
-        
-        # Peças do extra
-        for part in extra['parts']:
-            line_items_data.append({
-                "name": f"{part['name']} ({part['part_number'] or 'N/A'})",
-                "description": f"Peça - {extra['name']}",
-                "quantity": part['quantity'],
-                "unit_price": float(part['unit_price']),
-                "total": float(part['total'])
-            })
-            subtotal += part['total']
-    
-    # Generate unique invoice number
-    last_invoice = db.query(Invoice).order_by(Invoice.id.desc()).first()
-    next_number = (last_invoice.id + 1) if last_invoice else 1
-    invoice_number = f"INV-{next_number:06d}"
-    
-    print(f"🔢 Generated invoice number: {invoice_number}")
-    
-    # Get customer email from CustomerAuth
-    customer_email = None
-    customer_phone = None
-    customer_name = None
-    
-    if appointment.customer:
-        customer_name = appointment.customer.name
-        customer_phone = appointment.customer.phone
-        
-        customer_auth = db.query(CustomerAuth).filter(
-            CustomerAuth.id_customer == appointment.customer.id
-        ).first()
-        if customer_auth:
-            customer_email = customer_auth.email
-    
-    # Fallback to Stripe session data if customer not found
-    if not customer_name and 'customer_details' in session:
-        customer_name = session['customer_details'].get('name')
-    if not customer_email and 'customer_details' in session:
-        customer_email = session['customer_details'].get('email')
-    if not customer_phone and 'customer_details' in session:
-        customer_phone = session['customer_details'].get('phone')
-    
-    print(f"👤 Customer: {customer_name} ({customer_email})")
-    
-    # Create invoice
-    invoice = Invoice(
-        appointment_id=appointment.id,
-        stripe_session_id=session['id'],
-        stripe_payment_intent_id=session.get('payment_intent'),
-        invoice_number=invoice_number,
-        subtotal=float(subtotal),
-        tax=0.0,
-        total=float(subtotal),
-        currency="EUR",
-        payment_status="paid",
-        customer_name=customer_name,
-        customer_email=customer_email,
-        customer_phone=customer_phone,
-        line_items=json.dumps(line_items_data),
-        paid_at=datetime.utcnow()
-    )
-    
-    try:
-        db.add(invoice)
-        db.flush()  # Get the ID without committing
-        print(f"✅ Invoice object created with ID: {invoice.id}")
-        return invoice
-        
-    except Exception as e:
-        # Se houver erro de chave duplicada (race condition), buscar a invoice existente
-        if "UNIQUE KEY constraint" in str(e) or "Violation of UNIQUE KEY" in str(e):
-            db.rollback()
-            print(f"⚠️ Duplicate key detected, fetching existing invoice...")
-            existing_invoice = db.query(Invoice).filter(
-                Invoice.appointment_id == appointment.id
-            ).first()
-            if existing_invoice:
-                print(f"✅ Returning existing invoice: {existing_invoice.invoice_number}")
-                return existing_invoice
-        # Se for outro erro, propagar
-        raise
+    _require_admin(current_user)
+    events = StripeWebhookEventRepository(db).list(status=status, skip=skip, limit=limit)
+    return [{
+        "event_id": e.event_id,
+        "event_type": e.event_type,
+        "status": e.status,
+        "attempts": e.attempts,
+        "last_error": e.last_error,
+        "result": e.result,
+        "received_at": e.received_at.isoformat() if e.received_at else None,
+        "processed_at": e.processed_at.isoformat() if e.processed_at else None
+    } for e in events]
+
+
+@router.post("/webhook/events/replay")
+def replay_failed_webhook_events(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Volta a pôr na fila todos os eventos em estado 'failed'.
+    """
+    _require_admin(current_user)
+    requeued = StripeWebhookService(db).replay()
+    background_tasks.add_task(process_pending_stripe_events)
+    return {"status": "success", "requeued": requeued}
+
+
+@router.post("/webhook/events/{event_id}/replay")
+def replay_webhook_event(
+    event_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Reprocessa um evento específico (idempotente: uma fatura existente não é duplicada).
+    """
+    _require_admin(current_user)
+    service = StripeWebhookService(db)
+    if not service.repo.get_by_event_id(event_id):
+        raise HTTPException(status_code=404, detail="Webhook event not found")
+    if not service.replay(event_id):
+        raise HTTPException(status_code=409, detail="Webhook event is being processed")
+    background_tasks.add_task(process_stripe_event, event_id)
+    return {"status": "success", "event_id": event_id}
 
 
 # ==================== INVOICE ENDPOINTS ====================
 
 @router.get("/invoices/{appointment_id}")
-async def get_invoice_by_appointment(appointment_id: int, db: Session = Depends(get_db)):
+async def get_invoice_by_appointment(appointment_id: int, reads: ReadSession = Depends(get_read_db)):
     """Retorna a invoice de um appointment formatada para o componente"""
+    return await reads.run(_invoice_by_appointment, appointment_id)
+
+
+def _invoice_by_appointment(db: Session, appointment_id: int):
     try:
         print(f"🔍 Fetching invoice for appointment {appointment_id}")
         
@@ -563,13 +395,7 @@ async def get_invoice_by_appointment(appointment_id: int, db: Session = Depends(
         raise HTTPException(status_code=500, detail=f"Failed to fetch invoice: {str(e)}")
 
 
-@router.get("/invoice/{invoice_id}")
-async def get_invoice_by_id(invoice_id: int, db: Session = Depends(get_db)):
-    """Get a specific invoice by ID"""
-    invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
-    if not invoice:
-        raise HTTPException(status_code=404, detail="Invoice not found")
-    
+def _invoice_payload(invoice: Invoice) -> dict:
     try:
         line_items = json.loads(invoice.line_items) if invoice.line_items else []
     except:
@@ -595,36 +421,27 @@ async def get_invoice_by_id(invoice_id: int, db: Session = Depends(get_db)):
     }
 
 
+def _find_invoice(db: Session, *criteria) -> Optional[dict]:
+    invoice = db.query(Invoice).filter(*criteria).first()
+    return _invoice_payload(invoice) if invoice else None
+
+
+@router.get("/invoice/{invoice_id}")
+async def get_invoice_by_id(invoice_id: int, reads: ReadSession = Depends(get_read_db)):
+    """Get a specific invoice by ID"""
+    invoice = await reads.run(_find_invoice, Invoice.id == invoice_id)
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
+
+
 @router.get("/invoice/number/{invoice_number}")
-async def get_invoice_by_number(invoice_number: str, db: Session = Depends(get_db)):
+async def get_invoice_by_number(invoice_number: str, reads: ReadSession = Depends(get_read_db)):
     """Get invoice by invoice number (e.g., INV-2025-000001)"""
-    invoice = db.query(Invoice).filter(Invoice.invoice_number == invoice_number).first()
+    invoice = await reads.run(_find_invoice, Invoice.invoice_number == invoice_number)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
-    
-    try:
-        line_items = json.loads(invoice.line_items) if invoice.line_items else []
-    except:
-        line_items = []
-    
-    return {
-        "id": invoice.id,
-        "invoice_number": invoice.invoice_number,
-        "appointment_id": invoice.appointment_id,
-        "subtotal": float(invoice.subtotal),
-        "tax": float(invoice.tax),
-        "total": float(invoice.total),
-        "currency": invoice.currency,
-        "payment_status": invoice.payment_status,
-        "customer_name": invoice.customer_name,
-        "customer_email": invoice.customer_email,
-        "customer_phone": invoice.customer_phone,
-        "line_items": line_items,
-        "created_at": invoice.created_at.isoformat() if invoice.created_at else None,
-        "paid_at": invoice.paid_at.isoformat() if invoice.paid_at else None,
-        "stripe_session_id": invoice.stripe_session_id,
-        "stripe_payment_intent_id": invoice.stripe_payment_intent_id,
-    }
+    return invoice
 
 
 @router.post("/confirm-payment/{appointment_id}")
@@ -679,12 +496,11 @@ def confirm_payment_success(appointment_id: int, db: Session = Depends(get_db)):
         # Criar invoice usando a mesma função do webhook
         invoice = create_invoice_from_session(db, appointment, matching_session)
         
-        # Atualizar status do appointment para Finalizado
-        finalized_status = db.query(Status).filter(Status.name.ilike('%finalized%')).first()
-        if finalized_status:
-            appointment.status_id = finalized_status.id
-        else:
-            appointment.status_id = 3  # Fallback
+        # Atualizar status do appointment para Finalizado (e o rollup de métricas, como no webhook)
+        finalized_status_id = status_registry.get_id(db, "Finalized")
+        if finalized_status_id is None:
+            finalized_status_id = 3  # Fallback
+        MetricsRollupRepository(db).set_status(appointment, finalized_status_id)
         
         db.commit()
         print(f"✅ Pagamento confirmado e invoice criada: {invoice.invoice_number}")
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.deps import get_db
+from app.api.v1.pagination import PageParams, set_page_headers
 from app.schemas import product as product_schema
 from app.crud import product as crud_product
 from app.services.notification_service import NotificationService
+from app.services.stock_alerts import stock_alerts
 
 router = APIRouter()
 
@@ -37,12 +39,12 @@ def read_product(product_id: int, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[product_schema.Product])
 def list_products(
-    skip: int = 0, 
-    limit: int = 100, 
+    response: Response,
+    page_params: PageParams = Depends(),
     search: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
-    return crud_product.get_products(db, skip=skip, limit=limit, search=search)
+    return set_page_headers(response, crud_product.get_products_page(db, **page_params.kwargs(), search=search))
 
 
 @router.get("/by-part/{part_number}", response_model=product_schema.Product)
@@ -79,17 +81,9 @@ def update_product(product_id: int, product: product_schema.ProductCreate, db: S
         except Exception as e:
             print(f"Erro ao enviar notificação de atualização de stock: {e}")
     
-    # Verificar se o estoque está abaixo do mínimo e enviar notificação adicional
+    # Verificar se o estoque está abaixo do mínimo: alerta enviado em background
     if updated.quantity <= updated.minimum_stock:
-        try:
-            NotificationService.notify_low_stock(
-                db=db,
-                product_name=updated.name,
-                current_quantity=updated.quantity,
-                min_quantity=updated.minimum_stock
-            )
-        except Exception as e:
-            print(f"Erro ao enviar notificação de estoque baixo: {e}")
+        stock_alerts.submit([updated.id])
     
     return updated
 
@@ -1,37 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import asyncio
+import json
 from app.deps import get_db
+from app.database import get_read_db, ReadSession, SessionLocal
+from app.core.config import settings
+from app.core.security import resolve_token
+from app.services.notification_events import CLOSED, notification_broker
 from app.schemas import userNotification as user_notification_schema
 from app.crud import userNotification as crud_user_notif
+from app.crud.notification_feed import NotificationFeedRepository
 from app.models.userNotification import UserNotification
-from app.models.notificationBadge import Notification
 
 router = APIRouter()
 
 
 @router.get("/users/{user_id}/notifications")
 def get_user_notifications(user_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all unread notifications for a user with notification details."""
-    user_notifs = crud_user_notif.get_user_notifications(db, user_id, skip, limit)
-    
-    # Enrich with notification details
-    result = []
-    for un in user_notifs:
-        notif = db.query(Notification).filter(Notification.id == un.notification_id).first()
-        if notif:
-            result.append({
-                "id": un.id,
-                "notification_id": un.notification_id,
-                "user_id": un.user_id,
-                "read_at": un.read_at,
-                "created_at": un.created_at,
-                "component": notif.component,
-                "text": notif.text,
-                "insertedAt": notif.insertedAt,
-                "alertType": notif.alertType,
-            })
-    return result
+    """Get all unread notifications for a user with notification details (one joined query)."""
+    return NotificationFeedRepository(db).list(user_id, skip, limit)
+
+
+@router.get("/users/{user_id}/notifications/feed")
+def get_notification_feed(
+    user_id: int,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    component: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Unread notifications with details, newest first, keyset-paginated: pass the
+    returned next_cursor to load more (null when there are no more).
+    """
+    return NotificationFeedRepository(db).page(user_id, limit, cursor, component)
 
 
 @router.get("/users/{user_id}/notifications/by-component/{component}", response_model=List[user_notification_schema.UserNotification])
@@ -43,19 +48,100 @@ def get_notifications_by_component(
 
 
 @router.get("/users/{user_id}/notifications/count")
-def count_unread_notifications(user_id: int, db: Session = Depends(get_db)):
+async def count_unread_notifications(user_id: int, reads: ReadSession = Depends(get_read_db)):
     """Count all unread notifications for a user."""
-    count = crud_user_notif.count_all_unread(db, user_id)
+    count = await reads.run(crud_user_notif.count_all_unread, user_id)
     return {"count": count}
 
 
+@router.get("/users/{user_id}/notifications/counts")
+async def count_unread_notifications_by_components(user_id: int, reads: ReadSession = Depends(get_read_db)):
+    """Unread counts of every component for a user, plus the total (one badge poll)."""
+    return await reads.run(crud_user_notif.count_unread_by_components, user_id)
+
+
 @router.get("/users/{user_id}/notifications/count/{component}")
-def count_notifications_by_component(user_id: int, component: str, db: Session = Depends(get_db)):
+async def count_notifications_by_component(user_id: int, component: str, reads: ReadSession = Depends(get_read_db)):
     """Count unread notifications for a user by component."""
-    count = crud_user_notif.count_unread_by_component(db, user_id, component)
+    count = await reads.run(crud_user_notif.count_unread_by_component, user_id, component)
     return {"count": count, "component": component}
 
 
+def _stream_user_id(token: str) -> Optional[int]:
+    # Sessão própria e curta: a ligação SSE fica aberta sem ocupar uma ligação do pool
+    db = SessionLocal()
+    try:
+        principal = resolve_token(db, token)
+        return principal.id if principal else None
+    finally:
+        db.close()
+
+
+def _counts_snapshot(user_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        return crud_user_notif.count_unread_by_components(db, user_id)
+    finally:
+        db.close()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _event_stream(request: Request, subscription, snapshot: dict):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.NOTIFICATION_STREAM_MAX_SECONDS
+    try:
+        yield "retry: 3000\n\n"
+        yield _sse("counts", snapshot)
+        while loop.time() < deadline:
+            timeout = min(settings.NOTIFICATION_STREAM_KEEPALIVE_SECONDS, max(0.0, deadline - loop.time()))
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            if item is CLOSED:
+                break
+            published_at, payload = item
+            notification_broker.record_delivery(published_at)
+            yield _sse(payload["type"], payload)
+    finally:
+        notification_broker.unsubscribe(subscription)
+
+
+@router.get("/users/me/notifications/stream")
+async def stream_notifications(request: Request, access_token: Optional[str] = None):
+    """
+    Server-Sent Events for the authenticated user: a "counts" snapshot, then
+    "notification" (new notification) and "badge" (unread count delta or reset)
+    events. EventSource cannot send headers, so the token may also come as
+    ?access_token=. Streams end after NOTIFICATION_STREAM_MAX_SECONDS and the
+    browser reconnects.
+    """
+    authorization = request.headers.get("authorization") or ""
+    token = authorization.split(" ", 1)[1] if authorization.lower().startswith("bearer ") else access_token
+    user_id = await run_in_threadpool(_stream_user_id, token) if token else None
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+
+    # Subscrever antes do snapshot para não perder eventos entre os dois
+    subscription = notification_broker.subscribe(user_id)
+    try:
+        snapshot = await run_in_threadpool(_counts_snapshot, user_id)
+    except Exception:
+        notification_broker.unsubscribe(subscription)
+        raise
+    return StreamingResponse(
+        _event_stream(request, subscription, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/user-notifications", response_model=user_notification_schema.UserNotification)
 def create_user_notification(
     user_notification: user_notification_schema.UserNotificationCreate, db: Session = Depends(get_db)
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
 
 from app.database import get_db
+from app.api.v1.pagination import PageParams, set_page_headers
 from app.crud.vehicle import VehicleRepository
 from app.schemas.vehicle import Vehicle, VehicleCreate, VehicleWithCustomer
 from app.schemas.appointment import Appointment
@@ -23,12 +24,14 @@ class VehicleKilometersUpdate(BaseModel):
 
 @router.get("/", response_model=List[VehicleWithCustomer])
 def list_all_vehicles(
+    response: Response,
+    page_params: PageParams = Depends(),
     repo: VehicleRepository = Depends(get_vehicle_repo)
 ):
     """
-    List all vehicles with customer names.
+    List all vehicles with customer names (next page cursor in X-Next-Cursor).
     """
-    return repo.get_all_with_customers()
+    return set_page_headers(response, repo.page_with_customers(**page_params.kwargs()))
 
 
 @router.post("/", response_model=Vehicle, status_code=status.HTTP_201_CREATED)
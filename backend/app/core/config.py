@@ -6,6 +6,17 @@ load_dotenv()  # Carrega variáveis do .env
 class Settings:
     PROJECT_NAME: str = "FastAPI ORM Example"
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+    # Pool de ligações à BD (por processo/worker do uvicorn); timeouts em segundos, 0 = sem limite
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() in ("1", "true", "yes")
+    DB_STATEMENT_TIMEOUT: int = int(os.getenv("DB_STATEMENT_TIMEOUT", "30"))
+    # Caminho async (AsyncSession) das rotas de leitura mais usadas; sem driver async
+    # instalado (aiosqlite/aioodbc/asyncpg) essas rotas usam a Session normal no threadpool
+    DB_ASYNC_ENABLED: bool = os.getenv("DB_ASYNC_ENABLED", "True").lower() in ("1", "true", "yes")
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL")
     STRIPE_SECRET_KEY: str = os.getenv("STRIPE_PRIVATE_KEY")
     CLIENT_URL: str = os.getenv("CLIENT_URL", "http://localhost:3000")
     STRIPE_WEBHOOK_SECRET: str = os.getenv("STRIPE_WEBHOOK_SECRET")
@@ -13,5 +24,78 @@ class Settings:
     EXTERNAL_API_TIMEOUT: int = int(os.getenv("EXTERNAL_API_TIMEOUT", "15"))
     EXTERNAL_API_RETRIES: int = int(os.getenv("EXTERNAL_API_RETRIES", "3"))
     EXTERNAL_API_BACKOFF: float = float(os.getenv("EXTERNAL_API_BACKOFF", "0.5"))
+    # API externa de matrículas (registo de veículos)
+    BASE_URL: str = os.getenv("BASE_URL")
+    USERNAME_API: str = os.getenv("USERNAME_API")
+    PLATE_LOOKUP_POOL_SIZE: int = int(os.getenv("PLATE_LOOKUP_POOL_SIZE", "10"))
+    PLATE_LOOKUP_NEGATIVE_TTL_SECONDS: int = int(os.getenv("PLATE_LOOKUP_NEGATIVE_TTL_SECONDS", "600"))
+    PLATE_LOOKUP_CACHE_SIZE: int = int(os.getenv("PLATE_LOOKUP_CACHE_SIZE", "1024"))
+    PLATE_LOOKUP_BREAKER_THRESHOLD: int = int(os.getenv("PLATE_LOOKUP_BREAKER_THRESHOLD", "5"))
+    PLATE_LOOKUP_BREAKER_RESET_SECONDS: float = float(os.getenv("PLATE_LOOKUP_BREAKER_RESET_SECONDS", "30"))
+    # Arranque: schema/seeds só pelo comando init_db (True repete-os em cada arranque)
+    DB_INIT_ON_STARTUP: bool = os.getenv("DB_INIT_ON_STARTUP", "False").lower() in ("1", "true", "yes")
+    # Schedulers/workers em background: corre num único processo (líder eleito por lock)
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "True").lower() in ("1", "true", "yes")
+    SCHEDULER_LOCK_FILE: str = os.getenv("SCHEDULER_LOCK_FILE")
+    SCHEDULER_LEADER_RETRY_SECONDS: int = int(os.getenv("SCHEDULER_LEADER_RETRY_SECONDS", "30"))
+    # Metrics rollup: hora (0-23) da reconciliação diária
+    METRICS_ROLLUP_RECONCILE_HOUR: int = int(os.getenv("METRICS_ROLLUP_RECONCILE_HOUR", "3"))
+    # Cache de RoleScope (áreas de serviço visíveis por utilizador)
+    ROLE_SCOPE_CACHE_TTL_SECONDS: int = int(os.getenv("ROLE_SCOPE_CACHE_TTL_SECONDS", "300"))
+    ROLE_SCOPE_CACHE_SIZE: int = int(os.getenv("ROLE_SCOPE_CACHE_SIZE", "1024"))
+    # Principal dos tokens JWT: cache LRU de tokens validados e TTL da versão do token
+    # (revogação) lida da BD; 0 segundos = consultar a versão em cada pedido
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096"))
+    PRINCIPAL_VERSION_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_VERSION_TTL_SECONDS", "30"))
+    # Notificações: cache dos destinatários (admins/gestores, cargos por área) e janela em que
+    # alertas de stock baixo idênticos não são repetidos
+    NOTIFICATION_AUDIENCE_TTL_SECONDS: int = int(os.getenv("NOTIFICATION_AUDIENCE_TTL_SECONDS", "300"))
+    LOW_STOCK_ALERT_DEDUP_SECONDS: int = int(os.getenv("LOW_STOCK_ALERT_DEDUP_SECONDS", "21600"))
+    # Contadores de não lidas (badges): intervalo da reconstrução a partir de user_notifications
+    NOTIFICATION_COUNTER_REPAIR_MINUTES: int = int(os.getenv("NOTIFICATION_COUNTER_REPAIR_MINUTES", "360"))
+    # Push de notificações (SSE): transporte entre workers (memory | broker), fila por ligação,
+    # keepalive e duração máxima de cada stream (o cliente volta a ligar sozinho)
+    NOTIFICATION_PUBSUB_BACKEND: str = os.getenv("NOTIFICATION_PUBSUB_BACKEND", "memory")
+    NOTIFICATION_BROKER_URL: str = os.getenv("NOTIFICATION_BROKER_URL", "tcp://127.0.0.1:8765")
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", "100"))
+    NOTIFICATION_STREAM_KEEPALIVE_SECONDS: float = float(os.getenv("NOTIFICATION_STREAM_KEEPALIVE_SECONDS", "15"))
+    NOTIFICATION_STREAM_MAX_SECONDS: float = float(os.getenv("NOTIFICATION_STREAM_MAX_SECONDS", "300"))
+    # Listagens paginadas: o total "estimate" conta no máximo este nº de linhas (acima disso usa
+    # as estatísticas da tabela no SQL Server/PostgreSQL)
+    PAGINATION_COUNT_CAP: int = int(os.getenv("PAGINATION_COUNT_CAP", "10000"))
+    # Ledger de stock: hora (0-23, UTC) do checkpoint diário (snapshot à meia-noite do próprio dia)
+    STOCK_SNAPSHOT_HOUR: int = int(os.getenv("STOCK_SNAPSHOT_HOUR", "1"))
+    # Pesquisa de produtos: nº máximo de resultados ordenados por relevância (0 = sem limite)
+    PRODUCT_SEARCH_MAX_HITS: int = int(os.getenv("PRODUCT_SEARCH_MAX_HITS", "1000"))
+    # Fila de emails (email_outbox) e pool de envio SMTP; 0 threads desativa o worker
+    EMAIL_WORKER_POOL_SIZE: int = int(os.getenv("EMAIL_WORKER_POOL_SIZE", "2"))
+    EMAIL_OUTBOX_BATCH_SIZE: int = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "20"))
+    EMAIL_OUTBOX_POLL_SECONDS: float = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "2"))
+    EMAIL_OUTBOX_LEASE_SECONDS: int = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+    EMAIL_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+    EMAIL_RETRY_BACKOFF_SECONDS: float = float(os.getenv("EMAIL_RETRY_BACKOFF_SECONDS", "30"))
+    EMAIL_SMTP_IDLE_SECONDS: int = int(os.getenv("EMAIL_SMTP_IDLE_SECONDS", "60"))
+    # Job de lembretes: tamanho do lote reclamado e duração da lease (segundos)
+    REMINDER_BATCH_SIZE: int = int(os.getenv("REMINDER_BATCH_SIZE", "100"))
+    REMINDER_LEASE_SECONDS: int = int(os.getenv("REMINDER_LEASE_SECONDS", "300"))
+    # StatusRegistry: recarga periódica da tabela statuses (segundos)
+    STATUS_REGISTRY_TTL_SECONDS: int = int(os.getenv("STATUS_REGISTRY_TTL_SECONDS", "600"))
+    # Processamento em background dos eventos do webhook Stripe
+    STRIPE_EVENT_POLL_SECONDS: int = int(os.getenv("STRIPE_EVENT_POLL_SECONDS", "10"))
+    STRIPE_EVENT_BATCH_SIZE: int = int(os.getenv("STRIPE_EVENT_BATCH_SIZE", "20"))
+    STRIPE_EVENT_LEASE_SECONDS: int = int(os.getenv("STRIPE_EVENT_LEASE_SECONDS", "300"))
+    STRIPE_EVENT_MAX_ATTEMPTS: int = int(os.getenv("STRIPE_EVENT_MAX_ATTEMPTS", "5"))
+    STRIPE_EVENT_BACKOFF_SECONDS: float = float(os.getenv("STRIPE_EVENT_BACKOFF_SECONDS", "30"))
+    # Hash de passwords: esquema (bcrypt | argon2id) e custo; hashes com outro esquema/custo
+    # são refeitos no login. Pool dedicado (0 = nº de CPUs) com fila limitada
+    PASSWORD_SCHEME: str = os.getenv("PASSWORD_SCHEME", "bcrypt")
+    PASSWORD_BCRYPT_ROUNDS: int = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+    PASSWORD_ARGON2_TIME_COST: int = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+    PASSWORD_ARGON2_MEMORY_KIB: int = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", "65536"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64"))
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+    # Numeração das faturas: 1 = sem lacunas; >1 = reserva em blocos (menos escritas, pode deixar lacunas; SQLite usa sempre 1)
+    INVOICE_NUMBER_BLOCK_SIZE: int = int(os.getenv("INVOICE_NUMBER_BLOCK_SIZE", "1"))
     
 settings = Settings()
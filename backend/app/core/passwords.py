@@ -0,0 +1,206 @@
+"""
+Password hashing off the request threads.
+
+bcrypt/argon2 cost hundreds of milliseconds of CPU per call. Every hash and
+verify runs on a dedicated, bounded thread pool (both libraries release the
+GIL while hashing), so a burst of logins uses at most PASSWORD_HASH_WORKERS
+cores and the rest of the API keeps answering. Requests beyond the pool wait
+in a bounded queue; when it is full they fail fast with PasswordHasherBusyError.
+
+The configured scheme (PASSWORD_SCHEME: bcrypt or argon2id) and its cost are
+the targets: verify_and_update() returns a new hash whenever the stored one
+uses another scheme or cost, so hashes migrate on the next successful login.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+import logging
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# bcrypt só usa os primeiros 72 bytes; o mesmo corte para todos os esquemas
+MAX_PASSWORD_LENGTH = 72
+
+
+class PasswordHasherBusyError(Exception):
+    """The hashing queue is full; the caller should answer 503 and let the client retry."""
+
+
+def build_password_context(
+    scheme: str = None,
+    bcrypt_rounds: int = None,
+    argon2_time_cost: int = None,
+    argon2_memory_kib: int = None,
+) -> CryptContext:
+    """
+    CryptContext with the configured scheme as default. The other scheme is
+    still accepted (deprecated), and a hash with a different cost counts as
+    needing an update.
+    """
+    scheme = (scheme or settings.PASSWORD_SCHEME).lower()
+    bcrypt_rounds = bcrypt_rounds or settings.PASSWORD_BCRYPT_ROUNDS
+    argon2_time_cost = argon2_time_cost or settings.PASSWORD_ARGON2_TIME_COST
+    argon2_memory_kib = argon2_memory_kib or settings.PASSWORD_ARGON2_MEMORY_KIB
+    if scheme in ("argon2", "argon2id"):
+        schemes = ["argon2", "bcrypt"]
+    elif scheme == "bcrypt":
+        schemes = ["bcrypt", "argon2"]
+    else:
+        raise ValueError(f"Unsupported PASSWORD_SCHEME: {scheme}")
+
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_kib,
+        argon2__parallelism=1,
+    )
+
+
+class PasswordHasher:
+    """
+    Bounded pool for password hashing/verification with queue metrics.
+
+    Sync callers (routes running in the threadpool, seeds) use hash/verify/
+    verify_and_update, which wait for the pool; async code uses the a* variants.
+    """
+
+    def __init__(self, context: CryptContext = None, workers: int = None, queue_size: int = None, queue_timeout: float = None):
+        self.context = context or build_password_context()
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        self.queue_size = settings.PASSWORD_HASH_QUEUE_SIZE if queue_size is None else queue_size
+        self.queue_timeout = settings.PASSWORD_HASH_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.wait_total = 0.0
+        self.run_total = 0.0
+        self.wait_max = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusyError("Password hashing queue is full")
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def run():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.wait_total += started - submitted
+                    self.wait_max = max(self.wait_max, started - submitted)
+                    self.run_total += finished - started
+                self._slots.release()
+
+        try:
+            return self._get_executor().submit(run)
+        except Exception:
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+
+    # ---- sync API ----
+
+    def hash(self, password: str) -> str:
+        return self._submit(self.context.hash, password[:MAX_PASSWORD_LENGTH]).result()
+
+    def verify(self, password: str, hashed: Optional[str]) -> bool:
+        if not hashed:
+            return False
+        return self._submit(self.context.verify, password[:MAX_PASSWORD_LENGTH], hashed).result()
+
+    def verify_and_update(self, password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        (valid, new_hash). new_hash is set when the password is valid but the
+        stored hash uses another scheme or cost; the caller saves it.
+        """
+        if not hashed:
+            return False, None
+        valid, new_hash = self._submit(
+            self.context.verify_and_update, password[:MAX_PASSWORD_LENGTH], hashed
+        ).result()
+        if new_hash:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+
+    # ---- async API ----
+
+    async def ahash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(self.context.hash, password[:MAX_PASSWORD_LENGTH]))
+
+    async def averify_and_update(self, password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        if not hashed:
+            return False, None
+        valid, new_hash = await asyncio.wrap_future(
+            self._submit(self.context.verify_and_update, password[:MAX_PASSWORD_LENGTH], hashed)
+        )
+        if new_hash:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+
+    def needs_update(self, hashed: str) -> bool:
+        return self.context.needs_update(hashed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "scheme": self.context.default_scheme(),
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "wait_avg_ms": round(self.wait_total / self.completed * 1000, 2) if self.completed else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 2),
+                "run_avg_ms": round(self.run_total / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
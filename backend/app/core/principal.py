@@ -0,0 +1,307 @@
+"""
+Principal resolution for bearer tokens.
+
+Tokens carry the claims the API needs on every request: the kind of account
+("typ": user | customer), the token version ("ver") and, for management users,
+role, employee_id and the service-area scope. A validated token becomes a
+Principal that is kept in a bounded LRU keyed by the token hash, so repeated
+requests with the same token skip both the JWT decode and the user lookup.
+While the account version is cached too, cached_principal() answers without a
+database session at all (the async read routes only open one on a miss).
+
+Revocation: each users/customersAuth row has a token_version. Tokens embed
+the version they were issued with; revoke_tokens() increments the column and
+every older token is rejected. The current versions are read through a short
+TTL cache (PRINCIPAL_VERSION_TTL_SECONDS), which bounds how long a revoked
+token can still be used by another worker process.
+
+Tokens issued before these claims existed ("ver" missing) are resolved once
+from the database and then cached like any other token.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+import hashlib
+import threading
+import time
+import logging
+
+from jose import JWTError, jwt
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER = "user"
+CUSTOMER = "customer"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Authenticated account as seen by the API. For management users it
+    exposes the same attributes routes read from User (id, name, email,
+    role, employee_id). is_admin/area are None when the token carries no
+    scope claims.
+    """
+
+    id: int
+    kind: str
+    token_version: int
+    name: Optional[str] = None
+    email: Optional[str] = None
+    role: Optional[str] = None
+    employee_id: Optional[int] = None
+    is_admin: Optional[bool] = None
+    area: Optional[str] = None
+
+    @property
+    def has_scope(self) -> bool:
+        return self.is_admin is not None
+
+
+class PrincipalCache:
+    """Bounded LRU of validated tokens: sha256(kind:token) -> (exp, Principal)."""
+
+    def __init__(self, max_size: int = None):
+        self.max_size = settings.PRINCIPAL_CACHE_SIZE if max_size is None else max_size
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind: str, token: str) -> str:
+        return hashlib.sha256(f"{kind}:{token}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, principal = entry
+            if expires is not None and expires <= time.time():
+                del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def set(self, key: str, expires: Optional[float], principal: Principal):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = (expires, principal)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._items), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+class TokenVersions:
+    """Current token_version per (kind, id), re-read from the database after a TTL."""
+
+    def __init__(self, ttl_seconds: float = None):
+        self.ttl = settings.PRINCIPAL_VERSION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def current(self, db: Session, kind: str, account_id: int) -> Optional[int]:
+        """Current version, or None when the account no longer exists."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get((kind, account_id))
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        version = _load_token_version(db, kind, account_id)
+        if self.ttl > 0:
+            with self._lock:
+                self._items[(kind, account_id)] = (now + self.ttl, version)
+        return version
+
+    def cached(self, kind: str, account_id: int) -> Optional[tuple]:
+        """(version,) while the cached entry is fresh; None when the database must be read."""
+        with self._lock:
+            entry = self._items.get((kind, account_id))
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return (entry[1],)
+
+    def forget(self, kind: str, account_ids: Iterable[int]):
+        with self._lock:
+            for account_id in account_ids:
+                self._items.pop((kind, account_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+principal_cache = PrincipalCache()
+token_versions = TokenVersions()
+
+
+def _account_model(kind: str):
+    from app.models.user import User
+    from app.models.customerAuth import CustomerAuth
+    if kind == USER:
+        return User, User.id
+    return CustomerAuth, CustomerAuth.id_customer
+
+
+def _load_token_version(db: Session, kind: str, account_id: int) -> Optional[int]:
+    model, id_column = _account_model(kind)
+    row = db.query(model.token_version).filter(id_column == account_id).first()
+    if row is None:
+        return None
+    return row[0] or 0
+
+
+def user_claims(db: Session, user) -> dict:
+    """Token claims of a management user (role, employee and service-area scope)."""
+    from app.services.role_scope import scope_claims
+    return {
+        "sub": str(user.id),
+        "typ": USER,
+        "ver": user.token_version or 0,
+        "role": user.role,
+        "name": user.name,
+        "email": user.email,
+        "emp": user.employee_id,
+        "scope": scope_claims(db, user),
+    }
+
+
+def customer_claims(customer_auth) -> dict:
+    """Token claims of a customer account; sub stays the customer id."""
+    return {"sub": str(customer_auth.id_customer), "typ": CUSTOMER, "ver": customer_auth.token_version or 0}
+
+
+def _principal_from_claims(kind: str, account_id: int, payload: dict) -> Principal:
+    if kind == CUSTOMER:
+        return Principal(id=account_id, kind=CUSTOMER, token_version=payload["ver"])
+    scope = payload.get("scope") or {}
+    return Principal(
+        id=account_id,
+        kind=USER,
+        token_version=payload["ver"],
+        name=payload.get("name"),
+        email=payload.get("email"),
+        role=payload.get("role"),
+        employee_id=payload.get("emp"),
+        is_admin=bool(scope.get("admin")) if "admin" in scope else None,
+        area=scope.get("area"),
+    )
+
+
+def _principal_from_db(db: Session, kind: str, account_id: int) -> Optional[Principal]:
+    model, id_column = _account_model(kind)
+    account = db.query(model).filter(id_column == account_id).first()
+    if account is None:
+        return None
+    if kind == CUSTOMER:
+        return Principal(id=account_id, kind=CUSTOMER, token_version=account.token_version or 0)
+    return Principal(
+        id=account.id,
+        kind=USER,
+        token_version=account.token_version or 0,
+        name=account.name,
+        email=account.email,
+        role=account.role,
+        employee_id=account.employee_id,
+    )
+
+
+def resolve_principal(db: Session, token: str, kind: str, secret_key: str, algorithm: str) -> Optional[Principal]:
+    """
+    Principal of a bearer token for the given kind of account, or None when
+    the token is invalid, expired, of another kind or revoked.
+    """
+    key = PrincipalCache.key(kind, token)
+    principal = principal_cache.get(key)
+    if principal is None:
+        try:
+            payload = jwt.decode(token, secret_key, algorithms=[algorithm])
+            account_id = int(payload.get("sub"))
+        except (JWTError, TypeError, ValueError):
+            return None
+        token_kind = payload.get("typ")
+        if token_kind is not None and token_kind != kind:
+            return None
+        if token_kind == kind and isinstance(payload.get("ver"), int):
+            principal = _principal_from_claims(kind, account_id, payload)
+        else:
+            # Token antigo sem claims: uma leitura da BD e fica em cache
+            principal = _principal_from_db(db, kind, account_id)
+            if principal is None:
+                return None
+        principal_cache.set(key, payload.get("exp"), principal)
+
+    if token_versions.current(db, kind, principal.id) != principal.token_version:
+        principal_cache.discard(key)
+        return None
+    return principal
+
+
+def cached_principal(token: str, kind: str) -> Optional[Principal]:
+    """
+    Principal of a token already validated and whose account version is still
+    cached, without touching the database; None means "resolve it with a session".
+    """
+    principal = principal_cache.get(PrincipalCache.key(kind, token))
+    if principal is None:
+        return None
+    version = token_versions.cached(kind, principal.id)
+    if version is None or version[0] != principal.token_version:
+        return None
+    return principal
+
+
+def revoke_tokens(db: Session, kind: str, account_ids: Iterable[int]):
+    """
+    Invalidate every token issued so far for these accounts (token_version + 1).
+    The caller's transaction is committed.
+    """
+    account_ids = [account_id for account_id in set(account_ids) if account_id is not None]
+    if not account_ids:
+        return
+    model, id_column = _account_model(kind)
+    db.query(model).filter(id_column.in_(account_ids)).update(
+        {model.token_version: model.token_version + 1}, synchronize_session=False
+    )
+    db.commit()
+    token_versions.forget(kind, account_ids)
+    logger.info("Revoked %s tokens for %s", kind, account_ids)
+
+
+def revoke_employee_tokens(db: Session, employee_ids: Iterable[int] = (), emails: Iterable[str] = ()):
+    """Revoke the tokens of the users linked to these employees (by employee_id or email)."""
+    from sqlalchemy import or_
+    from app.models.user import User
+
+    employee_ids = [employee_id for employee_id in employee_ids if employee_id is not None]
+    emails = [email for email in emails if email]
+    criteria = []
+    if employee_ids:
+        criteria.append(User.employee_id.in_(employee_ids))
+    if emails:
+        criteria.append(User.email.in_(emails))
+    if not criteria:
+        return
+    user_ids = [user_id for (user_id,) in db.query(User.id).filter(or_(*criteria)).all()]
+    revoke_tokens(db, USER, user_ids)
@@ -3,7 +3,6 @@ from datetime import datetime, timedelta
 from typing import Optional, Union, Any
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from authlib.integrations.starlette_client import OAuth
 from starlette.config import Config
@@ -13,22 +12,17 @@ config = Config(".env")
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import joinedload
 from app.models.user import User
-from app.database import SessionLocal
-
-# Dependência de sessão local (evita import circular com deps.py)
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# A mesma dependência de sessão das rotas: o FastAPI reutiliza a sessão
+# do pedido em vez de abrir uma segunda ligação para autenticar.
+from app.database import get_db, get_read_db, ReadSession
+from app.core.principal import CUSTOMER, USER, Principal, cached_principal, customer_claims, resolve_principal, user_claims
 
 # OAuth2 scheme for FastAPI
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/customersauth/token")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="api/v1/customersauth/token", auto_error=False)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hash de passwords: pool dedicado (app.core.passwords)
+from app.core.passwords import password_hasher
 
 # JWT Configuration
 SECRET_KEY = config('SECRET_KEY', cast=str)
@@ -87,12 +81,14 @@ def create_facebook_user_data(user_info: dict) -> dict:
 
 # Password functions
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    plain_password = plain_password[:72] 
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """(válida, novo_hash): novo_hash quando o hash guardado usa outro esquema/custo."""
+    return password_hasher.verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    password = password[:72] 
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 # JWT Token functions
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -106,6 +102,18 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_user_token(db: Session, user: User, expires_delta: timedelta = None) -> str:
+    """Token of a management user with role, employee and service-area scope claims."""
+    return create_access_token(user_claims(db, user), expires_delta)
+
+def create_customer_token(customer_auth, expires_delta: timedelta = None) -> str:
+    """Token of a customer account (sub = customer id)."""
+    return create_access_token(customer_claims(customer_auth), expires_delta)
+
+def resolve_token(db: Session, token: str, kind: str = USER) -> Optional[Principal]:
+    """Principal of a bearer token (cached by token hash), or None if invalid/revoked."""
+    return resolve_principal(db, token, kind, SECRET_KEY, ALGORITHM)
+
 def verify_token(token: str) -> Optional[dict]:
     """Verify and decode a JWT token."""
     try:
@@ -129,19 +137,10 @@ def get_current_user_id(token: str = Depends(oauth2_scheme), db: Session = Depen
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        customer_id: str = payload.get("sub")  # This is the customer ID
-        if customer_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    from app.models.customerAuth import CustomerAuth
-    user = db.query(CustomerAuth).filter(CustomerAuth.id_customer == int(customer_id)).first()
-    if user is None:
+    principal = resolve_token(db, token, CUSTOMER)
+    if principal is None:
         raise credentials_exception
-    return customer_id  # Return the customer ID (which is what the JWT contains)
+    return str(principal.id)  # Return the customer ID (which is what the JWT contains)
 
 def get_current_user_with_customer(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """Get current user with customer data using relationships."""
@@ -161,41 +160,57 @@ def get_current_user_with_customer(token: str = Depends(oauth2_scheme), db: Sess
     return customer_auth
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    Utilizador autenticado a partir dos claims do token (sem consultar a tabela
+    users); expõe id, name, email, role e employee_id como o User.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
+    principal = resolve_token(db, token, USER)
+    if principal is None:
         raise credentials_exception
-    return user
+    return principal
 
 
-def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme_optional), db: Session = Depends(get_db)) -> Optional[User]:
+def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme_optional), db: Session = Depends(get_db)) -> Optional[Principal]:
     """
     Retorna o usuário atual ou None se não autenticado.
     Útil para endpoints que funcionam com ou sem autenticação.
     """
     if not token:
         return None
-    
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-    except JWTError:
+    return resolve_token(db, token, USER)
+
+
+# Rotas de leitura async: o principal vem da cache e, num miss, da mesma
+# ReadSession que a rota usa (o FastAPI partilha-a no pedido), sem get_db.
+async def _resolve_read_token(reads: ReadSession, token: str) -> Optional[Principal]:
+    principal = cached_principal(token, USER)
+    if principal is None:
+        principal = await reads.run(resolve_token, token, USER)
+    return principal
+
+
+async def get_read_user(token: str = Depends(oauth2_scheme), reads: ReadSession = Depends(get_read_db)) -> Principal:
+    """get_current_user das rotas que usam get_read_db (uma só sessão por pedido)."""
+    principal = await _resolve_read_token(reads, token)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+
+async def get_read_user_optional(
+    token: Optional[str] = Depends(oauth2_scheme_optional), reads: ReadSession = Depends(get_read_db)
+) -> Optional[Principal]:
+    """get_current_user_optional das rotas que usam get_read_db."""
+    if not token:
         return None
-    
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    return user
+    return await _resolve_read_token(reads, token)
@@ -0,0 +1,134 @@
+"""
+Startup subsystem for the API process.
+
+Nothing here runs at import time. The FastAPI lifespan (app.main) uses it
+to time each startup phase, elect the single process that runs the
+background schedulers/workers and stop them on shutdown. Schema creation
+and seeding live in init_database(), run by the dedicated command
+`python -m scripts.utilities.init_db` (or on boot with DB_INIT_ON_STARTUP).
+"""
+
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Collects (phase, seconds) pairs and renders a one-line breakdown."""
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    @property
+    def total(self) -> float:
+        return sum(seconds for _, seconds in self.phases)
+
+    def as_dict(self) -> Dict[str, float]:
+        timings = {name: round(seconds * 1000, 1) for name, seconds in self.phases}
+        timings["total"] = round(self.total * 1000, 1)
+        return timings
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases)
+        return f"Startup: {parts} (total {self.total * 1000:.0f} ms)"
+
+
+def init_database() -> Dict[str, int]:
+    """
+    Create missing tables, open the stock ledger balances, run the seeds when
+    the database is empty and create the invoice number sequence.
+
+    Returns:
+        {"users": <users before seeding>, "seeded": 0|1}
+    """
+    from app.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401 - regista todos os modelos no metadata
+    from app.models.user import User
+    from app.crud.stock_ledger import StockLedgerRepository
+    from app.crud.invoice_sequence import InvoiceSequenceRepository
+    from app.services.invoice_numbers import INVOICE_SEQUENCE
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        existing_users = db.query(User).count()
+        # Saldos iniciais do ledger de stock antes de qualquer movimento das rotas
+        StockLedgerRepository(db).open_balances()
+    finally:
+        db.close()
+
+    if existing_users:
+        logger.info(f"Database already has data ({existing_users} users). Skipping seeds.")
+    else:
+        from app.seed_all import run_all_seeds
+
+        logger.info("Database is empty. Running seeds...")
+        run_all_seeds()
+
+    # Sequência das faturas (a seguir às faturas existentes) criada no arranque:
+    # a primeira fatura não precisa de escrever noutra ligação
+    db = SessionLocal()
+    try:
+        InvoiceSequenceRepository(db).ensure(INVOICE_SEQUENCE)
+    finally:
+        db.close()
+    return {"users": existing_users, "seeded": 0 if existing_users else 1}
+
+
+class BackgroundServices:
+    """
+    Schedulers and workers that must run in a single process: reminders,
+    metrics rollup reconciliation, notification counter repair, email outbox,
+    Stripe event processing and the daily stock ledger checkpoint.
+    Started by the scheduler leader only.
+    """
+
+    def __init__(self):
+        self.services = []
+
+    def start(self) -> None:
+        from app.scheduler.scheduler import NotificationScheduler
+        from app.scheduler.metrics_rollup import MetricsRollupScheduler
+        from app.scheduler.notification_counters import NotificationCounterScheduler
+        from app.scheduler.stripe_events import StripeEventScheduler
+        from app.scheduler.stock_snapshots import StockSnapshotScheduler
+        from app.email_service import EmailOutboxWorker
+
+        self.services = [
+            NotificationScheduler(),
+            # Rollup de métricas (a construção inicial corre se a tabela estiver vazia)
+            MetricsRollupScheduler(),
+            # Contadores de não lidas dos badges (reconstrução periódica)
+            NotificationCounterScheduler(),
+            # Worker da fila de emails (envio SMTP fora dos pedidos HTTP)
+            EmailOutboxWorker(),
+            # Processamento dos eventos do webhook Stripe (faturas fora do pedido HTTP)
+            StripeEventScheduler(),
+            # Checkpoint diário do ledger de stock (snapshots para consultas por data)
+            StockSnapshotScheduler(),
+        ]
+        for service in self.services:
+            service.start()
+
+    def stop(self) -> None:
+        for service in reversed(self.services):
+            try:
+                service.stop()
+            except Exception as e:
+                logger.error(f"Error stopping {type(service).__name__}: {e}")
+        self.services = []
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session, joinedload
 from app.models.absence import Absence
 from app.schemas.absence import AbsenceCreate, AbsenceUpdate
+from app.crud.pagination import Page, SortKey, paginate
 from typing import List,Optional
 from datetime import date, datetime
 
@@ -30,18 +31,20 @@ class AbsenceRepository:
     
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Absence]:
         """Gets a list of all absences, with pagination."""
-        return (
+        return self.page(limit=limit, skip=skip).items
+
+    def page(self, limit: int = 100, cursor: Optional[str] = None, skip: int = 0, total: Optional[str] = None) -> Page:
+        """Gets a page of absences (most recent day first, id as tiebreaker), by cursor or by skip."""
+        query = (
             self.db.query(Absence)
             .options(
                 joinedload(Absence.employee),
                 joinedload(Absence.absence_type),
                 joinedload(Absence.status)
             )
-            .order_by(Absence.day.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        keys = [SortKey(Absence.day, descending=True), SortKey(Absence.id, descending=True)]
+        return paginate(query, keys, limit, cursor, skip, total)
 
     def get_by_employee(self, employee_id: int, skip: int = 0, limit: int = 100) -> List[Absence]:
         """Gets all absences for a specific employee."""
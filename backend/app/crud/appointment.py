@@ -1,6 +1,8 @@
-from typing import List, Optional, Union
-from datetime import datetime
+from typing import List, Optional, Tuple, Union
+from datetime import datetime, timedelta
+from uuid import uuid4
 
+from sqlalchemy import or_
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException
 
@@ -18,11 +20,17 @@ from app.schemas.appointment import AppointmentCreate, AppointmentUpdate
 from app.schemas.appointment_extra_service import AppointmentExtraServiceCreate
 
 from app.email_service.email_service import EmailService
+from app.crud.metrics_rollup import MetricsRollupRepository
+from app.crud.pagination import Page, SortKey, paginate
+from app.services.role_scope import resolve_role_scope
+from app.services.status_registry import status_registry
 
 from app.models.product import Product
 from sqlalchemy.orm.attributes import flag_modified
 from datetime import datetime
 from app.models.order_part import OrderPart
+from app.crud.stock import StockRepository
+from app.models.stock_movement import EXTRA_APPROVED, EXTRA_RETURNED
 from app.schemas import user
 
 
@@ -45,6 +53,12 @@ class AppointmentRepository:
     """
     def __init__(self, db: Session):
         self.db = db
+        self.rollup = MetricsRollupRepository(db)
+
+    def _track_rollup(self, db_appointment: Appointment, old_key) -> None:
+        """Atualiza o rollup diário de métricas com a transição old_key -> estado atual."""
+        area = old_key[3] if old_key and old_key[1] == db_appointment.service_id else None
+        self.rollup.move(old_key, self.rollup.key_for(db_appointment, area=area))
 
     def get_by_id(self, appointment_id: int) -> Optional[Appointment]:
         """Obter uma appointment por id (sem joins extras)."""
@@ -95,6 +109,7 @@ class AppointmentRepository:
             result['base_service']['parts'].append({
                 'name': part.name,
                 'part_number': part.part_number,
+                'product_id': part.product_id,
                 'quantity': part.quantity,
                 'unit_price': part.price,
                 'total': part_total
@@ -116,6 +131,7 @@ class AppointmentRepository:
                 extra_parts_list.append({
                     'name': part.name,
                     'part_number': part.part_number,
+                    'product_id': part.product_id,
                     'quantity': part.quantity,
                     'unit_price': part.price,
                     'total': part_total
@@ -161,6 +177,13 @@ class AppointmentRepository:
             
     def get_all(self, skip: int = 0, limit: int = 100, user: Optional[User] = None) -> List[Appointment]:
         """Listar appointments, ordenadas do mais recente para o mais antigo."""
+        return self.page(limit=limit, skip=skip, user=user).items
+
+    def page(
+        self, limit: int = 100, cursor: Optional[str] = None, skip: int = 0,
+        total: Optional[str] = None, user: Optional[User] = None,
+    ) -> Page:
+        """Página de appointments (mais recentes primeiro), por cursor ou por skip."""
         # carregar customer, vehicle, service e status para que os dados estejam disponíveis
         query = (
             self.db.query(Appointment)
@@ -172,79 +195,100 @@ class AppointmentRepository:
             )
         )
         
-        # Admin e Manager (sistema) veem tudo; outros roles veem apenas serviços da sua área e não concluídas
-        if user:
-            # Primeiro, verificar se o role do sistema é admin/manager
-            system_role = user.role.lower()
-            is_system_admin = system_role in ["admin", "manager"]
-            
-            # Buscar o employee associado ao user para obter o cargo real e verificar is_manager
-            from app.models.employee import Employee
-            from app.models.role import Role
-            
-            employee = None
-            if user.employee_id:
-                employee = (
-                    self.db.query(Employee)
-                    .options(joinedload(Employee.role))
-                    .filter(Employee.id == user.employee_id)
-                    .first()
-                )
-            
-            # Verificar se é manager/admin por qualquer critério
-            is_admin = is_system_admin
-            if employee:
-                # Verificar se tem flag is_manager
-                if employee.is_manager:
-                    is_admin = True
-                # Verificar se o cargo/role é admin ou gestor
-                if employee.role:
-                    role_name = employee.role.name.lower()
-                    if any(keyword in role_name for keyword in ["admin", "gestor", "gerente"]):
-                        is_admin = True
-            
-            print(f"[DEBUG] User ID={user.id}, Email={user.email}, System Role={user.role}, Is Admin={is_admin}")
-            if employee:
-                print(f"[DEBUG] Employee encontrado: ID={employee.id}, Nome={employee.name}, Role ID={employee.role_id}, is_manager={employee.is_manager}")
+        # Admin e Manager veem tudo; outros roles veem apenas serviços da sua área e não concluídas
+        scope = resolve_role_scope(self.db, user)
+        if scope.is_restricted:
+            query = scope.apply(query, Appointment.service_id)
             
-            # Se não é admin por nenhum critério, aplicar filtros por área
-            if not is_admin:
-                if employee and employee.role:
-                    role_name = employee.role.name.lower()
-            # Se não é admin por nenhum critério, aplicar filtros por área
-            if not is_admin:
-                if employee and employee.role:
-                    role_name = employee.role.name.lower()
-                    
-                    # Mapear cargos para áreas de serviço
-                    # Nota: as áreas no banco estão como "Mecânica", "Elétrica", etc.
-                    if "mecanico" in role_name or "mecânico" in role_name:
-                        query = query.join(Service).filter(Service.area.ilike("%Mecânica%"))
-                    elif "eletric" in role_name or "elétric" in role_name:
-                        query = query.join(Service).filter(Service.area.ilike("%Elétrica%"))
-                    elif "borracheiro" in role_name or "pneu" in role_name:
-                        query = query.join(Service).filter(Service.area.ilike("%pneu%"))
-                    elif "estética" in role_name or "estetica" in role_name:
-                        query = query.join(Service).filter(Service.area.ilike("%Estética%"))
-                    elif "vidro" in role_name:
-                        query = query.join(Service).filter(Service.area.ilike("%Vidros%"))
-                    else:
-                        # Para outros cargos, filtrar genericamente pela área
-                        query = query.join(Service).filter(Service.area.ilike(f"%{role_name}%"))
-                    
-                    # Filtrar apenas appointments não concluídas (excluir "Concluída" e "Cancelada")
-                    query = query.filter(
-                        ~Appointment.status.has(
-                            Status.name.in_(["Concluída", "Cancelada"])
-                        )
+            # Filtrar apenas appointments não concluídas (excluir "Concluída" e "Cancelada")
+            closed_status_ids = status_registry.ids_for(self.db, ["Concluída", "Cancelada"])
+            if closed_status_ids:
+                query = query.filter(
+                    or_(
+                        Appointment.status_id.is_(None),
+                        Appointment.status_id.notin_(sorted(closed_status_ids))
                     )
+                )
         
-        return query.order_by(Appointment.id.desc()).offset(skip).limit(limit).all()
+        return paginate(query, [SortKey(Appointment.id, descending=True)], limit, cursor, skip, total)
 
     # def get_all(self, skip: int = 0, limit: int = 100) -> List[Appointment]:
     #     """Listar appointments, ordenadas do mais recente para o mais antigo."""
     #     return self.db.query(Appointment).order_by(Appointment.id.desc()).offset(skip).limit(limit).all()
 
+    def claim_due_reminders(self, window_start: datetime, window_end: datetime, limit: int, lease_seconds: int) -> Tuple[Optional[str], List[Appointment]]:
+        """
+        Reclama (lease) até `limit` appointments da janela que ainda não receberam lembrete.
+        - Nos dialetos que o suportam, a seleção usa FOR UPDATE SKIP LOCKED;
+        - o UPDATE condicional com claim_token garante que cada appointment só
+          é reclamada por um processo até a lease expirar.
+        Retorna (token, appointments com customer/auth/service carregados).
+        """
+        now = datetime.now()
+        due_filter = [
+            Appointment.appointment_date >= window_start,
+            Appointment.appointment_date <= window_end,
+            Appointment.reminder_sent == 0,
+            or_(
+                Appointment.reminder_claimed_until.is_(None),
+                Appointment.reminder_claimed_until < now,
+            ),
+        ]
+
+        candidates = (
+            self.db.query(Appointment.id)
+            .filter(*due_filter)
+            .order_by(Appointment.appointment_date, Appointment.id)
+            .limit(limit)
+        )
+        if self.db.get_bind().dialect.name != "sqlite":
+            candidates = candidates.with_for_update(skip_locked=True)
+        candidate_ids = [appointment_id for (appointment_id,) in candidates.all()]
+        if not candidate_ids:
+            self.db.commit()
+            return None, []
+
+        token = uuid4().hex
+        self.db.query(Appointment).filter(Appointment.id.in_(candidate_ids), *due_filter).update(
+            {
+                Appointment.reminder_claim_token: token,
+                Appointment.reminder_claimed_until: now + timedelta(seconds=lease_seconds),
+            },
+            synchronize_session=False,
+        )
+        self.db.commit()
+
+        appointments = (
+            self.db.query(Appointment)
+            .options(
+                joinedload(Appointment.customer).joinedload(Customer.auth),
+                joinedload(Appointment.service)
+            )
+            .filter(Appointment.reminder_claim_token == token)
+            .order_by(Appointment.appointment_date, Appointment.id)
+            .all()
+        )
+        return token, appointments
+
+    def mark_reminders_sent(self, token: str, appointment_ids: List[int]) -> None:
+        """
+        Marca reminder_sent num único UPDATE por lote (sem commit: o chamador
+        grava-o na mesma transação que os emails colocados na fila).
+        """
+        if not appointment_ids:
+            return
+        self.db.query(Appointment).filter(
+            Appointment.id.in_(appointment_ids),
+            Appointment.reminder_claim_token == token,
+        ).update(
+            {
+                Appointment.reminder_sent: 1,
+                Appointment.reminder_claim_token: None,
+                Appointment.reminder_claimed_until: None,
+            },
+            synchronize_session=False,
+        )
+
     # ✅ FUNÇÃO AUXILIAR: Buscar email do customer via CustomerAuth
     def _get_customer_email(self, customer_id: int) -> Optional[str]:
         """
@@ -266,12 +310,12 @@ class AppointmentRepository:
         - Define o status default "Pendente" (procura-o na tabela statuses).
         - Se for fornecido email_service, envia email de confirmação para o cliente (busca email em CustomerAuth).
         """
-        pending_status = self.db.query(Status).filter(Status.name == APPOINTMENT_STATUS_PENDING).first()
-        if not pending_status:
+        pending_status_id = status_registry.get_id(self.db, APPOINTMENT_STATUS_PENDING)
+        if pending_status_id is None:
             raise RuntimeError(f"Default status '{APPOINTMENT_STATUS_PENDING}' not found in the database.")
 
         appointment_data = appointment.model_dump()
-        db_appointment = Appointment(**appointment_data, status_id=pending_status.id)
+        db_appointment = Appointment(**appointment_data, status_id=pending_status_id)
         self.db.add(db_appointment)
         self.db.commit()
         self.db.refresh(db_appointment)
@@ -281,9 +325,9 @@ class AppointmentRepository:
             comment=f"OS criada",
         )
         self.db.add(comment)
-        self.db.commit()
+        self._track_rollup(db_appointment, None)
 
-        #  CORRIGIDO: Buscar email do CustomerAuth
+        #  CORRIGIDO: Buscar email do CustomerAuth (o email é gravado no mesmo commit que o comentário)
         if email_service:
             try:
                 customer_email = self._get_customer_email(db_appointment.customer_id)
@@ -297,8 +341,9 @@ class AppointmentRepository:
                         customer_email=customer_email,
                         service_name=service_name,
                         service_date=service_date,
+                        db=self.db,
                     )
-                    print(f"✅ Confirmação de agendamento enviada para {customer_email}.")
+                    print(f"✅ Confirmação de agendamento na fila para {customer_email}.")
                 else:
                     print(f" Email não encontrado para customer_id={db_appointment.customer_id}")
                     
@@ -306,6 +351,7 @@ class AppointmentRepository:
                 # Não abortar a criação por falha no envio de email; só log
                 print(f" ERRO ao enviar confirmação de agendamento: {e}")
 
+        self.db.commit()
         return db_appointment
 
     # def update(self, appointment_id: int, appointment_data: AppointmentUpdate) -> Optional[Appointment]:
@@ -334,9 +380,9 @@ class AppointmentRepository:
         if "status" in update_data:
             status_name = update_data.pop("status")
             try:
-                status_obj = self.db.query(Status).filter(Status.name == status_name).first()
-                if status_obj and hasattr(db_appointment, "status_id"):
-                    db_appointment.status_id = status_obj.id
+                status_id = status_registry.get_id(self.db, status_name)
+                if status_id is not None and hasattr(db_appointment, "status_id"):
+                    self.rollup.set_status(db_appointment, status_id)
                 else:
                     
                     if hasattr(db_appointment, "status"):
@@ -346,11 +392,10 @@ class AppointmentRepository:
                     setattr(db_appointment, "status", status_name)
         
         if "status_id" in update_data:
-            try:
-                db_appointment.status_id = update_data.pop("status_id")
-            except Exception:
-                pass
+            self.rollup.set_status(db_appointment, update_data.pop("status_id"))
 
+        # Data e serviço também mudam a chave do rollup
+        old_rollup_key = self.rollup.key_for(db_appointment)
         for key, value in update_data.items():
             try:
                 if hasattr(db_appointment, key):
@@ -358,26 +403,27 @@ class AppointmentRepository:
             except Exception:
                 pass
 
+        self._track_rollup(db_appointment, old_rollup_key)
         self.db.commit()
         self.db.refresh(db_appointment)
         return db_appointment
 
     def cancel(self, appointment_id: int) -> Optional[Appointment]:
         """Cancela uma appointment, definindo o status 'Canceled'."""
-        canceled_status = self.db.query(Status).filter(Status.name == APPOINTMENT_STATUS_CANCELED).first()
-        if not canceled_status:
+        canceled_status_id = status_registry.get_id(self.db, APPOINTMENT_STATUS_CANCELED)
+        if canceled_status_id is None:
             raise RuntimeError(f"Status '{APPOINTMENT_STATUS_CANCELED}' not found in the database.")
 
-        update_data = AppointmentUpdate(status=canceled_status.name)
+        update_data = AppointmentUpdate(status_id=canceled_status_id)
         return self.update(appointment_id=appointment_id, appointment_data=update_data)
 
     def finalize(self, appointment_id: int) -> Optional[Appointment]:
         """Finaliza uma appointment, definindo o status 'Finalized'."""
-        finalized_status = self.db.query(Status).filter(Status.name == APPOINTMENT_STATUS_FINALIZED).first()
-        if not finalized_status:
+        finalized_status_id = status_registry.get_id(self.db, APPOINTMENT_STATUS_FINALIZED)
+        if finalized_status_id is None:
             raise RuntimeError(f"Status '{APPOINTMENT_STATUS_FINALIZED}' not found in the database.")
 
-        update_data = AppointmentUpdate(status=finalized_status.name)
+        update_data = AppointmentUpdate(status_id=finalized_status_id)
         return self.update(appointment_id=appointment_id, appointment_data=update_data)
   
 
@@ -416,18 +462,15 @@ class AppointmentRepository:
             "Canceled",
         ]
 
-        found_status = None
-        for name in candidates:
-            found_status = self.db.query(Status).filter(Status.name == name).first()
-            if found_status:
-                break
+        # resolvido em memória (nomes e aliases) pelo StatusRegistry
+        found_status_id = status_registry.get_first_id(self.db, candidates)
 
-        if found_status:
+        if found_status_id is not None:
             # aplica status_id quando disponível
             if hasattr(db_appointment, "status_id"):
-                db_appointment.status_id = found_status.id
+                self.rollup.set_status(db_appointment, found_status_id)
             elif hasattr(db_appointment, "status"):
-                db_appointment.status = found_status.name
+                db_appointment.status = status_registry.name_of(self.db, found_status_id)
 
             self.db.add(db_appointment)
             self.db.commit()
@@ -486,9 +529,8 @@ class AppointmentRepository:
             comment=f"Pedido de serviço extra '{service_name}' enviado ao cliente para aprovação (Preço: €{price or 0:.2f})",
         )
         self.db.add(comment)
-        self.db.commit()
 
-        # Enviar email se o serviço for fornecido
+        # Enviar email se o serviço for fornecido (no mesmo commit que o comentário)
         if email_service:
             try:
                 customer_email = self._get_customer_email(db_appointment.customer_id)
@@ -503,12 +545,14 @@ class AppointmentRepository:
                         vehicle_plate=vehicle_plate,
                         extra_service_name=db_request.name or "Serviço Extra",
                         price=db_request.price or 0.0,
-                        description=db_request.description or ""
+                        description=db_request.description or "",
+                        db=self.db,
                     )
                     print(f" Proposta de serviço extra enviada para {customer_email}.")
             except Exception as e:
                 print(f" ERRO ao enviar proposta de serviço extra: {e}")
 
+        self.db.commit()
         return db_request
 
     def approve_extra_service_request(self, request_id: int) -> Optional[AppointmentExtraService]:
@@ -534,6 +578,8 @@ class AppointmentRepository:
         if appointment:
             appointment.actual_budget = (appointment.actual_budget or 0.0) + (applied_price or 0.0)
 
+        # Reservas das peças passam a saídas de stock
+        self._move_extra_service_stock(req, "approved")
         req.status = "approved"
         
         # Criar comentário sobre a aprovação do serviço extra
@@ -557,6 +603,8 @@ class AppointmentRepository:
         if not req:
             return None
 
+        # Liberta as reservas (ou devolve as peças, se já estava aprovado)
+        self._move_extra_service_stock(req, "rejected")
         req.status = "rejected"
         
         # Criar comentário sobre a rejeição do serviço extra
@@ -598,11 +646,14 @@ class AppointmentRepository:
         )
         self.db.add(comment)
         
+        # Liberta as reservas e elimina as peças do pedido (não passam a peças do serviço base)
+        self._move_extra_service_stock(req, "cancelled")
+        self.db.query(OrderPart).filter(OrderPart.extra_service_id == req.id).delete(synchronize_session=False)
+
         # Elimina o pedido
         self.db.delete(req)
-        self.db.commit()
-        
-        # Enviar email se o serviço for fornecido
+
+        # Enviar email se o serviço for fornecido (no mesmo commit que o cancelamento)
         if email_service and db_appointment:
             try:
                 customer_email = self._get_customer_email(db_appointment.customer_id)
@@ -614,11 +665,14 @@ class AppointmentRepository:
                         customer_email=customer_email,
                         customer_name=customer_name,
                         vehicle_plate=vehicle_plate,
-                        extra_service_name=service_name
+                        extra_service_name=service_name,
+                        db=self.db,
                     )
                     print(f"✅ Email de cancelamento de serviço extra enviado para {customer_email}.")
             except Exception as e:
                 print(f"❌ ERRO ao enviar email de cancelamento de serviço extra: {e}")
+
+        self.db.commit()
         
         return True
 
@@ -627,55 +681,98 @@ class AppointmentRepository:
         Adiciona uma peça à ordem de serviço.
         Se extra_service_id for fornecido, a peça é associada ao serviço extra.
         Caso contrário, é uma peça do serviço base.
+        O stock sai num UPDATE condicional (StockRepository), seguro com pedidos em paralelo;
+        as peças de um serviço extra ainda pendente ficam só reservadas até à resposta do cliente.
         """
         appointment = self.db.query(Appointment).filter(Appointment.id == appointment_id).first()
         if not appointment:
             return None
-        
-        product = self.db.query(Product).filter(Product.id == product_id).first()
-        if not product:
-            raise HTTPException(status_code=404, detail="Produto não encontrado")
-        
-        # Verifica stock
-        if product.quantity < quantity:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Stock insuficiente! Disponível: {product.quantity}"
-            )
-        
-        # Desconta do stock
-        product.quantity -= quantity
-        
-        # Verificar se ficou abaixo do estoque mínimo e enviar notificação
-        if product.quantity <= product.minimum_stock:
-            try:
-                from app.services.notification_service import NotificationService
-                NotificationService.notify_low_stock(
-                    db=self.db,
-                    product_name=product.name,
-                    current_quantity=product.quantity,
-                    min_quantity=product.minimum_stock
-                )
-            except Exception as e:
-                print(f"Erro ao enviar notificação de estoque baixo: {e}")
-        
+
+        extra = None
+        if extra_service_id is not None:
+            extra = self.db.query(AppointmentExtraService).filter(
+                AppointmentExtraService.id == extra_service_id,
+                AppointmentExtraService.appointment_id == appointment_id
+            ).first()
+            if not extra:
+                raise HTTPException(status_code=404, detail="Serviço extra não encontrado")
+            if extra.status == "rejected":
+                raise HTTPException(status_code=400, detail="Serviço extra rejeitado pelo cliente")
+
+        stock = StockRepository(self.db)
+        if extra is not None and extra.status == "pending":
+            level = stock.hold(product_id, quantity)
+        else:
+            level = stock.consume(product_id, quantity, reference=f"appointment:{appointment_id}")
+
         new_part = OrderPart( 
             appointment_id=appointment_id,
-            product_id=product.id,
+            product_id=level.product_id,
             extra_service_id=extra_service_id,  # NULL para serviço base
-            name=product.name,
-            part_number=product.part_number,
+            name=level.name,
+            part_number=level.part_number,
             quantity=quantity,
-            price=product.sale_value
+            price=level.sale_value
         )
         
         self.db.add(new_part)
         self.db.commit()
         self.db.refresh(appointment)
-        self.db.refresh(product)
         
         return appointment
 
+    def remove_part(self, appointment_id: int, part_id: int) -> bool:
+        """
+        Apaga uma peça da ordem de serviço e devolve-a ao stock
+        (ou liberta a reserva, se for de um serviço extra pendente).
+        """
+        part = self.db.query(OrderPart).filter(
+            OrderPart.id == part_id,
+            OrderPart.appointment_id == appointment_id
+        ).first()
+        if not part:
+            return False
+
+        if part.product_id:
+            extra_status = None
+            if part.extra_service_id is not None:
+                extra_status = self.db.query(AppointmentExtraService.status).filter(
+                    AppointmentExtraService.id == part.extra_service_id
+                ).scalar()
+            stock = StockRepository(self.db)
+            if extra_status == "pending":
+                stock.release(part.product_id, part.quantity)
+            elif extra_status != "rejected":
+                stock.restock(part.product_id, part.quantity, reference=f"appointment:{appointment_id}")
+
+        self.db.delete(part)
+        self.db.commit()
+        return True
+
+    def _move_extra_service_stock(self, req: AppointmentExtraService, new_status: str) -> None:
+        """
+        Acerta o stock das peças de um serviço extra quando muda de estado
+        (só há reservas enquanto está 'pending'; aprovado = peças retiradas do stock).
+        """
+        stock = StockRepository(self.db)
+        reference = f"appointment:{req.appointment_id}"
+        moves = {
+            ("pending", "approved"): lambda product_id, quantity: stock.commit_hold(product_id, quantity, EXTRA_APPROVED, reference),
+            ("pending", "rejected"): stock.release,
+            ("pending", "cancelled"): stock.release,
+            ("rejected", "approved"): lambda product_id, quantity: stock.consume(product_id, quantity, EXTRA_APPROVED, reference),
+            ("approved", "rejected"): lambda product_id, quantity: stock.restock(product_id, quantity, EXTRA_RETURNED, reference),
+        }
+        move = moves.get((req.status, new_status))
+        if not move:
+            return
+        parts = self.db.query(OrderPart.product_id, OrderPart.quantity).filter(
+            OrderPart.extra_service_id == req.id,
+            OrderPart.product_id.isnot(None)
+        ).all()
+        for product_id, quantity in parts:
+            move(product_id, quantity)
+
     def start_work(self, appointment_id: int, employee_id: Optional[int] = None) -> Optional[Appointment]:
         """Inicia o trabalho na appointment: define start_time, employee responsável e status para 'In Repair'."""
         db_appointment = self.get_by_id(appointment_id=appointment_id)
@@ -694,13 +791,7 @@ class AppointmentRepository:
         db_appointment.pause_time = None
         
         # Muda status para "In Repair"
-        in_repair_status = self.db.query(Status).filter(Status.name == "In Repair").first()
-        if not in_repair_status:
-            in_repair_status = Status(name="In Repair")
-            self.db.add(in_repair_status)
-            self.db.commit()
-            self.db.refresh(in_repair_status)
-        db_appointment.status_id = in_repair_status.id
+        self.rollup.set_status(db_appointment, status_registry.get_or_create_id(self.db, "In Repair"))
         
         #  Comentário SEMPRE que inicia
         comment = OrderComment(
@@ -720,13 +811,13 @@ class AppointmentRepository:
                         customer_email=db_appointment.customer.auth.email,
                         customer_name=customer_name,
                         service_name=service_name,
-                        vehicle_plate=vehicle_plate
+                        vehicle_plate=vehicle_plate,
+                        db=self.db,
                     )
                 print(f"Email de início de trabalho enviado para {db_appointment.customer.auth.email}")
         except Exception as e:
             print(f"Erro ao enviar email de início de trabalho: {e}")
         
-            
         self.db.commit()
         self.db.refresh(db_appointment)
         return db_appointment
@@ -748,13 +839,7 @@ class AppointmentRepository:
         # Quando pausado, continua "Em Reparação" mas com flag is_paused = True
             
         # Muda status para "Pendente" quando pausado
-        pending_status = self.db.query(Status).filter(Status.name == "Pendente").first()
-        if not pending_status:
-            pending_status = Status(name="Pendente")
-            self.db.add(pending_status)
-            self.db.commit()
-            self.db.refresh(pending_status)
-        db_appointment.status_id = pending_status.id
+        self.rollup.set_status(db_appointment, status_registry.get_or_create_id(self.db, "Pendente"))
                 
         comment = OrderComment(
             service_order_id=appointment_id,
@@ -778,13 +863,7 @@ class AppointmentRepository:
         db_appointment.pause_time = None
 
         # Retoma status "In Repair"
-        in_repair_status = self.db.query(Status).filter(Status.name == "In Repair").first()
-        if not in_repair_status:
-            in_repair_status = Status(name="In Repair")
-            self.db.add(in_repair_status)
-            self.db.commit()
-            self.db.refresh(in_repair_status)
-        db_appointment.status_id = in_repair_status.id
+        self.rollup.set_status(db_appointment, status_registry.get_or_create_id(self.db, "In Repair"))
             
         comment = OrderComment(
             service_order_id=appointment_id,
@@ -821,13 +900,7 @@ class AppointmentRepository:
         db_appointment.start_time = None
 
         # Muda status para "Waitting Payment" (aguardando pagamento do cliente)
-        waitting_payment_status = self.db.query(Status).filter(Status.name == "Waitting Payment").first()
-        if not waitting_payment_status:
-            waitting_payment_status = Status(name="Waitting Payment")
-            self.db.add(waitting_payment_status)
-            self.db.commit()
-            self.db.refresh(waitting_payment_status)
-        db_appointment.status_id = waitting_payment_status.id
+        self.rollup.set_status(db_appointment, status_registry.get_or_create_id(self.db, "Waitting Payment"))
             
         comment = OrderComment(
             service_order_id=appointment_id,
@@ -846,7 +919,8 @@ class AppointmentRepository:
                     customer_email=db_appointment.customer.auth.email,
                     customer_name=customer_name,
                     service_name=service_name,
-                    vehicle_plate=vehicle_plate
+                    vehicle_plate=vehicle_plate,
+                    db=self.db,
                 )
                 print(f"Email de trabalho finalizado enviado para {db_appointment.customer.auth.email}")
         except Exception as e:
@@ -2,8 +2,10 @@ from sqlalchemy.orm import Session
 from app.models.customer import Customer
 from app.models.appointment import Appointment
 from app.schemas.customer import CustomerCreate, CustomerUpdate
+from app.crud.pagination import Page, SortKey, paginate
 from typing import List, Optional
 from datetime import datetime
+from app.core.principal import CUSTOMER, revoke_tokens
 
 from app.schemas.customer import CustomerCreate
 
@@ -35,7 +37,12 @@ class CustomerRepository:
 
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Customer]:
         """Gets a list of all customers."""
-        return self.db.query(Customer).filter(Customer.deleted_at.is_(None)).order_by(Customer.id).offset(skip).limit(limit).all()
+        return self.page(limit=limit, skip=skip).items
+
+    def page(self, limit: int = 100, cursor: Optional[str] = None, skip: int = 0, total: Optional[str] = None) -> Page:
+        """Gets a page of customers ordered by id, by cursor or by skip."""
+        query = self.db.query(Customer).filter(Customer.deleted_at.is_(None))
+        return paginate(query, [SortKey(Customer.id)], limit, cursor, skip, total)
 
     def create(self, customer: CustomerCreate) -> Customer:
         """Creates a new customer."""
@@ -68,6 +75,7 @@ class CustomerRepository:
             db_customer.deleted_at = datetime.utcnow()
             db_customer.is_active = False
             self.db.commit()
+            revoke_tokens(self.db, CUSTOMER, [customer_id])
             return True
         return False
 
@@ -0,0 +1,141 @@
+from typing import List, Sequence
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from app.models.email_outbox import (
+    EmailOutbox,
+    EMAIL_STATUS_PENDING,
+    EMAIL_STATUS_SENDING,
+    EMAIL_STATUS_SENT,
+    EMAIL_STATUS_FAILED,
+)
+
+
+class EmailOutboxRepository:
+    """
+    Repositório da fila email_outbox.
+    - enqueue: usado pelo EmailService (retorna logo após o INSERT),
+    - claim_batch/mark_sent/mark_failed: usados pelo EmailOutboxWorker.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(self, to_email: str, subject: str, body: str) -> EmailOutbox:
+        """Insere um email na fila (pronto a enviar de imediato)."""
+        db_email = self.add(to_email, subject, body)
+        self.db.commit()
+        self.db.refresh(db_email)
+        return db_email
+
+    def add(self, to_email: str, subject: str, body: str) -> EmailOutbox:
+        """
+        Adiciona um email à fila sem fazer commit, para que seja gravado na
+        mesma transação que a alteração que o originou (ex.: reminder_sent).
+        """
+        now = datetime.now()
+        db_email = EmailOutbox(
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            status=EMAIL_STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now,
+        )
+        self.db.add(db_email)
+        return db_email
+
+    def release_expired_claims(self) -> int:
+        """Devolve à fila os lotes cujo worker não terminou dentro do prazo (ex.: crash)."""
+        released = (
+            self.db.query(EmailOutbox)
+            .filter(
+                EmailOutbox.status == EMAIL_STATUS_SENDING,
+                EmailOutbox.claimed_until < datetime.now(),
+            )
+            .update(
+                {EmailOutbox.status: EMAIL_STATUS_PENDING, EmailOutbox.claim_token: None},
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return released
+
+    def claim_batch(self, limit: int, lease_seconds: int) -> List[EmailOutbox]:
+        """
+        Reclama até `limit` emails prontos a enviar.
+        O UPDATE condicional (status ainda 'pending') garante que dois workers
+        nunca ficam com o mesmo email; cada um lê depois apenas o seu token.
+        """
+        now = datetime.now()
+        candidate_ids = [
+            email_id for (email_id,) in (
+                self.db.query(EmailOutbox.id)
+                .filter(
+                    EmailOutbox.status == EMAIL_STATUS_PENDING,
+                    EmailOutbox.next_attempt_at <= now,
+                )
+                .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+                .limit(limit)
+                .all()
+            )
+        ]
+        if not candidate_ids:
+            return []
+
+        token = uuid4().hex
+        self.db.query(EmailOutbox).filter(
+            EmailOutbox.id.in_(candidate_ids),
+            EmailOutbox.status == EMAIL_STATUS_PENDING,
+        ).update(
+            {
+                EmailOutbox.status: EMAIL_STATUS_SENDING,
+                EmailOutbox.claim_token: token,
+                EmailOutbox.claimed_until: now + timedelta(seconds=lease_seconds),
+            },
+            synchronize_session=False,
+        )
+        self.db.commit()
+
+        return (
+            self.db.query(EmailOutbox)
+            .filter(EmailOutbox.claim_token == token, EmailOutbox.status == EMAIL_STATUS_SENDING)
+            .order_by(EmailOutbox.id)
+            .all()
+        )
+
+    def mark_sent(self, email_ids: Sequence[int]) -> None:
+        """Marca um lote como enviado com um único UPDATE."""
+        if not email_ids:
+            return
+        now = datetime.now()
+        self.db.query(EmailOutbox).filter(EmailOutbox.id.in_(list(email_ids))).update(
+            {
+                EmailOutbox.status: EMAIL_STATUS_SENT,
+                EmailOutbox.sent_at: now,
+                EmailOutbox.attempts: EmailOutbox.attempts + 1,
+                EmailOutbox.claim_token: None,
+                EmailOutbox.last_error: None,
+            },
+            synchronize_session=False,
+        )
+
+    def mark_failed(self, db_email: EmailOutbox, error: str, max_attempts: int, backoff_seconds: float) -> None:
+        """
+        Regista uma falha de envio: volta à fila com backoff exponencial
+        (backoff * 2^(tentativas-1)) ou fica 'failed' ao atingir max_attempts.
+        """
+        db_email.attempts = (db_email.attempts or 0) + 1
+        db_email.last_error = (error or "")[:1000]
+        db_email.claim_token = None
+        if db_email.attempts >= max_attempts:
+            db_email.status = EMAIL_STATUS_FAILED
+        else:
+            db_email.status = EMAIL_STATUS_PENDING
+            delay = backoff_seconds * (2 ** (db_email.attempts - 1))
+            db_email.next_attempt_at = datetime.now() + timedelta(seconds=delay)
+
+    def count_by_status(self, status: str) -> int:
+        return self.db.query(EmailOutbox).filter(EmailOutbox.status == status).count()
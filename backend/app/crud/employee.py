@@ -5,6 +5,10 @@ from app.models.user import User
 from app.schemas.employee import EmployeeCreate, EmployeeUpdate
 from app.crud import user as crud_user
 from app.schemas.user import UserCreate
+from app.services.role_scope import invalidate_role_scopes
+from app.services.notification_service import invalidate_notification_audiences
+from app.core.principal import revoke_employee_tokens
+from app.crud.pagination import Page, SortKey, paginate
 from typing import List, Optional
 from datetime import datetime
 
@@ -27,7 +31,11 @@ class EmployeeRepository:
 
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Employee]:
         """Gets a list of all employees, with pagination."""
-        return self.db.query(Employee).order_by(Employee.id).offset(skip).limit(limit).all()
+        return self.page(limit=limit, skip=skip).items
+
+    def page(self, limit: int = 100, cursor: Optional[str] = None, skip: int = 0, total: Optional[str] = None) -> Page:
+        """Gets a page of employees ordered by id, by cursor or by skip."""
+        return paginate(self.db.query(Employee), [SortKey(Employee.id)], limit, cursor, skip, total)
     
     
     def create(self, employee: EmployeeCreate) -> Employee:
@@ -57,6 +65,8 @@ class EmployeeRepository:
             db_user.requires_password_change = True
             
         self.db.commit()
+        invalidate_role_scopes()
+        invalidate_notification_audiences()
         self.db.refresh(db_employee)
         return db_employee
     
@@ -67,6 +77,12 @@ class EmployeeRepository:
             return None
             
         update_data = employee_data.model_dump(exclude_unset=True)
+        previous_email = db_employee.email
+        # Campos que entram nos claims do token (cargo, gestor, acesso): revogar os tokens
+        scope_changed = any(
+            field in update_data and update_data[field] != getattr(db_employee, field)
+            for field in ("role_id", "is_manager", "email", "has_system_access")
+        )
         
         # Check if has_system_access is being changed
         old_has_access = db_employee.has_system_access
@@ -103,6 +119,10 @@ class EmployeeRepository:
             pass
         
         self.db.commit()
+        invalidate_role_scopes()
+        invalidate_notification_audiences()
+        if scope_changed:
+            revoke_employee_tokens(self.db, [employee_id], [previous_email])
         self.db.refresh(db_employee)
         return db_employee
     
@@ -115,5 +135,8 @@ class EmployeeRepository:
         if db_employee:
             db_employee.deleted_at = datetime.utcnow()
             self.db.commit()
+            invalidate_role_scopes()
+            invalidate_notification_audiences()
+            revoke_employee_tokens(self.db, [employee_id], [db_employee.email])
             return True
         return False
\ No newline at end of file
@@ -0,0 +1,183 @@
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.invoice import Invoice
+from app.models.product import Product
+from app.models.invoice_line import InvoiceLine, PART
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.crud.stock_ledger import StockLedgerRepository
+from app.exceptions import ValidationError
+
+PAID = "paid"
+
+
+def parse_date_range(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Converte start_date/end_date (YYYY-MM-DD) em [início, fim exclusivo): o dia final
+    é incluído por inteiro (paid_at < end_date + 1 dia).
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) if end_date else None
+    except ValueError:
+        raise ValidationError("Datas no formato YYYY-MM-DD", code="INVALID_DATE")
+    if start and end and start >= end:
+        raise ValidationError("start_date posterior a end_date", code="INVALID_DATE_RANGE")
+    return start, end
+
+
+class FinanceRepository:
+    """
+    Agregações financeiras calculadas na BD (SUM/COUNT/GROUP BY), sem carregar
+    faturas ou produtos para Python:
+    - overview: receita/nº de faturas pagas no período e valor do inventário,
+    - parts: relatório por peça (inventário ou invoice_lines vendidas), ordenado e paginado em SQL,
+    - services: receita por serviço no período,
+    - stock / consumed: inventário numa data e peças consumidas no período (ledger de stock).
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _paid_in(self, query, start: Optional[datetime], end: Optional[datetime]):
+        query = query.filter(Invoice.payment_status == PAID)
+        if start:
+            query = query.filter(Invoice.paid_at >= start)
+        if end:
+            query = query.filter(Invoice.paid_at < end)
+        return query
+
+    def overview(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> dict:
+        """Uma consulta para as faturas pagas e outra para o inventário."""
+        revenue, invoices = self._paid_in(
+            self.db.query(func.coalesce(func.sum(Invoice.total), 0), func.count(Invoice.id)), start, end
+        ).one()
+
+        quantity = func.coalesce(Product.quantity, 0)
+        expenses, potential_revenue = (
+            self.db.query(
+                func.coalesce(func.sum(Product.cost_value * quantity), 0),
+                func.coalesce(func.sum(Product.sale_value * quantity), 0),
+            )
+            .filter(Product.deleted_at.is_(None))
+            .one()
+        )
+        return {
+            "total_revenue": round(float(revenue), 2),
+            "total_expenses": round(float(expenses), 2),
+            "total_profit": round(float(potential_revenue) - float(expenses), 2),
+            "total_invoices": int(invoices),
+        }
+
+    def parts(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None, skip: int = 0, limit: int = 100,
+        part_number: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Sem período: inventário atual (peças em stock, valor a custo e a preço de venda).
+        Com período: receita por part number das faturas pagas no período (invoice_lines),
+        com o custo guardado na linha da fatura. Ordenado por lucro decrescente.
+        """
+        if start or end:
+            query = self._sold_parts(start, end, part_number)
+        else:
+            query = self._stock_parts()
+            if part_number:
+                query = query.filter(Product.part_number == part_number)
+        rows = query.offset(skip).limit(limit).all()
+        return [
+            {
+                "part_number": row.part_number,
+                "name": row.name,
+                "quantity_sold": int(row.quantity or 0),
+                "total_cost": round(float(row.total_cost or 0), 2),
+                "total_revenue": round(float(row.total_revenue or 0), 2),
+                "total_profit": round(float(row.total_profit or 0), 2),
+            }
+            for row in rows
+        ]
+
+    def _stock_parts(self):
+        total_cost = (Product.cost_value * Product.quantity).label("total_cost")
+        total_revenue = (Product.sale_value * Product.quantity).label("total_revenue")
+        total_profit = ((Product.sale_value - Product.cost_value) * Product.quantity).label("total_profit")
+        return (
+            self.db.query(
+                Product.part_number, Product.name, Product.quantity.label("quantity"),
+                total_cost, total_revenue, total_profit,
+            )
+            .filter(Product.deleted_at.is_(None), Product.quantity > 0)
+            .order_by(total_profit.desc(), Product.id)
+        )
+
+    def _sold_parts(self, start: Optional[datetime], end: Optional[datetime], part_number: Optional[str] = None):
+        cost = func.coalesce(InvoiceLine.unit_cost, 0)
+        total_cost = func.sum(InvoiceLine.quantity * cost).label("total_cost")
+        total_revenue = func.sum(InvoiceLine.total).label("total_revenue")
+        total_profit = func.sum(InvoiceLine.total - InvoiceLine.quantity * cost).label("total_profit")
+        key = func.coalesce(InvoiceLine.part_number, InvoiceLine.name)
+        query = self._paid_in(
+            self.db.query(
+                key.label("part_number"),
+                func.max(InvoiceLine.name).label("name"),
+                func.sum(InvoiceLine.quantity).label("quantity"),
+                total_cost, total_revenue, total_profit,
+            )
+            .select_from(Invoice)
+            .join(InvoiceLine, InvoiceLine.invoice_id == Invoice.id)
+            .filter(InvoiceLine.kind == PART),
+            start, end,
+        )
+        if part_number:
+            query = query.filter(InvoiceLine.part_number == part_number)
+        return query.group_by(key).order_by(total_profit.desc(), key)
+
+    def services(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[dict]:
+        """Receita por serviço das appointments com fatura paga no período."""
+        total_revenue = func.sum(Service.price).label("total_revenue")
+        query = self._paid_in(
+            self.db.query(
+                Appointment.service_id,
+                Service.name.label("service_name"),
+                func.count(Appointment.id).label("count"),
+                total_revenue,
+            )
+            .join(Invoice, Invoice.appointment_id == Appointment.id)
+            .join(Service, Service.id == Appointment.service_id),
+            start, end,
+        )
+        rows = query.group_by(Appointment.service_id, Service.name).order_by(total_revenue.desc()).all()
+        return [
+            {
+                "service_id": row.service_id,
+                "service_name": row.service_name,
+                "count": row.count,
+                "total_revenue": round(float(row.total_revenue) if row.total_revenue else 0, 2),
+            }
+            for row in rows
+        ]
+
+    def stock(
+        self, at: Optional[datetime] = None, skip: int = 0, limit: int = 100, product_id: Optional[int] = None
+    ) -> dict:
+        """Quantidade e valorização do inventário em `at` (checkpoint + replay, ver StockLedgerRepository)."""
+        at = at or datetime.utcnow()
+        ledger = StockLedgerRepository(self.db)
+        totals = ledger.valuation_at(at)
+        return {
+            "at": at.isoformat(),
+            "checkpoint": totals["checkpoint"].isoformat() if totals["checkpoint"] else None,
+            "products": totals["products"],
+            "total_quantity": totals["total_quantity"],
+            "total_value": totals["total_value"],
+            "items": ledger.levels_at(at, skip, limit, product_id),
+        }
+
+    def consumed(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None, skip: int = 0, limit: int = 100
+    ) -> List[dict]:
+        """Peças consumidas pelas ordens de serviço no período, ao custo de cada saída."""
+        return StockLedgerRepository(self.db).consumed(start, end, skip, limit)
@@ -0,0 +1,126 @@
+from typing import Callable, Dict, Iterable, List, Optional
+import json
+import re
+
+from sqlalchemy.orm import Session
+
+from app.models.invoice import Invoice
+from app.models.invoice_line import InvoiceLine, LABOR, PART
+from app.models.product import Product
+from app.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# "Nome da peça (PART-NUMBER)" — formato escrito em line_items pelo create_invoice_from_session
+_PART_NAME = re.compile(r"^(?P<name>.*)\s\((?P<part_number>[^()]*)\)$")
+
+
+def parse_line_items(raw: Optional[str]) -> List[dict]:
+    """
+    Converte o JSON de Invoice.line_items em linhas de invoice_lines (sem invoice_id).
+    Peças têm descrição "Peça - ..." e o part number entre parênteses no nome; o resto é mão de obra.
+    """
+    try:
+        items = json.loads(raw) if raw else []
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(items, list):
+        return []
+
+    lines = []
+    for line_no, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            continue
+        description = item.get("description")
+        name = str(item.get("name") or description or "")
+        part_number = None
+        kind = PART if str(description or "").startswith("Peça") else LABOR
+        if kind == PART:
+            match = _PART_NAME.match(name)
+            if match:
+                name = match.group("name")
+                part_number = None if match.group("part_number") == "N/A" else match.group("part_number")
+        quantity = int(item.get("quantity") or 1)
+        unit_price = float(item.get("unit_price") or 0)
+        lines.append({
+            "line_no": line_no,
+            "kind": kind,
+            "name": name[:255],
+            "description": description,
+            "part_number": part_number,
+            "product_id": None,
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "unit_cost": None,
+            "total": float(item.get("total") if item.get("total") is not None else unit_price * quantity),
+        })
+    return lines
+
+
+class InvoiceLineRepository:
+    """
+    Repositório para a tabela invoice_lines.
+    - add: linhas de uma fatura nova (na transação do chamador, sem commit),
+    - backfill: preenche as faturas antigas a partir do JSON line_items, por blocos.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add(self, invoice_id: int, lines: Iterable[dict]) -> None:
+        # INSERT da tabela (executemany de Core): o bulk insert do ORM faz um INSERT por linha
+        rows = [{**line, "invoice_id": invoice_id} for line in lines]
+        if rows:
+            self.db.execute(InvoiceLine.__table__.insert(), rows)
+
+    def _costs_by_part_number(self, part_numbers: Iterable[str]) -> Dict[str, tuple]:
+        part_numbers = sorted({pn for pn in part_numbers if pn})
+        if not part_numbers:
+            return {}
+        rows = (
+            self.db.query(Product.part_number, Product.id, Product.cost_value)
+            .filter(Product.part_number.in_(part_numbers))
+            .all()
+        )
+        return {part_number: (product_id, cost) for part_number, product_id, cost in rows}
+
+    def backfill(self, chunk_size: int = 1000, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Processa as faturas sem linhas por ordem de id, `chunk_size` de cada vez (keyset),
+        com um commit por bloco: pode ser interrompido e retomado. product_id/unit_cost
+        vêm do produto atual com o mesmo part number (o custo histórico não foi guardado).
+        Retorna o nº de faturas processadas.
+        """
+        has_lines = self.db.query(InvoiceLine.id).filter(InvoiceLine.invoice_id == Invoice.id).exists()
+        last_id, processed = 0, 0
+        while True:
+            chunk = (
+                self.db.query(Invoice.id, Invoice.line_items)
+                .filter(Invoice.id > last_id, ~has_lines)
+                .order_by(Invoice.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not chunk:
+                break
+            parsed = [(invoice_id, parse_line_items(raw)) for invoice_id, raw in chunk]
+            costs = self._costs_by_part_number(line["part_number"] for _, lines in parsed for line in lines)
+            rows = []
+            for invoice_id, lines in parsed:
+                for line in lines:
+                    product_id, cost = costs.get(line["part_number"], (None, None))
+                    rows.append({**line, "invoice_id": invoice_id, "product_id": product_id, "unit_cost": cost})
+            try:
+                if rows:
+                    self.db.execute(InvoiceLine.__table__.insert(), rows)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            last_id = chunk[-1][0]
+            processed += len(chunk)
+            if progress:
+                progress(processed, last_id)
+            # Liberta os objetos do bloco: a memória não cresce com o nº de faturas
+            self.db.expunge_all()
+        logger.info(f"invoice_lines: {processed} faturas processadas")
+        return processed
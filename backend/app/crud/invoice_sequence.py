@@ -0,0 +1,63 @@
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.invoice import Invoice
+from app.models.invoice_sequence import InvoiceSequence
+
+
+class InvoiceSequenceRepository:
+    """
+    Repositório da tabela invoice_sequences.
+    - ensure: cria a sequência (uma vez) a seguir às faturas existentes,
+    - advance: reserva `step` números com um único UPDATE atómico.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, name: str) -> Optional[InvoiceSequence]:
+        return self.db.query(InvoiceSequence).filter(InvoiceSequence.name == name).first()
+
+    def ensure(self, name: str) -> None:
+        """
+        Cria a linha da sequência se ainda não existir. O valor inicial segue a
+        numeração anterior (id da última fatura + 1), pelo que os números já
+        emitidos nunca são repetidos. Faz commit.
+        """
+        if self.get(name):
+            return
+        last_id = self.db.query(func.max(Invoice.id)).scalar() or 0
+        try:
+            self.db.add(InvoiceSequence(name=name, next_value=last_id + 1))
+            self.db.commit()
+        except IntegrityError:
+            # Outro processo criou a sequência ao mesmo tempo
+            self.db.rollback()
+
+    def advance(self, name: str, step: int = 1) -> int:
+        """
+        Avança a sequência `step` números e retorna o primeiro reservado
+        (na transação atual - sem commit).
+
+        O UPDATE bloqueia a linha até ao fim da transação (SQL Server/Postgres:
+        lock de linha; SQLite: lock de escrita da BD), por isso duas transações
+        concorrentes nunca leem o mesmo valor.
+        """
+        updated = (
+            self.db.query(InvoiceSequence)
+            .filter(InvoiceSequence.name == name)
+            .update(
+                {InvoiceSequence.next_value: InvoiceSequence.next_value + step},
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            raise LookupError(f"Invoice sequence '{name}' does not exist")
+        next_value = (
+            self.db.query(InvoiceSequence.next_value)
+            .filter(InvoiceSequence.name == name)
+            .scalar()
+        )
+        return next_value - step
@@ -0,0 +1,218 @@
+from typing import Optional, Tuple
+from datetime import date, datetime, time, timedelta
+import threading
+
+from sqlalchemy import func, cast, Date, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.models.metrics_rollup import MetricsDailyRollup
+from app.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# (day, service_id, status_id, area)
+RollupKey = Tuple[date, Optional[int], Optional[int], Optional[str]]
+
+
+class RollupHealth:
+    """
+    Desvios da manutenção incremental desde a última reconstrução completa:
+    movimentos que falharam e decrementos sem linha no rollup. Com valores > 0
+    os totais do rollup só voltam a estar certos após a reconciliação.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.failed_moves = 0
+        self.missing_rows = 0
+        self.last_error = None
+        self.last_rebuild = None
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.failed_moves += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    def record_missing_row(self):
+        with self._lock:
+            self.missing_rows += 1
+
+    def record_rebuild(self):
+        with self._lock:
+            self.failed_moves = self.missing_rows = 0
+            self.last_error = None
+            self.last_rebuild = datetime.utcnow()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "failed_moves": self.failed_moves,
+                "missing_rows": self.missing_rows,
+                "drifted": bool(self.failed_moves or self.missing_rows),
+                "last_error": self.last_error,
+                "last_rebuild": self.last_rebuild.isoformat() if self.last_rebuild else None,
+            }
+
+
+rollup_health = RollupHealth()
+
+
+class MetricsRollupRepository:
+    """
+    Repositório para a tabela metrics_daily_rollup.
+    - set_status: única escrita de Appointment.status_id (move o rollup com ela),
+    - key_for/move: manutenção incremental quando uma appointment muda,
+    - rebuild: reconstrução (total ou por intervalo) a partir de appointments.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def key_for(self, appointment: Appointment, area: Optional[str] = None) -> Optional[RollupKey]:
+        """
+        Calcula a chave de rollup de uma appointment.
+        Se a área não for fornecida, é lida do serviço (uma leitura por PK).
+        """
+        if not appointment or not appointment.appointment_date:
+            return None
+        if area is None and appointment.service_id is not None:
+            area = self.db.query(Service.area).filter(Service.id == appointment.service_id).scalar()
+        return (
+            appointment.appointment_date.date(),
+            appointment.service_id,
+            appointment.status_id,
+            area,
+        )
+
+    def set_status(self, appointment: Appointment, status_id: Optional[int]) -> None:
+        """
+        Altera o status de uma appointment e move-a no rollup (na transação atual).
+        Todas as mudanças de Appointment.status_id passam por aqui.
+        """
+        old_key = self.key_for(appointment)
+        appointment.status_id = status_id
+        # A área é a do serviço, que não muda com o status
+        self.move(old_key, self.key_for(appointment, area=old_key[3] if old_key else None))
+
+    def move(self, old_key: Optional[RollupKey], new_key: Optional[RollupKey]) -> None:
+        """
+        Transfere uma appointment de old_key para new_key (na transação atual).
+        Erros não interrompem a operação principal: ficam contados em
+        rollup_health (/health/metrics-rollup) e a reconciliação periódica
+        corrige o desvio.
+        """
+        if old_key == new_key:
+            return
+        try:
+            with self.db.begin_nested():
+                self._apply(old_key, -1)
+                self._apply(new_key, 1)
+        except Exception as e:
+            rollup_health.record_failure(e)
+            logger.error(f"Erro ao atualizar metrics_daily_rollup ({old_key} -> {new_key}): {e}", exc_info=True)
+
+    def _apply(self, key: Optional[RollupKey], delta: int) -> None:
+        if key is None:
+            return
+        updated = (
+            self.db.query(MetricsDailyRollup)
+            .filter(*self._key_filter(key))
+            .update(
+                {MetricsDailyRollup.appointment_count: MetricsDailyRollup.appointment_count + delta},
+                synchronize_session=False,
+            )
+        )
+        if updated:
+            return
+        if delta < 0:
+            # Sem linha para decrementar: o rollup já divergiu de appointments
+            rollup_health.record_missing_row()
+            logger.warning(f"metrics_daily_rollup sem linha para decrementar: {key}")
+            return
+
+        day, service_id, status_id, area = key
+        try:
+            with self.db.begin_nested():
+                self.db.add(MetricsDailyRollup(
+                    day=day,
+                    service_id=service_id,
+                    status_id=status_id,
+                    area=area,
+                    appointment_count=delta,
+                ))
+        except IntegrityError:
+            # Outro pedido inseriu a mesma chave entretanto
+            self.db.query(MetricsDailyRollup).filter(*self._key_filter(key)).update(
+                {MetricsDailyRollup.appointment_count: MetricsDailyRollup.appointment_count + delta},
+                synchronize_session=False,
+            )
+
+    @staticmethod
+    def _key_filter(key: RollupKey):
+        day, service_id, status_id, area = key
+
+        def eq(column, value):
+            return column.is_(None) if value is None else column == value
+
+        return [
+            MetricsDailyRollup.day == day,
+            eq(MetricsDailyRollup.service_id, service_id),
+            eq(MetricsDailyRollup.status_id, status_id),
+            eq(MetricsDailyRollup.area, area),
+        ]
+
+    def _day_expression(self):
+        """Expressão SQL que trunca appointment_date ao dia, portável por dialeto."""
+        if self.db.get_bind().dialect.name == "sqlite":
+            return func.date(Appointment.appointment_date)
+        return cast(Appointment.appointment_date, Date)
+
+    def rebuild(self, start_day: Optional[date] = None, end_day: Optional[date] = None) -> int:
+        """
+        Reconstrói o rollup a partir de appointments (INSERT ... SELECT agrupado).
+        Sem intervalo, reconstrói a tabela inteira. Retorna o nº de linhas geradas.
+        """
+        day_expr = self._day_expression()
+
+        source = (
+            self.db.query(
+                day_expr.label("day"),
+                Appointment.service_id,
+                Appointment.status_id,
+                Service.area,
+                func.count(Appointment.id).label("appointment_count"),
+            )
+            .outerjoin(Service, Appointment.service_id == Service.id)
+        )
+        existing = self.db.query(MetricsDailyRollup)
+
+        if start_day:
+            source = source.filter(Appointment.appointment_date >= datetime.combine(start_day, time.min))
+            existing = existing.filter(MetricsDailyRollup.day >= start_day)
+        if end_day:
+            source = source.filter(Appointment.appointment_date < datetime.combine(end_day + timedelta(days=1), time.min))
+            existing = existing.filter(MetricsDailyRollup.day <= end_day)
+
+        source = source.group_by(day_expr, Appointment.service_id, Appointment.status_id, Service.area)
+
+        try:
+            existing.delete(synchronize_session=False)
+            result = self.db.execute(
+                insert(MetricsDailyRollup).from_select(
+                    ["day", "service_id", "status_id", "area", "appointment_count"],
+                    source.statement,
+                )
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        if not start_day and not end_day:
+            rollup_health.record_rebuild()
+        logger.info(f"metrics_daily_rollup reconstruído ({start_day or 'início'} -> {end_day or 'fim'}): {result.rowcount} linhas")
+        return result.rowcount
+
+    def is_empty(self) -> bool:
+        return self.db.query(MetricsDailyRollup.id).first() is None
@@ -3,6 +3,7 @@ from typing import List, Optional
 from datetime import datetime
 from app.models.notificationBadge import Notification as NotificationModel
 from app.schemas import notificationBadge as notification_schema
+from app.crud.notification_counters import NotificationCounterRepository
 
 
 def create_notification(db: Session, notification: notification_schema.NotificationCreate) -> NotificationModel:
@@ -55,6 +56,7 @@ class NotificationRepository:
     def update(self, notification_id: int, notification_data: notification_schema.NotificationCreate) -> Optional[NotificationModel]:
         db_notification = self.get_by_id(notification_id)
         if db_notification:
+            old_component = db_notification.component
             update_data = notification_data.dict()
             field_map = {
                 "component": "component",
@@ -74,6 +76,12 @@ class NotificationRepository:
                     else:
                         setattr(db_notification, attr, value)
             db_notification.updated_at = datetime.utcnow()
+            if db_notification.component != old_component:
+                # As não lidas passam para os contadores do novo componente
+                counters = NotificationCounterRepository(self.db)
+                user_ids = [user_id for user_id, _ in counters.unread_keys_for_notification(notification_id)]
+                counters.remove((user_id, old_component) for user_id in user_ids)
+                counters.add((user_id, db_notification.component) for user_id in user_ids)
             self.db.commit()
             self.db.refresh(db_notification)
         return db_notification
@@ -81,6 +89,8 @@ class NotificationRepository:
     def delete(self, notification_id: int) -> bool:
         db_notification = self.get_by_id(notification_id)
         if db_notification:
+            counters = NotificationCounterRepository(self.db)
+            counters.remove(counters.unread_keys_for_notification(notification_id))
             db_notification.deleted_at = datetime.utcnow()
             self.db.commit()
             return True
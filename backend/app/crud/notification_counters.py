@@ -0,0 +1,171 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import datetime
+
+from sqlalchemy import case, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.notificationBadge import Notification
+from app.models.userNotification import UserNotification
+from app.models.notification_counter import NotificationUnreadCounter
+from app.services.notification_events import queue_event
+from app.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# (user_id, component)
+CounterKey = Tuple[int, str]
+
+
+class NotificationCounterRepository:
+    """
+    Repositório para a tabela notification_unread_counters.
+    - apply/add/remove: manutenção na transação de quem cria, lê ou apaga notificações
+      (sem commit; o chamador faz commit junto com a alteração principal),
+    - counts: leitura dos badges de um utilizador numa só consulta indexada,
+    - rebuild: reconstrução (total ou de um utilizador) a partir das tabelas de origem.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add(self, keys: Iterable[CounterKey]) -> None:
+        """+1 por cada (user_id, component) (chaves repetidas somam)."""
+        self.apply(Counter(keys))
+
+    def remove(self, keys: Iterable[CounterKey]) -> None:
+        """-1 por cada (user_id, component) (chaves repetidas somam)."""
+        self.apply({key: -count for key, count in Counter(keys).items()})
+
+    def apply(self, deltas: Dict[CounterKey, int]) -> None:
+        """
+        Aplica os deltas com um UPDATE por (componente, delta) e um INSERT em lote
+        para os contadores que ainda não existem. Erros são registados e não
+        interrompem a operação principal — a reconstrução periódica corrige desvios.
+        """
+        groups = defaultdict(list)
+        for (user_id, component), delta in deltas.items():
+            if delta:
+                groups[(component, delta)].append(user_id)
+        if not groups:
+            return
+        try:
+            with self.db.begin_nested():
+                for (component, delta), user_ids in groups.items():
+                    self._apply_group(component, delta, user_ids)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar notification_unread_counters: {e}", exc_info=True)
+            return
+        # Deltas dos badges para o canal de push (publicados após o commit)
+        for (component, delta), user_ids in groups.items():
+            queue_event(self.db, user_ids, {"type": "badge", "component": component, "delta": delta})
+
+    def _apply_group(self, component: str, delta: int, user_ids) -> None:
+        counter = NotificationUnreadCounter
+        key_filter = (counter.component == component, counter.user_id.in_(user_ids))
+        if delta > 0:
+            new_value = counter.unread_count + delta
+        else:
+            # Nunca abaixo de zero (contadores ainda não reconstruídos)
+            new_value = case((counter.unread_count + delta > 0, counter.unread_count + delta), else_=0)
+        self.db.query(counter).filter(*key_filter).update(
+            {counter.unread_count: new_value, counter.updated_at: datetime.utcnow()},
+            synchronize_session=False,
+        )
+        if delta < 0:
+            return
+
+        existing = {user_id for (user_id,) in self.db.query(counter.user_id).filter(*key_filter).all()}
+        missing = [user_id for user_id in user_ids if user_id not in existing]
+        if not missing:
+            return
+        now = datetime.utcnow()
+        rows = [{"user_id": user_id, "component": component, "unread_count": delta, "updated_at": now} for user_id in missing]
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(counter), rows)
+        except IntegrityError:
+            # Outro pedido criou algum destes contadores entretanto
+            self.db.query(counter).filter(counter.component == component, counter.user_id.in_(missing)).update(
+                {counter.unread_count: counter.unread_count + delta}, synchronize_session=False
+            )
+
+    def counts(self, user_id: int) -> Dict[str, int]:
+        """Não lidas por componente (componentes a zero omitidos)."""
+        rows = (
+            self.db.query(NotificationUnreadCounter.component, NotificationUnreadCounter.unread_count)
+            .filter(NotificationUnreadCounter.user_id == user_id, NotificationUnreadCounter.unread_count > 0)
+            .all()
+        )
+        return {component: count for component, count in rows}
+
+    def count(self, user_id: int, component: Optional[str] = None) -> int:
+        """Total de não lidas do utilizador, ou só de um componente."""
+        query = self.db.query(func.coalesce(func.sum(NotificationUnreadCounter.unread_count), 0)).filter(
+            NotificationUnreadCounter.user_id == user_id
+        )
+        if component is not None:
+            query = query.filter(NotificationUnreadCounter.component == component)
+        return int(query.scalar() or 0)
+
+    def clear_user(self, user_id: int) -> None:
+        """Todos os contadores do utilizador a zero (marcar todas como lidas)."""
+        self.db.query(NotificationUnreadCounter).filter(
+            NotificationUnreadCounter.user_id == user_id, NotificationUnreadCounter.unread_count != 0
+        ).update({NotificationUnreadCounter.unread_count: 0, NotificationUnreadCounter.updated_at: datetime.utcnow()},
+                 synchronize_session=False)
+        queue_event(self.db, [user_id], {"type": "badge", "reset": True})
+
+    def unread_keys_for_notification(self, notification_id: int):
+        """(user_id, component) de cada ligação não lida de uma notificação ativa."""
+        return (
+            self.db.query(UserNotification.user_id, Notification.component)
+            .join(Notification, UserNotification.notification_id == Notification.id)
+            .filter(
+                UserNotification.notification_id == notification_id,
+                UserNotification.read_at.is_(None),
+                Notification.deleted_at.is_(None),
+            )
+            .all()
+        )
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """
+        Reconstrói os contadores a partir de user_notifications x notifications
+        (INSERT ... SELECT agrupado). Sem user_id, reconstrói a tabela inteira.
+        Retorna o nº de linhas geradas.
+        """
+        source = (
+            self.db.query(
+                UserNotification.user_id,
+                Notification.component,
+                func.count(UserNotification.id).label("unread_count"),
+                func.max(UserNotification.created_at).label("updated_at"),
+            )
+            .join(Notification, UserNotification.notification_id == Notification.id)
+            .filter(UserNotification.read_at.is_(None), Notification.deleted_at.is_(None))
+        )
+        existing = self.db.query(NotificationUnreadCounter)
+        if user_id is not None:
+            source = source.filter(UserNotification.user_id == user_id)
+            existing = existing.filter(NotificationUnreadCounter.user_id == user_id)
+        source = source.group_by(UserNotification.user_id, Notification.component)
+
+        try:
+            existing.delete(synchronize_session=False)
+            result = self.db.execute(
+                insert(NotificationUnreadCounter).from_select(
+                    ["user_id", "component", "unread_count", "updated_at"],
+                    source.statement,
+                )
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        logger.info(f"notification_unread_counters reconstruído ({'utilizador ' + str(user_id) if user_id else 'todos'}): {result.rowcount} linhas")
+        return result.rowcount
+
+    def is_empty(self) -> bool:
+        return self.db.query(NotificationUnreadCounter.id).first() is None
@@ -0,0 +1,72 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.userNotification import UserNotification
+from app.models.notificationBadge import Notification
+from app.crud.pagination import SortKey, paginate
+
+FEED_KEYS = [SortKey(UserNotification.created_at, descending=True), SortKey(UserNotification.id, descending=True)]
+
+
+class NotificationFeedRepository:
+    """
+    Feed de notificações não lidas de um utilizador, já com os detalhes da notificação.
+    Uma única consulta (user_notifications JOIN notifications) por página, ordenada por
+    (created_at, id) descendente e paginada por keyset: o cursor é a posição da última
+    linha devolvida, servida pelo índice ix_user_notifications_unread_feed.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _query(self, user_id: int, component: Optional[str] = None):
+        query = (
+            self.db.query(
+                UserNotification.id,
+                UserNotification.notification_id,
+                UserNotification.user_id,
+                UserNotification.read_at,
+                UserNotification.created_at,
+                Notification.component,
+                Notification.text,
+                Notification.inserted_at,
+                Notification.alert_type,
+            )
+            .join(Notification, UserNotification.notification_id == Notification.id)
+            .filter(
+                UserNotification.user_id == user_id,
+                UserNotification.read_at.is_(None),
+                Notification.deleted_at.is_(None),
+            )
+        )
+        if component is not None:
+            query = query.filter(Notification.component == component)
+        return query
+
+    @staticmethod
+    def _item(row) -> dict:
+        return {
+            "id": row.id,
+            "notification_id": row.notification_id,
+            "user_id": row.user_id,
+            "read_at": row.read_at,
+            "created_at": row.created_at,
+            "component": row.component,
+            "text": row.text,
+            "insertedAt": row.inserted_at.isoformat() if row.inserted_at else None,
+            "alertType": row.alert_type,
+        }
+
+    def page(
+        self, user_id: int, limit: int = 100, cursor: Optional[str] = None, component: Optional[str] = None
+    ) -> dict:
+        """
+        Uma página do feed: {"items": [...], "next_cursor": str | None}.
+        next_cursor é None quando não há mais linhas ("carregar mais" termina).
+        """
+        page = paginate(self._query(user_id, component), FEED_KEYS, limit, cursor)
+        return {"items": [self._item(row) for row in page.items], "next_cursor": page.next_cursor}
+
+    def list(self, user_id: int, skip: int = 0, limit: int = 100, component: Optional[str] = None) -> List[dict]:
+        """Paginação por offset (compatibilidade com ?skip=), também numa só consulta."""
+        return [self._item(row) for row in paginate(self._query(user_id, component), FEED_KEYS, limit, skip=skip).items]
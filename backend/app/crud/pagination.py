@@ -0,0 +1,214 @@
+"""
+Keyset (cursor) pagination shared by the list repositories.
+
+A page is ordered by one or more sort keys whose last key is unique (the id
+tiebreaker), so the position after the last row returned is a tuple of
+values and the next page is a seek on the index instead of an OFFSET scan:
+
+    page = paginate(query, [SortKey(Absence.day, descending=True), SortKey(Absence.id, descending=True)], limit, cursor)
+
+Nullable sort keys are allowed (only the last key must be unique and not
+null): NULL sorts as the smallest value on every dialect (the native order of
+SQLite and SQL Server; NULLS FIRST/LAST is spelled out elsewhere), the cursor
+stores it as null and the seek compares it with IS NULL / IS NOT NULL.
+
+Cursors are opaque to clients (url-safe base64 of the values, bound to the
+sort keys they were produced for). `skip` is still accepted when no cursor is
+given, for clients that page by offset; those pages also return next_cursor.
+
+The optional total is either exact (COUNT over the filtered query) or an
+estimate: a COUNT bounded by PAGINATION_COUNT_CAP rows and, beyond that, the
+table size from the database statistics (SQL Server/PostgreSQL).
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import base64
+import hashlib
+import json
+
+from sqlalchemy import and_, false, func, or_, text
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+from app.exceptions import ValidationError
+
+TOTAL_EXACT = "exact"
+TOTAL_ESTIMATE = "estimate"
+
+
+class InvalidCursorError(ValidationError):
+    """Cursor mal formado ou de outra listagem (o cliente deve recomeçar sem cursor)."""
+    def __init__(self, message: str = "Invalid cursor", code: str = "INVALID_CURSOR"):
+        super().__init__(message, code)
+
+
+@dataclass(frozen=True)
+class SortKey:
+    column: Any
+    descending: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.column.key
+
+    @property
+    def nullable(self) -> bool:
+        # Expressões sem a informação (colunas de subconsultas) contam como nullable
+        return getattr(self.column, "nullable", True)
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_estimated: bool = False
+
+
+def _signature(keys: Sequence[SortKey]) -> str:
+    spec = ",".join(f"{key.name}{'-' if key.descending else '+'}" for key in keys)
+    return hashlib.sha1(spec.encode()).hexdigest()[:8]
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise ValueError(value)
+    return value
+
+
+def encode_cursor(keys: Sequence[SortKey], values: Sequence[Any]) -> str:
+    raw = json.dumps({"k": _signature(keys), "v": [_dump(value) for value in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(keys: Sequence[SortKey], cursor: str) -> Tuple[Any, ...]:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+        values = tuple(_load(value) for value in raw["v"])
+        signature = raw["k"]
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise InvalidCursorError()
+    if signature != _signature(keys) or len(values) != len(keys):
+        raise InvalidCursorError()
+    if values[-1] is None or any(value is None and not key.nullable for key, value in zip(keys, values)):
+        raise InvalidCursorError()
+    return values
+
+
+def _equal(key: SortKey, value):
+    return key.column.is_(None) if value is None else key.column == value
+
+
+def _beyond(key: SortKey, value):
+    """Valores depois de `value` na ordem da chave (NULL é o menor valor)."""
+    if value is None:
+        return false() if key.descending else key.column.isnot(None)
+    if key.descending:
+        return or_(key.column < value, key.column.is_(None)) if key.nullable else key.column < value
+    return key.column > value
+
+
+def _after(keys: Sequence[SortKey], values: Sequence[Any]):
+    """Linhas depois da posição `values` na ordem das chaves: (k1 > v1) OR (k1 = v1 AND k2 > v2) ..."""
+    clauses = []
+    for i, key in enumerate(keys):
+        equal = [_equal(keys[j], values[j]) for j in range(i)]
+        clauses.append(and_(*equal, _beyond(key, values[i])))
+    if len(keys) == 1:
+        return clauses[0]
+    # Limite redundante na primeira chave: permite ao otimizador fazer seek no índice (o OR sozinho não)
+    first, value = keys[0], values[0]
+    if value is None:
+        bound = first.column.is_(None) if first.descending else None
+    elif first.descending:
+        bound = or_(first.column <= value, first.column.is_(None)) if first.nullable else first.column <= value
+    else:
+        bound = first.column >= value
+    return or_(*clauses) if bound is None else and_(bound, or_(*clauses))
+
+
+def _order_by(key: SortKey, dialect: str):
+    order = key.column.desc() if key.descending else key.column.asc()
+    # NULL primeiro em ASC e último em DESC, como no SQLite e no SQL Server (que não aceita NULLS FIRST/LAST)
+    if key.nullable and dialect not in ("sqlite", "mssql"):
+        order = order.nulls_last() if key.descending else order.nulls_first()
+    return order
+
+
+def _table_rows_estimate(query: Query) -> Optional[int]:
+    """Nº de linhas da tabela principal segundo as estatísticas da BD (None se indisponível)."""
+    session = query.session
+    table = query.column_descriptions[0]["entity"].__table__.name
+    dialect = session.get_bind().dialect.name
+    if dialect == "mssql":
+        sql = "SELECT SUM(row_count) FROM sys.dm_db_partition_stats WHERE object_id = OBJECT_ID(:t) AND index_id IN (0, 1)"
+    elif dialect == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"
+    else:
+        return None
+    value = session.execute(text(sql), {"t": table}).scalar()
+    return int(value) if value is not None and value >= 0 else None
+
+
+def count_total(query: Query, mode: str = TOTAL_EXACT, cap: int = None) -> Tuple[int, bool]:
+    """(total, estimado?) das linhas da listagem, sem ordenação nem eager loads."""
+    base = query.enable_eagerloads(False).order_by(None)
+    if mode == TOTAL_EXACT:
+        return base.count(), False
+    cap = settings.PAGINATION_COUNT_CAP if cap is None else cap
+    bounded = base.limit(cap + 1).subquery()
+    counted = query.session.query(func.count()).select_from(bounded).scalar()
+    if counted <= cap:
+        return counted, False
+    return max(cap, _table_rows_estimate(query) or 0), True
+
+
+def paginate(
+    query: Query,
+    keys: Sequence[SortKey],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    total: Optional[str] = None,
+    row_key: Optional[Callable[[Any], Any]] = None,
+) -> Page:
+    """
+    Uma página de `query` ordenada por `keys` (a última chave tem de ser única e não nula).
+    - cursor: posição devolvida na página anterior (next_cursor); tem prioridade sobre skip,
+    - total: None, "exact" ou "estimate",
+    - row_key: objeto de onde ler os valores das chaves em cada linha (omissão: a própria linha).
+    """
+    page = Page(items=[])
+    if total:
+        page.total, page.total_estimated = count_total(query, total)
+    if limit <= 0:
+        return page
+
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(keys, cursor)))
+    dialect = query.session.get_bind().dialect.name
+    query = query.order_by(*(_order_by(key, dialect) for key in keys))
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    # Uma linha a mais indica se existe página seguinte
+    rows = query.limit(limit + 1).all()
+    page.items = rows[:limit]
+    if len(rows) > limit:
+        last = row_key(rows[limit - 1]) if row_key else rows[limit - 1]
+        page.next_cursor = encode_cursor(keys, [getattr(last, key.name) for key in keys])
+    return page
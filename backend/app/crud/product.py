@@ -1,8 +1,14 @@
 from sqlalchemy.orm import Session
+from types import SimpleNamespace
 from typing import List, Optional
 from datetime import datetime
 from app.models.product import Product
 from app.schemas import product as product_schema
+from app.crud.pagination import Page, SortKey, paginate
+from app.crud.stock import StockRepository
+from app.crud.stock_ledger import StockLedgerRepository
+from app.crud.product_search import product_search
+from app.models.stock_movement import OPENING
 
 
 def create_product(db: Session, product: product_schema.ProductCreate) -> Product:
@@ -20,6 +26,10 @@ def create_product(db: Session, product: product_schema.ProductCreate) -> Produc
         minimum_stock=data.get("minimumStock"),
     )
     db.add(db_product)
+    db.flush()
+    # Saldo inicial no ledger de stock
+    StockLedgerRepository(db).record(db_product.id, db_product.quantity or 0, db_product.cost_value, OPENING)
+    product_search(db).refresh([db_product.id])
     db.commit()
     db.refresh(db_product)
     return db_product
@@ -33,17 +43,30 @@ def get_product(db: Session, product_id: int) -> Optional[Product]:
 #     return db.query(Product).filter(Product.deleted_at.is_(None)).order_by(Product.id).offset(skip).limit(limit).all()
 
 def get_products(db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None) -> List[Product]:
+    return get_products_page(db, limit=limit, skip=skip, search=search).items
+
+
+def get_products_page(
+    db: Session, limit: int = 100, cursor: Optional[str] = None, skip: int = 0,
+    total: Optional[str] = None, search: Optional[str] = None,
+) -> Page:
+    """
+    Página de produtos ordenados por id, por cursor ou por skip.
+    Com `search`, só os produtos encontrados pelo índice de pesquisa (app.crud.product_search),
+    ordenados por relevância e id.
+    """
     query = db.query(Product).filter(Product.deleted_at.is_(None))
-    
-    # Aplica filtro de pesquisa se fornecido
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (Product.name.ilike(search_filter)) | 
-            (Product.part_number.ilike(search_filter))
-        )
-    
-    return query.order_by(Product.id).offset(skip).limit(limit).all()
+    if not search or not search.strip():
+        return paginate(query, [SortKey(Product.id)], limit, cursor, skip, total)
+
+    hits = product_search(db).matches(search)
+    query = query.join(hits, hits.c.product_id == Product.id).add_columns(hits.c.rank)
+    page = paginate(
+        query, [SortKey(hits.c.rank), SortKey(Product.id)], limit, cursor, skip, total,
+        row_key=lambda row: SimpleNamespace(rank=row.rank, id=row.Product.id),
+    )
+    page.items = [row.Product for row in page.items]
+    return page
 
 
 def get_by_part_number(db: Session, part_number: str) -> Optional[Product]:
@@ -80,11 +103,20 @@ class ProductRepository:
                 "saleValue": "sale_value",
                 "minimumStock": "minimum_stock",
             }
+            old_cost = db_product.cost_value
+            new_quantity = update_data.pop("quantity", None)
             for key, value in update_data.items():
                 attr = field_map.get(key, None)
                 if attr is not None:
                     setattr(db_product, attr, value)
             db_product.updated_at = datetime.utcnow()
+            self.db.flush()
+            # A quantidade muda por ajuste no ledger (diferença para o valor atual), não por overwrite
+            stock = StockRepository(self.db)
+            adjusted = stock.set_quantity(product_id, new_quantity, reference="product_update") if new_quantity is not None else None
+            if adjusted is None and db_product.cost_value != old_cost:
+                stock.revalue(product_id, db_product.cost_value, reference="product_update")
+            product_search(self.db).refresh([product_id])
             self.db.commit()
             self.db.refresh(db_product)
         return db_product
@@ -93,6 +125,8 @@ class ProductRepository:
         db_product = self.get_by_id(product_id)
         if db_product:
             db_product.deleted_at = datetime.utcnow()
+            self.db.flush()
+            product_search(self.db).refresh([product_id])
             self.db.commit()
             return True
         return False
@@ -0,0 +1,251 @@
+"""
+Product search over part_number, name, brand and category.
+
+The query is folded (lower case, no accents: "Travão" -> "travao") and split
+into terms; a product matches when every term matches, and the hits come back
+as a (product_id, rank) subquery, lower rank first, that the listing joins
+and pages by keyset (rank, id):
+
+- SQLite: FTS5 tables kept next to `products` (models.product).
+  products_fts matches word prefixes ("trav", "5w3") ranked by bm25 with
+  part_number weighted highest; products_trigram adds substrings of 3+
+  characters inside words and part numbers ("w30"), ranked after them.
+- SQL Server: full-text index on products (accent-insensitive catalog,
+  CHANGE_TRACKING AUTO) through CONTAINSTABLE with prefix terms, plus a
+  LIKE 'x%' seek on the part_number index.
+- Anything else, or while the index has not been created: the previous
+  LIKE '%x%' scan. One-character queries also use the scan (the FTS5
+  prefix indexes start at two characters).
+
+Each source of hits is capped at PRODUCT_SEARCH_MAX_HITS, so a broad prefix
+("5w30" on a large catalogue) ranks a bounded set instead of every matching
+SKU: SQL Server keeps the best N by rank (CONTAINSTABLE top_n), SQLite the
+first N matches ranked among themselves; typing more narrows the set. A
+part_number equal to the query always comes first.
+
+The SQLite index is refreshed in the caller's transaction by
+ProductRepository create/update/delete (refresh) and rebuilt after bulk
+loads (rebuild); the SQL Server index follows the table by itself.
+"""
+
+from typing import Iterable, List, Optional
+import re
+import unicodedata
+
+from sqlalchemy import column, func, literal, literal_column, select, table, text, union_all
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.product import Product
+
+EXACT_RANK = -1e9
+INFIX_RANK = 0.0
+MIN_INFIX_LENGTH = 3
+MIN_INDEXED_LENGTH = 2
+
+# Índices já verificados por BD (só os resultados positivos: a migração pode criá-los depois)
+_available = set()
+
+
+def fold(value: Optional[str]) -> str:
+    """Minúsculas e sem acentos, como os termos indexados."""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def search_terms(value: Optional[str]) -> List[str]:
+    """Termos pesquisáveis: sequências de letras/dígitos do texto normalizado."""
+    return re.findall(r"[^\W_]+", fold(value))
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class ProductSearchIndex:
+    """Pesquisa pelo LIKE '%x%' anterior (sem índice); base dos índices por dialeto."""
+    dialect = None
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def available(self) -> bool:
+        return True
+
+    def matches(self, search: str):
+        """Subconsulta (product_id, rank) dos produtos que correspondem a `search`."""
+        raw = search.strip()
+        terms = search_terms(raw)
+        parts = [
+            select(Product.id.label("product_id"), literal(EXACT_RANK).label("rank"))
+            .where(Product.part_number.in_({raw, raw.upper()}))
+        ]
+        indexed = terms and len(raw) >= MIN_INDEXED_LENGTH and self.available()
+        candidates = self._candidates(raw, terms) if indexed else self._scan(raw)
+        parts += [self._capped(part) for part in candidates]
+        hits = union_all(*parts).subquery()
+        return (
+            select(hits.c.product_id, func.min(hits.c.rank).label("rank"))
+            .group_by(hits.c.product_id)
+            .subquery()
+        )
+
+    @staticmethod
+    def _capped(part):
+        cap = settings.PRODUCT_SEARCH_MAX_HITS
+        if not cap:
+            return part
+        limited = part.limit(cap).subquery()
+        return select(limited.c.product_id, limited.c.rank)
+
+    def _scan(self, raw: str):
+        pattern = f"%{raw}%"
+        return [
+            select(Product.id.label("product_id"), literal(INFIX_RANK).label("rank"))
+            .where(Product.name.ilike(pattern) | Product.part_number.ilike(pattern))
+        ]
+
+    def _candidates(self, raw: str, terms: List[str]):
+        return self._scan(raw)
+
+    def refresh(self, product_ids: Iterable[int]) -> None:
+        """Atualiza o índice destes produtos na transação do chamador (não faz commit)."""
+
+    def rebuild(self) -> int:
+        """Reconstrói o índice a partir da tabela products. Retorna o nº de produtos indexados."""
+        return 0
+
+
+class SqliteProductSearch(ProductSearchIndex):
+    """FTS5: prefixos de palavras (products_fts) + trigramas (products_trigram)."""
+    dialect = "sqlite"
+    fts = table("products_fts", column("rowid"))
+    trigram = table("products_trigram", column("rowid"))
+    # Pesos bm25 por coluna: part_number, name, brand, category
+    weights = (10.0, 4.0, 2.0, 1.0)
+
+    def available(self) -> bool:
+        key = (self.dialect, str(self.db.get_bind().url))
+        if key not in _available:
+            found = self.db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+            ).first()
+            if not found:
+                return False
+            _available.add(key)
+        return True
+
+    def _candidates(self, raw: str, terms: List[str]):
+        fts = literal_column("products_fts")
+        parts = [
+            select(
+                self.fts.c.rowid.label("product_id"),
+                func.bm25(fts, *(literal_column(str(weight)) for weight in self.weights)).label("rank"),
+            ).where(fts.op("MATCH")(" AND ".join(f'"{term}"*' for term in terms)))
+        ]
+        # O tokenizer trigram não indexa menos de 3 caracteres
+        if all(len(term) >= MIN_INFIX_LENGTH for term in terms):
+            parts.append(
+                select(self.trigram.c.rowid.label("product_id"), literal(INFIX_RANK).label("rank"))
+                .where(literal_column("products_trigram").op("MATCH")(" AND ".join(f'"{term}"' for term in terms)))
+            )
+        return parts
+
+    @staticmethod
+    def _documents(rows):
+        fts_rows, trigram_rows = [], []
+        for row in rows:
+            part_number = fold(row.part_number)
+            fields = [part_number, fold(row.name), fold(row.brand), fold(row.category)]
+            fts_rows.append(dict(zip(("id", "part_number", "name", "brand", "category"), [row.id] + fields)))
+            # Part number também sem separadores: "ol5w30" encontra "OL-5W30-1L"
+            compact = re.sub(r"[\W_]+", "", part_number)
+            trigram_rows.append({"id": row.id, "terms": " ".join([compact] + fields)})
+        return fts_rows, trigram_rows
+
+    def _insert(self, rows) -> int:
+        fts_rows, trigram_rows = self._documents(rows)
+        if fts_rows:
+            self.db.execute(
+                text("INSERT INTO products_fts (rowid, part_number, name, brand, category) "
+                     "VALUES (:id, :part_number, :name, :brand, :category)"),
+                fts_rows,
+            )
+            self.db.execute(text("INSERT INTO products_trigram (rowid, terms) VALUES (:id, :terms)"), trigram_rows)
+        return len(fts_rows)
+
+    def _documents_query(self):
+        return self.db.query(
+            Product.id, Product.part_number, Product.name, Product.brand, Product.category
+        ).filter(Product.deleted_at.is_(None))
+
+    def refresh(self, product_ids: Iterable[int]) -> None:
+        ids = list(product_ids)
+        if not ids or not self.available():
+            return
+        rowids = ", ".join(str(int(product_id)) for product_id in ids)
+        self.db.execute(text(f"DELETE FROM products_fts WHERE rowid IN ({rowids})"))
+        self.db.execute(text(f"DELETE FROM products_trigram WHERE rowid IN ({rowids})"))
+        # Produtos apagados (deleted_at) saem do índice
+        self._insert(self._documents_query().filter(Product.id.in_(ids)).all())
+
+    def rebuild(self, chunk_size: int = 5000) -> int:
+        if not self.available():
+            return 0
+        self.db.execute(text("DELETE FROM products_fts"))
+        self.db.execute(text("DELETE FROM products_trigram"))
+        indexed, last_id = 0, 0
+        while True:
+            rows = self._documents_query().filter(Product.id > last_id).order_by(Product.id).limit(chunk_size).all()
+            if not rows:
+                break
+            indexed += self._insert(rows)
+            last_id = rows[-1].id
+        self.db.commit()
+        return indexed
+
+
+class SqlServerProductSearch(ProductSearchIndex):
+    """Índice full-text (CONTAINSTABLE) + seek no índice de part_number."""
+    dialect = "mssql"
+
+    def available(self) -> bool:
+        key = (self.dialect, str(self.db.get_bind().url))
+        if key not in _available:
+            found = self.db.execute(
+                text("SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('products')")
+            ).first()
+            if not found:
+                return False
+            _available.add(key)
+        return True
+
+    def _candidates(self, raw: str, terms: List[str]):
+        hits = func.containstable(
+            literal_column("products"),
+            literal_column("(part_number, name, brand, category)"),
+            " AND ".join(f'"{term}*"' for term in terms),
+            *([literal_column(str(int(settings.PRODUCT_SEARCH_MAX_HITS)))] if settings.PRODUCT_SEARCH_MAX_HITS else []),
+        ).table_valued(column("KEY"), column("RANK"))
+        return [
+            select(hits.c.KEY.label("product_id"), (-hits.c.RANK).label("rank")),
+            # Part number escrito desde o início (com separadores): usa o índice único
+            select(Product.id.label("product_id"), literal(INFIX_RANK).label("rank"))
+            .where(Product.part_number.like(f"{_like_escape(raw)}%", escape="\\")),
+        ]
+
+    def rebuild(self) -> int:
+        if not self.available():
+            return 0
+        # DDL full-text não corre dentro de uma transação; o SQL Server repovoa o índice em background
+        with self.db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ALTER FULLTEXT INDEX ON products START FULL POPULATION"))
+        return self.db.query(func.count(Product.id)).filter(Product.deleted_at.is_(None)).scalar()
+
+
+_BACKENDS = {backend.dialect: backend for backend in (SqliteProductSearch, SqlServerProductSearch)}
+
+
+def product_search(db: Session) -> ProductSearchIndex:
+    """Índice de pesquisa de produtos para o dialeto da sessão."""
+    return _BACKENDS.get(db.get_bind().dialect.name, ProductSearchIndex)(db)
@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
 from app.models.role import Role
 from app.schemas.role import RoleCreate, RoleUpdate
+from app.services.role_scope import invalidate_role_scopes
+from app.services.notification_service import invalidate_notification_audiences
+from app.core.principal import revoke_employee_tokens
 from typing import List, Optional
 
 class RoleRepository:
@@ -38,6 +41,11 @@ class RoleRepository:
             for field, value in update_data.items():
                 setattr(db_role, field, value)
             self.db.commit()
+            invalidate_role_scopes()
+            invalidate_notification_audiences()
+            # O nome do cargo define a área no token dos funcionários com este cargo
+            if "name" in update_data:
+                revoke_employee_tokens(self.db, [employee.id for employee in db_role.employees])
             self.db.refresh(db_role)
         return db_role
 
@@ -49,5 +57,7 @@ class RoleRepository:
                 return False
             self.db.delete(db_role)
             self.db.commit()
+            invalidate_role_scopes()
+            invalidate_notification_audiences()
             return True
         return False
\ No newline at end of file
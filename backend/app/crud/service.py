@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.service import Service
 from app.schemas.service import ServiceCreate, ServiceUpdate
+from app.services.role_scope import invalidate_role_scopes
 from typing import List, Optional
 from app.models.appointment import Appointment
 
@@ -35,6 +36,7 @@ class ServiceRepository:
         db_service = Service(**service.model_dump())
         self.db.add(db_service)
         self.db.commit()
+        invalidate_role_scopes()
         self.db.refresh(db_service)
         return db_service
 
@@ -46,6 +48,7 @@ class ServiceRepository:
             for field, value in update_data.items():
                 setattr(db_service, field, value)
             self.db.commit()
+            invalidate_role_scopes()
             self.db.refresh(db_service)
         return db_service
 
@@ -55,6 +58,7 @@ class ServiceRepository:
         if db_service:
             self.db.delete(db_service)
             self.db.commit()
+            invalidate_role_scopes()
             return True
         return False
 
@@ -0,0 +1,174 @@
+"""
+Stock movements on products as single conditional UPDATEs.
+
+Every change is one statement evaluated by the database under the row lock,
+so concurrent requests cannot both pass the availability check and drive the
+stock negative (no read-check-write in Python):
+
+    UPDATE products SET quantity = quantity - :q
+    WHERE id = :id AND quantity - COALESCE(reserve_quantity, 0) >= :q
+
+reserve_quantity holds the units reserved for parts of extra services still
+waiting for the customer's answer: they stay in `quantity` but are not
+available to other orders. On approval the hold becomes a decrement; on
+rejection or cancellation it is released.
+
+Every change of quantity is also appended to the stock ledger
+(stock_movements, app.crud.stock_ledger) in the same transaction, with the
+product's cost at that moment; holds do not move stock and are not recorded.
+
+Nothing here commits; the caller's transaction does. Products that end at or
+below minimum_stock are queued for the asynchronous low-stock alert
+(app.services.stock_alerts), sent only after the commit.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.stock_movement import ORDER_PART, ADJUSTMENT, REVALUATION, PART_RETURNED
+from app.crud.stock_ledger import StockLedgerRepository
+from app.exceptions import NotFoundError, ValidationError
+from app.services.stock_alerts import queue_low_stock
+
+RESERVED = func.coalesce(Product.reserve_quantity, 0)
+AVAILABLE = Product.quantity - RESERVED
+
+
+class InsufficientStockError(ValidationError):
+    """Não há unidades disponíveis (quantity - reserve_quantity) para o pedido."""
+    def __init__(self, available: int):
+        self.available = available
+        super().__init__(f"Stock insuficiente! Disponível: {available}", code="INSUFFICIENT_STOCK")
+
+
+@dataclass
+class StockLevel:
+    """Estado do produto depois do movimento (lido no próprio UPDATE)."""
+    product_id: int
+    name: str
+    part_number: str
+    sale_value: float
+    cost_value: float
+    quantity: int
+    reserved: int
+    minimum_stock: int
+
+    @property
+    def available(self) -> int:
+        return self.quantity - self.reserved
+
+
+class StockRepository:
+    """
+    Movimentos de stock atómicos:
+    - consume: retira unidades disponíveis (peça aplicada numa ordem),
+    - hold / release: reserva e liberta unidades (peças de serviços extra pendentes),
+    - commit_hold: converte uma reserva em saída (serviço extra aprovado),
+    - restock: devolve unidades ao stock (peça removida da ordem),
+    - set_quantity: contagem/edição manual (ajuste pela diferença).
+    As saídas e entradas ficam registadas no ledger (reason/reference do movimento).
+    """
+    def __init__(self, db: Session):
+        self.db = db
+        self.ledger = StockLedgerRepository(db)
+
+    def _apply(
+        self, product_id: int, quantity: int, values: dict, *conditions,
+        required: bool = True, delta: int = 0, reason: str = None, reference: Optional[str] = None,
+    ) -> Optional[StockLevel]:
+        if quantity <= 0:
+            raise ValidationError("A quantidade tem de ser positiva", code="INVALID_QUANTITY")
+        statement = (
+            update(Product)
+            .where(Product.id == product_id, *conditions)
+            .values(updated_at=datetime.utcnow(), **values)
+            .returning(
+                Product.id, Product.name, Product.part_number, Product.sale_value,
+                Product.cost_value, Product.quantity, RESERVED, Product.minimum_stock,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        row = self.db.execute(statement).first()
+        if row is None:
+            if not required:
+                return None
+            self._raise_unavailable(product_id)
+        level = StockLevel(*row)
+        if delta:
+            self.ledger.record(product_id, delta, level.cost_value, reason, reference)
+        # Objetos Product já carregados nesta sessão deixam de estar atualizados
+        product = self.db.identity_map.get(self.db.identity_key(Product, product_id))
+        if product is not None:
+            self.db.expire(product)
+        return level
+
+    def _check_low_stock(self, level: StockLevel) -> StockLevel:
+        if level.quantity <= level.minimum_stock:
+            queue_low_stock(self.db, level.product_id)
+        return level
+
+    def _raise_unavailable(self, product_id: int):
+        available = self.db.query(AVAILABLE).filter(Product.id == product_id).scalar()
+        if available is None:
+            raise NotFoundError("Produto não encontrado", code="PRODUCT_NOT_FOUND")
+        raise InsufficientStockError(max(int(available), 0))
+
+    def consume(
+        self, product_id: int, quantity: int, reason: str = ORDER_PART, reference: Optional[str] = None
+    ) -> StockLevel:
+        return self._check_low_stock(self._apply(
+            product_id, quantity, {"quantity": Product.quantity - quantity}, AVAILABLE >= quantity,
+            delta=-quantity, reason=reason, reference=reference,
+        ))
+
+    def hold(self, product_id: int, quantity: int) -> StockLevel:
+        return self._apply(product_id, quantity, {"reserve_quantity": RESERVED + quantity}, AVAILABLE >= quantity)
+
+    def release(self, product_id: int, quantity: int) -> StockLevel:
+        return self._apply(product_id, quantity, {"reserve_quantity": case((RESERVED > quantity, RESERVED - quantity), else_=0)})
+
+    def commit_hold(
+        self, product_id: int, quantity: int, reason: str = ORDER_PART, reference: Optional[str] = None
+    ) -> StockLevel:
+        """Sai do stock e da reserva. Sem reserva suficiente (ex.: reserva ajustada à mão) comporta-se como consume."""
+        level = self._apply(
+            product_id,
+            quantity,
+            {"quantity": Product.quantity - quantity, "reserve_quantity": RESERVED - quantity},
+            RESERVED >= quantity,
+            required=False, delta=-quantity, reason=reason, reference=reference,
+        )
+        return self._check_low_stock(level) if level else self.consume(product_id, quantity, reason, reference)
+
+    def restock(
+        self, product_id: int, quantity: int, reason: str = PART_RETURNED, reference: Optional[str] = None
+    ) -> StockLevel:
+        return self._apply(
+            product_id, quantity, {"quantity": Product.quantity + quantity},
+            delta=quantity, reason=reason, reference=reference,
+        )
+
+    def set_quantity(self, product_id: int, quantity: int, reference: Optional[str] = None) -> Optional[StockLevel]:
+        """
+        Fixa a quantidade (contagem de inventário / edição do produto). A linha é bloqueada
+        (SELECT ... FOR UPDATE / UPDLOCK) para que o ajuste registado seja a diferença real.
+        """
+        current = self.db.query(Product.quantity).filter(Product.id == product_id).with_for_update().scalar()
+        if current is None:
+            raise NotFoundError("Produto não encontrado", code="PRODUCT_NOT_FOUND")
+        delta = quantity - current
+        if not delta:
+            return None
+        return self._check_low_stock(self._apply(
+            product_id, abs(delta), {"quantity": Product.quantity + delta},
+            delta=delta, reason=ADJUSTMENT, reference=reference,
+        ))
+
+    def revalue(self, product_id: int, cost_value: float, reference: Optional[str] = None) -> None:
+        """Regista no ledger uma mudança de custo (delta 0): a valorização passa a usar o novo custo."""
+        self.ledger.record(product_id, 0, cost_value, REVALUATION, reference)
@@ -0,0 +1,219 @@
+"""
+Stock ledger: append-only stock_movements plus periodic stock_snapshots.
+
+The quantity (and last unit cost) of a product at instant `at` is the latest
+checkpoint taken at or before `at` plus the movements between the checkpoint
+and `at`; with daily checkpoints the replay never reads more than one day of
+movements, whatever the size of the history:
+
+    quantity(at) = snapshot(T).quantity + SUM(delta WHERE T <= ts < at),
+    T = MAX(taken_at) <= at
+
+Snapshots are derived from the ledger itself (previous checkpoint + replay),
+not from Product.quantity, so replays and checkpoints always agree. Products
+that predate the ledger get an "opening" movement (open_balances, run by
+init_database, the snapshot job and the snapshot script): their quantity
+minus any movements already recorded for them, dated at the first of those.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import case, exists, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.stock_movement import StockMovement, OPENING, CONSUMPTION_REASONS
+from app.models.stock_snapshot import StockSnapshot
+
+
+class StockLedgerRepository:
+    """
+    Movimentos de stock e consultas sobre o ledger:
+    - record: acrescenta um movimento (na transação do chamador),
+    - open_balances / checkpoint: saldos iniciais e snapshots periódicos,
+    - levels_at / valuation_at: quantidade e valor do inventário numa data,
+    - consumed: peças consumidas pelas ordens de serviço num período.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(
+        self, product_id: int, delta: int, unit_cost: Optional[float], reason: str,
+        reference: Optional[str] = None,
+    ) -> None:
+        self.db.add(StockMovement(
+            product_id=product_id, ts=datetime.utcnow(), delta=delta,
+            unit_cost=unit_cost, reason=reason, reference=reference,
+        ))
+
+    def open_balances(self) -> int:
+        """
+        Movimento 'opening' para os produtos ainda sem ele (INSERT ... SELECT). Se o produto já
+        tem movimentos (registados antes de o ledger ser aberto), o saldo inicial é a quantidade
+        atual menos esses movimentos, datado do primeiro deles, para que o replay dê Product.quantity.
+        """
+        has_opening = exists().where(StockMovement.product_id == Product.id, StockMovement.reason == OPENING)
+        recorded = (
+            select(
+                StockMovement.product_id,
+                func.sum(StockMovement.delta).label("delta"),
+                func.min(StockMovement.ts).label("first_ts"),
+            )
+            .group_by(StockMovement.product_id)
+            .subquery()
+        )
+        opening = (
+            select(
+                Product.id,
+                func.coalesce(recorded.c.first_ts, literal(datetime.utcnow())),
+                func.coalesce(Product.quantity, 0) - func.coalesce(recorded.c.delta, 0),
+                Product.cost_value,
+                literal(OPENING),
+            )
+            .outerjoin(recorded, recorded.c.product_id == Product.id)
+            .where(~has_opening)
+        )
+        result = self.db.execute(
+            insert(StockMovement).from_select(["product_id", "ts", "delta", "unit_cost", "reason"], opening)
+        )
+        self.db.commit()
+        return result.rowcount or 0
+
+    # ---- quantidade numa data: checkpoint + replay ----
+
+    def latest_checkpoint(self, at: datetime) -> Optional[datetime]:
+        return self.db.query(func.max(StockSnapshot.taken_at)).filter(StockSnapshot.taken_at <= at).scalar()
+
+    def _levels(self, at: datetime, product_id: Optional[int] = None):
+        """(product_id, quantity, unit_cost) em `at`: snapshot do último checkpoint + movimentos seguintes."""
+        checkpoint = self.latest_checkpoint(at)
+        movements = select(
+            StockMovement.product_id, StockMovement.delta, StockMovement.unit_cost,
+            StockMovement.id.label("seq"),
+        ).where(StockMovement.ts < at)
+        parts = []
+        if checkpoint is not None:
+            movements = movements.where(StockMovement.ts >= checkpoint)
+            parts.append(select(
+                StockSnapshot.product_id, StockSnapshot.quantity.label("delta"), StockSnapshot.unit_cost,
+                literal(0).label("seq"),
+            ).where(StockSnapshot.taken_at == checkpoint))
+        parts.append(movements)
+        if product_id is not None:
+            parts = [part.where(part.selected_columns.product_id == product_id) for part in parts]
+
+        rows = union_all(*parts).subquery()
+        # Custo do último movimento (ou do snapshot, se não houve movimentos depois)
+        latest = func.row_number().over(partition_by=rows.c.product_id, order_by=rows.c.seq.desc())
+        ranked = select(
+            rows.c.product_id, rows.c.delta, case((latest == 1, rows.c.unit_cost)).label("unit_cost"),
+        ).subquery()
+        return (
+            select(
+                ranked.c.product_id,
+                func.sum(ranked.c.delta).label("quantity"),
+                func.max(ranked.c.unit_cost).label("unit_cost"),
+            )
+            .group_by(ranked.c.product_id)
+            .subquery()
+        )
+
+    def levels_at(
+        self, at: datetime, skip: int = 0, limit: int = 100, product_id: Optional[int] = None
+    ) -> List[dict]:
+        """Produtos com stock em `at`, por id, com quantidade, custo unitário e valor."""
+        levels = self._levels(at, product_id)
+        rows = (
+            self.db.query(
+                levels.c.product_id, Product.part_number, Product.name,
+                levels.c.quantity, levels.c.unit_cost,
+            )
+            .join(Product, Product.id == levels.c.product_id)
+            .filter(levels.c.quantity != 0)
+            .order_by(levels.c.product_id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return [
+            {
+                "product_id": row.product_id,
+                "part_number": row.part_number,
+                "name": row.name,
+                "quantity": int(row.quantity),
+                "unit_cost": round(float(row.unit_cost or 0), 2),
+                "total_value": round(int(row.quantity) * float(row.unit_cost or 0), 2),
+            }
+            for row in rows
+        ]
+
+    def valuation_at(self, at: datetime) -> dict:
+        """Totais do inventário em `at` (uma consulta sobre o checkpoint + replay)."""
+        levels = self._levels(at)
+        products, quantity, value = self.db.query(
+            func.count(levels.c.product_id),
+            func.coalesce(func.sum(levels.c.quantity), 0),
+            func.coalesce(func.sum(levels.c.quantity * func.coalesce(levels.c.unit_cost, 0)), 0),
+        ).filter(levels.c.quantity != 0).one()
+        return {
+            "checkpoint": self.latest_checkpoint(at),
+            "products": int(products),
+            "total_quantity": int(quantity),
+            "total_value": round(float(value), 2),
+        }
+
+    def checkpoint(self, taken_at: datetime) -> int:
+        """
+        Snapshot de todos os produtos em taken_at (movimentos com ts < taken_at), derivado
+        do checkpoint anterior + replay. Idempotente: não repete um checkpoint existente.
+        """
+        if self.db.query(StockSnapshot.id).filter(StockSnapshot.taken_at == taken_at).first():
+            return 0
+        levels = self._levels(taken_at)
+        result = self.db.execute(
+            insert(StockSnapshot).from_select(
+                ["taken_at", "product_id", "quantity", "unit_cost"],
+                select(literal(taken_at), levels.c.product_id, levels.c.quantity, levels.c.unit_cost),
+            )
+        )
+        self.db.commit()
+        return result.rowcount or 0
+
+    # ---- consumo por período ----
+
+    def consumed(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None, skip: int = 0, limit: int = 100
+    ) -> List[dict]:
+        """
+        Peças consumidas pelas ordens de serviço em [start, end): saídas menos devoluções,
+        valorizadas ao custo de cada movimento. Ordenado por quantidade decrescente.
+        """
+        quantity = (-func.sum(StockMovement.delta)).label("quantity")
+        total_cost = (-func.sum(StockMovement.delta * func.coalesce(StockMovement.unit_cost, 0))).label("total_cost")
+        query = self.db.query(StockMovement.product_id, quantity, total_cost).filter(
+            StockMovement.reason.in_(CONSUMPTION_REASONS)
+        )
+        if start:
+            query = query.filter(StockMovement.ts >= start)
+        if end:
+            query = query.filter(StockMovement.ts < end)
+        consumed = query.group_by(StockMovement.product_id).subquery()
+        rows = (
+            self.db.query(consumed, Product.part_number, Product.name)
+            .join(Product, Product.id == consumed.c.product_id)
+            .order_by(consumed.c.quantity.desc(), consumed.c.product_id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return [
+            {
+                "product_id": row.product_id,
+                "part_number": row.part_number,
+                "name": row.name,
+                "quantity_consumed": int(row.quantity or 0),
+                "total_cost": round(float(row.total_cost or 0), 2),
+            }
+            for row in rows
+        ]
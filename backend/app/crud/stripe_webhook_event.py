@@ -0,0 +1,176 @@
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.stripe_webhook_event import (
+    StripeWebhookEvent,
+    STRIPE_EVENT_PENDING,
+    STRIPE_EVENT_PROCESSING,
+    STRIPE_EVENT_PROCESSED,
+    STRIPE_EVENT_IGNORED,
+    STRIPE_EVENT_FAILED,
+)
+
+
+class StripeWebhookEventRepository:
+    """
+    Repositório da tabela stripe_webhook_events.
+    - record: ingestão idempotente (chave única event_id),
+    - claim_*/mark_*: usados pelo processador em background,
+    - reset_for_replay: volta a pôr eventos na fila.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_by_event_id(self, event_id: str) -> Optional[StripeWebhookEvent]:
+        return self.db.query(StripeWebhookEvent).filter(StripeWebhookEvent.event_id == event_id).first()
+
+    def list(self, status: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[StripeWebhookEvent]:
+        query = self.db.query(StripeWebhookEvent)
+        if status:
+            query = query.filter(StripeWebhookEvent.status == status)
+        return query.order_by(StripeWebhookEvent.id.desc()).offset(skip).limit(limit).all()
+
+    def record(self, event_id: str, event_type: str, payload: str) -> Tuple[StripeWebhookEvent, bool]:
+        """
+        Guarda o evento em bruto. Retorna (evento, criado); um reenvio do
+        mesmo evento pelo Stripe devolve o registo existente com criado=False.
+        """
+        existing = self.get_by_event_id(event_id)
+        if existing:
+            return existing, False
+
+        now = datetime.now()
+        db_event = StripeWebhookEvent(
+            event_id=event_id,
+            event_type=event_type,
+            payload=payload,
+            status=STRIPE_EVENT_PENDING,
+            attempts=0,
+            next_attempt_at=now,
+            received_at=now,
+        )
+        try:
+            self.db.add(db_event)
+            self.db.commit()
+        except IntegrityError:
+            # Entrega concorrente do mesmo evento
+            self.db.rollback()
+            return self.get_by_event_id(event_id), False
+        self.db.refresh(db_event)
+        return db_event, True
+
+    def claim_event(self, event_id: str, lease_seconds: int) -> Optional[StripeWebhookEvent]:
+        """Reclama um evento específico se ainda estiver pendente."""
+        token = uuid4().hex
+        claimed = self.db.query(StripeWebhookEvent).filter(
+            StripeWebhookEvent.event_id == event_id,
+            StripeWebhookEvent.status == STRIPE_EVENT_PENDING,
+        ).update(
+            {
+                StripeWebhookEvent.status: STRIPE_EVENT_PROCESSING,
+                StripeWebhookEvent.claim_token: token,
+                StripeWebhookEvent.claimed_until: datetime.now() + timedelta(seconds=lease_seconds),
+            },
+            synchronize_session=False,
+        )
+        self.db.commit()
+        if not claimed:
+            return None
+        return self.db.query(StripeWebhookEvent).filter(StripeWebhookEvent.claim_token == token).first()
+
+    def claim_batch(self, limit: int, lease_seconds: int) -> List[StripeWebhookEvent]:
+        """Reclama até `limit` eventos pendentes cuja próxima tentativa já chegou."""
+        now = datetime.now()
+
+        # Leases expiradas (processador interrompido) voltam à fila
+        self.db.query(StripeWebhookEvent).filter(
+            StripeWebhookEvent.status == STRIPE_EVENT_PROCESSING,
+            StripeWebhookEvent.claimed_until < now,
+        ).update(
+            {StripeWebhookEvent.status: STRIPE_EVENT_PENDING, StripeWebhookEvent.claim_token: None},
+            synchronize_session=False,
+        )
+
+        candidate_ids = [
+            event_pk for (event_pk,) in (
+                self.db.query(StripeWebhookEvent.id)
+                .filter(
+                    StripeWebhookEvent.status == STRIPE_EVENT_PENDING,
+                    StripeWebhookEvent.next_attempt_at <= now,
+                )
+                .order_by(StripeWebhookEvent.id)
+                .limit(limit)
+                .all()
+            )
+        ]
+        if not candidate_ids:
+            self.db.commit()
+            return []
+
+        token = uuid4().hex
+        self.db.query(StripeWebhookEvent).filter(
+            StripeWebhookEvent.id.in_(candidate_ids),
+            StripeWebhookEvent.status == STRIPE_EVENT_PENDING,
+        ).update(
+            {
+                StripeWebhookEvent.status: STRIPE_EVENT_PROCESSING,
+                StripeWebhookEvent.claim_token: token,
+                StripeWebhookEvent.claimed_until: now + timedelta(seconds=lease_seconds),
+            },
+            synchronize_session=False,
+        )
+        self.db.commit()
+        return (
+            self.db.query(StripeWebhookEvent)
+            .filter(StripeWebhookEvent.claim_token == token)
+            .order_by(StripeWebhookEvent.id)
+            .all()
+        )
+
+    def mark_processed(self, db_event: StripeWebhookEvent, result: Optional[str] = None, ignored: bool = False) -> None:
+        db_event.status = STRIPE_EVENT_IGNORED if ignored else STRIPE_EVENT_PROCESSED
+        db_event.attempts = (db_event.attempts or 0) + 1
+        db_event.result = result
+        db_event.last_error = None
+        db_event.claim_token = None
+        db_event.processed_at = datetime.now()
+
+    def mark_failed(self, db_event: StripeWebhookEvent, error: str, max_attempts: int, backoff_seconds: float) -> None:
+        """Falha: nova tentativa com backoff exponencial ou 'failed' ao atingir max_attempts."""
+        db_event.attempts = (db_event.attempts or 0) + 1
+        db_event.last_error = (error or "")[:1000]
+        db_event.claim_token = None
+        if db_event.attempts >= max_attempts:
+            db_event.status = STRIPE_EVENT_FAILED
+        else:
+            db_event.status = STRIPE_EVENT_PENDING
+            db_event.next_attempt_at = datetime.now() + timedelta(seconds=backoff_seconds * (2 ** (db_event.attempts - 1)))
+
+    def reset_for_replay(self, event_id: Optional[str] = None) -> int:
+        """
+        Volta a pôr na fila um evento (qualquer estado exceto em processamento)
+        ou, sem event_id, todos os eventos 'failed'. Retorna o nº de eventos.
+        """
+        query = self.db.query(StripeWebhookEvent)
+        if event_id:
+            query = query.filter(
+                StripeWebhookEvent.event_id == event_id,
+                StripeWebhookEvent.status != STRIPE_EVENT_PROCESSING,
+            )
+        else:
+            query = query.filter(StripeWebhookEvent.status == STRIPE_EVENT_FAILED)
+        count = query.update(
+            {
+                StripeWebhookEvent.status: STRIPE_EVENT_PENDING,
+                StripeWebhookEvent.attempts: 0,
+                StripeWebhookEvent.next_attempt_at: datetime.now(),
+                StripeWebhookEvent.claim_token: None,
+            },
+            synchronize_session=False,
+        )
+        self.db.commit()
+        return count
@@ -1,12 +1,13 @@
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas import user as user_schema
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.passwords import password_hasher
+from app.core.principal import USER, revoke_tokens
+from app.services.role_scope import invalidate_role_scopes
+from app.services.notification_service import invalidate_notification_audiences
 
 def create_user(db: Session, user: user_schema.UserCreate, employee_id: int = None):
-    password_hash = pwd_context.hash(user.password)
+    password_hash = password_hasher.hash(user.password)
     db_user = User(
         name=user.name,
         email=user.email,
@@ -17,6 +18,7 @@ def create_user(db: Session, user: user_schema.UserCreate, employee_id: int = No
     )
     db.add(db_user)
     db.commit()
+    invalidate_notification_audiences()
     db.refresh(db_user)
     return db_user
 
@@ -27,7 +29,10 @@ def get_users(db: Session, skip: int = 0, limit: int = 10):
     return db.query(User).order_by(User.id).offset(skip).limit(limit).all()
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return password_hasher.verify(plain, hashed)
+
+def verify_and_update_password(plain: str, hashed: str):
+    return password_hasher.verify_and_update(plain, hashed)
 
 def get_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
@@ -56,11 +61,13 @@ def update_user(db: Session, user_id: int, user_update: user_schema.UserUpdate):
             db_user.employee.address = user_update.address
     
     db.commit()
+    invalidate_role_scopes()
+    invalidate_notification_audiences()
     db.refresh(db_user)
     return db_user
 
 def change_password(db: Session, user_id: int, current_password: str, new_password: str) -> bool:
-    """Change user password after verifying current password"""
+    """Change user password after verifying current password; tokens issued before the change stop working."""
     db_user = get_user(db, user_id)
     if not db_user:
         return False
@@ -70,6 +77,6 @@ def change_password(db: Session, user_id: int, current_password: str, new_passwo
         return False
     
     # Hash and set new password
-    db_user.password_hash = pwd_context.hash(new_password)
-    db.commit()
+    db_user.password_hash = password_hasher.hash(new_password)
+    revoke_tokens(db, USER, [db_user.id])  # faz commit da nova password
     return True
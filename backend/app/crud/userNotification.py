@@ -4,6 +4,16 @@ from datetime import datetime
 from app.models.userNotification import UserNotification
 from app.models.notificationBadge import Notification
 from app.schemas import userNotification as user_notification_schema
+from app.crud.notification_counters import NotificationCounterRepository
+
+
+def _active_component(db: Session, notification_id: int) -> Optional[str]:
+    """Componente da notificação, ou None se não existir ou estiver apagada (não conta nos badges)."""
+    return (
+        db.query(Notification.component)
+        .filter(Notification.id == notification_id, Notification.deleted_at.is_(None))
+        .scalar()
+    )
 
 
 def create_user_notification(
@@ -15,6 +25,9 @@ def create_user_notification(
         notification_id=notification_id,
     )
     db.add(db_user_notif)
+    component = _active_component(db, notification_id)
+    if component is not None:
+        NotificationCounterRepository(db).add([(user_id, component)])
     db.commit()
     db.refresh(db_user_notif)
     return db_user_notif
@@ -60,38 +73,29 @@ def get_user_notifications_by_component(
 
 
 def count_unread_by_component(db: Session, user_id: int, component: str) -> int:
-    """Count unread notifications for a user by component."""
-    return (
-        db.query(UserNotification)
-        .join(Notification, UserNotification.notification_id == Notification.id)
-        .filter(
-            UserNotification.user_id == user_id,
-            UserNotification.read_at.is_(None),
-            Notification.component == component,
-            Notification.deleted_at.is_(None),
-        )
-        .count()
-    )
+    """Count unread notifications for a user by component (from notification_unread_counters)."""
+    return NotificationCounterRepository(db).count(user_id, component)
 
 
 def count_all_unread(db: Session, user_id: int) -> int:
-    """Count all unread notifications for a user."""
-    return (
-        db.query(UserNotification)
-        .join(Notification, UserNotification.notification_id == Notification.id)
-        .filter(
-            UserNotification.user_id == user_id,
-            UserNotification.read_at.is_(None),
-            Notification.deleted_at.is_(None),
-        )
-        .count()
-    )
+    """Count all unread notifications for a user (from notification_unread_counters)."""
+    return NotificationCounterRepository(db).count(user_id)
+
+
+def count_unread_by_components(db: Session, user_id: int) -> dict:
+    """Unread counts of every component for a user, plus the total, in one query."""
+    components = NotificationCounterRepository(db).counts(user_id)
+    return {"count": sum(components.values()), "components": components}
 
 
 def mark_as_read(db: Session, user_notification_id: int) -> Optional[UserNotification]:
     """Mark a user notification as read."""
     db_user_notif = get_user_notification(db, user_notification_id)
     if db_user_notif:
+        if db_user_notif.read_at is None:
+            component = _active_component(db, db_user_notif.notification_id)
+            if component is not None:
+                NotificationCounterRepository(db).remove([(db_user_notif.user_id, component)])
         db_user_notif.read_at = datetime.utcnow()
         db.commit()
         db.refresh(db_user_notif)
@@ -105,6 +109,7 @@ def mark_all_as_read(db: Session, user_id: int) -> int:
         .filter(UserNotification.user_id == user_id, UserNotification.read_at.is_(None))
         .update({UserNotification.read_at: datetime.utcnow()})
     )
+    NotificationCounterRepository(db).clear_user(user_id)
     db.commit()
     return count
 
@@ -113,6 +118,10 @@ def delete_user_notification(db: Session, user_notification_id: int) -> bool:
     """Delete a user notification."""
     db_user_notif = get_user_notification(db, user_notification_id)
     if db_user_notif:
+        if db_user_notif.read_at is None:
+            component = _active_component(db, db_user_notif.notification_id)
+            if component is not None:
+                NotificationCounterRepository(db).remove([(db_user_notif.user_id, component)])
         db.delete(db_user_notif)
         db.commit()
         return True
@@ -140,6 +149,9 @@ class UserNotificationRepository:
     def count_all(self, user_id: int) -> int:
         return count_all_unread(self.db, user_id)
 
+    def count_by_components(self, user_id: int) -> dict:
+        return count_unread_by_components(self.db, user_id)
+
     def mark_read(self, user_notification_id: int) -> Optional[UserNotification]:
         return mark_as_read(self.db, user_notification_id)
 
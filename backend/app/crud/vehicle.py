@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session, joinedload
 from app.models.vehicle import Vehicle
 from app.models.customer import Customer
 from app.schemas.vehicle import VehicleCreate
+from app.crud.pagination import Page, SortKey, paginate
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -24,20 +25,31 @@ class VehicleRepository:
 
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Vehicle]:
         """Gets a list of all vehicles."""
-        return self.db.query(Vehicle).order_by(Vehicle.id).offset(skip).limit(limit).all()
+        return self.page(limit=limit, skip=skip).items
+
+    def page(self, limit: int = 100, cursor: Optional[str] = None, skip: int = 0, total: Optional[str] = None) -> Page:
+        """Gets a page of vehicles ordered by id, by cursor or by skip."""
+        return paginate(self.db.query(Vehicle), [SortKey(Vehicle.id)], limit, cursor, skip, total)
 
     def get_all_with_customers(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
         """Gets all vehicles with customer names using a join."""
-        results = self.db.query(
+        return self.page_with_customers(limit=limit, skip=skip).items
+
+    def page_with_customers(
+        self, limit: int = 100, cursor: Optional[str] = None, skip: int = 0, total: Optional[str] = None
+    ) -> Page:
+        """Gets a page of vehicles (ordered by id) with customer names, by cursor or by skip."""
+        query = self.db.query(
             Vehicle,
             Customer.name.label("customer_name")
         ).outerjoin(
             Customer, Vehicle.customer_id == Customer.id
-        ).order_by(Vehicle.id).offset(skip).limit(limit).all()
+        )
+        page = paginate(query, [SortKey(Vehicle.id)], limit, cursor, skip, total, row_key=lambda row: row[0])
         
         # Convert to list of dicts with customer_name included
         vehicles_with_customers = []
-        for vehicle, customer_name in results:
+        for vehicle, customer_name in page.items:
             vehicle_dict = {
                 "id": vehicle.id,
                 "customer_id": vehicle.customer_id,
@@ -57,7 +69,8 @@ class VehicleRepository:
             }
             vehicles_with_customers.append(vehicle_dict)
         
-        return vehicles_with_customers
+        page.items = vehicles_with_customers
+        return page
 
     def get_by_customer_id(self, customer_id: int) -> List[Vehicle]:
         """Gets a list of all vehicles for a specific customer."""
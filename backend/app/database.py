@@ -1,21 +1,228 @@
-from sqlalchemy import create_engine
+from collections import deque
+from typing import Callable, Optional
+import logging
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """
+    Tempo de espera por uma ligação do pool e ocupação atual.
+    A espera inclui abrir uma ligação nova (overflow) quando o pool não tem livres.
+    """
+    def __init__(self, window: int = 2048):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._recent.append(seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self.checkouts = self.timeouts = 0
+            self.wait_total = self.wait_max = 0.0
+
+    def snapshot(self, pool=None) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "wait_p50_ms": round(recent[len(recent) // 2] * 1000, 3) if recent else 0.0,
+                "wait_p99_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000, 3) if recent else 0.0,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mede quanto tempo cada checkout esperou por uma ligação."""
+    metrics = pool_metrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def _engine_options(url: str) -> dict:
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        if ":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"):
+            return options  # BD em memória: pool próprio do dialeto (uma ligação)
+    elif url.startswith("mssql+pyodbc"):
+        options["fast_executemany"] = True  # inserts em lote (notificações) num só round trip
+    elif url.startswith("postgresql") and settings.DB_STATEMENT_TIMEOUT:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT * 1000}"}
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
 # Engine (detecta o banco pelo DATABASE_URL)
-engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+
+
+@event.listens_for(engine, "connect")
+def _set_statement_timeout(dbapi_connection, connection_record):
+    # Limite por instrução em cada ligação nova (PostgreSQL: connect_args; SQLite não tem equivalente)
+    if settings.DB_STATEMENT_TIMEOUT and engine.dialect.name == "mssql":
+        dbapi_connection.timeout = settings.DB_STATEMENT_TIMEOUT  # pyodbc: query timeout
+
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-# Dependency to get a DB session for each request
+# Única dependência de sessão da API (deps.py e core/security.py reexportam-na).
+# O FastAPI guarda o resultado por pedido, por isso a rota e todas as
+# dependências (get_current_user, ...) partilham a mesma sessão e ligação.
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# ==================== CAMINHO ASYNC (rotas de leitura) ====================
+
+# Driver async equivalente a cada dialeto do DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mssql": "mssql+aioodbc",
+    "postgresql": "postgresql+asyncpg",
+}
+
+_async_lock = threading.Lock()
+_async_state = {"engine": None, "sessionmaker": None, "resolved": False}
+
+
+def async_database_url(url: str = settings.DATABASE_URL) -> Optional[str]:
+    """URL do engine async: ASYNC_DATABASE_URL ou o DATABASE_URL com o driver async."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    backend, separator, rest = url.partition(":")
+    driver = ASYNC_DRIVERS.get(backend.split("+")[0])
+    return f"{driver}{separator}{rest}" if driver else None
+
+
+def get_async_sessionmaker():
+    """
+    async_sessionmaker do engine async, criado no primeiro uso.
+    None se DB_ASYNC_ENABLED=False ou se o driver async não estiver instalado.
+    """
+    if _async_state["resolved"]:
+        return _async_state["sessionmaker"]
+    with _async_lock:
+        if not _async_state["resolved"]:
+            url = async_database_url() if settings.DB_ASYNC_ENABLED else None
+            if url:
+                from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+                options = _engine_options(url)
+                options.pop("poolclass", None)  # o engine async usa AsyncAdaptedQueuePool
+                if url.startswith("postgresql") and settings.DB_STATEMENT_TIMEOUT:
+                    options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT * 1000)}}
+                try:
+                    _async_state["engine"] = create_async_engine(url, **options)
+                except ImportError as e:
+                    logger.warning("Driver async indisponível (%s); rotas de leitura usam a Session síncrona", e)
+                else:
+                    _async_state["sessionmaker"] = async_sessionmaker(
+                        _async_state["engine"], autoflush=False, expire_on_commit=False
+                    )
+            _async_state["resolved"] = True
+    return _async_state["sessionmaker"]
+
+
+async def dispose_async_engine():
+    if _async_state["engine"] is not None:
+        await _async_state["engine"].dispose()
+
+
+class ReadSession:
+    """
+    Sessão das rotas de leitura async. O código dos repositórios é o mesmo
+    (síncrono, recebe uma Session): com driver async corre sobre uma
+    AsyncSession via run_sync e a espera pela BD não ocupa uma thread;
+    sem driver corre numa Session normal no threadpool.
+
+    A função passada a run() deve devolver dados já serializados (dicts ou
+    schemas): relações lazy não podem ser carregadas fora dela.
+    """
+    def __init__(self, async_session=None):
+        self.async_session = async_session
+        self._sync_session = None
+
+    @property
+    def is_async(self) -> bool:
+        return self.async_session is not None
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        if self.async_session is not None:
+            return await self.async_session.run_sync(fn, *args, **kwargs)
+        if self._sync_session is None:
+            self._sync_session = SessionLocal()
+        return await run_in_threadpool(fn, self._sync_session, *args, **kwargs)
+
+    async def close(self):
+        if self.async_session is not None:
+            await self.async_session.close()
+        if self._sync_session is not None:
+            await run_in_threadpool(self._sync_session.close)
+
+
+# Dependência das rotas de leitura async (uma ReadSession por pedido)
+async def get_read_db():
+    factory = get_async_sessionmaker()
+    reads = ReadSession(factory() if factory is not None else None)
+    try:
+        yield reads
+    finally:
+        await reads.close()
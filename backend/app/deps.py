@@ -1,9 +1,5 @@
-from app.database import SessionLocal
+from app.database import get_db
 
-# Dependência de sessão para injeção no FastAPI
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Dependência de sessão para injeção no FastAPI: é a mesma função de
+# app.database, para que todas as dependências de um pedido partilhem a sessão.
+__all__ = ["get_db"]
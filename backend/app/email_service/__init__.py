@@ -1,2 +1,3 @@
 # Importa a classe EmailService do arquivo local (módulo) email_service.py
-from .email_service import EmailService
\ No newline at end of file
+from .email_service import EmailService
+from .outbox_worker import EmailOutboxWorker
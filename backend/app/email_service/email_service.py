@@ -4,6 +4,9 @@ from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from app.core.config import settings
+from app.database import SessionLocal
+from app.crud.email_outbox import EmailOutboxRepository
 load_dotenv()
 
 class EmailService:
@@ -13,16 +16,57 @@ class EmailService:
         self.email_user = os.getenv('EMAIL_HOST_USER')
         self.email_password = os.getenv('EMAIL_HOST_PASSWORD')
         self.email_from = os.getenv('EMAIL_FROM')
+        self.use_tls = os.getenv('EMAIL_USE_TLS', 'true').lower() in ('1', 'true', 'yes')
         
-    def send_email(self, to_email: str, subject: str, body: str):
+    def send_email(self, to_email: str, subject: str, body: str, db=None):
+        """
+        Coloca o email na fila email_outbox e retorna de imediato.
+        O envio SMTP (com ligações reutilizadas e retries) é feito pelo EmailOutboxWorker.
+        Com `db`, o email entra na transação do chamador (só sai se a alteração que o
+        originou for gravada); sem sessão, é gravado numa sessão própria.
+        """
+        if db is not None:
+            self.queue_email(db, to_email, subject, body)
+            print(f"Email para {to_email} adicionado à fila na transação atual às {datetime.now()}")
+            return True
+        db = SessionLocal()
         try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"Mecatec Oficinas <{self.email_from}>"
-            msg['To'] = to_email
+            db_email = EmailOutboxRepository(db).enqueue(to_email, subject, self.wrap_body(body))
+            print(f"Email para {to_email} colocado na fila (id={db_email.id}) às {datetime.now()}")
+            return True
+        except Exception as e:
+            db.rollback()
+            print(f"Falha ao colocar email para {to_email} na fila. Erro: {e}")
+            return False
+        finally:
+            db.close()
+
+    def queue_email(self, db, to_email: str, subject: str, body: str):
+        """Adiciona o email à fila na sessão do chamador (o commit fica a cargo deste)."""
+        return EmailOutboxRepository(db).add(to_email, subject, self.wrap_body(body))
+
+    def build_message(self, to_email: str, subject: str, html_body: str) -> MIMEMultipart:
+        """Constrói a mensagem MIME a partir do HTML final guardado na fila."""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f"Mecatec Oficinas <{self.email_from}>"
+        msg['To'] = to_email
+        msg.attach(MIMEText(html_body, 'html'))
+        return msg
 
-            # Adicionar logo ao cabeçalho do email
-            body_with_logo = f"""
+    def open_connection(self) -> smtplib.SMTP:
+        """Abre uma ligação SMTP autenticada (STARTTLS e LOGIN apenas quando configurados)."""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=settings.EXTERNAL_API_TIMEOUT)
+        if self.use_tls:
+            server.starttls()
+        if self.email_user and self.email_password:
+            server.login(self.email_user, self.email_password)
+        return server
+
+    @staticmethod
+    def wrap_body(body: str) -> str:
+        # Adicionar logo ao cabeçalho do email
+        return f"""
             <div style="max-width: 600px; margin: 0 auto; font-family: Arial, sans-serif;">
                 <div style="background-color: #dc2626; padding: 20px; text-align: center;">
                     <h1 style="color: white; margin: 0; font-size: 28px;"> MECATEC</h1>
@@ -38,21 +82,8 @@ class EmailService:
                 </div>
             </div>
             """
-
-            msg.attach(MIMEText(body_with_logo, 'html'))
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_user, self.email_password)
-                server.send_message(msg)
-                
-            print(f"Email enviado para {to_email} às {datetime.now()}")
-            return True
-        except Exception as e:
-            print(f"Falha ao enviar email para {to_email}. Erro: {e}")
-            return False
             
-    def send_confirmation_email(self, customer_email: str, service_name: str, service_date: datetime):
+    def send_confirmation_email(self, customer_email: str, service_name: str, service_date: datetime, db=None):
         """Envia email de confirmação quando um appointment é criado"""
         subject = "Confirmação de Agendamento"
         
@@ -69,10 +100,15 @@ class EmailService:
         </html>
         """
 
-        return self.send_email(customer_email, subject, html_content)
+        return self.send_email(customer_email, subject, html_content, db=db)
     
-    def send_reminder_email(self, customer_email: str, service_name: str, service_date: datetime):
+    def send_reminder_email(self, customer_email: str, service_name: str, service_date: datetime, db=None):
         """Envia email de lembrete 24h antes do appointment"""
+        subject, html_content = self.render_reminder_email(service_name, service_date)
+        return self.send_email(customer_email, subject, html_content, db=db)
+
+    def render_reminder_email(self, service_name: str, service_date: datetime):
+        """Retorna (assunto, html) do email de lembrete"""
         subject = "Lembrete de Agendamento"
         
         html_content = f"""
@@ -88,9 +124,9 @@ class EmailService:
         </html>
         """
 
-        return self.send_email(customer_email, subject, html_content)
+        return subject, html_content
 
-    def send_extra_service_proposal_email(self, customer_email: str, customer_name: str, vehicle_plate: str, extra_service_name: str, price: float, description: str):
+    def send_extra_service_proposal_email(self, customer_email: str, customer_name: str, vehicle_plate: str, extra_service_name: str, price: float, description: str, db=None):
         """Envia email com proposta de serviço extra"""
         subject = f"Proposta de Serviço Extra - Veículo {vehicle_plate}"
         
@@ -113,10 +149,10 @@ class EmailService:
         </html>
         """
         
-        return self.send_email(customer_email, subject, html_content)
+        return self.send_email(customer_email, subject, html_content, db=db)
         
     
-    def send_extra_service_cancellation_email(self, customer_email: str, customer_name: str, vehicle_plate: str, extra_service_name: str):
+    def send_extra_service_cancellation_email(self, customer_email: str, customer_name: str, vehicle_plate: str, extra_service_name: str, db=None):
         """Envia email quando um serviço extra proposto é cancelado"""
         subject = f"Serviço Extra Cancelado - Veículo {vehicle_plate}"
         
@@ -138,10 +174,10 @@ class EmailService:
         </html>
         """
         
-        return self.send_email(customer_email, subject, html_content)   
+        return self.send_email(customer_email, subject, html_content, db=db)   
         
     
-    def send_work_started_email(self, customer_email: str, customer_name: str, service_name: str, vehicle_plate: str):
+    def send_work_started_email(self, customer_email: str, customer_name: str, service_name: str, vehicle_plate: str, db=None):
         """Envia email quando o trabalho é iniciado"""
         subject = f"Trabalho Iniciado - {vehicle_plate}"
     
@@ -163,9 +199,9 @@ class EmailService:
         </html>
         """
 
-        return self.send_email(customer_email, subject, html_content)
+        return self.send_email(customer_email, subject, html_content, db=db)
 
-    def send_work_completed_email(self, customer_email: str, customer_name: str, service_name: str, vehicle_plate: str):
+    def send_work_completed_email(self, customer_email: str, customer_name: str, service_name: str, vehicle_plate: str, db=None):
         """Envia email quando o trabalho é finalizado"""
         subject = f"Trabalho Concluído - {vehicle_plate}"
     
@@ -187,10 +223,10 @@ class EmailService:
         </html>
         """
 
-        return self.send_email(customer_email, subject, html_content)
+        return self.send_email(customer_email, subject, html_content, db=db)
 
     def send_payment_confirmation_email(self, customer_email: str, customer_name: str, invoice_number: str, 
-                                       amount: float, vehicle_plate: str, service_name: str = None):
+                                       amount: float, vehicle_plate: str, service_name: str = None, db=None):
         """Envia email de confirmação de pagamento com agradecimento"""
         subject = f"✅ Pagamento Confirmado - Fatura {invoice_number}"
     
@@ -233,4 +269,4 @@ class EmailService:
         </html>
         """
 
-        return self.send_email(customer_email, subject, html_content)
\ No newline at end of file
+        return self.send_email(customer_email, subject, html_content, db=db)
\ No newline at end of file
@@ -0,0 +1,163 @@
+import smtplib
+import threading
+import time
+import atexit
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.crud.email_outbox import EmailOutboxRepository
+from .email_service import EmailService
+
+
+class SmtpConnection:
+    """
+    Ligação SMTP autenticada reutilizada entre envios.
+    Abre na primeira utilização, valida com NOOP após algum tempo parada e
+    volta a ligar automaticamente se o servidor a tiver fechado.
+    """
+    def __init__(self, email_service: EmailService, idle_seconds: int):
+        self.email_service = email_service
+        self.idle_seconds = idle_seconds
+        self.server: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+        self.connections_opened = 0
+
+    def send(self, msg) -> None:
+        server = self._ensure_connected()
+        try:
+            server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError, OSError):
+            # Ligação caiu entre envios: volta a ligar e tenta uma vez
+            self.close()
+            server = self._ensure_connected()
+            server.send_message(msg)
+        self.last_used = time.monotonic()
+
+    def _ensure_connected(self) -> smtplib.SMTP:
+        if self.server is not None and time.monotonic() - self.last_used > self.idle_seconds:
+            try:
+                self.server.noop()
+            except Exception:
+                self.close()
+        if self.server is None:
+            self.server = self.email_service.open_connection()
+            self.connections_opened += 1
+            self.last_used = time.monotonic()
+        return self.server
+
+    def close(self) -> None:
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except Exception:
+            pass
+        self.server = None
+
+
+class EmailOutboxWorker:
+    """
+    Pool de threads que envia os emails da tabela email_outbox.
+    Cada thread tem a sua ligação SMTP persistente, reclama lotes de emails
+    prontos a enviar e reagenda as falhas com backoff exponencial.
+    """
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        email_service: Optional[EmailService] = None,
+    ):
+        self.pool_size = settings.EMAIL_WORKER_POOL_SIZE if pool_size is None else pool_size
+        self.batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        self.poll_seconds = settings.EMAIL_OUTBOX_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.email_service = email_service or EmailService()
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._connections = []
+
+    def start(self):
+        if self.pool_size <= 0:
+            print(f"[{datetime.now()}] Email outbox worker disabled (EMAIL_WORKER_POOL_SIZE=0)")
+            return
+        for index in range(self.pool_size):
+            connection = SmtpConnection(self.email_service, settings.EMAIL_SMTP_IDLE_SECONDS)
+            thread = threading.Thread(
+                target=self._run,
+                args=(connection,),
+                name=f"email-outbox-{index}",
+                daemon=True,
+            )
+            self._connections.append(connection)
+            self._threads.append(thread)
+            thread.start()
+        print(f"[{datetime.now()}] Email outbox worker started ({self.pool_size} threads)!")
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=self.poll_seconds + settings.EXTERNAL_API_TIMEOUT)
+        self._threads = []
+
+    @property
+    def connections_opened(self) -> int:
+        return sum(connection.connections_opened for connection in self._connections)
+
+    def _run(self, connection: SmtpConnection):
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    processed = self.process_batch(connection)
+                except Exception as e:
+                    print(f"Erro no worker de email: {e}")
+                    processed = 0
+                if not processed:
+                    # Fila vazia: fecha a ligação se ficou parada e espera pelo próximo poll
+                    if connection.server is not None and time.monotonic() - connection.last_used > settings.EMAIL_SMTP_IDLE_SECONDS:
+                        connection.close()
+                    self._stop_event.wait(self.poll_seconds)
+        finally:
+            connection.close()
+
+    def process_batch(self, connection: SmtpConnection) -> int:
+        """
+        Reclama e envia um lote. Os envios bem-sucedidos são marcados com um
+        único UPDATE e as falhas reagendadas, tudo num só commit por lote.
+        Retorna o nº de emails processados.
+        """
+        db = SessionLocal()
+        try:
+            repo = EmailOutboxRepository(db)
+            repo.release_expired_claims()
+            batch = repo.claim_batch(self.batch_size, settings.EMAIL_OUTBOX_LEASE_SECONDS)
+            if not batch:
+                return 0
+
+            sent_ids = []
+            for db_email in batch:
+                try:
+                    connection.send(self.email_service.build_message(db_email.to_email, db_email.subject, db_email.body))
+                    sent_ids.append(db_email.id)
+                except Exception as e:
+                    print(f"Falha ao enviar email {db_email.id} para {db_email.to_email}. Erro: {e}")
+                    connection.close()
+                    repo.mark_failed(
+                        db_email,
+                        str(e),
+                        max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+                        backoff_seconds=settings.EMAIL_RETRY_BACKOFF_SECONDS,
+                    )
+
+            repo.mark_sent(sent_ids)
+            db.commit()
+            if sent_ids:
+                print(f"[{datetime.now()}] {len(sent_ids)}/{len(batch)} emails enviados")
+            return len(batch)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
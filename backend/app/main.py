@@ -1,11 +1,24 @@
+import time
+
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from starlette.middleware.sessions import SessionMiddleware
-from app.database import Base, engine, SessionLocal
+from app.database import engine, pool_metrics, dispose_async_engine
 from app.api.v1.api import api_router as api_v1_router
-from app.scheduler.scheduler import NotificationScheduler
+from app.api.v1.pagination import PAGE_HEADERS
+from app.core.config import settings
+from app.core.startup import StartupTimer, BackgroundServices, init_database
+from app.scheduler.leader import SchedulerLeader, SchedulerLeaderLock
 from app.core.security import SECRET_KEY
+from app.core.passwords import password_hasher, PasswordHasherBusyError
+from app.core.principal import principal_cache
+from app.crud.metrics_rollup import rollup_health
+from app.services.notification_events import notification_broker
+from app.services.stock_alerts import stock_alerts
 from app.core.logger import setup_logger
 from app.exceptions import (
     DomainException,
@@ -17,44 +30,66 @@ from app.exceptions import (
     BusinessRuleError
 )
 
-# IMPORTANTE: Importe aqui todos os seus modelos.
-# O SQLAlchemy precisa que eles sejam carregados na memória para saber
-# que tabelas deve criar com o `create_all`.
-from app.models import *
+# Todos os modelos carregados para o SQLAlchemy resolver as relationships
+# (a criação das tabelas é feita pelo comando init_db). Importa o pacote sem `*`:
+# o módulo app.models.status taparia o `status` do FastAPI usado nos handlers.
+import app.models  # noqa: F401
 
 logger = setup_logger(__name__)
 
-scheduler = NotificationScheduler()
-scheduler.start()
-
-# Cria tabelas
-Base.metadata.create_all(bind=engine)
-
-def run_seeds_on_startup():
-    """Executa seeds apenas se o banco estiver vazio"""
-    from app.models.user import User
-    from app.seed_all import run_all_seeds
-    
-    db = SessionLocal()
+_import_seconds = time.perf_counter() - _import_started
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque/paragem do processo. Nada corre no import do módulo: cada worker
+    do uvicorn (e cada restart do --reload) só paga o que está aqui.
+    - schema e seeds: comando `python -m scripts.utilities.init_db`
+      (ou DB_INIT_ON_STARTUP=True para os repetir em cada arranque),
+    - schedulers/workers em background: apenas no worker eleito líder.
+    """
+    timer = StartupTimer()
+    timer.record("imports", _import_seconds)
+
+    if settings.DB_INIT_ON_STARTUP:
+        with timer.phase("schema + seeds"):
+            init_database()
+
+    leader = None
+    if settings.SCHEDULER_ENABLED:
+        background_services = BackgroundServices()
+        with timer.phase("scheduler election + start"):
+            leader = SchedulerLeader(
+                SchedulerLeaderLock(engine),
+                on_elected=background_services.start,
+                on_stop=background_services.stop,
+            )
+            leader.start()
+
+    # Canal de push das notificações (liga ao broker quando NOTIFICATION_PUBSUB_BACKEND=broker)
+    with timer.phase("notification pub/sub"):
+        notification_broker.start()
+
+    app.state.startup_timings = timer.as_dict()
+    app.state.scheduler_leader = leader
+    logger.info(timer.summary())
     try:
-        existing_users = db.query(User).count()
-        if existing_users == 0:
-            logger.info("Database is empty. Running seeds...")
-            run_all_seeds()
-        else:
-            logger.info(f"Database already has data ({existing_users} users). Skipping seeds.")
-    except Exception as e:
-        logger.error(f"Error checking/running seeds: {e}", exc_info=True)
+        yield
     finally:
-        db.close()
+        if leader is not None:
+            leader.stop()
+        notification_broker.stop()
+        stock_alerts.shutdown()
+        await dispose_async_engine()
+        password_hasher.shutdown()
 
-# Executa seeds no arranque
-run_seeds_on_startup()
 
 app = FastAPI(
     title="Mecatec API",
     description="API para gestão de oficina automotiva",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 
@@ -123,6 +158,17 @@ async def business_rule_handler(request: Request, exc: BusinessRuleError):
     )
 
 
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    """Fila do hash de passwords cheia (pico de logins): o cliente tenta de novo."""
+    logger.warning(f"PasswordHasherBusy - Path: {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many logins in progress, try again shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+
 @app.exception_handler(DomainException)
 async def domain_exception_handler(request: Request, exc: DomainException):
     """Catch-all handler for any DomainException not caught by specific handlers."""
@@ -152,6 +198,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Permite todos os métodos (GET, POST, etc.)
     allow_headers=["*"], # Permite todos os cabeçalhos
+    expose_headers=PAGE_HEADERS, # Cursor/total das listagens paginadas
 )
 
 # Inclui as rotas da v1 com o prefixo /api/v1
@@ -159,4 +206,43 @@ app.include_router(api_v1_router, prefix="/api/v1")
 
 @app.get("/ping")
 def ping():
-    return {"message": "pong"}
\ No newline at end of file
+    return {"message": "pong"}
+
+
+@app.get("/health/startup")
+def startup_health(request: Request):
+    """Tempos das fases de arranque deste worker e se é o líder dos schedulers."""
+    leader = getattr(request.app.state, "scheduler_leader", None)
+    return {
+        "timings_ms": getattr(request.app.state, "startup_timings", {}),
+        "scheduler_leader": bool(leader and leader.is_leader),
+    }
+
+@app.get("/health/db-pool")
+def db_pool_health():
+    """Ocupação do pool de ligações deste worker e tempo de espera nos checkouts."""
+    return pool_metrics.snapshot(engine.pool)
+
+
+@app.get("/health/password-hasher")
+def password_hasher_health():
+    """Pool do hash de passwords: workers, fila, rejeitados e tempos médios."""
+    return password_hasher.stats()
+
+
+@app.get("/health/principal-cache")
+def principal_cache_health():
+    """Cache de tokens validados: ocupação e hits/misses."""
+    return principal_cache.stats()
+
+
+@app.get("/health/metrics-rollup")
+def metrics_rollup_health():
+    """Desvios do rollup de métricas desde a última reconstrução (movimentos falhados, linhas em falta)."""
+    return rollup_health.stats()
+
+
+@app.get("/health/notification-stream")
+def notification_stream_health():
+    """Canal de push (SSE): ligações, eventos publicados/entregues/descartados e latência do fan-out."""
+    return notification_broker.stats()
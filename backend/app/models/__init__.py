@@ -23,3 +23,11 @@ from .absence import Absence
 from .user import User
 from .notificationBadge import Notification
 from .userNotification import UserNotification
+from .metrics_rollup import MetricsDailyRollup
+from .email_outbox import EmailOutbox
+from .stripe_webhook_event import StripeWebhookEvent
+from .invoice_sequence import InvoiceSequence
+from .notification_counter import NotificationUnreadCounter
+from .invoice_line import InvoiceLine
+from .stock_movement import StockMovement
+from .stock_snapshot import StockSnapshot
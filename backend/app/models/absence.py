@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date
+from sqlalchemy import Column, Integer, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -6,6 +6,10 @@ from app.database import Base
 
 class Absence(Base):
     __tablename__ = "absences"
+    __table_args__ = (
+        # Listagem paginada por keyset (day, id), mais recentes primeiro
+        Index("ix_absences_day_id", "day", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
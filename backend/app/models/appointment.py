@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Boolean, Column, Integer, String, DateTime, Float, ForeignKey, Text
+from sqlalchemy import JSON, Boolean, Column, Integer, String, DateTime, Float, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.models.order_part import OrderPart
@@ -8,6 +8,10 @@ from app.database import Base
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Index composto para as agregações de métricas por status/serviço
+        Index("ix_appointments_status_service", "status_id", "service_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -33,6 +37,9 @@ class Appointment(Base):
     # Flags e metadados
     created_at = Column(DateTime, default=datetime.utcnow, index=True)  # Index para ordenação
     reminder_sent = Column(Integer, default=0)  # 0 = Não enviado, 1 = Enviado
+    # Lease do job de lembretes (vários processos podem correr o scheduler)
+    reminder_claim_token = Column(String(32), nullable=True, index=True)
+    reminder_claimed_until = Column(DateTime, nullable=True)
     
 
     # Foreign Keys
@@ -18,6 +18,8 @@ class CustomerAuth(Base):
     is_active = Column(Boolean, default=True)
     failed_login_attempts = Column(Integer, default=0)
     last_login = Column(DateTime, nullable=True)
+    # Incrementado para revogar todos os tokens emitidos ao cliente
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     deleted_at = Column(DateTime, nullable=True, default=None) # Soft delete column
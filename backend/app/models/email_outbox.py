@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+
+from app.database import Base
+
+EMAIL_STATUS_PENDING = "pending"
+EMAIL_STATUS_SENDING = "sending"
+EMAIL_STATUS_SENT = "sent"
+EMAIL_STATUS_FAILED = "failed"
+
+
+class EmailOutbox(Base):
+    """
+    Fila persistente de emails a enviar.
+    O EmailService apenas insere aqui; o EmailOutboxWorker reclama lotes
+    (claim_token + claimed_until), envia-os e regista o resultado.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Index para o worker encontrar rapidamente os emails prontos a enviar
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)  # HTML final (já com cabeçalho/rodapé)
+    status = Column(String(20), nullable=False, default=EMAIL_STATUS_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(1000), nullable=True)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)
+    claim_token = Column(String(32), nullable=True, index=True)
+    claimed_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    sent_at = Column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<EmailOutbox id={self.id} to={self.to_email} status={self.status} attempts={self.attempts}>"
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Agregações financeiras: faturas pagas por período (total incluído no índice no SQL Server)
+        Index("ix_invoices_status_paid_at", "payment_status", "paid_at", mssql_include=["total", "appointment_id"]),
+        # Uma fatura por appointment: dois pagamentos concorrentes não geram duas faturas
+        Index("uq_invoices_appointment_id", "appointment_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     appointment_id = Column(Integer, ForeignKey("appointments.id"), nullable=False)
@@ -34,4 +40,6 @@ class Invoice(Base):
     paid_at = Column(DateTime, nullable=True)
     
     # Relacionamentos
-    appointment = relationship("Appointment", back_populates="invoices")
\ No newline at end of file
+    appointment = relationship("Appointment", back_populates="invoices")
+    lines = relationship("InvoiceLine", back_populates="invoice", order_by="InvoiceLine.line_no",
+                         cascade="all, delete-orphan", passive_deletes=True)
\ No newline at end of file
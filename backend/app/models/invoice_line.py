@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+LABOR = "labor"
+PART = "part"
+
+
+class InvoiceLine(Base):
+    """Linha de uma fatura (snapshot no momento do pagamento), normalizada a partir de line_items."""
+    __tablename__ = "invoice_lines"
+    __table_args__ = (
+        # Receita/margem por peça num período: faturas pagas (ix_invoices_status_paid_at) -> linhas
+        Index("ix_invoice_lines_invoice_id", "invoice_id", "line_no",
+              mssql_include=["kind", "part_number", "quantity", "unit_price", "unit_cost", "total"]),
+        Index("ix_invoice_lines_part_number", "part_number"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    invoice_id = Column(Integer, ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False)
+    line_no = Column(Integer, nullable=False)
+    kind = Column(String(20), nullable=False)  # labor | part
+    name = Column(String(255), nullable=False)
+    description = Column(String(255), nullable=True)
+    part_number = Column(String(100), nullable=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="SET NULL"), nullable=True)
+    quantity = Column(Integer, nullable=False, default=1)
+    unit_price = Column(Float, nullable=False)
+    unit_cost = Column(Float, nullable=True)  # custo da peça no momento da fatura (margem por SKU)
+    total = Column(Float, nullable=False)
+
+    invoice = relationship("Invoice", back_populates="lines")
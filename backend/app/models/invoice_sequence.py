@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+
+from app.database import Base
+
+
+class InvoiceSequence(Base):
+    """
+    Contador persistente para a numeração das faturas (uma linha por sequência).
+    next_value é o próximo número ainda não atribuído; é avançado com um
+    UPDATE atómico pelo InvoiceNumberAllocator.
+    """
+    __tablename__ = "invoice_sequences"
+
+    name = Column(String(50), primary_key=True)
+    next_value = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<InvoiceSequence name={self.name} next_value={self.next_value}>"
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index, UniqueConstraint
+from datetime import datetime
+
+from app.database import Base
+
+
+class MetricsDailyRollup(Base):
+    """
+    Contagem materializada de appointments por (dia, serviço, status, área).
+    Mantida incrementalmente pelo AppointmentRepository e reconciliada
+    periodicamente pelo scheduler a partir da tabela appointments.
+    """
+    __tablename__ = "metrics_daily_rollup"
+    __table_args__ = (
+        UniqueConstraint("day", "service_id", "status_id", "area", name="uq_metrics_daily_rollup_key"),
+        # Index de cobertura dos totais globais (MetricsService.all_time): agrupa sem ler a tabela
+        Index("ix_metrics_daily_rollup_status_service", "status_id", "service_id", "appointment_count"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)  # Index para filtros por intervalo de datas
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=True, index=True)
+    status_id = Column(Integer, ForeignKey("statuses.id"), nullable=True, index=True)
+    area = Column(String(100), nullable=True, index=True)  # Snapshot de Service.area para filtros por role
+    appointment_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return (
+            f"<MetricsDailyRollup day={self.day} service_id={self.service_id} "
+            f"status_id={self.status_id} count={self.appointment_count}>"
+        )
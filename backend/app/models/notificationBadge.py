@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from datetime import datetime
 from app.database import Base
 
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Deduplicação de alertas recentes por componente
+        Index("ix_notifications_component_inserted_at", "component", "inserted_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     component = Column(String(100), nullable=False)
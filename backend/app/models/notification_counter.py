@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+
+from app.database import Base
+
+
+class NotificationUnreadCounter(Base):
+    """
+    Nº de notificações não lidas por (utilizador, componente) para os badges.
+    Mantido na mesma transação pelas escritas em user_notifications/notifications
+    e reconstruído periodicamente pelo scheduler a partir dessas tabelas.
+    """
+    __tablename__ = "notification_unread_counters"
+    __table_args__ = (
+        UniqueConstraint("user_id", "component", name="uq_notification_unread_counters_user_component"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    component = Column(String(100), nullable=False)
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<NotificationUnreadCounter user_id={self.user_id} component={self.component} unread={self.unread_count}>"
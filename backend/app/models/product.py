@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, DDL, event
 from datetime import datetime
 from app.database import Base
 
@@ -42,3 +42,18 @@ class Product(Base):
     @property
     def minimumStock(self) -> int:
         return self.minimum_stock
+
+
+# Pesquisa de produtos (app.crud.product_search): em SQLite as tabelas FTS5 são criadas
+# junto com `products`. Em SQL Server o índice full-text vem da migração
+# scripts/migrations/add_product_search_index.
+PRODUCT_SEARCH_SQLITE_DDL = (
+    # Prefixos de palavras, sem acentos, com ranking bm25 por coluna
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "part_number, name, brand, category, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    # Substrings de 3+ caracteres no meio de palavras e part numbers ("w30" em "OL-5W30-1L")
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_trigram USING fts5(terms, tokenize = 'trigram')",
+)
+
+for _statement in PRODUCT_SEARCH_SQLITE_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
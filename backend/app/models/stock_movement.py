@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from datetime import datetime
+
+from app.database import Base
+
+# Motivos dos movimentos (reason)
+OPENING = "opening"              # saldo inicial do produto no ledger
+ADJUSTMENT = "adjustment"        # contagem/edição manual da quantidade (PUT do produto)
+REVALUATION = "revaluation"      # mudança de custo sem mudança de quantidade (delta 0)
+ORDER_PART = "order_part"        # peça aplicada numa ordem de serviço
+EXTRA_APPROVED = "extra_approved"  # peças reservadas de um serviço extra aprovado
+PART_RETURNED = "part_returned"  # peça removida da ordem, devolvida ao stock
+EXTRA_RETURNED = "extra_returned"  # serviço extra aprovado depois rejeitado
+
+CONSUMPTION_REASONS = (ORDER_PART, EXTRA_APPROVED, PART_RETURNED, EXTRA_RETURNED)
+
+
+class StockMovement(Base):
+    """
+    Ledger append-only das alterações a Product.quantity: cada saída/entrada é
+    uma linha com o delta e o custo unitário nesse momento. Nunca é atualizado;
+    a quantidade numa data vem do snapshot mais próximo + os movimentos seguintes.
+    """
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Histórico/replay de um produto
+        Index("ix_stock_movements_product_ts", "product_id", "ts"),
+        # Relatórios por período (todos os produtos) e replay a partir de um checkpoint
+        Index("ix_stock_movements_ts", "ts", mssql_include=["product_id", "delta", "unit_cost", "reason"]),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    ts = Column(DateTime, nullable=False, default=datetime.utcnow)
+    delta = Column(Integer, nullable=False)
+    unit_cost = Column(Float, nullable=True)
+    reason = Column(String(30), nullable=False)
+    reference = Column(String(100), nullable=True)  # ex.: "appointment:12"
+
+    def __repr__(self) -> str:
+        return f"<StockMovement product_id={self.product_id} delta={self.delta} reason={self.reason}>"
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+
+from app.database import Base
+
+
+class StockSnapshot(Base):
+    """
+    Checkpoint do ledger de stock: quantidade e último custo de cada produto em
+    taken_at (movimentos com ts < taken_at). Todos os produtos de um checkpoint
+    partilham o mesmo taken_at; criados periodicamente pelo StockSnapshotScheduler.
+    """
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (
+        Index("ix_stock_snapshots_taken_at", "taken_at", "product_id"),
+        Index("ix_stock_snapshots_product_taken_at", "product_id", "taken_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    taken_at = Column(DateTime, nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_cost = Column(Float, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<StockSnapshot product_id={self.product_id} taken_at={self.taken_at} quantity={self.quantity}>"
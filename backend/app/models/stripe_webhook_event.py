@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+
+from app.database import Base
+
+STRIPE_EVENT_PENDING = "pending"
+STRIPE_EVENT_PROCESSING = "processing"
+STRIPE_EVENT_PROCESSED = "processed"
+STRIPE_EVENT_IGNORED = "ignored"
+STRIPE_EVENT_FAILED = "failed"
+
+
+class StripeWebhookEvent(Base):
+    """
+    Eventos recebidos do webhook do Stripe, guardados em bruto.
+    A chave única event_id torna a ingestão idempotente (o Stripe reenvia
+    eventos); o processamento (faturas) é feito em background.
+    """
+    __tablename__ = "stripe_webhook_events"
+    __table_args__ = (
+        # Index para o processador encontrar os eventos prontos a processar
+        Index("ix_stripe_webhook_events_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String(255), unique=True, nullable=False, index=True)  # id do evento Stripe (evt_...)
+    event_type = Column(String(100), nullable=False, index=True)
+    payload = Column(Text, nullable=False)  # JSON em bruto, tal como recebido
+    status = Column(String(20), nullable=False, default=STRIPE_EVENT_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(1000), nullable=True)
+    result = Column(String(255), nullable=True)  # ex.: número da fatura criada
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)
+    claim_token = Column(String(32), nullable=True, index=True)
+    claimed_until = Column(DateTime, nullable=True)
+    received_at = Column(DateTime, nullable=False, default=datetime.now)
+    processed_at = Column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<StripeWebhookEvent {self.event_id} type={self.event_type} status={self.status}>"
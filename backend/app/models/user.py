@@ -14,6 +14,8 @@ class User(Base):
     twofactor_secret = Column(String(255), nullable=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=True, unique=True)
     requires_password_change = Column(Boolean, nullable=False, default=False)
+    # Incrementado para revogar todos os tokens emitidos ao utilizador
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     employee = relationship("Employee", back_populates="user", uselist=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -6,6 +6,17 @@ from app.database import Base
 
 class UserNotification(Base):
     __tablename__ = "user_notifications"
+    __table_args__ = (
+        # Feed por keyset (user_id, created_at, id): todas as notificações do utilizador
+        Index("ix_user_notifications_feed", "user_id", "created_at", "id"),
+        # Extra: mesmo índice filtrado às não lidas (o feed por omissão), menor e só com linhas por ler
+        Index(
+            "ix_user_notifications_unread_feed", "user_id", "created_at", "id",
+            sqlite_where=text("read_at IS NULL"),
+            mssql_where=text("read_at IS NULL"),
+            postgresql_where=text("read_at IS NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
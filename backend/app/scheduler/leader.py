@@ -0,0 +1,167 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+import hashlib
+import tempfile
+import threading
+import zlib
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+SCHEDULER_LOCK_NAME = "mecatec-scheduler"
+
+
+class SchedulerLeaderLock:
+    """
+    Lock exclusivo entre processos (workers do uvicorn, várias instâncias).
+    - SQL Server: sp_getapplock na sessão de uma ligação dedicada,
+    - PostgreSQL: pg_try_advisory_lock,
+    - SQLite/outros: lock de ficheiro (flock/msvcrt).
+    O lock é libertado quando o processo termina (ligação ou ficheiro fechados),
+    por isso um worker que morre não deixa o lock preso.
+    """
+    def __init__(self, engine: Engine, name: str = SCHEDULER_LOCK_NAME, lock_file: Optional[str] = None):
+        self.engine = engine
+        self.name = name
+        self.lock_file = lock_file or settings.SCHEDULER_LOCK_FILE or self._default_lock_file()
+        self._connection = None
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._connection is not None or self._file is not None
+
+    def try_acquire(self) -> bool:
+        if self.held:
+            return True
+        dialect = self.engine.dialect.name
+        if dialect == "mssql":
+            return self._acquire_db(
+                "SET NOCOUNT ON; DECLARE @result int; "
+                "EXEC @result = sp_getapplock @Resource = :name, @LockMode = 'Exclusive', "
+                "@LockOwner = 'Session', @LockTimeout = 0; SELECT @result",
+                {"name": self.name},
+                lambda result: result is not None and result >= 0,
+            )
+        if dialect == "postgresql":
+            return self._acquire_db(
+                "SELECT pg_try_advisory_lock(:key)",
+                {"key": zlib.crc32(self.name.encode())},
+                bool,
+            )
+        return self._acquire_file()
+
+    def release(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()  # fim da sessão liberta o lock
+            finally:
+                self._connection = None
+        if self._file is not None:
+            try:
+                self._unlock_file(self._file)
+                self._file.close()
+            finally:
+                self._file = None
+
+    def _acquire_db(self, statement: str, params: dict, acquired: Callable) -> bool:
+        connection = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            if acquired(connection.execute(text(statement), params).scalar()):
+                self._connection = connection
+                return True
+        except Exception as e:
+            print(f"Erro ao obter o lock do scheduler: {e}")
+        connection.close()
+        return False
+
+    def _acquire_file(self) -> bool:
+        handle = open(self.lock_file, "a+")
+        try:
+            self._lock_file(handle)
+        except OSError:
+            handle.close()
+            return False
+        self._file = handle
+        return True
+
+    def _default_lock_file(self) -> str:
+        # Um lock por base de dados (vários projetos/BDs na mesma máquina)
+        digest = hashlib.sha1(str(self.engine.url).encode()).hexdigest()[:12]
+        return str(Path(tempfile.gettempdir()) / f"{self.name}-{digest}.lock")
+
+    @staticmethod
+    def _lock_file(handle):
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    @staticmethod
+    def _unlock_file(handle):
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class SchedulerLeader:
+    """
+    Eleição do processo que corre os schedulers/workers em background.
+    Só o processo que obtém o lock chama on_elected; os restantes tentam de
+    novo a cada SCHEDULER_LEADER_RETRY_SECONDS e assumem se o líder terminar.
+    """
+    def __init__(self, lock: SchedulerLeaderLock, on_elected: Callable[[], None], on_stop: Callable[[], None]):
+        self.lock = lock
+        self.on_elected = on_elected
+        self.on_stop = on_stop
+        self.is_leader = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self) -> bool:
+        """Tenta ser líder já; caso contrário fica a tentar em background."""
+        if self._try_lead():
+            return True
+        print(f"[{datetime.now()}] Scheduler leader is another process; this worker will retry every "
+              f"{settings.SCHEDULER_LEADER_RETRY_SECONDS}s")
+        self._thread = threading.Thread(target=self._retry, name="scheduler-leader", daemon=True)
+        self._thread.start()
+        return False
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.is_leader:
+            self.on_stop()
+            self.is_leader = False
+        self.lock.release()
+
+    def _try_lead(self) -> bool:
+        if not self.lock.try_acquire():
+            return False
+        self.is_leader = True
+        print(f"[{datetime.now()}] This worker is the scheduler leader")
+        self.on_elected()
+        return True
+
+    def _retry(self):
+        while not self._stop_event.wait(settings.SCHEDULER_LEADER_RETRY_SECONDS):
+            try:
+                if self._try_lead():
+                    return
+            except Exception as e:
+                print(f"Erro na eleição do scheduler: {e}")
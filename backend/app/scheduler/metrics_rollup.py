@@ -0,0 +1,63 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime
+from app.database import SessionLocal
+from app.core.config import settings
+from app.crud.metrics_rollup import MetricsRollupRepository
+import atexit
+
+
+class MetricsRollupScheduler:
+    """
+    Reconciliação periódica do metrics_daily_rollup.
+    O rollup é mantido incrementalmente pelo AppointmentRepository; este job
+    reconstrói-o a partir de appointments para corrigir desvios (escritas
+    diretas, falhas, alterações de área de serviços, ...).
+    """
+    def __init__(self):
+        self.scheduler = BackgroundScheduler()
+
+    def start(self):
+        # Reconciliação completa diária (hora configurável)
+        self.scheduler.add_job(
+            func=self.reconcile,
+            trigger='cron',
+            hour=settings.METRICS_ROLLUP_RECONCILE_HOUR,
+            minute=0,
+            id='metrics_rollup_reconcile_job',
+            replace_existing=True
+        )
+        # Construção inicial se a tabela ainda estiver vazia
+        self.scheduler.add_job(
+            func=self.build_if_empty,
+            trigger='date',
+            run_date=datetime.now(),
+            id='metrics_rollup_initial_build',
+            replace_existing=True
+        )
+        self.scheduler.start()
+        print(f"[{datetime.now()}] Metrics rollup scheduler started!")
+        atexit.register(self.stop)
+
+    def reconcile(self):
+        print(f"[{datetime.now()}] Reconciling metrics_daily_rollup...")
+        db = SessionLocal()
+        try:
+            rows = MetricsRollupRepository(db).rebuild()
+            print(f"metrics_daily_rollup reconciled: {rows} rows")
+        except Exception as e:
+            print(f"Error while reconciling metrics_daily_rollup: {e}")
+        finally:
+            db.close()
+
+    def build_if_empty(self):
+        db = SessionLocal()
+        try:
+            if not MetricsRollupRepository(db).is_empty():
+                return
+        finally:
+            db.close()
+        self.reconcile()
+
+    def stop(self):
+        if self.scheduler.running:
+            self.scheduler.shutdown()
@@ -0,0 +1,61 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime
+from app.database import SessionLocal
+from app.core.config import settings
+from app.crud.notification_counters import NotificationCounterRepository
+import atexit
+
+
+class NotificationCounterScheduler:
+    """
+    Reparação periódica de notification_unread_counters.
+    Os contadores são mantidos na transação de cada escrita em notificações;
+    este job reconstrói-os a partir de user_notifications x notifications para
+    corrigir desvios (seeds, escritas diretas, falhas na manutenção, ...).
+    """
+    def __init__(self):
+        self.scheduler = BackgroundScheduler()
+
+    def start(self):
+        self.scheduler.add_job(
+            func=self.repair,
+            trigger='interval',
+            minutes=settings.NOTIFICATION_COUNTER_REPAIR_MINUTES,
+            id='notification_counter_repair_job',
+            replace_existing=True
+        )
+        # Construção inicial se a tabela ainda estiver vazia
+        self.scheduler.add_job(
+            func=self.build_if_empty,
+            trigger='date',
+            run_date=datetime.now(),
+            id='notification_counter_initial_build',
+            replace_existing=True
+        )
+        self.scheduler.start()
+        print(f"[{datetime.now()}] Notification counter scheduler started!")
+        atexit.register(self.stop)
+
+    def repair(self):
+        print(f"[{datetime.now()}] Rebuilding notification_unread_counters...")
+        db = SessionLocal()
+        try:
+            rows = NotificationCounterRepository(db).rebuild()
+            print(f"notification_unread_counters rebuilt: {rows} rows")
+        except Exception as e:
+            print(f"Error while rebuilding notification_unread_counters: {e}")
+        finally:
+            db.close()
+
+    def build_if_empty(self):
+        db = SessionLocal()
+        try:
+            if not NotificationCounterRepository(db).is_empty():
+                return
+        finally:
+            db.close()
+        self.repair()
+
+    def stop(self):
+        if self.scheduler.running:
+            self.scheduler.shutdown()
@@ -6,12 +6,16 @@ from app.models.customer import Customer
 from app.email_service import EmailService
 from app.database import SessionLocal
 from app.models.service import Service
+from app.crud.appointment import AppointmentRepository
+from app.core.config import settings
 import atexit
+import time
 
 class NotificationScheduler:
     def __init__(self):
         self.scheduler = BackgroundScheduler()
         self.email_service = EmailService()
+        self.last_run_stats = {}
         
     def start(self):
         # Agendar o job para verificar lembretes a cada 2 minutos
@@ -25,12 +29,16 @@ class NotificationScheduler:
         self.scheduler.start()
         print(f"[{datetime.now()}] Scheduler started!")
         # Para garantir que o scheduler para quando a aplicação for encerrada
-        atexit.register(lambda: self.scheduler.shutdown()) 
+        atexit.register(self.stop) 
     
     def check_and_send_reminders(self):
         print(f"[{datetime.now()}] Checking for upcoming appointments to send reminders...")   
         
         db: Session = SessionLocal()
+        repo = AppointmentRepository(db)
+        run_started = time.perf_counter()
+        stats = {"batches": 0, "claimed": 0, "queued": 0, "skipped": 0}
+        lags = []
         
         try:
             now = datetime.now()   
@@ -38,45 +46,48 @@ class NotificationScheduler:
             start_window = now + timedelta(hours=23)
             end_window = now + timedelta(hours=25)
             
-            # Query appointments with relationships eagerly loaded to avoid N+1 queries.
-            # Corrected 'service_date' to 'appointment_date'.
-            appointments = (
-                db.query(Appointment)
-                .options(
-                    joinedload(Appointment.customer).joinedload(Customer.auth),
-                    joinedload(Appointment.service)
+            while True:
+                # Reclama um lote (lease) - seguro com vários processos a correr este job
+                token, appointments = repo.claim_due_reminders(
+                    start_window,
+                    end_window,
+                    limit=settings.REMINDER_BATCH_SIZE,
+                    lease_seconds=settings.REMINDER_LEASE_SECONDS,
                 )
-                .filter(
-                    Appointment.appointment_date >= start_window,
-                    Appointment.appointment_date <= end_window,
-                    Appointment.reminder_sent == 0,
-                )
-                .all()
-            )
-            
-            print(f"Found {len(appointments)} appointments needing reminders.")
-            
-            for appointment in appointments:
-                if not appointment.customer or not appointment.service:
-                    print(f"Skipping appointment {appointment.id} due to missing customer or service relationship.")
-                    continue
+                if not appointments:
+                    break
+                stats["batches"] += 1
+                stats["claimed"] += len(appointments)
                 
-                if not appointment.customer.auth or not appointment.customer.auth.email:
-                    print(f"Skipping appointment {appointment.id} - customer has no email in auth.")
-                    continue
+                queued_ids = []
+                for appointment in appointments:
+                    # Os ignorados mantêm a lease e voltam a ser avaliados quando ela expirar
+                    if not appointment.customer or not appointment.service:
+                        print(f"Skipping appointment {appointment.id} due to missing customer or service relationship.")
+                        stats["skipped"] += 1
+                        continue
+                    
+                    if not appointment.customer.auth or not appointment.customer.auth.email:
+                        print(f"Skipping appointment {appointment.id} - customer has no email in auth.")
+                        stats["skipped"] += 1
+                        continue
+                    
+                    subject, html_content = self.email_service.render_reminder_email(
+                        service_name=appointment.service.name,
+                        service_date=appointment.appointment_date,
+                    )
+                    self.email_service.queue_email(db, appointment.customer.auth.email, subject, html_content)
+                    queued_ids.append(appointment.id)
+                    # Atraso desde que a appointment entrou na janela (25h antes)
+                    lags.append((datetime.now() - (appointment.appointment_date - timedelta(hours=25))).total_seconds())
                 
-                success = self.email_service.send_reminder_email(
-                    customer_email=appointment.customer.auth.email,
-                    service_name=appointment.service.name,
-                    service_date=appointment.appointment_date,
-                )
+                # Emails na fila + reminder_sent do lote numa única transação
+                repo.mark_reminders_sent(token, queued_ids)
+                db.commit()
+                stats["queued"] += len(queued_ids)
                 
-                if success:
-                    appointment.reminder_sent = 1
-                    db.commit()
-                    print(f"Reminder sent for appointment ID {appointment.id}")
-                else:
-                    print(f"Failed to send reminder for appointment ID {appointment.id}")
+                if len(appointments) < settings.REMINDER_BATCH_SIZE:
+                    break
                     
         except Exception as e:
             print(f"Error while checking/sending reminders: {e}")
@@ -84,5 +95,18 @@ class NotificationScheduler:
         finally:
             db.close()
         
+        elapsed = time.perf_counter() - run_started
+        stats["duration_seconds"] = round(elapsed, 3)
+        stats["throughput_per_second"] = round(stats["queued"] / elapsed, 2) if elapsed > 0 else 0
+        stats["lag_avg_seconds"] = round(sum(lags) / len(lags), 1) if lags else 0
+        stats["lag_max_seconds"] = round(max(lags), 1) if lags else 0
+        self.last_run_stats = stats
+        print(
+            f"Reminders: {stats['queued']} queued, {stats['skipped']} skipped in {stats['batches']} batches "
+            f"({stats['duration_seconds']}s, {stats['throughput_per_second']}/s, "
+            f"lag avg {stats['lag_avg_seconds']}s / max {stats['lag_max_seconds']}s)"
+        )
+        
     def stop(self):
-        self.scheduler.shutdown()
\ No newline at end of file
+        if self.scheduler.running:
+            self.scheduler.shutdown()
\ No newline at end of file
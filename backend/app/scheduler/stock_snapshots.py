@@ -0,0 +1,56 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime
+from app.database import SessionLocal
+from app.core.config import settings
+from app.crud.stock_ledger import StockLedgerRepository
+import atexit
+
+
+class StockSnapshotScheduler:
+    """
+    Checkpoint diário do ledger de stock (stock_snapshots à meia-noite UTC).
+    Com um checkpoint por dia, a quantidade/valorização numa data lê no máximo
+    um dia de stock_movements. Corre algumas horas depois da meia-noite para
+    que as transações desse dia já estejam todas confirmadas.
+    """
+    def __init__(self):
+        self.scheduler = BackgroundScheduler(timezone="UTC")
+
+    def start(self):
+        self.scheduler.add_job(
+            func=self.checkpoint,
+            trigger='cron',
+            hour=settings.STOCK_SNAPSHOT_HOUR,
+            minute=0,
+            id='stock_snapshot_job',
+            replace_existing=True
+        )
+        # Checkpoint de hoje em falta (ex.: processo parado à hora do job)
+        self.scheduler.add_job(
+            func=self.checkpoint,
+            trigger='date',
+            run_date=datetime.now(),
+            id='stock_snapshot_initial_job',
+            replace_existing=True
+        )
+        self.scheduler.start()
+        print(f"[{datetime.now()}] Stock snapshot scheduler started!")
+        atexit.register(self.stop)
+
+    def checkpoint(self):
+        taken_at = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        db = SessionLocal()
+        try:
+            ledger = StockLedgerRepository(db)
+            # Produtos criados fora das rotas (escritas diretas) entram com o saldo atual
+            opened = ledger.open_balances()
+            rows = ledger.checkpoint(taken_at)
+            print(f"[{datetime.now()}] Stock snapshot {taken_at:%Y-%m-%d}: {rows} products ({opened} opening balances)")
+        except Exception as e:
+            print(f"Error while taking stock snapshot: {e}")
+        finally:
+            db.close()
+
+    def stop(self):
+        if self.scheduler.running:
+            self.scheduler.shutdown()
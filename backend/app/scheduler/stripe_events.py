@@ -0,0 +1,45 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime
+from app.database import SessionLocal
+from app.core.config import settings
+from app.services.stripe_webhook_service import StripeWebhookService
+import atexit
+
+
+class StripeEventScheduler:
+    """
+    Processa periodicamente os eventos do webhook Stripe pendentes.
+    O webhook já dispara o processamento de cada evento logo após a resposta;
+    este job trata das novas tentativas (backoff), replays e eventos cujo
+    processamento foi interrompido.
+    """
+    def __init__(self):
+        self.scheduler = BackgroundScheduler()
+
+    def start(self):
+        self.scheduler.add_job(
+            func=self.process_pending,
+            trigger='interval',
+            seconds=settings.STRIPE_EVENT_POLL_SECONDS,
+            id='stripe_events_job',
+            replace_existing=True,
+            max_instances=1
+        )
+        self.scheduler.start()
+        print(f"[{datetime.now()}] Stripe event scheduler started!")
+        atexit.register(self.stop)
+
+    def process_pending(self):
+        db = SessionLocal()
+        try:
+            processed = StripeWebhookService(db).process_pending()
+            if processed:
+                print(f"[{datetime.now()}] {processed} Stripe events processed")
+        except Exception as e:
+            print(f"Error while processing Stripe events: {e}")
+        finally:
+            db.close()
+
+    def stop(self):
+        if self.scheduler.running:
+            self.scheduler.shutdown()
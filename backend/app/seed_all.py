@@ -19,6 +19,10 @@ from app.crud.vehicle import VehicleRepository
 from app.crud.appointment import AppointmentRepository
 from app.crud.employee import EmployeeRepository
 from app.crud.service import ServiceRepository
+from app.crud.invoice_lines import InvoiceLineRepository, parse_line_items
+from app.crud.stock_ledger import StockLedgerRepository
+from app.crud.product_search import product_search
+from app.crud.metrics_rollup import MetricsRollupRepository
 from app.crud import user as crud_user
 from app.crud import notificationBadge
 from app.crud import userNotification
@@ -187,6 +191,10 @@ def seed_products(db: Session):
         created += 1
     
     db.commit()
+    # Saldo inicial no ledger de stock dos produtos criados
+    StockLedgerRepository(db).open_balances()
+    # Índice de pesquisa (os produtos foram inseridos sem passar pelo repositório)
+    product_search(db).rebuild()
     logger.info(f"   ✓ Created {created} products")
 
 
@@ -253,6 +261,8 @@ def create_invoice_for_appointment(db: Session, appointment: Appointment, invoic
     )
     
     db.add(invoice)
+    db.flush()
+    InvoiceLineRepository(db).add(invoice.id, parse_line_items(invoice.line_items))
     return invoice
 
 
@@ -749,6 +759,8 @@ def run_all_seeds():
             seed_user_notifications(db, admin_user.id)
         
         seed_main_data(db)
+        # Rollup de métricas: as appointments foram criadas como Pendente e o status mudado depois
+        MetricsRollupRepository(db).rebuild()
         
         logger.info("\n" + "="*60)
         logger.info("✅ ALL SEEDS COMPLETED SUCCESSFULLY!")
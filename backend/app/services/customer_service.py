@@ -13,6 +13,7 @@ from app.models.appointment import Appointment
 from app.models.vehicle import Vehicle
 from app.schemas.customer import CustomerCreate, CustomerUpdate
 from app.crud.customer import CustomerRepository
+from app.crud.pagination import Page, SortKey, paginate
 from app.exceptions import (
     CustomerNotFoundError,
     CustomerAlreadyExistsError,
@@ -155,6 +156,24 @@ class CustomerService(BaseService[Customer]):
         """
         logger.debug(f"Listing customers (skip={skip}, limit={limit})")
         return self.repo.get_all(skip=skip, limit=limit)
+
+    def list_customers_page(
+        self, limit: int = 100, cursor: Optional[str] = None, skip: int = 0, total: Optional[str] = None
+    ) -> Page:
+        """
+        List customers by cursor (keyset on id) or by skip.
+
+        Args:
+            limit: Maximum number of records to return
+            cursor: next_cursor of the previous page (takes precedence over skip)
+            skip: Number of records to skip (offset paging, kept for compatibility)
+            total: None, "exact" or "estimate"
+
+        Returns:
+            Page with the customers, next_cursor and the optional total
+        """
+        logger.debug(f"Listing customers page (cursor={bool(cursor)}, skip={skip}, limit={limit})")
+        return self.repo.page(limit=limit, cursor=cursor, skip=skip, total=total)
     
     def update_customer(
         self, 
@@ -397,21 +416,39 @@ class CustomerService(BaseService[Customer]):
         Returns:
             List of customer profile dictionaries
         """
-        logger.debug(f"Getting all customer profiles (skip={skip}, limit={limit})")
+        return self.get_customer_profiles_page(limit=limit, skip=skip).items
+
+    def get_customer_profiles_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        total: Optional[str] = None
+    ) -> Page:
+        """
+        Page of customer profiles with auth info, keyset-paginated on id.
+        
+        Args:
+            limit: Maximum number of records to return
+            cursor: next_cursor of the previous page (takes precedence over skip)
+            skip: Number of records to skip (offset paging, kept for compatibility)
+            total: None, "exact" or "estimate"
+            
+        Returns:
+            Page whose items are customer profile dictionaries
+        """
+        logger.debug(f"Getting customer profiles (cursor={bool(cursor)}, skip={skip}, limit={limit})")
         
         # Fetch customers with eager loading of auth relationship
-        customers = (
+        query = (
             self.db.query(Customer)
             .options(joinedload(Customer.auth))
             .filter(Customer.deleted_at.is_(None))
-            .order_by(Customer.id)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        page = paginate(query, [SortKey(Customer.id)], limit, cursor, skip, total)
         
         result = []
-        for customer in customers:
+        for customer in page.items:
             customer_auth = customer.auth
             
             profile = {
@@ -438,7 +475,8 @@ class CustomerService(BaseService[Customer]):
             result.append(profile)
         
         logger.debug(f"Returning {len(result)} customer profiles")
-        return result
+        page.items = result
+        return page
     
     def get_customer_appointments(self, customer_id: int) -> List[Appointment]:
         """
@@ -0,0 +1,134 @@
+"""
+Invoice number allocator backed by the invoice_sequences counter table.
+
+Numbers are reserved with one atomic UPDATE on the counter row, so
+concurrent webhooks can never produce the same INV-xxxxxx and invoice
+creation never scans the invoices table.
+
+- INVOICE_NUMBER_BLOCK_SIZE = 1 (default): the number is taken inside the
+  caller's transaction, so it is committed (or rolled back) together with
+  the invoice - the sequence stays gap-free.
+- INVOICE_NUMBER_BLOCK_SIZE > 1: blocks of numbers are reserved in their
+  own short transaction and handed out from memory, trading possible gaps
+  (unused numbers of a block when the process stops) for one counter write
+  per block. Not on SQLite: with a single writer per database, the block
+  reservation would wait for the caller's own uncommitted writes until the
+  busy timeout, so SQLite always takes numbers in the caller's transaction.
+"""
+
+from threading import Lock
+from typing import Dict, Optional, Set, Tuple
+import logging
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.crud.invoice_sequence import InvoiceSequenceRepository
+
+logger = logging.getLogger(__name__)
+
+INVOICE_SEQUENCE = "invoice"
+
+
+class InvoiceNumberAllocator:
+    """
+    Thread-safe allocator of invoice numbers.
+
+    Block state is kept per database (bind URL) so that tools using a
+    separate engine (benchmarks, scripts) never share reserved numbers.
+    Its own transactions (sequence creation, block reservation) run on a
+    dedicated unpooled engine: taking a second connection from the
+    application pool while the caller holds one could exhaust it under load.
+    """
+
+    def __init__(self, sequence: str = INVOICE_SEQUENCE, prefix: str = "INV-", block_size: Optional[int] = None):
+        self.sequence = sequence
+        self.prefix = prefix
+        self._block_size = block_size
+        self._blocks: Dict[str, Tuple[int, int]] = {}  # bind -> (next, end)
+        self._ensured: Set[str] = set()
+        self._engines: Dict[str, Engine] = {}
+        self._sqlite_warned: Set[str] = set()
+        self._lock = Lock()
+
+    @property
+    def block_size(self) -> int:
+        return max(1, self._block_size or settings.INVOICE_NUMBER_BLOCK_SIZE)
+
+    def format(self, value: int) -> str:
+        return f"{self.prefix}{value:06d}"
+
+    def block_size_for(self, bind) -> int:
+        """Block size used for this database (always 1 on SQLite)."""
+        if bind.dialect.name == "sqlite":
+            if self.block_size > 1 and self.sequence not in self._sqlite_warned:
+                self._sqlite_warned.add(self.sequence)
+                logger.warning("INVOICE_NUMBER_BLOCK_SIZE > 1 is ignored on SQLite (single writer)")
+            return 1
+        return self.block_size
+
+    def next_value(self, db: Session) -> int:
+        """
+        Reserve the next number (in the caller's transaction when the block
+        size is 1; otherwise from a block reserved by a separate transaction).
+        """
+        bind = db.get_bind()
+        key = str(bind.url)
+        self._ensure_sequence(key, bind)
+
+        if self.block_size_for(bind) == 1:
+            return InvoiceSequenceRepository(db).advance(self.sequence, 1)
+
+        with self._lock:
+            next_value, end = self._blocks.get(key, (0, 0))
+            if next_value >= end:
+                next_value = self._reserve_block(key, bind)
+                end = next_value + self.block_size
+                logger.info(f"Reserved invoice numbers {next_value}-{end - 1}")
+            self._blocks[key] = (next_value + 1, end)
+            return next_value
+
+    def next_number(self, db: Session) -> str:
+        """Reserve and format the next invoice number (e.g. INV-000123)."""
+        return self.format(self.next_value(db))
+
+    def reset(self) -> None:
+        """Forget in-memory blocks (unused numbers of a block are skipped)."""
+        with self._lock:
+            self._blocks.clear()
+            self._ensured.clear()
+
+    def _own_engine(self, key: str, bind) -> Engine:
+        engine = self._engines.get(key)
+        if engine is None:
+            engine = create_engine(bind.url, poolclass=NullPool)
+            self._engines[key] = engine
+        return engine
+
+    def _reserve_block(self, key: str, bind) -> int:
+        db = Session(bind=self._own_engine(key, bind))
+        try:
+            first = InvoiceSequenceRepository(db).advance(self.sequence, self.block_size)
+            db.commit()
+            return first
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _ensure_sequence(self, key: str, bind) -> None:
+        if key in self._ensured:
+            return
+        db = Session(bind=self._own_engine(key, bind))
+        try:
+            InvoiceSequenceRepository(db).ensure(self.sequence)
+        finally:
+            db.close()
+        self._ensured.add(key)
+
+
+invoice_number_allocator = InvoiceNumberAllocator()
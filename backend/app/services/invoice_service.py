@@ -0,0 +1,190 @@
+"""
+Invoice service layer - builds invoices from paid Stripe checkout sessions.
+
+Shared by the webhook event processor and the manual payment confirmation.
+"""
+
+import json
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.customerAuth import CustomerAuth
+from app.models.invoice import Invoice
+from app.models.invoice_line import LABOR, PART
+from app.models.product import Product
+from app.crud.invoice_lines import InvoiceLineRepository
+from app.services.invoice_numbers import invoice_number_allocator
+
+
+def _invoice_lines(db: Session, line_items_data: list, part_lines: list) -> list:
+    """Linhas de invoice_lines a partir de line_items, com part number/produto/custo atual das peças."""
+    product_ids = {part['product_id'] for _, part in part_lines if part.get('product_id')}
+    costs = dict(
+        db.query(Product.id, Product.cost_value).filter(Product.id.in_(product_ids)).all()
+    ) if product_ids else {}
+    parts = dict(part_lines)
+    lines = []
+    for line_no, item in enumerate(line_items_data, start=1):
+        part = parts.get(line_no)
+        product_id = part.get('product_id') if part else None
+        lines.append({
+            "line_no": line_no,
+            "kind": PART if part else LABOR,
+            "name": (part['name'] if part else item["name"])[:255],
+            "description": item["description"],
+            "part_number": part['part_number'] if part else None,
+            "product_id": product_id,
+            "quantity": item["quantity"],
+            "unit_price": item["unit_price"],
+            "unit_cost": costs.get(product_id),
+            "total": item["total"],
+        })
+    return lines
+
+
+def create_invoice_from_session(db: Session, appointment: Appointment, session):
+    """
+    Create an invoice from a successful Stripe checkout session.
+    Stores a snapshot of the payment at the time it was made.
+    Agora com discriminação de mão de obra e peças.
+    """
+    from app.crud.appointment import AppointmentRepository
+    
+    print(f"📝 Starting invoice creation for appointment {appointment.id}")
+    
+    # Verificar se já existe invoice para este appointment (proteção contra duplicação)
+    existing_invoice = db.query(Invoice).filter(
+        Invoice.appointment_id == appointment.id
+    ).first()
+    
+    if existing_invoice:
+        print(f"⚠️ Invoice já existe para appointment {appointment.id}: {existing_invoice.invoice_number}")
+        return existing_invoice
+    
+    # Usar o novo sistema de cálculo discriminado
+    repo = AppointmentRepository(db)
+    breakdown = repo.calculate_order_total(appointment.id)
+    
+    if not breakdown:
+        raise Exception("Could not calculate order breakdown")
+    
+    print(f"💰 Breakdown calculated: {breakdown['total']} EUR")
+    
+    line_items_data = []
+    part_lines = []  # (nº da linha, peça do breakdown) para invoice_lines
+    subtotal = 0
+    
+    # Serviço base - Mão de obra
+    base_service = breakdown['base_service']
+    if base_service['labor_cost'] > 0:
+        line_items_data.append({
+            "name": f"{base_service['name']} - Mão de Obra",
+            "description": "Custo de mão de obra",
+            "quantity": 1,
+            "unit_price": float(base_service['labor_cost']),
+            "total": float(base_service['labor_cost'])
+        })
+        subtotal += base_service['labor_cost']
+    
+    # Serviço base - Peças
+    for part in base_service['parts']:
+        line_items_data.append({
+            "name": f"{part['name']} ({part['part_number'] or 'N/A'})",
+            "description": f"Peça - {base_service['name']}",
+            "quantity": part['quantity'],
+            "unit_price": float(part['unit_price']),
+            "total": float(part['total'])
+        })
+        part_lines.append((len(line_items_data), part))
+        subtotal += part['total']
+    
+    # Serviços extras
+    for extra in breakdown['extra_services']:
+        # Mão de obra do extra
+        if extra['labor_cost'] > 0:
+            line_items_data.append({
+                "name": f"{extra['name']} - Mão de Obra",
+                "description": "Custo de mão de obra (extra)",
+                "quantity": 1,
+                "unit_price": float(extra['labor_cost']),
+                "total": float(extra['labor_cost'])
+            })
+            subtotal += extra['labor_cost']
+        
+        # Peças do extra
+        for part in extra['parts']:
+            line_items_data.append({
+                "name": f"{part['name']} ({part['part_number'] or 'N/A'})",
+                "description": f"Peça - {extra['name']}",
+                "quantity": part['quantity'],
+                "unit_price": float(part['unit_price']),
+                "total": float(part['total'])
+            })
+            part_lines.append((len(line_items_data), part))
+            subtotal += part['total']
+    
+    # Get customer email from CustomerAuth
+    customer_email = None
+    customer_phone = None
+    customer_name = None
+    
+    if appointment.customer:
+        customer_name = appointment.customer.name
+        customer_phone = appointment.customer.phone
+        
+        customer_auth = db.query(CustomerAuth).filter(
+            CustomerAuth.id_customer == appointment.customer.id
+        ).first()
+        if customer_auth:
+            customer_email = customer_auth.email
+    
+    # Fallback to Stripe session data if customer not found
+    if not customer_name and 'customer_details' in session:
+        customer_name = session['customer_details'].get('name')
+    if not customer_email and 'customer_details' in session:
+        customer_email = session['customer_details'].get('email')
+    if not customer_phone and 'customer_details' in session:
+        customer_phone = session['customer_details'].get('phone')
+    
+    print(f"👤 Customer: {customer_name} ({customer_email})")
+    
+    # Número e fatura num savepoint: se um pedido concorrente já faturou esta appointment
+    # (índice único em appointment_id), desfaz-se só isto - incluindo o avanço da sequência
+    # quando o número é tirado na transação - e devolve-se a fatura existente.
+    try:
+        with db.begin_nested():
+            # Número atribuído pela sequência invoice_sequences (atómico, sem ler a tabela invoices)
+            invoice_number = invoice_number_allocator.next_number(db)
+            print(f"🔢 Generated invoice number: {invoice_number}")
+            invoice = Invoice(
+                appointment_id=appointment.id,
+                stripe_session_id=session['id'],
+                stripe_payment_intent_id=session.get('payment_intent'),
+                invoice_number=invoice_number,
+                subtotal=float(subtotal),
+                tax=0.0,
+                total=float(subtotal),
+                currency="EUR",
+                payment_status="paid",
+                customer_name=customer_name,
+                customer_email=customer_email,
+                customer_phone=customer_phone,
+                line_items=json.dumps(line_items_data),
+                paid_at=datetime.utcnow()
+            )
+            db.add(invoice)
+            db.flush()  # Get the ID without committing
+    except IntegrityError:
+        existing_invoice = db.query(Invoice).filter(Invoice.appointment_id == appointment.id).first()
+        if not existing_invoice:
+            raise
+        print(f"⚠️ Invoice criada em paralelo para appointment {appointment.id}: {existing_invoice.invoice_number}")
+        return existing_invoice
+
+    # Linhas normalizadas (invoice_lines) na mesma transação; line_items fica para a API
+    InvoiceLineRepository(db).add(invoice.id, _invoice_lines(db, line_items_data, part_lines))
+    print(f"✅ Invoice object created with ID: {invoice.id}")
+    return invoice
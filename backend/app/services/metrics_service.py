@@ -0,0 +1,192 @@
+"""
+Metrics service layer - aggregated appointment metrics for the dashboard.
+
+Every window (a day, a month) is computed with a single conditional-aggregation
+statement instead of one COUNT per status; the all-time totals are read from
+the daily rollup.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, and_, true, false, literal
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+import logging
+
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.models.metrics_rollup import MetricsDailyRollup
+from app.models.user import User
+from .base_service import BaseService
+from .role_scope import resolve_role_scope
+from .status_registry import status_registry
+
+logger = logging.getLogger(__name__)
+
+# Estado concluído (um só status, resolvido pelo StatusRegistry) e padrões dos restantes
+STATUS_COMPLETED = "Concluído"
+STATUS_IN_PROGRESS_PATTERN = "%em andamento%"
+STATUS_PENDING_PATTERN = "%pendente%"
+
+Window = Tuple[Optional[datetime], Optional[datetime]]
+
+
+class MetricsService(BaseService[Appointment]):
+    """
+    Service layer for dashboard metrics.
+
+    Computes total, completed, in-progress and pending counts plus the
+    average duration of completed appointments for one or more time
+    windows, grouped in a single statement.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(db)
+
+    def window_metrics(
+        self,
+        windows: Dict[str, Window],
+        user: Optional[User] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregate appointment counters for several windows at once.
+
+        Each window is a (start, end) pair, inclusive on both ends; either
+        bound may be None to leave that side open. Windows must not overlap.
+        Appointments are bucketed by window label with a CASE expression,
+        pre-aggregated per (window, status, service) and then rolled up per
+        window, so N windows cost one round trip.
+
+        Args:
+            windows: Mapping of label -> (start, end)
+            user: Current user, used to apply the role/area filter
+
+        Returns:
+            Mapping of label -> {total, completed, in_progress, pending,
+            average_duration_minutes}; windows without rows return zeros.
+        """
+        results = {label: self._empty_row() for label in windows}
+        if not windows:
+            return results
+
+        bucket_conditions = []
+        for label, (start, end) in windows.items():
+            conditions = []
+            if start is not None:
+                conditions.append(Appointment.appointment_date >= start)
+            if end is not None:
+                conditions.append(Appointment.appointment_date <= end)
+            bucket_conditions.append((and_(*conditions) if conditions else true(), label))
+
+        # 1) Classifica cada appointment na sua janela, sem joins, para que a
+        #    contagem por (janela, status, serviço) use apenas a tabela/índices
+        #    de appointments. Com uma só janela não é preciso classificar e o
+        #    agrupamento usa o índice (status_id, service_id) diretamente.
+        single_label = next(iter(windows)) if len(windows) == 1 else None
+        columns = [
+            Appointment.status_id.label("status_id"),
+            Appointment.service_id.label("service_id"),
+        ]
+        if single_label is None:
+            columns.insert(0, case(*bucket_conditions, else_=None).label("bucket"))
+        rows = self.db.query(*columns)
+
+        # Restringe às janelas pedidas para que os índices de data sejam usados
+        starts = [start for start, _ in windows.values()]
+        ends = [end for _, end in windows.values()]
+        if all(start is not None for start in starts):
+            rows = rows.filter(Appointment.appointment_date >= min(starts))
+        if all(end is not None for end in ends):
+            rows = rows.filter(Appointment.appointment_date <= max(ends))
+        rows = resolve_role_scope(self.db, user).apply(rows, Appointment.service_id)
+        rows = rows.subquery()
+
+        group_columns = [rows.c.status_id, rows.c.service_id]
+        if single_label is None:
+            group_columns.insert(0, rows.c.bucket)
+        grouped = (
+            self.db.query(*group_columns, func.count().label("n"))
+            .group_by(*group_columns)
+            .subquery()
+        )
+        bucket_column = grouped.c.bucket if single_label is None else literal(single_label)
+        return self._totals(grouped, bucket_column, results, by_bucket=single_label is None)
+
+    def all_time(self, user: Optional[User] = None) -> Dict[str, float]:
+        """
+        All-time counters read from metrics_daily_rollup instead of appointments.
+
+        The rollup holds at most one row per (day, service, status, area), so
+        the whole history costs a scan of that table; an unbounded window over
+        appointments has to visit every row of the (status_id, service_id) index.
+        """
+        query = self.db.query(
+            MetricsDailyRollup.status_id.label("status_id"),
+            MetricsDailyRollup.service_id.label("service_id"),
+            func.sum(MetricsDailyRollup.appointment_count).label("n"),
+        )
+        query = resolve_role_scope(self.db, user).apply(query, MetricsDailyRollup.service_id)
+        grouped = query.group_by(MetricsDailyRollup.status_id, MetricsDailyRollup.service_id).subquery()
+        return self._totals(grouped, literal("all"), {"all": self._empty_row()})["all"]
+
+    def _totals(self, grouped, bucket_column, results, by_bucket: bool = False):
+        """Counters per bucket from a (bucket?, status_id, service_id, n) subquery."""
+        # 2) Junta o resultado agrupado (poucas linhas) a services e
+        #    soma os contadores condicionais por janela.
+        # Ids dos status resolvidos em memória pelo StatusRegistry (sem join a statuses)
+        completed_id = status_registry.get_id(self.db, STATUS_COMPLETED)
+        is_completed = grouped.c.status_id == completed_id if completed_id is not None else false()
+        is_in_progress = grouped.c.status_id.in_(sorted(status_registry.ids_matching(self.db, STATUS_IN_PROGRESS_PATTERN)))
+        is_pending = grouped.c.status_id.in_(sorted(status_registry.ids_matching(self.db, STATUS_PENDING_PATTERN)))
+        has_duration = and_(is_completed, Service.duration_minutes.isnot(None))
+
+        query = (
+            self.db.query(
+                bucket_column.label("bucket"),
+                func.sum(grouped.c.n).label("total"),
+                func.sum(case((is_completed, grouped.c.n), else_=0)).label("completed"),
+                func.sum(case((is_in_progress, grouped.c.n), else_=0)).label("in_progress"),
+                func.sum(case((is_pending, grouped.c.n), else_=0)).label("pending"),
+                func.sum(case((has_duration, grouped.c.n * Service.duration_minutes), else_=0)).label("duration_sum"),
+                func.sum(case((has_duration, grouped.c.n), else_=0)).label("duration_count"),
+            )
+            .select_from(grouped)
+            .outerjoin(Service, grouped.c.service_id == Service.id)
+        )
+
+        if by_bucket:
+            query = query.group_by(grouped.c.bucket)
+
+        for row in query.all():
+            if row.bucket is None or not row.total:
+                continue
+            duration_count = int(row.duration_count or 0)
+            results[row.bucket] = {
+                "total": int(row.total),
+                "completed": int(row.completed or 0),
+                "in_progress": int(row.in_progress or 0),
+                "pending": int(row.pending or 0),
+                "average_duration_minutes": (
+                    float(row.duration_sum) / duration_count if duration_count else 0.0
+                ),
+            }
+
+        return results
+
+    def single_window(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        user: Optional[User] = None
+    ) -> Dict[str, float]:
+        """Aggregate appointment counters for a single (start, end) window."""
+        return self.window_metrics({"window": (start, end)}, user=user)["window"]
+
+    @staticmethod
+    def _empty_row() -> Dict[str, float]:
+        return {
+            "total": 0,
+            "completed": 0,
+            "in_progress": 0,
+            "pending": 0,
+            "average_duration_minutes": 0.0,
+        }
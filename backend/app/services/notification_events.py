@@ -0,0 +1,306 @@
+"""
+Notification push channel (pub/sub behind the SSE stream).
+
+Writes that create notifications or change unread counters queue events on
+the SQLAlchemy session (queue_event); they are published only after the
+transaction commits, so a client never sees a notification that was rolled
+back. The broker fans each event out to the SSE subscriptions of the target
+users in this process.
+
+The transport between processes is pluggable (NOTIFICATION_PUBSUB_BACKEND):
+- memory: in-process only (single worker, tests),
+- broker: newline-delimited JSON over TCP to a relay that echoes every
+  message to all connected workers (scripts/server/event_broker.py, a local
+  stand-in for Redis pub/sub or similar). When the relay is unreachable,
+  events are still delivered to the local subscribers.
+
+Counters (connections, published, delivered, dropped, fan-out latency) are
+exposed through stats() / GET /health/notification-stream.
+"""
+
+from collections import defaultdict, deque
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import asyncio
+import json
+import socket
+import threading
+import time
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PENDING_EVENTS_KEY = "notification_events"
+CLOSED = object()  # sentinela: a stream termina (paragem do processo)
+
+
+class Subscription:
+    """One SSE connection: a bounded queue owned by the event loop that serves it."""
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+
+class MemoryBackend:
+    """In-process transport: published messages are delivered straight back."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[dict], None]] = None
+
+    def start(self, deliver: Callable[[dict], None]):
+        self._deliver = deliver
+
+    def publish(self, message: dict):
+        if self._deliver is not None:
+            self._deliver(message)
+
+    def stop(self):
+        self._deliver = None
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class BrokerBackend:
+    """
+    TCP relay transport. A reader thread keeps one connection to the relay
+    (reconnecting with backoff) and delivers every received line; publish()
+    writes a line. Messages published while disconnected go to the local
+    subscribers only.
+    """
+
+    name = "broker"
+
+    def __init__(self, url: str, reconnect_seconds: float = 2.0):
+        host, _, port = url.replace("tcp://", "").rpartition(":")
+        self.address = (host or "127.0.0.1", int(port))
+        self.reconnect_seconds = reconnect_seconds
+        self._deliver: Optional[Callable[[dict], None]] = None
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected = False
+        self.errors = 0
+
+    def start(self, deliver: Callable[[dict], None]):
+        self._deliver = deliver
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-broker", daemon=True)
+        self._thread.start()
+        # Espera pela primeira ligação: eventos publicados antes só chegariam aos clientes deste worker
+        if not self._ready.wait(timeout=self.reconnect_seconds):
+            logger.warning("Notification broker %s:%s not reachable yet", *self.address)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sock = socket.create_connection(self.address, timeout=5)
+                sock.settimeout(None)
+                with self._send_lock:
+                    self._sock = sock
+                    self.connected = True
+                self._ready.set()
+                logger.info("Connected to notification broker %s:%s", *self.address)
+                with sock.makefile("r", encoding="utf-8") as lines:
+                    for line in lines:
+                        if line.strip():
+                            self._deliver(json.loads(line))
+            except (OSError, ValueError) as e:
+                self._ready.set()
+                if not self._stop.is_set():
+                    self.errors += 1
+                    logger.warning("Notification broker connection lost: %s", e)
+            finally:
+                with self._send_lock:
+                    if self._sock is not None:
+                        try:
+                            self._sock.close()
+                        except OSError:
+                            pass
+                    self._sock = None
+                    self.connected = False
+            self._stop.wait(self.reconnect_seconds)
+
+    def publish(self, message: dict):
+        data = (json.dumps(message, default=str) + "\n").encode("utf-8")
+        with self._send_lock:
+            sock = self._sock
+            if sock is not None:
+                try:
+                    sock.sendall(data)
+                    return  # o relay devolve a mensagem a todos os workers, incluindo este
+                except OSError as e:
+                    self.errors += 1
+                    logger.warning("Notification broker publish failed: %s", e)
+        self._deliver(message)
+
+    def stop(self):
+        self._stop.set()
+        with self._send_lock:
+            if self._sock is not None:
+                try:
+                    self._sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "broker": f"{self.address[0]}:{self.address[1]}",
+            "connected": self.connected,
+            "errors": self.errors,
+        }
+
+
+def build_backend(name: str = None):
+    name = (name or settings.NOTIFICATION_PUBSUB_BACKEND).lower()
+    if name == "memory":
+        return MemoryBackend()
+    if name == "broker":
+        return BrokerBackend(settings.NOTIFICATION_BROKER_URL)
+    raise ValueError(f"Unsupported NOTIFICATION_PUBSUB_BACKEND: {name}")
+
+
+class NotificationBroker:
+    """Per-process fan-out from published events to the SSE subscriptions of each user."""
+
+    def __init__(self, backend=None, queue_size: int = None):
+        self.backend = backend or build_backend()
+        self.queue_size = queue_size or settings.NOTIFICATION_STREAM_QUEUE_SIZE
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._started = False
+        self.peak_connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._latencies = deque(maxlen=2048)
+
+    def start(self):
+        if not self._started:
+            self.backend.start(self._fan_out)
+            self._started = True
+
+    def stop(self):
+        if self._started:
+            self.backend.stop()
+            self._started = False
+        with self._lock:
+            subscriptions = [sub for subs in self._subscriptions.values() for sub in subs]
+        for sub in subscriptions:
+            sub.loop.call_soon_threadsafe(self._offer, sub, CLOSED)
+
+    # ---- subscribers (event loop) ----
+
+    def subscribe(self, user_id: int) -> Subscription:
+        self.start()
+        sub = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._subscriptions[user_id].add(sub)
+            self.peak_connections = max(self.peak_connections, self._connection_count())
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subscriptions.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscriptions[sub.user_id]
+
+    def record_delivery(self, published_at: float):
+        with self._lock:
+            self.delivered += 1
+            self._latencies.append(max(0.0, time.time() - published_at))
+
+    # ---- publishers (any thread) ----
+
+    def publish(self, user_ids: Iterable[int], payload: dict):
+        users = sorted(set(user_ids))
+        if not users:
+            return
+        with self._lock:
+            self.published += 1
+        self.start()
+        self.backend.publish({"users": users, "event": payload, "published_at": time.time()})
+
+    def _fan_out(self, message: dict):
+        item = (message.get("published_at") or time.time(), message["event"])
+        with self._lock:
+            targets = [sub for user_id in message["users"] for sub in self._subscriptions.get(user_id, ())]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(self._offer, sub, item)
+            except RuntimeError:
+                self.unsubscribe(sub)  # loop já fechado
+
+    def _offer(self, sub: Subscription, item):
+        try:
+            sub.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Cliente lento: descarta; o próximo snapshot de contagens repõe o estado
+            with self._lock:
+                self.dropped += 1
+
+    def _connection_count(self) -> int:
+        return sum(len(subs) for subs in self._subscriptions.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            connections = self._connection_count()
+            data = {
+                "connections": connections,
+                "users": len(self._subscriptions),
+                "peak_connections": self.peak_connections,
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+            }
+        data["fanout_latency_ms"] = {
+            "avg": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else 0.0,
+            "p99": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        }
+        data.update(self.backend.stats())
+        return data
+
+
+notification_broker = NotificationBroker()
+
+
+# ---- eventos ligados à transação da sessão ----
+
+def queue_event(db: Session, user_ids: Iterable[int], payload: dict):
+    """Publish payload to these users once the session's transaction commits."""
+    db.info.setdefault(PENDING_EVENTS_KEY, []).append((list(user_ids), payload))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session):
+    pending: List = session.info.pop(PENDING_EVENTS_KEY, None)
+    for user_ids, payload in pending or ():
+        try:
+            notification_broker.publish(user_ids, payload)
+        except Exception as e:
+            logger.error("Error publishing notification event: %s", e, exc_info=True)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_events(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_EVENTS_KEY, None)
@@ -1,18 +1,64 @@
 """
 Serviço centralizado para criação e envio de notificações.
+
+Fan-out: a notificação é uma linha em notifications e os destinatários são
+inseridos em user_notifications num único INSERT em lote (executemany), em vez
+de um objeto ORM por destinatário. Os destinatários (admins/gestores, cargos
+por área) ficam em cache por NOTIFICATION_AUDIENCE_TTL_SECONDS e a cache é
+limpa quando funcionários, cargos ou utilizadores mudam
+(invalidate_notification_audiences). Alertas de stock baixo idênticos dentro de
+LOW_STOCK_ALERT_DEDUP_SECONDS não são repetidos.
 """
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
 from app.models.notificationBadge import Notification
 from app.models.userNotification import UserNotification
 from app.models.user import User
 from app.models.employee import Employee
+from app.crud.notification_counters import NotificationCounterRepository
+from app.services.notification_events import queue_event
 from app.core.logger import setup_logger
-from datetime import datetime
+from datetime import datetime, timedelta
+import time
 
 logger = setup_logger(__name__)
 
 
+class AudienceCache:
+    """Cache (TTL) dos IDs de utilizadores de cada audiência de notificações."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple, Tuple[float, Tuple[int, ...]]] = {}
+        self._lock = Lock()
+
+    def get_or_load(self, key: Tuple, loader) -> List[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return list(entry[1])
+        user_ids = tuple(loader())
+        if self.ttl_seconds > 0:
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, user_ids)
+        return list(user_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+audience_cache = AudienceCache(ttl_seconds=settings.NOTIFICATION_AUDIENCE_TTL_SECONDS)
+
+
+def invalidate_notification_audiences() -> None:
+    """Limpa os destinatários em cache; chamado quando funcionários, cargos ou utilizadores mudam."""
+    audience_cache.clear()
+
+
 class NotificationService:
     """Serviço para gerenciar notificações do sistema."""
 
@@ -37,86 +83,116 @@ class NotificationService:
         Returns:
             Notification: Objeto da notificação criada
         """
-        # Criar a notificação
+        now = datetime.utcnow()
         notification = Notification(
             component=component,
             text=text,
             alert_type=alert_type,
-            inserted_at=datetime.utcnow(),
-            created_at=datetime.utcnow()
+            inserted_at=now,
+            created_at=now
         )
         db.add(notification)
         db.flush()  # Para obter o ID da notificação
 
-        # Associar a notificação aos usuários
-        for user_id in user_ids:
-            user_notification = UserNotification(
-                user_id=user_id,
-                notification_id=notification.id,
-                created_at=datetime.utcnow()
-            )
-            db.add(user_notification)
+        # Todos os destinatários num só INSERT em lote (e os contadores de não lidas)
+        NotificationService._insert_recipients(db, [(notification.id, user_id) for user_id in user_ids], now, component)
+        # Push (SSE) para os destinatários ligados, depois do commit
+        queue_event(db, user_ids, NotificationService._event_payload(notification))
 
         db.commit()
         db.refresh(notification)
         return notification
 
+    @staticmethod
+    def _insert_recipients(db: Session, pairs: Iterable[Tuple[int, int]], created_at: datetime, component: str) -> int:
+        """
+        Insere as linhas (notification_id, user_id) com um executemany, ignorando pares
+        repetidos, e incrementa os contadores de não lidas do componente.
+        """
+        rows = [
+            {"notification_id": notification_id, "user_id": user_id, "created_at": created_at}
+            for notification_id, user_id in dict.fromkeys(pairs)
+        ]
+        if rows:
+            db.execute(insert(UserNotification), rows)
+            NotificationCounterRepository(db).add((row["user_id"], component) for row in rows)
+        return len(rows)
+
+    @staticmethod
+    def _event_payload(notification: Notification) -> dict:
+        """Evento de nova notificação para o canal de push."""
+        return {
+            "type": "notification",
+            "notification_id": notification.id,
+            "component": notification.component,
+            "text": notification.text,
+            "alertType": notification.alert_type,
+            "insertedAt": notification.insertedAt,
+        }
+
     @staticmethod
     def get_admin_and_manager_ids(db: Session) -> List[int]:
         """Retorna IDs de todos os usuários com perfil de Admin ou Gestor."""
-        users = db.query(User).join(Employee).filter(
-            (Employee.role_id.in_(
-                db.query(Employee.role_id).join(User).filter(
-                    User.email == Employee.email
-                ).filter(
-                    (Employee.is_manager == True) | 
-                    (Employee.role.has(name="Admin"))
-                )
-            ))
-        ).all()
-        
-        # Alternativa mais simples e direta
-        admin_managers = db.query(User.id).join(
-            Employee, User.email == Employee.email
-        ).filter(
-            (Employee.is_manager == True) | 
-            (Employee.role.has(name="Admin"))
-        ).all()
-        
-        return [user[0] for user in admin_managers]
+        def load():
+            admin_managers = db.query(User.id).join(
+                Employee, User.email == Employee.email
+            ).filter(
+                (Employee.is_manager == True) | 
+                (Employee.role.has(name="Admin"))
+            ).all()
+            return [user[0] for user in admin_managers]
+
+        return audience_cache.get_or_load(("admins_managers",), load)
 
     @staticmethod
     def get_users_by_role_name(db: Session, role_name: str) -> List[int]:
         """Retorna IDs de usuários com uma função específica."""
-        users = db.query(User.id).join(
-            Employee, User.email == Employee.email
-        ).filter(
-            Employee.role.has(name=role_name)
-        ).all()
-        
-        return [user[0] for user in users]
+        return NotificationService.get_users_by_role_names(db, [role_name])
 
     @staticmethod
     def get_users_by_role_names(db: Session, role_names: List[str]) -> List[int]:
         """Retorna IDs de usuários com funções específicas."""
         from app.models.role import Role
-        
-        users = db.query(User.id).join(
-            Employee, User.email == Employee.email
-        ).join(
-            Role, Employee.role_id == Role.id
-        ).filter(
-            Role.name.in_(role_names)
-        ).all()
-        
-        return [user[0] for user in users]
+
+        def load():
+            users = db.query(User.id).join(
+                Employee, User.email == Employee.email
+            ).join(
+                Role, Employee.role_id == Role.id
+            ).filter(
+                Role.name.in_(role_names)
+            ).all()
+            return [user[0] for user in users]
+
+        return audience_cache.get_or_load(("roles",) + tuple(sorted(set(role_names))), load)
+
+    @staticmethod
+    def _recent_alerts(db: Session, component: str, texts: List[str], user_id: Optional[int] = None) -> set:
+        """Textos de alertas iguais já criados dentro da janela de deduplicação (opcionalmente para um utilizador)."""
+        if not texts or settings.LOW_STOCK_ALERT_DEDUP_SECONDS <= 0:
+            return set()
+        since = datetime.utcnow() - timedelta(seconds=settings.LOW_STOCK_ALERT_DEDUP_SECONDS)
+        query = db.query(Notification.text).filter(
+            Notification.component == component,
+            Notification.inserted_at >= since,
+            Notification.text.in_(texts),
+            Notification.deleted_at.is_(None)
+        )
+        if user_id is not None:
+            query = query.join(UserNotification, UserNotification.notification_id == Notification.id).filter(
+                UserNotification.user_id == user_id
+            )
+        return {row[0] for row in query.all()}
 
     @staticmethod
     def notify_low_stock(db: Session, product_name: str, current_quantity: int, min_quantity: int):
-        """Notifica admins e gestores sobre estoque baixo."""
-        user_ids = NotificationService.get_admin_and_manager_ids(db)
-        
+        """Notifica admins e gestores sobre estoque baixo (sem repetir o mesmo alerta dentro da janela)."""
         text = f"O produto '{product_name}' está com estoque baixo! Quantidade atual: {current_quantity}, Mínimo: {min_quantity}"
+        if NotificationService._recent_alerts(db, "Stock", [text]):
+            logger.debug(f"Alerta de stock baixo repetido ignorado: {product_name}")
+            return
+
+        user_ids = NotificationService.get_admin_and_manager_ids(db)
         
         NotificationService.create_notification_for_users(
             db=db,
@@ -319,11 +395,15 @@ class NotificationService:
 
     @staticmethod
     def check_and_notify_low_stock_on_login(db: Session, user_id: int):
-        """Verifica produtos com stock baixo e notifica o usuário no login."""
+        """
+        Verifica produtos com stock baixo e notifica o usuário no login.
+        Uma notificação por produto, criadas em lote num único commit; alertas
+        iguais já enviados ao utilizador dentro da janela não são repetidos.
+        """
         from app.models.product import Product
         
         # Buscar produtos com stock baixo
-        low_stock_products = db.query(Product).filter(
+        low_stock_products = db.query(Product.name, Product.quantity, Product.minimum_stock).filter(
             Product.quantity <= Product.minimum_stock,
             Product.deleted_at.is_(None)
         ).all()
@@ -331,20 +411,30 @@ class NotificationService:
         if not low_stock_products:
             return  # Nenhum produto com stock baixo
         
-        # Criar notificações individuais para cada produto
-        for product in low_stock_products:
-            try:
-                text = f"Alerta de stock baixo: '{product.name}' - Quantidade: {product.quantity}, Mínimo: {product.minimum_stock}"
-                
-                NotificationService.create_notification_for_users(
-                    db=db,
-                    user_ids=[user_id],
-                    component="Stock",
-                    text=text,
-                    alert_type="warning"
-                )
-            except Exception as e:
-                logger.error(f"Erro ao criar notificação de stock baixo para produto {product.name}: {e}", exc_info=True)
+        texts = list(dict.fromkeys(
+            f"Alerta de stock baixo: '{name}' - Quantidade: {quantity}, Mínimo: {minimum_stock}"
+            for name, quantity, minimum_stock in low_stock_products
+        ))
+        try:
+            already_sent = NotificationService._recent_alerts(db, "Stock", texts, user_id=user_id)
+            texts = [text for text in texts if text not in already_sent]
+            if not texts:
+                return
+
+            now = datetime.utcnow()
+            notifications = [
+                Notification(component="Stock", text=text, alert_type="warning", inserted_at=now, created_at=now)
+                for text in texts
+            ]
+            db.add_all(notifications)
+            db.flush()  # IDs das notificações (INSERT em lote)
+            NotificationService._insert_recipients(db, [(notification.id, user_id) for notification in notifications], now, "Stock")
+            for notification in notifications:
+                queue_event(db, [user_id], NotificationService._event_payload(notification))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao criar notificações de stock baixo no login do utilizador {user_id}: {e}", exc_info=True)
 
     @staticmethod
     def notify_new_customer(
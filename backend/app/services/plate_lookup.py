@@ -0,0 +1,343 @@
+"""
+Plate lookup service - read-through access to the external vehicle registry.
+
+The vehiclesApi table is the cache: a plate is looked up there first and
+only a miss reaches the registry. On top of that:
+
+- one pooled HTTP session (keep-alive) with the EXTERNAL_API_* timeout,
+  retries and backoff,
+- single-flight: concurrent lookups of the same plate share one upstream
+  call and one INSERT,
+- a TTL cache of plates the registry does not know (negative results),
+- a circuit breaker that fails fast while the registry keeps failing.
+
+The upstream is any callable plate -> XML text, so tests and benchmarks
+can replace the HTTP registry with a local stub (see set_upstream).
+"""
+
+from collections import OrderedDict
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Optional
+import time
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.vehicleApi import VehicleApiRepository
+from app.models.vehicleApi import VehicleApi
+from app.schemas.vehicleApi import VehicleApiCreate
+from app.utils.vehicle_parsers import parse_vehicle_xml
+from .base_service import BaseService
+
+logger = logging.getLogger(__name__)
+
+Upstream = Callable[[str], str]
+
+
+class PlateLookupError(Exception):
+    """The registry failed or returned an unusable response."""
+
+
+class PlateNotFoundError(PlateLookupError):
+    """The registry has no vehicle for this plate."""
+
+
+class PlateLookupUnavailableError(PlateLookupError):
+    """Circuit open: the registry is not called until the reset timeout."""
+
+
+class HttpRegistryUpstream:
+    """Registry client over one pooled requests.Session (thread-safe for GETs)."""
+
+    def __init__(self, base_url: Optional[str] = None, username: Optional[str] = None):
+        self.base_url = base_url or settings.BASE_URL
+        self.username = username or settings.USERNAME_API
+        retry = Retry(
+            total=settings.EXTERNAL_API_RETRIES,
+            backoff_factor=settings.EXTERNAL_API_BACKOFF,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.PLATE_LOOKUP_POOL_SIZE,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __call__(self, plate: str) -> str:
+        response = self.session.get(
+            self.base_url,
+            params={"username": self.username, "RegistrationNumber": plate},
+            timeout=settings.EXTERNAL_API_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response.content.decode(errors="ignore")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker: opens after `threshold` failed lookups
+    (each already retried EXTERNAL_API_RETRIES times by the HTTP adapter),
+    then lets a single trial call through after `reset_seconds`.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = max(1, threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Plate registry circuit opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class PlateLookupClient:
+    """
+    Process-wide registry client: single-flight, negative cache and breaker.
+    Counters (upstream_calls, coalesced, negative_hits) are kept for the
+    benchmark and for troubleshooting.
+    """
+
+    def __init__(self, upstream: Optional[Upstream] = None):
+        self._upstream = upstream
+        self._in_flight: Dict[str, _Call] = {}
+        self._negative: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = Lock()
+        self.breaker = CircuitBreaker(
+            settings.PLATE_LOOKUP_BREAKER_THRESHOLD,
+            settings.PLATE_LOOKUP_BREAKER_RESET_SECONDS,
+        )
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.negative_hits = 0
+
+    @property
+    def upstream(self) -> Upstream:
+        if self._upstream is None:
+            self._upstream = HttpRegistryUpstream()
+        return self._upstream
+
+    def set_upstream(self, upstream: Optional[Upstream]) -> None:
+        """Replace the registry (e.g. by a local stub); None restores HTTP."""
+        with self._lock:
+            self._upstream = upstream
+            self._negative.clear()
+        self.breaker.record_success()
+
+    @staticmethod
+    def key(plate: str) -> str:
+        return (plate or "").strip().upper()
+
+    def single_flight(self, plate: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once per plate at a time: callers arriving while a lookup of
+        the same plate is running wait for it and share its result/error.
+        """
+        key = self.key(plate)
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._in_flight[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            call.done.set()
+
+    def is_known_missing(self, plate: str) -> bool:
+        key = self.key(plate)
+        with self._lock:
+            expires_at = self._negative.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._negative[key]
+                return False
+            self.negative_hits += 1
+            return True
+
+    def forget(self, plate: str) -> None:
+        """Drop a plate from the negative cache (e.g. after a manual create)."""
+        with self._lock:
+            self._negative.pop(self.key(plate), None)
+
+    def fetch(self, plate: str) -> Dict[str, Any]:
+        """
+        Call the registry and return the normalized fields (without plate).
+
+        Raises:
+            PlateNotFoundError: Unknown plate (also cached for the negative TTL)
+            PlateLookupUnavailableError: Circuit open
+            PlateLookupError: Network/HTTP/parse failure
+        """
+        if self.is_known_missing(plate):
+            raise PlateNotFoundError(f"Vehicle {plate} not found in external service")
+        if not self.breaker.allow():
+            raise PlateLookupUnavailableError("External vehicle service temporarily unavailable")
+
+        with self._lock:
+            self.upstream_calls += 1
+        try:
+            xml_content = self.upstream(plate)
+            parsed = parse_vehicle_xml(xml_content) if xml_content else {}
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure()
+            raise PlateLookupError(f"Erro de rede/HTTP: {e}") from e
+        except Exception as e:
+            self.breaker.record_failure()
+            raise PlateLookupError(f"Erro de processamento: {e}") from e
+
+        self.breaker.record_success()
+        if not any(value is not None for value in parsed.values()):
+            self._remember_missing(plate)
+            raise PlateNotFoundError(f"Vehicle {plate} not found in external service")
+        return parsed
+
+    def _remember_missing(self, plate: str) -> None:
+        with self._lock:
+            self._negative[self.key(plate)] = time.monotonic() + settings.PLATE_LOOKUP_NEGATIVE_TTL_SECONDS
+            self._negative.move_to_end(self.key(plate))
+            while len(self._negative) > settings.PLATE_LOOKUP_CACHE_SIZE:
+                self._negative.popitem(last=False)
+
+
+plate_lookup_client = PlateLookupClient()
+
+
+def registry_payload(plate: str, vehicle_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map normalized registry fields to VehicleApiCreate fields (None dropped)."""
+    payload = {
+        "plate": plate,
+        "abiCode": vehicle_data.get("abiCode") or vehicle_data.get("ABICode"),
+        "description": vehicle_data.get("description"),
+        "brand": vehicle_data.get("brand"),
+        "model": vehicle_data.get("model"),
+        "engineSize": vehicle_data.get("engineSize"),
+        "fuelType": vehicle_data.get("fuelType"),
+        "numberOfSeats": vehicle_data.get("numberOfSeats"),
+        "version": vehicle_data.get("version"),
+        "colour": vehicle_data.get("colour") or vehicle_data.get("color"),
+        "vehicleIdentificationNumber": vehicle_data.get("vehicleIdentificationNumber") or vehicle_data.get("VechileIdentificationNumber"),
+        "grossWeight": vehicle_data.get("grossWeight"),
+        "netWeight": vehicle_data.get("netWeight"),
+        "imported": vehicle_data.get("imported"),
+        "RegistrationDate": vehicle_data.get("RegistrationDate"),
+        "imageUrl": vehicle_data.get("imageUrl"),
+        "kilometers": vehicle_data.get("kilometers"),
+    }
+    return {k: v for k, v in payload.items() if v is not None}
+
+
+class PlateLookupService(BaseService[VehicleApi]):
+    """
+    Service layer for vehicle lookups by plate (DB first, then registry).
+    """
+
+    def __init__(self, db: Session, client: Optional[PlateLookupClient] = None):
+        super().__init__(db)
+        self.repo = VehicleApiRepository(db)
+        self.client = client or plate_lookup_client
+
+    def get_by_plate(self, plate: str) -> VehicleApi:
+        """
+        Return the vehicle for a plate, fetching and storing it on a miss.
+
+        Raises:
+            PlateNotFoundError / PlateLookupUnavailableError / PlateLookupError
+            pydantic.ValidationError: Registry data does not fit VehicleApiCreate
+        """
+        db_vehicle = self.repo.get_by_plate(plate=plate)
+        if db_vehicle:
+            return db_vehicle
+
+        vehicle_id = self.client.single_flight(plate, lambda: self._fetch_and_store(plate))
+        # Quem esperou pelo líder lê na própria sessão a linha já gravada
+        return self.repo.get_by_id(vehicle_id)
+
+    def _fetch_and_store(self, plate: str) -> int:
+        # Outro pedido pode ter gravado a matrícula entretanto
+        db_vehicle = self.repo.get_by_plate(plate=plate)
+        if db_vehicle:
+            return db_vehicle.id
+
+        vehicle_data = self.client.fetch(plate)
+        payload = registry_payload(plate, vehicle_data)
+        self.logger.debug("Normalized vehicle payload: %s", payload)
+        vehicle_in = VehicleApiCreate(**payload)
+
+        try:
+            return self.repo.create(vehicle=vehicle_in).id
+        except (IntegrityError, HTTPException):
+            # Inserção concorrente noutro processo ("Plate already exists"): usar a linha existente
+            self.rollback()
+            db_vehicle = self.repo.get_by_plate(plate=plate)
+            if not db_vehicle:
+                raise
+            return db_vehicle.id
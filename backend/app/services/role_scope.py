@@ -0,0 +1,193 @@
+"""
+Role scope resolver - which service areas a user is allowed to see.
+
+Maps a user to an admin flag plus the set of service ids of their area,
+and caches the result per user so dashboard and listing requests do not
+repeat the employee/role lookup and the area matching on every call.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import FrozenSet, Optional, Tuple
+import time
+import logging
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.models.employee import Employee
+from app.models.service import Service
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Palavras-chave do cargo -> padrão da área de serviço
+ROLE_AREA_KEYWORDS = [
+    (("mecanico", "mecânico"), "%Mecânica%"),
+    (("eletric", "elétric"), "%Elétrica%"),
+    (("borracheiro", "pneu"), "%pneu%"),
+    (("estética", "estetica"), "%Estética%"),
+    (("vidro",), "%Vidros%"),
+    (("chaparia",), "%chaparia%"),
+    (("pintura",), "%pintura%"),
+]
+ADMIN_SYSTEM_ROLES = ("admin", "manager")
+ADMIN_ROLE_KEYWORDS = ("admin", "gestor", "gerente")
+
+
+@dataclass(frozen=True)
+class RoleScope:
+    """
+    Resolved visibility of a user.
+
+    service_ids is None when the user is not restricted (admins, managers,
+    users without an employee/role); otherwise it holds the ids of the
+    services of the user's area, possibly empty.
+    """
+    is_admin: bool
+    service_ids: Optional[FrozenSet[int]] = None
+
+    @property
+    def is_restricted(self) -> bool:
+        return self.service_ids is not None
+
+    def apply(self, query, service_id_column):
+        """Restrict a query to the scope with an indexed service_id IN (...) filter."""
+        if not self.is_restricted:
+            return query
+        return query.filter(service_id_column.in_(sorted(self.service_ids)))
+
+
+UNRESTRICTED = RoleScope(is_admin=True)
+
+
+class RoleScopeCache:
+    """
+    Thread-safe TTL + LRU cache of RoleScope objects.
+
+    Keys are (user id, system role) so a change of the user's system role
+    is never served from a stale entry, plus ("area", pattern) for the
+    services of an area; employee, role and service changes call clear()
+    through invalidate_role_scopes().
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[float, RoleScope]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Tuple[int, str]) -> Optional[RoleScope]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, scope = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return scope
+
+    def set(self, key: Tuple[int, str], scope: RoleScope) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, scope)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+role_scope_cache = RoleScopeCache(
+    ttl_seconds=settings.ROLE_SCOPE_CACHE_TTL_SECONDS,
+    maxsize=settings.ROLE_SCOPE_CACHE_SIZE,
+)
+
+
+def invalidate_role_scopes() -> None:
+    """Drop every cached scope; called when employees, roles or services change."""
+    role_scope_cache.clear()
+    logger.debug("Role scope cache cleared")
+
+
+def resolve_role_scope(db: Session, user: Optional[User]) -> RoleScope:
+    """
+    Resolve (and cache) the visibility scope of a user.
+
+    Args:
+        db: Database session
+        user: Authenticated user (or token principal), or None for unauthenticated calls
+
+    Returns:
+        RoleScope; unauthenticated calls are unrestricted
+    """
+    if not user:
+        return UNRESTRICTED
+
+    # Principal de um token com o scope nos claims: sem consultar funcionário/cargo
+    if getattr(user, "has_scope", False):
+        return _scope_for(db, user.is_admin, user.area)
+
+    key = (user.id, user.role)
+    scope = role_scope_cache.get(key)
+    if scope is None:
+        scope = _load_role_scope(db, user)
+        role_scope_cache.set(key, scope)
+    return scope
+
+
+def scope_claims(db: Session, user: User) -> dict:
+    """
+    Scope of a user as token claims: {"admin": bool, "area": pattern or None}.
+    area is None when the user is not restricted to a service area.
+    """
+    is_admin = (user.role or "").lower() in ADMIN_SYSTEM_ROLES
+
+    employee_query = db.query(Employee).options(joinedload(Employee.role))
+    if user.employee_id:
+        employee = employee_query.filter(Employee.id == user.employee_id).first()
+    else:
+        employee = employee_query.filter(Employee.email == user.email).first()
+
+    if employee:
+        if employee.is_manager:
+            is_admin = True
+        if employee.role and any(keyword in employee.role.name.lower() for keyword in ADMIN_ROLE_KEYWORDS):
+            is_admin = True
+
+    if is_admin or not employee or not employee.role:
+        return {"admin": is_admin, "area": None}
+    return {"admin": False, "area": _area_pattern(employee.role.name.lower())}
+
+
+def _load_role_scope(db: Session, user: User) -> RoleScope:
+    claims = scope_claims(db, user)
+    return _scope_for(db, claims["admin"], claims["area"])
+
+
+def _scope_for(db: Session, is_admin: bool, area: Optional[str]) -> RoleScope:
+    if area is None:
+        return RoleScope(is_admin=bool(is_admin))
+    # Serviços da área em cache (limpa com invalidate_role_scopes)
+    key = ("area", area)
+    scope = role_scope_cache.get(key)
+    if scope is None:
+        service_ids = frozenset(
+            service_id
+            for (service_id,) in db.query(Service.id).filter(Service.area.ilike(area)).all()
+        )
+        scope = RoleScope(is_admin=False, service_ids=service_ids)
+        role_scope_cache.set(key, scope)
+    return scope
+
+
+def _area_pattern(role_name: str) -> str:
+    for keywords, pattern in ROLE_AREA_KEYWORDS:
+        if any(keyword in role_name for keyword in keywords):
+            return pattern
+    # Para outros cargos, filtrar genericamente pela área com o nome do cargo
+    return f"%{role_name}%"
@@ -0,0 +1,182 @@
+"""
+Status registry - in-process lookup of appointment statuses.
+
+Loads the statuses table once and resolves names (and their PT/EN
+aliases, e.g. "Concluído"/"Finalized") to ids without a query per call.
+Reloads itself on the first miss of a name, when statuses are written
+through the app and after STATUS_REGISTRY_TTL_SECONDS (to pick up changes
+from other processes). Names still missing after that reload are remembered
+until the next reload, so repeated lookups of an absent status cost nothing.
+"""
+
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+import time
+import unicodedata
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.status import Status
+
+logger = logging.getLogger(__name__)
+
+# Nomes equivalentes usados pelos seeds, scripts e código ao longo do tempo
+STATUS_ALIASES: List[List[str]] = [
+    ["Pendente", "Pending"],
+    ["Cancelado", "Canceled", "Cancelada", "Cancelled"],
+    ["Concluído", "Finalized", "Concluída", "Completed"],
+    ["Em Reparação", "In Repair"],
+    ["Aguardando Aprovação", "Awaiting Approval"],
+    ["Aguardando Pagamento", "Waitting Payment", "Waiting Payment", "Awaiting Payment"],
+]
+
+
+def normalize_status_name(name: str) -> str:
+    """Case- and accent-insensitive key for a status name."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).strip().casefold()
+
+
+_ALIAS_GROUPS: Dict[str, List[str]] = {}
+for _group in STATUS_ALIASES:
+    for _alias in _group:
+        _ALIAS_GROUPS[normalize_status_name(_alias)] = [normalize_status_name(name) for name in _group]
+
+
+class StatusRegistry:
+    """
+    Thread-safe in-memory map of status name -> id.
+
+    Resolution order for a name: exact name, then the normalized name, then
+    the other names of its alias group (in STATUS_ALIASES order).
+    """
+
+    def __init__(self):
+        self._by_name: Dict[str, int] = {}
+        self._by_key: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        # Nomes (normalizados) que não existiam no último reload
+        self._misses: Set[str] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = Lock()
+
+    @property
+    def _loaded(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < settings.STATUS_REGISTRY_TTL_SECONDS
+        )
+
+    def refresh(self, db: Session) -> None:
+        """Reload every status from the database."""
+        rows = db.query(Status.id, Status.name).all()
+        by_name = {name: status_id for status_id, name in rows}
+        by_key: Dict[str, int] = {}
+        for status_id, name in sorted(rows):
+            by_key.setdefault(normalize_status_name(name), status_id)
+        with self._lock:
+            self._by_name = by_name
+            self._by_key = by_key
+            self._names = {status_id: name for status_id, name in rows}
+            self._misses = set()
+            self._loaded_at = time.monotonic()
+        logger.debug(f"Status registry loaded ({len(rows)} statuses)")
+
+    def invalidate(self) -> None:
+        """Force a reload on the next lookup."""
+        with self._lock:
+            self._loaded_at = None
+            self._misses = set()
+
+    def get_id(self, db: Session, name: str) -> Optional[int]:
+        """
+        Resolve a status name or alias to its id.
+
+        Reloads the registry once when the name is unknown, so statuses
+        created by another process are picked up; a name still unknown is
+        not reloaded for again until the next TTL reload.
+        """
+        return self.get_first_id(db, [name])
+
+    def get_first_id(self, db: Session, names: Iterable[str]) -> Optional[int]:
+        """Return the id of the first name (by priority) that resolves."""
+        if not self._loaded:
+            self.refresh(db)
+        names = list(names)
+        for name in names:
+            status_id = self._lookup(name)
+            if status_id is not None:
+                return status_id
+        keys = {normalize_status_name(name) for name in names}
+        with self._lock:
+            if keys <= self._misses:
+                return None
+        self.refresh(db)
+        for name in names:
+            status_id = self._lookup(name)
+            if status_id is not None:
+                return status_id
+        with self._lock:
+            self._misses |= keys
+        return None
+
+    def get_or_create_id(self, db: Session, name: str) -> int:
+        """Resolve a status, creating it (and reloading the registry) when missing."""
+        status_id = self.get_id(db, name)
+        if status_id is not None:
+            return status_id
+        db_status = Status(name=name)
+        db.add(db_status)
+        db.commit()
+        db.refresh(db_status)
+        self.invalidate()
+        self.refresh(db)
+        return db_status.id
+
+    def name_of(self, db: Session, status_id: int) -> Optional[str]:
+        if not self._loaded or status_id not in self._names:
+            self.refresh(db)
+        return self._names.get(status_id)
+
+    def ids_matching(self, db: Session, fragment: str) -> FrozenSet[int]:
+        """
+        Ids of the statuses whose name contains `fragment` (case/accent
+        insensitive) - the in-process equivalent of Status.name ILIKE '%fragment%'.
+        """
+        if not self._loaded:
+            self.refresh(db)
+        key = normalize_status_name(fragment.strip("%"))
+        with self._lock:
+            return frozenset(
+                status_id for status_id, name in self._names.items()
+                if key in normalize_status_name(name)
+            )
+
+    def ids_for(self, db: Session, names: Iterable[str]) -> FrozenSet[int]:
+        """Ids of all the given names/aliases that exist."""
+        if not self._loaded:
+            self.refresh(db)
+        return frozenset(
+            status_id for status_id in (self._lookup(name) for name in names)
+            if status_id is not None
+        )
+
+    def _lookup(self, name: str) -> Optional[int]:
+        with self._lock:
+            status_id = self._by_name.get(name)
+            if status_id is not None:
+                return status_id
+            key = normalize_status_name(name)
+            status_id = self._by_key.get(key)
+            if status_id is not None:
+                return status_id
+            for alias_key in _ALIAS_GROUPS.get(key, []):
+                status_id = self._by_key.get(alias_key)
+                if status_id is not None:
+                    return status_id
+        return None
+
+
+status_registry = StatusRegistry()
@@ -0,0 +1,138 @@
+"""
+Low-stock alerts off the request path.
+
+Stock writes (app.crud.stock) mark the products whose quantity reached the
+minimum with queue_low_stock(); once the transaction commits, the product ids
+are handed to a single background worker that re-reads each product in its
+own session and calls NotificationService.notify_low_stock (deduplicated by
+the alert window). A rolled-back decrement never alerts, and the request no
+longer waits for the admin lookup and the notification fan-out.
+
+Ids already waiting in the queue are not queued again, so a burst of
+decrements on the same product produces one check.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, Set
+import threading
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+PENDING_LOW_STOCK_KEY = "low_stock_product_ids"
+
+
+class StockAlertDispatcher:
+    """One worker thread that runs the low-stock checks queued by committed transactions."""
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued: Set[int] = set()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self.checked = 0
+        self.notified = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stock-alerts")
+        return self._executor
+
+    def submit(self, product_ids: Iterable[int]):
+        with self._lock:
+            new = [product_id for product_id in product_ids if product_id not in self._queued]
+            self._queued.update(new)
+            self._in_flight += len(new)
+        for product_id in new:
+            try:
+                self._get_executor().submit(self._check, product_id)
+            except RuntimeError:
+                # Executor já parado (processo a terminar)
+                with self._lock:
+                    self._queued.discard(product_id)
+                self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.notify_all()
+
+    def _check(self, product_id: int):
+        from app.database import SessionLocal
+        from app.models.product import Product
+        from app.services.notification_service import NotificationService
+
+        # Sai da fila antes de ler: um decremento durante a verificação volta a agendar
+        with self._lock:
+            self._queued.discard(product_id)
+        db = (self._session_factory or SessionLocal)()
+        try:
+            product = db.query(Product.name, Product.quantity, Product.minimum_stock).filter(
+                Product.id == product_id, Product.deleted_at.is_(None)
+            ).first()
+            with self._lock:
+                self.checked += 1
+            if product and product.quantity <= product.minimum_stock:
+                NotificationService.notify_low_stock(
+                    db=db,
+                    product_name=product.name,
+                    current_quantity=product.quantity,
+                    min_quantity=product.minimum_stock,
+                )
+                with self._lock:
+                    self.notified += 1
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self.failed += 1
+            logger.error("Error sending low-stock alert for product %s: %s", product_id, e, exc_info=True)
+        finally:
+            db.close()
+            self._finish()
+
+    def drain(self, timeout: float = None) -> bool:
+        """Wait until every queued check has run (scripts/stress tests). False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._in_flight, timeout=timeout)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": self._in_flight, "checked": self.checked, "notified": self.notified, "failed": self.failed}
+
+
+stock_alerts = StockAlertDispatcher()
+
+
+# ---- verificações ligadas à transação da sessão ----
+
+def queue_low_stock(db: Session, product_id: int):
+    """Check this product for a low-stock alert once the session's transaction commits."""
+    db.info.setdefault(PENDING_LOW_STOCK_KEY, set()).add(product_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending_checks(session):
+    pending = session.info.pop(PENDING_LOW_STOCK_KEY, None)
+    if pending:
+        stock_alerts.submit(sorted(pending))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_checks(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_LOW_STOCK_KEY, None)
@@ -0,0 +1,157 @@
+"""
+Stripe webhook service layer - ingestion and background processing.
+
+The webhook endpoint only stores the raw event (idempotent on the Stripe
+event id) and acknowledges it; invoices are built here, outside the HTTP
+request, with retries and a replay path for failed events.
+"""
+
+import json
+from typing import Optional, Tuple
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.appointment import Appointment
+from app.models.invoice import Invoice
+from app.models.stripe_webhook_event import StripeWebhookEvent
+from app.crud.stripe_webhook_event import StripeWebhookEventRepository
+from app.crud.metrics_rollup import MetricsRollupRepository
+from .base_service import BaseService
+from .invoice_service import create_invoice_from_session
+from .status_registry import status_registry
+
+logger = logging.getLogger(__name__)
+
+HANDLED_EVENT_TYPES = ("checkout.session.completed",)
+
+
+class StripeEventError(Exception):
+    """Event cannot be processed (kept for retry/replay)."""
+
+
+class StripeWebhookService(BaseService[StripeWebhookEvent]):
+    """
+    Service layer for Stripe webhook events.
+
+    - ingest(): validate and persist a raw event (milliseconds, no Stripe
+      or invoice work)
+    - process_event()/process_pending(): build invoices idempotently
+    - replay(): put failed (or specific) events back in the queue
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(db)
+        self.repo = StripeWebhookEventRepository(db)
+
+    def ingest(self, payload: bytes) -> Tuple[StripeWebhookEvent, bool]:
+        """
+        Persist a raw webhook payload.
+
+        Args:
+            payload: Request body as received from Stripe
+
+        Returns:
+            (event, created) - created is False for a redelivered event
+
+        Raises:
+            ValueError: Payload is not JSON or has no event id/type
+        """
+        event = json.loads(payload)
+        event_id = event.get("id")
+        event_type = event.get("type")
+        if not event_id or not event_type:
+            raise ValueError("Missing event id or type")
+        return self.repo.record(event_id, event_type, payload.decode("utf-8"))
+
+    def process_event(self, event_id: str) -> bool:
+        """Claim and process a single pending event. Returns False if not claimed."""
+        db_event = self.repo.claim_event(event_id, settings.STRIPE_EVENT_LEASE_SECONDS)
+        if not db_event:
+            return False
+        self._process(db_event)
+        return True
+
+    def process_pending(self) -> int:
+        """Process every pending event whose next attempt is due, in batches."""
+        processed = 0
+        while True:
+            batch = self.repo.claim_batch(settings.STRIPE_EVENT_BATCH_SIZE, settings.STRIPE_EVENT_LEASE_SECONDS)
+            if not batch:
+                return processed
+            for db_event in batch:
+                self._process(db_event)
+            processed += len(batch)
+
+    def replay(self, event_id: Optional[str] = None) -> int:
+        """Re-queue one event, or all failed events when event_id is None."""
+        return self.repo.reset_for_replay(event_id)
+
+    def _process(self, db_event: StripeWebhookEvent) -> None:
+        try:
+            event = json.loads(db_event.payload)
+            if db_event.event_type in HANDLED_EVENT_TYPES:
+                result = self._handle_checkout_completed(event["data"]["object"])
+                self.repo.mark_processed(db_event, result=result)
+            else:
+                self.repo.mark_processed(db_event, ignored=True)
+            self.commit()
+            self.logger.info(f"Stripe event {db_event.event_id} ({db_event.event_type}) -> {db_event.status}")
+        except Exception as e:
+            self.rollback()
+            self.repo.mark_failed(
+                db_event,
+                str(e),
+                max_attempts=settings.STRIPE_EVENT_MAX_ATTEMPTS,
+                backoff_seconds=settings.STRIPE_EVENT_BACKOFF_SECONDS,
+            )
+            self.commit()
+            self.logger.error(f"Stripe event {db_event.event_id} failed (attempt {db_event.attempts}): {e}")
+
+    def _handle_checkout_completed(self, session: dict) -> str:
+        """
+        Create the invoice for a paid checkout session (idempotent: an
+        existing invoice for the appointment is returned unchanged).
+        """
+        appointment_id = (session.get("metadata") or {}).get("appointment_id")
+        if not appointment_id:
+            raise StripeEventError("No appointment_id in session metadata")
+
+        appointment = self.db.query(Appointment).filter(Appointment.id == int(appointment_id)).first()
+        if not appointment:
+            raise StripeEventError(f"Appointment {appointment_id} not found")
+
+        existing_invoice = self.db.query(Invoice).filter(Invoice.appointment_id == appointment.id).first()
+        if existing_invoice:
+            return existing_invoice.invoice_number
+
+        invoice = create_invoice_from_session(self.db, appointment, session)
+
+        # Atualizar status do appointment para Concluído (e o rollup de métricas)
+        MetricsRollupRepository(self.db).set_status(appointment, status_registry.get_id(self.db, "Concluído") or 3)
+        return invoice.invoice_number
+
+
+def process_stripe_event(event_id: str) -> None:
+    """Background-task entry point: process one event with its own session."""
+    db = SessionLocal()
+    try:
+        StripeWebhookService(db).process_event(event_id)
+    except Exception as e:
+        logger.error(f"Error processing Stripe event {event_id}: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+def process_pending_stripe_events() -> int:
+    """Background-task/scheduler entry point: drain the due events with its own session."""
+    db = SessionLocal()
+    try:
+        return StripeWebhookService(db).process_pending()
+    except Exception as e:
+        logger.error(f"Error processing pending Stripe events: {e}", exc_info=True)
+        return 0
+    finally:
+        db.close()
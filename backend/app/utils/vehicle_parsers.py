@@ -1,7 +1,8 @@
 import json
 import xml.etree.ElementTree as ET
-from typing import Dict, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+import re
+from datetime import date, datetime
 
 
 def _text(node: Optional[ET.Element]) -> Optional[str]:
@@ -15,15 +16,110 @@ def _get_current_text(node: Optional[ET.Element]) -> Optional[str]:
     return _text(cur) or _text(node)
 
 
-def _find_child_by_localname(node: Optional[ET.Element], name: str) -> Optional[ET.Element]:
-    """Find first child whose tag local-name equals `name`, ignoring namespace."""
-    if node is None:
+# Campos lidos diretamente de <vehicleData> (comparação por sufixo, sem namespace)
+VEHICLE_DATA_FIELDS = (
+    "CarMake",
+    "CarModel",
+    "EngineSize",
+    "FuelType",
+    "NumberOfSeats",
+    "Description",
+    "RegistrationYear",
+)
+_VEHICLE_DATA_SUFFIXES = tuple((name.lower(), name) for name in VEHICLE_DATA_FIELDS)
+
+_KIND_JSON = 1
+_KIND_DATA = 2
+_PARSE_CHUNK = 4096
+_DMY_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})$")
+_YEAR_RE = re.compile(r"\d{4}$")
+
+# Tabela tag -> classificação, preenchida à medida que aparecem tags novas.
+# As respostas usam sempre o mesmo pequeno conjunto de tags (com namespace),
+# por isso cada tag só é comparada por sufixo uma vez por processo.
+_TAG_KINDS: Dict[str, int] = {}
+_TAG_FIELDS: Dict[str, Tuple[str, ...]] = {}
+_TAG_TABLE_LIMIT = 4096
+
+
+def _tag_kind(tag: str) -> int:
+    kind = _TAG_KINDS.get(tag)
+    if kind is None:
+        lowered = tag.lower()
+        kind = _KIND_JSON if lowered.endswith('vehiclejson') else _KIND_DATA if lowered.endswith('vehicledata') else 0
+        if len(_TAG_KINDS) < _TAG_TABLE_LIMIT:
+            _TAG_KINDS[tag] = kind
+    return kind
+
+
+def _fields_for_tag(tag: str) -> Tuple[str, ...]:
+    fields = _TAG_FIELDS.get(tag)
+    if fields is None:
+        lowered = tag.lower()
+        fields = tuple(name for suffix, name in _VEHICLE_DATA_SUFFIXES if lowered.endswith(suffix))
+        if len(_TAG_FIELDS) < _TAG_TABLE_LIMIT:
+            _TAG_FIELDS[tag] = fields
+    return fields
+
+
+def _scan_vehicle_xml(xml_text: str) -> Tuple[Optional[str], Dict[str, ET.Element]]:
+    """Single pass over the response: returns (vehicleJson text, vehicleData field nodes).
+
+    Incremental (iterparse-style) parsing that only looks at "end" events and
+    stops as soon as both the JSON blob and <vehicleData> have been read. The
+    first matching element wins, as does the first matching child of
+    <vehicleData> for each field.
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    json_text: Optional[str] = None
+    nodes: Dict[str, ET.Element] = {}
+    vdata_done = False
+
+    for offset in range(0, len(xml_text), _PARSE_CHUNK):
+        parser.feed(xml_text[offset:offset + _PARSE_CHUNK])
+        for _, elem in parser.read_events():
+            kind = _TAG_KINDS.get(elem.tag)
+            if kind is None:
+                kind = _tag_kind(elem.tag)
+            if kind == _KIND_DATA and not vdata_done:
+                for child in elem:
+                    if isinstance(child.tag, str):
+                        for name in _fields_for_tag(child.tag):
+                            nodes.setdefault(name, child)
+                vdata_done = True
+            elif kind == _KIND_JSON and json_text is None and elem.text:
+                json_text = elem.text
+            else:
+                continue
+            if vdata_done and json_text is not None:
+                return json_text, nodes
+
+    parser.close()  # ParseError para respostas vazias ou mal formadas
+    return json_text, nodes
+
+
+def _normalize_registration_date(value: Any) -> Optional[str]:
+    """dd/mm/YYYY or YYYY -> YYYY-MM-DD; None when it is not such a date."""
+    if not isinstance(value, str):
         return None
-    for child in node:
-        tag = child.tag
-        if isinstance(tag, str) and tag.lower().endswith(name.lower()):
-            return child
-    return None
+    value = value.strip()
+    match = _DMY_RE.match(value)
+    try:
+        if match:
+            day, month, year = match.groups()
+            return date(int(year), int(month), int(day)).isoformat()
+        if _YEAR_RE.match(value):
+            return date(int(value), 1, 1).isoformat()
+    except ValueError:
+        pass
+    # Formatos pouco comuns: mesmo comportamento do strptime original
+    try:
+        return datetime.strptime(value, "%d/%m/%Y").date().isoformat()
+    except Exception:
+        try:
+            return datetime.strptime(value, "%Y").date().isoformat()
+        except Exception:
+            return None
 
 
 def parse_vehicle_xml(xml_text: str) -> Dict[str, Any]:
@@ -31,19 +127,13 @@ def parse_vehicle_xml(xml_text: str) -> Dict[str, Any]:
 
     Note: does NOT set `plate`. Caller must provide plate before creating the DB record.
     """
-    root = ET.fromstring(xml_text)
+    json_text, nodes = _scan_vehicle_xml(xml_text)
     data: Dict[str, Any] = {}
 
     # Try vehicleJson (it's a JSON string inside XML)
-    json_node = None
-    for elem in root.iter():
-        tag = elem.tag
-        if isinstance(tag, str) and tag.lower().endswith('vehiclejson') and elem.text:
-            json_node = elem
-            break
-    if json_node is not None and json_node.text:
+    if json_text:
         try:
-            j = json.loads(json_node.text)
+            j = json.loads(json_text)
         except Exception:
             j = None
         if isinstance(j, dict):
@@ -66,40 +156,29 @@ def parse_vehicle_xml(xml_text: str) -> Dict[str, Any]:
                 "kilometers": j.get("Kilometers") if j.get("Kilometers") is not None else None,
             })
 
-    # Fallback/extra from vehicleData
-    # Fallback/extra from vehicleData (handle namespaces by matching local-name)
-    vdata = None
-    for elem in root.iter():
-        tag = elem.tag
-        if isinstance(tag, str) and tag.lower().endswith('vehicledata'):
-            vdata = elem
-            break
-    if vdata is not None:
-        brand_node = _find_child_by_localname(vdata, 'CarMake')
-        brand = _get_current_text(brand_node)
+    # Fallback/extra from vehicleData (namespaces ignored by matching local-name)
+    if nodes:
+        brand = _get_current_text(nodes.get('CarMake'))
         if brand:
             data.setdefault("brand", brand)
-        model_node = _find_child_by_localname(vdata, 'CarModel')
+        model_node = nodes.get('CarModel')
         model_val = _get_current_text(model_node) or _text(model_node)
         if model_val:
             data.setdefault("model", model_val)
-        engine_node = _find_child_by_localname(vdata, 'EngineSize')
-        engine_val = _get_current_text(engine_node)
+        engine_val = _get_current_text(nodes.get('EngineSize'))
         if engine_val:
             data.setdefault("engineSize", engine_val)
-        fuel_node = _find_child_by_localname(vdata, 'FuelType')
-        fuel_val = _get_current_text(fuel_node)
+        fuel_val = _get_current_text(nodes.get('FuelType'))
         if fuel_val:
             data.setdefault("fuelType", fuel_val)
-        nos_node = _find_child_by_localname(vdata, 'NumberOfSeats')
-        nos_val = _get_current_text(nos_node)
+        nos_val = _get_current_text(nodes.get('NumberOfSeats'))
         if nos_val:
             data.setdefault("numberOfSeats", nos_val)
-        desc = _find_child_by_localname(vdata, 'Description')
+        desc = nodes.get('Description')
         if _text(desc):
             data.setdefault("description", _text(desc))
 
-        regy = _find_child_by_localname(vdata, 'RegistrationYear')
+        regy = nodes.get('RegistrationYear')
         if _text(regy):
             data.setdefault("RegistrationDate", _text(regy))
 
@@ -121,16 +200,9 @@ def parse_vehicle_xml(xml_text: str) -> Dict[str, Any]:
     # Normalize RegistrationDate dd/mm/YYYY -> YYYY-MM-DD
     rd = data.get("RegistrationDate")
     if rd:
-        try:
-            parsed = datetime.strptime(rd.strip(), "%d/%m/%Y")
-            data["RegistrationDate"] = parsed.date().isoformat()
-        except Exception:
-            # also try year-only
-            try:
-                parsed = datetime.strptime(rd.strip(), "%Y")
-                data["RegistrationDate"] = parsed.date().isoformat()
-            except Exception:
-                pass
+        normalized = _normalize_registration_date(rd)
+        if normalized:
+            data["RegistrationDate"] = normalized
 
     # Remove DB-managed fields
     for k in ["created_at", "updated_at", "deleted_at"]:
@@ -0,0 +1,59 @@
+"""
+Async Read Path Benchmark
+Runs the same uvicorn worker twice on a seeded SQLite database, once with
+the async read path (AsyncSession over aiosqlite, DB_ASYNC_ENABLED=true)
+and once with the sync fallback (Session in the threadpool), and fires a
+mix of the hot read endpoints from many concurrent clients:
+appointment list/detail, unread counts, metrics and invoice lookups.
+
+Usage:
+    python -m scripts.benchmarks.bench_async_reads
+    python -m scripts.benchmarks.bench_async_reads --concurrency 64 --requests 2000
+"""
+
+import os
+import sys
+import argparse
+
+from scripts.benchmarks.load_db_pool import (
+    bench_env,
+    prepare_database,
+    print_latencies,
+    run_load,
+    start_server,
+)
+
+HOT_READS = [
+    "/api/v1/appointments/?limit=20",
+    "/api/v1/appointments/1",
+    "/api/v1/users/1/notifications/count",
+    "/api/v1/users/1/notifications/count/appointments",
+    "/api/v1/metrics/daily",
+    "/api/v1/metrics/summary",
+    "/api/v1/payments/invoice/1",
+    "/api/v1/payments/invoices/1",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caminho async vs síncrono nas rotas de leitura")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--reuse-db", action="store_true", help="Não recriar a BD de teste")
+    args = parser.parse_args()
+
+    token = prepare_database(bench_env(), reuse=args.reuse_db)
+
+    for label, enabled in (("sync (Session in threadpool)", "false"), ("async (AsyncSession)", "true")):
+        server, url = start_server(bench_env(DB_ASYNC_ENABLED=enabled))
+        try:
+            run_load(url, token, 8, 200, HOT_READS)  # aquecimento
+            print(f"\n🔥 {label}: {args.requests} hot reads, {args.concurrency} clients, {os.cpu_count()} CPUs")
+            print_latencies(*run_load(url, token, args.concurrency, args.requests, HOT_READS))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
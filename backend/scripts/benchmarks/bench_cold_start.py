@@ -0,0 +1,99 @@
+"""
+Cold Start Benchmark
+Starts the API in fresh interpreters (like each uvicorn worker or --reload
+restart does) and measures the time until the first request is answered:
+import of app.main + lifespan startup + GET /ping.
+
+The database is prepared once (schema + seeds) before measuring, so the
+numbers are those of a normal boot on an existing database.
+
+Usage:
+    python -m scripts.benchmarks.bench_cold_start
+    python -m scripts.benchmarks.bench_cold_start --runs 10
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+import tempfile
+
+backend_root = Path(__file__).parent.parent.parent
+BENCH_DB = Path(tempfile.gettempdir()) / "mecatec_bench_cold_start.db"
+
+BOOT_SNIPPET = """
+import time
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/ping")
+    ready = time.perf_counter()
+print(f"BOOT {imported - started:.4f} {ready - started:.4f}")
+"""
+
+PREPARE_SNIPPET = """
+try:
+    from app.core.startup import init_database
+except ImportError:
+    import app.main  # versões antigas: schema e seeds no import
+else:
+    init_database()
+"""
+
+
+def run_python(snippet: str, env: dict) -> str:
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", snippet],
+        cwd=backend_root,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de arranque a frio da API")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if BENCH_DB.exists():
+        BENCH_DB.unlink()
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{BENCH_DB}",
+        "EMAIL_WORKER_POOL_SIZE": "0",
+        "SCHEDULER_LOCK_FILE": str(BENCH_DB.with_suffix(".lock")),
+    })
+    for key, value in {
+        "SECRET_KEY": "bench-secret",
+        "INITIAL_ADMIN_PASSWORD": "bench-admin",
+        "DEFAULT_CUSTOMER_PASSWORD": "bench-pass",
+        "DEFAULT_EMPLOYEE_PASSWORD": "bench-pass",
+    }.items():
+        env.setdefault(key, value)
+
+    print("\n🌱 Preparing database (schema + seeds)...")
+    run_python(PREPARE_SNIPPET, env)
+
+    imports, totals = [], []
+    for _ in range(args.runs):
+        line = [l for l in run_python(BOOT_SNIPPET, env).splitlines() if l.startswith("BOOT ")][-1]
+        imported, ready = (float(value) for value in line.split()[1:])
+        imports.append(imported * 1000)
+        totals.append(ready * 1000)
+
+    print(f"\n🚀 Cold start over {args.runs} runs (existing database)")
+    print(f"   import app.main        min={min(imports):9.1f} ms   median={statistics.median(imports):9.1f} ms")
+    print(f"   first request answered min={min(totals):9.1f} ms   median={statistics.median(totals):9.1f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Email Outbox Benchmark
+Compares the request-side cost of the previous synchronous send (new SMTP
+connection per message) with enqueueing into email_outbox, then drains the
+queue with the EmailOutboxWorker pool against a slow local SMTP stub.
+
+Usage:
+    python -m scripts.benchmarks.bench_email_outbox
+    python -m scripts.benchmarks.bench_email_outbox --emails 500 --smtp-delay 0.05 --workers 4
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+import tempfile
+
+# A fila usa o SessionLocal da aplicação: apontá-lo para uma BD temporária
+# antes de importar a app.
+BENCH_DB = Path(tempfile.gettempdir()) / "mecatec_bench_email_outbox.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+from scripts.benchmarks.common import make_session_factory, measure
+from scripts.benchmarks.smtp_stub import SmtpStub
+from app.email_service import EmailService, EmailOutboxWorker
+from app.crud.email_outbox import EmailOutboxRepository
+from app.models.email_outbox import EMAIL_STATUS_SENT
+
+
+def legacy_send(email_service: EmailService, to_email: str):
+    """Replica do envio anterior: ligação + STARTTLS/LOGIN + envio por mensagem."""
+    server = email_service.open_connection()
+    try:
+        server.send_message(email_service.build_message(to_email, "Lembrete", email_service.wrap_body("<p>Teste</p>")))
+    finally:
+        server.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da fila de emails")
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--smtp-delay", type=float, default=0.02, help="Atraso simulado do servidor por mensagem (s)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(str(BENCH_DB), fresh=True)
+
+    with SmtpStub(delay=args.smtp_delay) as stub:
+        email_service = EmailService()
+        email_service.smtp_server = "127.0.0.1"
+        email_service.smtp_port = stub.port
+        email_service.email_user = None
+        email_service.email_password = None
+        email_service.use_tls = False
+        email_service.email_from = "bench@mecatec.pt"
+
+        print(f"\n📧 Request-side latency per email (SMTP delay {args.smtp_delay * 1000:.0f} ms)")
+        measure("legacy synchronous send", lambda: legacy_send(email_service, "cliente@example.com"), repeat=args.repeat)
+        measure("enqueue (EmailService.send_email)", lambda: email_service.send_email("cliente@example.com", "Lembrete", "<p>Teste</p>"), repeat=args.repeat)
+
+        # Encher a fila e medir o tempo de escoamento pelo pool
+        for i in range(args.emails - args.repeat):
+            email_service.send_email(f"cliente{i}@example.com", "Lembrete", "<p>Teste</p>")
+        connections_before = stub.connections
+        messages_before = stub.messages
+
+        worker = EmailOutboxWorker(
+            pool_size=args.workers,
+            batch_size=args.batch_size,
+            poll_seconds=0.05,
+            email_service=email_service,
+        )
+        start = time.perf_counter()
+        worker.start()
+        db = session_factory()
+        try:
+            repo = EmailOutboxRepository(db)
+            while repo.count_by_status(EMAIL_STATUS_SENT) < args.emails:
+                time.sleep(0.05)
+        finally:
+            db.close()
+        elapsed = time.perf_counter() - start
+        worker.stop()
+
+        print(f"\n🚚 Drained {args.emails} emails with {args.workers} workers in {elapsed:.2f}s "
+              f"({args.emails / elapsed:.1f} emails/s)")
+        print(f"   SMTP connections opened: {stub.connections - connections_before} "
+              f"(legacy: one per email), messages received: {stub.messages - messages_before}")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Finance Report Benchmark
+Time and Python memory (tracemalloc peak) of the finance endpoints before and
+after moving the aggregation into SQL:
+- overview: paid invoices and inventory loaded into Python and summed (as
+  before) vs one SUM/COUNT statement each,
+- parts: whole catalogue loaded, filtered and sorted in Python (as before) vs
+  ordered and paginated in SQL,
+- revenue by part number over a date range: the line_items JSON of every paid
+  invoice parsed in Python vs GROUP BY over invoice_lines (filled by the
+  streaming backfill, also timed).
+Memory of the SQL versions stays flat as invoices/SKUs grow.
+
+Usage:
+    python -m scripts.benchmarks.bench_finance
+    python -m scripts.benchmarks.bench_finance --invoices 500000 --products 50000
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from scripts.benchmarks.common import make_session_factory, bulk_insert, default_db_path
+from app.models.invoice import Invoice
+from app.models.product import Product
+from app.models.invoice_line import InvoiceLine
+from app.crud.finance import FinanceRepository, parse_date_range
+from app.crud.invoice_lines import InvoiceLineRepository, parse_line_items
+
+
+def line_items(rng: random.Random, products: int) -> str:
+    """JSON no formato escrito por create_invoice_from_session: mão de obra + 1 a 3 peças."""
+    items = [{"name": "Revisão - Mão de Obra", "description": "Custo de mão de obra",
+              "quantity": 1, "unit_price": 40.0, "total": 40.0}]
+    for _ in range(rng.randint(1, 3)):
+        pid, quantity, price = rng.randint(0, products - 1), rng.randint(1, 4), round(rng.uniform(2, 300), 2)
+        items.append({"name": f"Peça {pid} (PN-{pid:06d})", "description": "Peça - Revisão",
+                      "quantity": quantity, "unit_price": price, "total": round(price * quantity, 2)})
+    return json.dumps(items)
+
+
+def seed(engine, session_factory, invoices: int, products: int):
+    db = session_factory()
+    try:
+        if db.query(Invoice.id).count() >= invoices and db.query(Product.id).count() >= products:
+            print(f"   Reusing existing database ({invoices} invoices, {products} products)")
+            return
+    finally:
+        db.close()
+
+    print(f"   Seeding {products} products, {invoices} invoices (with line_items JSON)...")
+    rng = random.Random(7)
+    start = datetime(2023, 1, 1)
+    bulk_insert(engine, Product.__table__, (
+        {"part_number": f"PN-{i:06d}", "name": f"Peça {i}", "category": "Geral",
+         "quantity": rng.randint(0, 40), "cost_value": round(rng.uniform(1, 200), 2),
+         "sale_value": round(rng.uniform(2, 300), 2), "minimum_stock": 5,
+         "deleted_at": start if i % 100 == 0 else None}
+        for i in range(products)
+    ))
+    bulk_insert(engine, Invoice.__table__, (
+        {"appointment_id": i + 1, "invoice_number": f"FT-{i:08d}", "subtotal": 100.0, "tax": 23.0,
+         "total": round(rng.uniform(20, 900), 2), "currency": "EUR",
+         "payment_status": "paid" if i % 10 else "pending",
+         "created_at": start + timedelta(minutes=i), "paid_at": start + timedelta(minutes=i) if i % 10 else None,
+         "line_items": line_items(rng, products)}
+        for i in range(invoices)
+    ))
+
+
+def legacy_overview(db, start, end):
+    """Replica da versão anterior: carrega faturas e produtos para Python."""
+    query = db.query(Invoice).filter(Invoice.payment_status == "paid")
+    if start:
+        query = query.filter(Invoice.paid_at >= start)
+    if end:
+        query = query.filter(Invoice.paid_at <= end)
+    invoices = query.all()
+    products = db.query(Product).filter(Product.deleted_at.is_(None)).all()
+    expenses = sum(p.cost_value * p.quantity for p in products)
+    return {"total_revenue": round(sum(i.total for i in invoices), 2), "total_expenses": round(expenses, 2),
+            "total_profit": round(sum(p.sale_value * p.quantity for p in products) - expenses, 2),
+            "total_invoices": len(invoices)}
+
+
+def legacy_parts(db):
+    """Replica da versão anterior: catálogo inteiro filtrado e ordenado em Python."""
+    data = []
+    for p in db.query(Product).filter(Product.deleted_at.is_(None)).all():
+        if p.quantity > 0:
+            data.append({"part_number": p.part_number, "total_profit": round((p.sale_value - p.cost_value) * p.quantity, 2)})
+    data.sort(key=lambda x: x["total_profit"], reverse=True)
+    return data
+
+
+def legacy_part_revenue(db, start, end):
+    """Antes de invoice_lines: JSON de cada fatura paga do período desserializado em Python."""
+    revenue = {}
+    rows = db.query(Invoice.line_items).filter(
+        Invoice.payment_status == "paid", Invoice.paid_at >= start, Invoice.paid_at < end
+    )
+    for (raw,) in rows:
+        for line in parse_line_items(raw):
+            if line["kind"] == "part":
+                revenue[line["part_number"]] = revenue.get(line["part_number"], 0) + line["total"]
+    return revenue
+
+
+def profile(label: str, session_factory, fn):
+    """Tempo e pico de memória Python de fn(db) numa sessão nova (sem identity map aquecido)."""
+    db = session_factory()
+    try:
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = fn(db)
+        elapsed = (time.perf_counter() - started) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        db.close()
+    print(f"   {label:<44} {elapsed:9.1f} ms   peak {peak / 1024 / 1024:8.2f} MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=500_000)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Faturas por bloco no backfill de invoice_lines")
+    parser.add_argument("--db", default=default_db_path("bench_finance.db"))
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(args.db)
+    seed(engine, session_factory, args.invoices, args.products)
+    start, end = parse_date_range("2023-03-01", "2023-06-30")
+
+    print(f"\n💶 Overview ({args.invoices} invoices, {args.products} products)")
+    old = profile("legacy (all rows into Python)", session_factory, lambda db: legacy_overview(db, None, None))
+    new = profile("SQL aggregates", session_factory, lambda db: FinanceRepository(db).overview())
+    print(f"   same result: {old == new}")
+    profile("legacy, Mar-Jun", session_factory, lambda db: legacy_overview(db, start, end))
+    profile("SQL aggregates, Mar-Jun", session_factory, lambda db: FinanceRepository(db).overview(start, end))
+
+    print("\n🔩 Parts report")
+    old = profile("legacy (catalogue sorted in Python)", session_factory, legacy_parts)
+    new = profile("SQL, first page of 100", session_factory, lambda db: FinanceRepository(db).parts())
+    print(f"   same top 100: {[p['part_number'] for p in old[:100]] == [p['part_number'] for p in new]}")
+    profile("SQL, page 50 of 100", session_factory, lambda db: FinanceRepository(db).parts(skip=4900))
+
+    print("\n🧾 Revenue by part number, Mar-Jun")
+    processed = profile(f"backfill invoice_lines (chunks of {args.chunk_size})", session_factory,
+                        lambda db: InvoiceLineRepository(db).backfill(args.chunk_size))
+    print(f"   invoices backfilled: {processed}")
+    old = profile("legacy (line_items JSON parsed in Python)", session_factory, lambda db: legacy_part_revenue(db, start, end))
+    new = profile("SQL over invoice_lines (all part numbers)", session_factory,
+                  lambda db: FinanceRepository(db).parts(start, end, limit=len(old) or 1))
+    print(f"   same revenue: {all(abs(old[p['part_number']] - p['total_revenue']) < 0.05 for p in new) and len(new) == len(old)}")
+    top = new[0]["part_number"] if new else None
+    profile("SQL over invoice_lines, one part number", session_factory,
+            lambda db: FinanceRepository(db).parts(start, end, part_number=top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Metrics Benchmark
+Compares the legacy per-status COUNT queries of /metrics/daily, /monthly and
+/summary with the single-pass MetricsService aggregation (the all-time
+/summary reads the daily rollup, built here after seeding).
+
+Usage:
+    python -m scripts.benchmarks.bench_metrics
+    python -m scripts.benchmarks.bench_metrics --rows 200000 --db /tmp/bench_metrics.db
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func
+
+from scripts.benchmarks.common import make_session_factory, bulk_insert, measure, default_db_path
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.models.status import Status
+from app.services.metrics_service import MetricsService
+from app.crud.metrics_rollup import MetricsRollupRepository
+
+STATUS_NAMES = ["Pendente", "Cancelado", "Concluído", "Em Reparação", "Aguardando Aprovação", "Aguardando Pagamento"]
+AREAS = ["Mecânica", "Elétrica", "Estética", "Vidros"]
+
+
+def seed(engine, session_factory, rows: int):
+    db = session_factory()
+    try:
+        if db.query(Appointment).count() >= rows:
+            print(f"   Reusing existing database ({rows} appointments)")
+            if MetricsRollupRepository(db).is_empty():
+                MetricsRollupRepository(db).rebuild()
+            return
+        for name in STATUS_NAMES:
+            db.add(Status(name=name))
+        for i in range(20):
+            db.add(Service(name=f"Serviço {i}", price=100.0, duration_minutes=30 + i * 10, area=AREAS[i % len(AREAS)]))
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"   Seeding {rows} appointments...")
+    start = datetime(2023, 1, 1)
+    span_minutes = 3 * 365 * 24 * 60
+    rng = random.Random(42)
+    bulk_insert(engine, Appointment.__table__, (
+        {
+            "appointment_date": start + timedelta(minutes=rng.randrange(span_minutes)),
+            "customer_id": 1,
+            "service_id": rng.randint(1, 20),
+            "status_id": rng.randint(1, len(STATUS_NAMES)),
+            "total_worked_time": 0,
+            "reminder_sent": 0,
+        }
+        for _ in range(rows)
+    ))
+    db = session_factory()
+    try:
+        print(f"   Building metrics_daily_rollup: {MetricsRollupRepository(db).rebuild()} rows")
+    finally:
+        db.close()
+
+
+def legacy_window(db, start=None, end=None):
+    """Replica da implementação anterior: um lookup + um COUNT por status."""
+    base_query = db.query(Appointment)
+    if start is not None:
+        base_query = base_query.filter(Appointment.appointment_date >= start, Appointment.appointment_date <= end)
+    total = base_query.count()
+    status_completed = db.query(Status).filter(Status.name.ilike("%concluído%")).first()
+    status_in_progress = db.query(Status).filter(Status.name.ilike("%em andamento%")).first()
+    status_pending = db.query(Status).filter(Status.name.ilike("%pendente%")).first()
+    completed = base_query.filter(Appointment.status_id == status_completed.id).count() if status_completed else 0
+    in_progress = base_query.filter(Appointment.status_id == status_in_progress.id).count() if status_in_progress else 0
+    pending = base_query.filter(Appointment.status_id == status_pending.id).count() if status_pending else 0
+    avg_query = db.query(func.avg(Service.duration_minutes)).join(Appointment)
+    if start is not None:
+        avg_query = avg_query.filter(Appointment.appointment_date >= start, Appointment.appointment_date <= end)
+    avg_duration = avg_query.filter(Appointment.status_id == status_completed.id).scalar() or 0
+    return total, completed, in_progress, pending, avg_duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default=default_db_path("bench_metrics.db"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(args.db)
+    seed(engine, session_factory, args.rows)
+
+    statements = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        statements["count"] += 1
+
+    day = datetime(2024, 6, 3)
+    day_window = (day, day.replace(hour=23, minute=59, second=59))
+    month_windows = {
+        "current": (datetime(2024, 6, 1), datetime(2024, 7, 1) - timedelta(seconds=1)),
+        "previous": (datetime(2024, 5, 1), datetime(2024, 6, 1) - timedelta(seconds=1)),
+    }
+
+    db = session_factory()
+    service = MetricsService(db)
+    scenarios = [
+        ("daily", lambda: legacy_window(db, *day_window), lambda: service.single_window(*day_window)),
+        ("monthly", lambda: [legacy_window(db, *w) for w in month_windows.values()],
+         lambda: service.window_metrics(month_windows)),
+        ("summary", lambda: legacy_window(db), lambda: service.all_time()),
+    ]
+
+    print(f"\n📊 Metrics benchmark ({args.rows} appointments)")
+    try:
+        for name, legacy, engine_fn in scenarios:
+            print(f"\n🔹 /metrics/{name}")
+            statements["count"] = 0
+            measure("legacy (COUNT per status)", legacy, args.repeat)
+            legacy_statements = statements["count"] // args.repeat
+            statements["count"] = 0
+            measure("MetricsService (single pass)", engine_fn, args.repeat)
+            print(f"   statements per call: legacy={legacy_statements}  engine={statements['count'] // args.repeat}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
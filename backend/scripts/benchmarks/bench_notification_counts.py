@@ -0,0 +1,122 @@
+"""
+Notification Badge Benchmark
+Compares one badge poll of the management app before and after the unread
+counter table:
+- legacy: COUNT over user_notifications x notifications for the total and
+  for each component (what /notifications/count and /count/{component} ran),
+- counters: one indexed read of notification_unread_counters for the user
+  (/notifications/counts).
+Also times the full counter rebuild (repair job).
+
+Usage:
+    python -m scripts.benchmarks.bench_notification_counts
+    python -m scripts.benchmarks.bench_notification_counts --users 200 --links 2000000
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from scripts.benchmarks.common import make_session_factory, bulk_insert, measure, default_db_path
+from app.models.user import User
+from app.models.notificationBadge import Notification
+from app.models.userNotification import UserNotification
+from app.crud.notification_counters import NotificationCounterRepository
+
+COMPONENTS = ["Appointment", "ServiceOrder", "Stock", "Payment", "Customer", "Vehicle"]
+
+
+def seed(engine, session_factory, users: int, links: int):
+    db = session_factory()
+    try:
+        if db.query(UserNotification.id).count() >= links:
+            print(f"   Reusing existing database ({links} user notifications)")
+            return
+    finally:
+        db.close()
+
+    notifications = max(1, links // users)
+    print(f"   Seeding {users} users, {notifications} notifications, {links} user notifications...")
+    start = datetime(2024, 1, 1)
+    rng = random.Random(42)
+    bulk_insert(engine, User.__table__, (
+        {"name": f"User {i}", "email": f"user{i}@bench.pt", "password_hash": "x", "role": "user",
+         "twofactor_enabled": False, "requires_password_change": False, "token_version": 0}
+        for i in range(users)
+    ))
+    bulk_insert(engine, Notification.__table__, (
+        {"component": rng.choice(COMPONENTS), "text": f"Notificação {i}", "alert_type": "info",
+         "inserted_at": start + timedelta(minutes=i), "created_at": start + timedelta(minutes=i),
+         "deleted_at": start if i % 50 == 0 else None}
+        for i in range(notifications)
+    ))
+    bulk_insert(engine, UserNotification.__table__, (
+        {"user_id": 1 + i % users, "notification_id": 1 + i // users,
+         "created_at": start + timedelta(minutes=i // users),
+         "read_at": None if rng.random() < 0.3 else start + timedelta(days=1)}
+        for i in range(links)
+    ))
+
+
+def legacy_poll(db, user_id: int):
+    """Replica dos endpoints anteriores: COUNT com join para o total e para cada componente."""
+    def count(component=None):
+        query = (
+            db.query(UserNotification)
+            .join(Notification, UserNotification.notification_id == Notification.id)
+            .filter(
+                UserNotification.user_id == user_id,
+                UserNotification.read_at.is_(None),
+                Notification.deleted_at.is_(None),
+            )
+        )
+        if component:
+            query = query.filter(Notification.component == component)
+        return query.count()
+
+    components = {component: count(component) for component in COMPONENTS}
+    return count(), {component: value for component, value in components.items() if value}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--links", type=int, default=500_000, help="Linhas em user_notifications")
+    parser.add_argument("--db", default=default_db_path("bench_notification_counts.db"))
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(args.db)
+    seed(engine, session_factory, args.users, args.links)
+
+    statements = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        statements["count"] += 1
+
+    db = session_factory()
+    counters = NotificationCounterRepository(db)
+    user_id = 1
+    print(f"\n🔔 Badge poll benchmark ({args.links} user notifications, {args.users} users)")
+    try:
+        measure("counter rebuild (repair job)", counters.rebuild, 1)
+
+        legacy_total, legacy_components = legacy_poll(db, user_id)
+        current = counters.counts(user_id)
+        print(f"   same result: {legacy_total == sum(current.values()) and legacy_components == current}")
+
+        statements["count"] = 0
+        measure("legacy (COUNT x join per badge)", lambda: legacy_poll(db, user_id), args.repeat)
+        legacy_statements = statements["count"] // args.repeat
+        statements["count"] = 0
+        measure("counters (one indexed read)", lambda: counters.counts(user_id), args.repeat)
+        print(f"   statements per poll: legacy={legacy_statements}  counters={statements['count'] // args.repeat}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+List Pagination Benchmark
+Latency of a deep page (page 1000 of 100 rows by default) of two list
+endpoints, OFFSET/LIMIT vs keyset cursor:
+- customers: ordered by id (CustomerRepository.page),
+- absences: ordered by (day DESC, id DESC), many rows per day
+  (AbsenceRepository.page, index ix_absences_day_id).
+Also times page 1 for reference and the optional totals (exact / estimate).
+
+Usage:
+    python -m scripts.benchmarks.bench_pagination
+    python -m scripts.benchmarks.bench_pagination --rows 1000000 --page 5000
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+
+from scripts.benchmarks.common import make_session_factory, bulk_insert, measure, default_db_path
+from app.models.customer import Customer
+from app.models.absence import Absence
+from app.crud.customer import CustomerRepository
+from app.crud.absence import AbsenceRepository
+from app.crud.pagination import encode_cursor
+
+
+def seed(engine, session_factory, rows: int):
+    db = session_factory()
+    try:
+        if db.query(Customer.id).count() >= rows and db.query(Absence.id).count() >= rows:
+            print(f"   Reusing existing database ({rows} customers and absences)")
+            return
+    finally:
+        db.close()
+
+    print(f"   Seeding {rows} customers and {rows} absences...")
+    now = datetime(2024, 1, 1)
+    bulk_insert(engine, Customer.__table__, (
+        {"name": f"Cliente {i}", "phone": f"9{i:08d}", "city": "Lisboa", "is_active": True,
+         "created_at": now, "updated_at": now, "deleted_at": now if i % 40 == 0 else None}
+        for i in range(rows)
+    ))
+    # ~50 ausências por dia: a ordem por day precisa do id como desempate
+    first_day = date(2015, 1, 1)
+    bulk_insert(engine, Absence.__table__, (
+        {"employee_id": 1 + i % 30, "absence_type_id": 1, "status_id": 1,
+         "day": first_day + timedelta(days=i // 50)}
+        for i in range(rows)
+    ))
+
+
+def cursor_at(page_fn, keys, skip: int, key_values):
+    """Cursor equivalente a `skip` linhas (o que o cliente teria recebido ao percorrer as páginas)."""
+    last = page_fn(limit=1, skip=skip - 1).items[0]
+    return encode_cursor(keys, key_values(last))
+
+
+def compare(label: str, repo, keys, key_values, page: int, page_size: int, repeat: int):
+    skip = (page - 1) * page_size
+    print(f"\n📄 {label}: page {page} (skip={skip}, limit={page_size})")
+    cursor = cursor_at(repo.page, keys, skip, key_values)
+    by_offset = [row.id for row in repo.page(limit=page_size, skip=skip).items]
+    by_cursor = [row.id for row in repo.page(limit=page_size, cursor=cursor).items]
+    print(f"   same rows: {by_offset == by_cursor}")
+    measure("page 1", lambda: repo.page(limit=page_size), repeat)
+    measure(f"page {page} OFFSET/LIMIT (?skip=)", lambda: repo.page(limit=page_size, skip=skip), repeat)
+    measure(f"page {page} keyset (?cursor=)", lambda: repo.page(limit=page_size, cursor=cursor), repeat)
+    measure("total=exact", lambda: repo.page(limit=page_size, total="exact"), repeat)
+    measure("total=estimate", lambda: repo.page(limit=page_size, total="estimate"), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300_000, help="Linhas em customers e em absences")
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--db", default=default_db_path("bench_pagination.db"))
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(args.db)
+    seed(engine, session_factory, args.rows)
+
+    from app.crud.pagination import SortKey
+    db = session_factory()
+    try:
+        compare("customers (id)", CustomerRepository(db), [SortKey(Customer.id)],
+                lambda row: [row.id], args.page, args.page_size, args.repeat)
+        compare("absences (day DESC, id DESC)", AbsenceRepository(db),
+                [SortKey(Absence.day, descending=True), SortKey(Absence.id, descending=True)],
+                lambda row: [row.day, row.id], args.page, args.page_size, args.repeat)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Password Hashing Benchmark
+Logins per second per core for bcrypt and argon2id, and what a burst of
+logins does to the rest of the process:
+- verify throughput on one thread and on the bounded pool (workers = CPUs),
+- a burst of N simultaneous logins hashed inline on N request threads (as
+  before) vs through the bounded pool, while a "light request" thread
+  measures how late it gets scheduled,
+- rehash on login when the stored cost differs from the configured one.
+
+Usage:
+    python -m scripts.benchmarks.bench_password_hashing
+    python -m scripts.benchmarks.bench_password_hashing --burst 64 --bcrypt-rounds 12
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import threading
+
+from app.core.passwords import PasswordHasher, build_password_context
+
+
+def verify_rate(context, hashed: str, seconds: float) -> float:
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        context.verify("correct horse", hashed)
+        done += 1
+    return done / seconds
+
+
+def pool_rate(hasher: PasswordHasher, hashed: str, count: int) -> float:
+    start = time.perf_counter()
+    futures = [hasher._submit(hasher.context.verify, "correct horse", hashed) for _ in range(count)]
+    for future in futures:
+        future.result()
+    return count / (time.perf_counter() - start)
+
+
+def light_request_lag(stop: threading.Event, lags: list):
+    """Acorda a cada 5 ms (um pedido leve) e regista o atraso em relação ao previsto."""
+    while not stop.is_set():
+        expected = time.perf_counter() + 0.005
+        time.sleep(0.005)
+        lags.append((time.perf_counter() - expected) * 1000)
+
+
+def burst(label: str, login, count: int):
+    stop, lags = threading.Event(), []
+    watcher = threading.Thread(target=light_request_lag, args=(stop, lags))
+    watcher.start()
+    time.sleep(0.05)
+    threads = [threading.Thread(target=login) for _ in range(count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    watcher.join()
+    lags.sort()
+    print(f"   {label:<28} {elapsed:6.2f}s   light request lag p50={statistics.median(lags):6.2f} ms  "
+          f"p99={lags[int(len(lags) * 0.99)]:7.2f} ms  max={lags[-1]:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do hash de passwords")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--argon2-time-cost", type=int, default=3)
+    parser.add_argument("--argon2-memory-kib", type=int, default=65536)
+    parser.add_argument("--burst", type=int, default=32, help="Logins simultâneos no pico")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    cores = os.cpu_count() or 1
+
+    schemes = [
+        ("bcrypt", build_password_context("bcrypt", bcrypt_rounds=args.bcrypt_rounds)),
+        ("argon2id", build_password_context(
+            "argon2", argon2_time_cost=args.argon2_time_cost, argon2_memory_kib=args.argon2_memory_kib
+        )),
+    ]
+    for name, context in schemes:
+        hashed = context.hash("correct horse")
+        print(f"\n🔐 {name}: {hashed[:30]}...")
+        single = verify_rate(context, hashed, args.seconds)
+        hasher = PasswordHasher(context, workers=cores, queue_size=args.burst * 4)
+        pooled = pool_rate(hasher, hashed, max(cores * 4, int(single * args.seconds)))
+        print(f"   verify, 1 thread              {single:8.1f} logins/s")
+        print(f"   verify, pool of {cores:<2} workers     {pooled:8.1f} logins/s   ({pooled / cores:.1f} per core)")
+
+        print(f"   burst of {args.burst} logins:")
+        burst("inline on request threads", lambda: context.verify("correct horse", hashed), args.burst)
+        burst(f"bounded pool ({cores} workers)", lambda: hasher.verify("correct horse", hashed), args.burst)
+        print(f"   pool stats: {hasher.stats()}")
+        hasher.shutdown()
+
+    print("\n♻️  Rehash on login when the stored cost differs")
+    old = build_password_context("bcrypt", bcrypt_rounds=max(4, args.bcrypt_rounds - 2)).hash("correct horse")
+    hasher = PasswordHasher(build_password_context("bcrypt", bcrypt_rounds=args.bcrypt_rounds), workers=1)
+    valid, new_hash = hasher.verify_and_update("correct horse", old)
+    print(f"   stored {old[:7]} -> valid={valid}, new hash {new_hash[:7] if new_hash else None}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Plate Lookup Benchmark
+Runs the vehicle plate lookup against the local registry stub:
+- per-call latency of requests.get (new connection) vs the pooled session,
+- N clerks looking up the same new plate at once (single-flight),
+- repeated lookups of an unknown plate (negative cache),
+- registry down: time to fail once the circuit breaker is open.
+
+Usage:
+    python -m scripts.benchmarks.bench_plate_lookup
+    python -m scripts.benchmarks.bench_plate_lookup --concurrency 50 --registry-delay 0.3
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+import tempfile
+
+# O serviço usa o SessionLocal da aplicação: apontá-lo para uma BD temporária
+# antes de importar a app. Poucas tentativas para o cenário de falha ser rápido.
+BENCH_DB = Path(tempfile.gettempdir()) / "mecatec_bench_plate_lookup.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+os.environ.setdefault("EXTERNAL_API_RETRIES", "1")
+os.environ.setdefault("EXTERNAL_API_BACKOFF", "0.05")
+
+import requests
+
+from scripts.benchmarks.common import make_session_factory, measure
+from scripts.benchmarks.plate_registry_stub import PlateRegistryStub
+from app.database import SessionLocal
+from app.models.vehicleApi import VehicleApi
+from app.services.plate_lookup import (
+    HttpRegistryUpstream,
+    PlateLookupService,
+    PlateLookupError,
+    plate_lookup_client,
+)
+
+
+def concurrent_lookups(plate: str, concurrency: int):
+    barrier = threading.Barrier(concurrency)
+    results, errors = [], []
+
+    def lookup():
+        barrier.wait()
+        db = SessionLocal()
+        try:
+            results.append(PlateLookupService(db).get_by_plate(plate).id)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=lookup) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, results, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da consulta de matrículas")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--registry-delay", type=float, default=0.2, help="Latência simulada do registo (s)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(str(BENCH_DB), fresh=True)
+
+    with PlateRegistryStub() as stub:
+        upstream = HttpRegistryUpstream(base_url=stub.url, username="bench")
+        plate_lookup_client.set_upstream(upstream)
+
+        print("\n🔌 Registry call latency (no simulated delay)")
+        connections = stub.connections
+        measure("requests.get (new connection)", lambda: requests.get(stub.url, params={"RegistrationNumber": "AA-00-AA"}, timeout=5), repeat=args.repeat)
+        print(f"   connections opened: {stub.connections - connections}")
+        connections = stub.connections
+        measure("pooled session", lambda: upstream("AA-00-AA"), repeat=args.repeat)
+        print(f"   connections opened: {stub.connections - connections}")
+
+        stub.delay = args.registry_delay
+        print(f"\n👥 {args.concurrency} concurrent lookups of the same new plate (registry delay {args.registry_delay * 1000:.0f} ms)")
+        requests_before = stub.requests
+        elapsed, results, errors = concurrent_lookups("12-AB-34", args.concurrency)
+        db = session_factory()
+        try:
+            rows = db.query(VehicleApi).filter(VehicleApi.plate == "12-AB-34").count()
+        finally:
+            db.close()
+        print(f"   {elapsed:.2f}s, registry calls: {stub.requests - requests_before}, coalesced: {plate_lookup_client.coalesced}, "
+              f"rows stored: {rows}, distinct ids returned: {len(set(results))}, errors: {len(errors)}")
+
+        print("\n🚫 Unknown plate looked up repeatedly")
+        requests_before = stub.requests
+        for _ in range(args.repeat):
+            db = SessionLocal()
+            try:
+                PlateLookupService(db).get_by_plate("XX-99-XX")
+            except PlateLookupError:
+                pass
+            finally:
+                db.close()
+        print(f"   {args.repeat} lookups, registry calls: {stub.requests - requests_before}, negative cache hits: {plate_lookup_client.negative_hits}")
+
+        print("\n⚡ Registry down (HTTP 503)")
+        stub.fail = True
+        stub.delay = 0
+        for index in range(args.repeat):
+            db = SessionLocal()
+            start = time.perf_counter()
+            try:
+                PlateLookupService(db).get_by_plate(f"99-ZZ-{index:02d}")
+            except PlateLookupError as e:
+                outcome = type(e).__name__
+            finally:
+                db.close()
+            if index in (0, args.repeat - 1):
+                print(f"   lookup {index + 1:>3}: {(time.perf_counter() - start) * 1000:8.2f} ms  {outcome}  (breaker {plate_lookup_client.breaker.state})")
+
+        plate_lookup_client.set_upstream(None)
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
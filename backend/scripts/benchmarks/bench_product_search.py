@@ -0,0 +1,117 @@
+"""
+Product Search Benchmark
+First page (20 rows) of the parts picker for each keystroke of a few typical
+searches over a large catalogue:
+- legacy: name/part_number ILIKE '%x%' (full scan of products, ordered by id),
+- index: get_products_page(search=...) over the FTS5 prefix and trigram
+  tables (app.crud.product_search), ranked by relevance (the first key
+  stays on the scan).
+Also times the full rebuild of the index, the incremental refresh done by
+ProductRepository.update, and shows what each finds for accent-free input
+("travao" -> "Travão"), which the LIKE scan misses.
+
+Usage:
+    python -m scripts.benchmarks.bench_product_search
+    python -m scripts.benchmarks.bench_product_search --products 300000
+"""
+
+import argparse
+import random
+import time
+
+from scripts.benchmarks.common import make_session_factory, bulk_insert, default_db_path, measure
+from app.models.product import Product
+from app.crud.product import get_products_page
+from app.crud.product_search import product_search
+
+NAMES = [
+    ("Pastilhas de Travão", "Travagem", "PT"), ("Discos de Travão", "Travagem", "DC"),
+    ("Óleo Motor", "Lubrificantes", "OL"), ("Filtro de Óleo", "Filtros", "FL"), ("Filtro de Ar", "Filtros", "FA"),
+    ("Correia de Distribuição", "Motor", "CD"), ("Bomba de Água", "Refrigeração", "BA"),
+    ("Amortecedor", "Suspensão", "AM"), ("Vela de Ignição", "Ignição", "VL"), ("Bateria", "Elétrico", "BT"),
+    ("Embraiagem Completa", "Transmissão", "EB"), ("Junta da Cabeça", "Motor", "JC"),
+]
+QUALIFIERS = ["Dianteiras", "Traseiras", "5W30", "10W40", "Reforçada", "Cerâmica", "Longa Duração", "1L", "5L", "Kit"]
+BRANDS = ["Bosch", "Brembo", "Mann", "Castrol", "Valeo", "Febi", "Continental", "NGK", "Varta", "Sachs"]
+SEARCHES = ["travao", "past trav", "5w30", "OL-10", "w40", "distribuicao", "bosch amort", "000123"]
+
+
+def seed(engine, session_factory, products: int):
+    db = session_factory()
+    try:
+        if db.query(Product.id).count() >= products:
+            print(f"   Reusing existing database ({products} products)")
+            return
+    finally:
+        db.close()
+
+    print(f"   Seeding {products} products...")
+    rng = random.Random(3)
+
+    def rows():
+        for i in range(products):
+            name, category, prefix = rng.choice(NAMES)
+            qualifier = rng.choice(QUALIFIERS)
+            yield {"part_number": f"{prefix}-{qualifier.upper().replace(' ', '')[:4]}-{i:06d}",
+                   "name": f"{name} {qualifier}", "category": category, "brand": rng.choice(BRANDS),
+                   "quantity": rng.randint(0, 40), "cost_value": 10.0, "sale_value": 15.0, "minimum_stock": 5}
+
+    bulk_insert(engine, Product.__table__, rows())
+
+
+def legacy_search(db, search: str, limit: int = 20):
+    """Replica da versão anterior."""
+    pattern = f"%{search}%"
+    return (
+        db.query(Product)
+        .filter(Product.deleted_at.is_(None), Product.name.ilike(pattern) | Product.part_number.ilike(pattern))
+        .order_by(Product.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--db", default=default_db_path("bench_product_search.db"))
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(args.db)
+    seed(engine, session_factory, args.products)
+    db = session_factory()
+    try:
+        print(f"\n🗂️  Index ({args.products} SKUs)")
+        started = time.perf_counter()
+        indexed = product_search(db).rebuild()
+        print(f"   full rebuild: {indexed} products in {time.perf_counter() - started:.2f}s")
+        product_id = db.query(Product.id).filter(Product.part_number.like("BA-%")).first().id
+
+        def refresh():
+            product_search(db).refresh([product_id])
+            db.commit()
+        measure("incremental refresh (one product)", refresh, repeat=20)
+
+        for search in SEARCHES:
+            print(f"\n🔎 '{search}' typed one key at a time (first page of 20)")
+            typed = [search[:n] for n in range(1, len(search) + 1)]
+            legacy_ms, index_ms = [], []
+            for text in typed:
+                started = time.perf_counter()
+                legacy_search(db, text)
+                legacy_ms.append((time.perf_counter() - started) * 1000)
+                started = time.perf_counter()
+                get_products_page(db, limit=20, search=text)
+                index_ms.append((time.perf_counter() - started) * 1000)
+            old, new = legacy_search(db, search, 3), get_products_page(db, limit=3, search=search).items
+            print(f"   legacy LIKE  total {sum(legacy_ms):8.1f} ms  max/key {max(legacy_ms):7.1f} ms  "
+                  f"top: {[p.name for p in old]}")
+            print(f"   search index total {sum(index_ms):8.1f} ms  max/key {max(index_ms):7.1f} ms  "
+                  f"top: {[p.name for p in new]}")
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
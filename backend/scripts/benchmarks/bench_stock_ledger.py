@@ -0,0 +1,126 @@
+"""
+Stock Ledger Benchmark
+Point-in-time inventory over a long stock_movements history:
+- full replay: SUM(delta) of every movement before the date (what the ledger
+  costs without checkpoints) vs the nearest daily snapshot plus at most one
+  day of movements (StockLedgerRepository.valuation_at / levels_at),
+- parts consumed by service orders in one month (index on ts),
+- taking one daily checkpoint (previous snapshot + one day of replay).
+Checks that both ways give the same quantities. The checkpoint query stays flat
+as the history grows; the full replay grows with it.
+
+Usage:
+    python -m scripts.benchmarks.bench_stock_ledger
+    python -m scripts.benchmarks.bench_stock_ledger --products 5000 --days 730 --movements-per-day 4000
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from scripts.benchmarks.common import make_session_factory, bulk_insert, default_db_path, measure
+from app.models.product import Product
+from app.models.stock_movement import StockMovement, OPENING, ORDER_PART, EXTRA_APPROVED, PART_RETURNED, ADJUSTMENT
+from app.models.stock_snapshot import StockSnapshot
+from app.crud.stock_ledger import StockLedgerRepository
+
+START = datetime(2023, 1, 1)
+
+
+def seed(engine, session_factory, products: int, days: int, per_day: int):
+    db = session_factory()
+    try:
+        if db.query(StockMovement.id).count() >= products + days * per_day:
+            print(f"   Reusing existing database ({products} products, {days} days of movements)")
+            return
+    finally:
+        db.close()
+
+    print(f"   Seeding {products} products, {days * per_day} movements over {days} days...")
+    rng = random.Random(5)
+    costs = [round(rng.uniform(1, 200), 2) for _ in range(products)]
+    bulk_insert(engine, Product.__table__, (
+        {"part_number": f"PN-{i:06d}", "name": f"Peça {i}", "category": "Geral", "quantity": 0,
+         "cost_value": costs[i], "sale_value": costs[i] * 1.5, "minimum_stock": 5}
+        for i in range(products)
+    ))
+    reasons = [ORDER_PART] * 6 + [EXTRA_APPROVED] * 2 + [PART_RETURNED, ADJUSTMENT]
+
+    def movements():
+        for i in range(products):
+            yield {"product_id": i + 1, "ts": START, "delta": 500, "unit_cost": costs[i], "reason": OPENING}
+        for day in range(days):
+            for n in range(per_day):
+                reason = rng.choice(reasons)
+                delta = rng.randint(1, 4) * (1 if reason in (PART_RETURNED, ADJUSTMENT) else -1)
+                yield {"product_id": rng.randint(1, products), "delta": delta, "unit_cost": None, "reason": reason,
+                       "ts": START + timedelta(days=day, seconds=n * 86400 // per_day)}
+
+    bulk_insert(engine, StockMovement.__table__, (
+        dict(row, unit_cost=row["unit_cost"] or costs[row["product_id"] - 1]) for row in movements()
+    ))
+
+
+def full_replay(db, at: datetime):
+    """Sem checkpoints: todos os movimentos anteriores a `at`."""
+    return dict(
+        db.query(StockMovement.product_id, func.sum(StockMovement.delta))
+        .filter(StockMovement.ts < at)
+        .group_by(StockMovement.product_id)
+        .all()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--movements-per-day", type=int, default=3000)
+    parser.add_argument("--db", default=default_db_path("bench_stock_ledger.db"))
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(args.db)
+    seed(engine, session_factory, args.products, args.days, args.movements_per_day)
+    db = session_factory()
+    ledger = StockLedgerRepository(db)
+    try:
+        print("\n🗓️  Daily checkpoints")
+        existing = {row[0] for row in db.query(StockSnapshot.taken_at).distinct()}
+        day = START + timedelta(days=1)
+        last = START + timedelta(days=args.days)
+        created = 0
+        while day <= last:
+            if day not in existing:
+                ledger.checkpoint(day)
+                created += 1
+            day += timedelta(days=1)
+        print(f"   {created} checkpoints taken ({len(existing)} already present)")
+        measure("one checkpoint (snapshot + 1 day)", lambda: (
+            db.query(StockSnapshot).filter(StockSnapshot.taken_at == last).delete(),
+            db.commit(),
+            ledger.checkpoint(last),
+        ), repeat=3)
+
+        total = db.query(func.count(StockMovement.id)).scalar()
+        at = START + timedelta(days=args.days - 1, hours=15)
+        print(f"\n📦 Stock on {at:%Y-%m-%d %H:%M} ({total} movements in the ledger)")
+        old = measure("full replay of the history", lambda: full_replay(db, at))
+        new = measure("snapshot + replay (levels_at, all)", lambda: ledger.levels_at(at, limit=args.products))
+        # levels_at omite produtos com quantidade 0
+        same = {k: v for k, v in old.items() if v} == {row["product_id"]: row["quantity"] for row in new}
+        print(f"   same quantities: {same}")
+        measure("snapshot + replay (valuation_at)", lambda: ledger.valuation_at(at))
+        measure("snapshot + replay (one product)", lambda: ledger.levels_at(at, product_id=1))
+
+        print("\n🔧 Parts consumed in one month")
+        month = START + timedelta(days=args.days // 2)
+        measure("consumed(month), top 100", lambda: ledger.consumed(month, month + timedelta(days=30)))
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
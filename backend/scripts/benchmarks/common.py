@@ -0,0 +1,62 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Each benchmark runs against its own SQLite file (never the configured
+DATABASE_URL) so it can be seeded with large synthetic volumes safely.
+"""
+
+import sys
+import time
+import tempfile
+import statistics
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+import app.models  # noqa: F401 - regista todos os modelos no metadata
+
+
+def default_db_path(filename: str) -> str:
+    """Default location for benchmark databases (outside the repository)."""
+    return str(Path(tempfile.gettempdir()) / f"mecatec_{filename}")
+
+
+def make_session_factory(db_path: str, fresh: bool = False):
+    """Create (and optionally reset) a benchmark SQLite database."""
+    path = Path(db_path)
+    if fresh and path.exists():
+        path.unlink()
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def bulk_insert(engine, table, rows, chunk_size: int = 50_000):
+    """Insert an iterable of dicts in executemany chunks."""
+    batch = []
+    with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                conn.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(table.insert(), batch)
+
+
+def measure(label: str, fn, repeat: int = 5):
+    """Run fn `repeat` times and print min/median wall time in ms."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"   {label:<40} min={min(timings):9.2f} ms   median={statistics.median(timings):9.2f} ms")
+    return result
@@ -0,0 +1,190 @@
+"""
+Database Pool Load Test
+Starts the API with uvicorn (one worker, like each worker in production)
+on a seeded SQLite database and fires authenticated requests from many
+concurrent clients at an endpoint that uses both the route session and
+get_current_user_optional. Prints throughput and p50/p95/p99 latency and,
+when the server exposes it, the pool occupancy and checkout wait time
+(GET /health/db-pool).
+
+Small pools make connection contention visible: before the single session
+provider every authenticated request held two connections.
+
+Usage:
+    python -m scripts.benchmarks.load_db_pool
+    python -m scripts.benchmarks.load_db_pool --concurrency 64 --requests 4000 --pool-size 5 --max-overflow 0
+"""
+
+import os
+import sys
+import time
+import json
+import socket
+import argparse
+import statistics
+import subprocess
+import threading
+from pathlib import Path
+import tempfile
+
+import requests
+
+backend_root = Path(__file__).parent.parent.parent
+BENCH_DB = Path(tempfile.gettempdir()) / "mecatec_load_db_pool.db"
+ENDPOINT = "/api/v1/metrics/daily"
+
+PREPARE_SNIPPET = """
+from app.core.startup import init_database
+from app.core.security import create_user_token
+from app.database import SessionLocal
+from app.models.user import User
+init_database()
+db = SessionLocal()
+print("TOKEN " + create_user_token(db, db.query(User).order_by(User.id).first()))
+db.close()
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, timeout: float = 120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url + "/ping", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API did not start")
+
+
+def run_load(url: str, token: str, concurrency: int, total: int, paths=(ENDPOINT,)):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    remaining = [total]
+    paths = list(paths)
+
+    def client():
+        session = requests.Session()
+        headers = {"Authorization": f"Bearer {token}"}
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+                path = paths[remaining[0] % len(paths)]
+            start = time.perf_counter()
+            try:
+                response = session.get(url + path, headers=headers, timeout=60)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                (latencies if ok else errors).append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, errors
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_env(**overrides) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{BENCH_DB}",
+        "SCHEDULER_ENABLED": "false",
+        "EMAIL_WORKER_POOL_SIZE": "0",
+    })
+    for key, value in {
+        "SECRET_KEY": "bench-secret",
+        "INITIAL_ADMIN_PASSWORD": "bench-admin",
+        "DEFAULT_CUSTOMER_PASSWORD": "bench-pass",
+        "DEFAULT_EMPLOYEE_PASSWORD": "bench-pass",
+    }.items():
+        env.setdefault(key, value)
+    env.update({key: str(value) for key, value in overrides.items()})
+    return env
+
+
+def prepare_database(env: dict, reuse: bool = False) -> str:
+    """Schema + seeds na BD de teste; devolve um token do primeiro utilizador."""
+    if not reuse and BENCH_DB.exists():
+        BENCH_DB.unlink()
+    print("\n🌱 Preparing database (schema + seeds)...")
+    prepared = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PREPARE_SNIPPET],
+        cwd=backend_root, env=env, capture_output=True, text=True, timeout=600,
+    )
+    if prepared.returncode != 0:
+        raise RuntimeError(prepared.stderr[-2000:])
+    return [line for line in prepared.stdout.splitlines() if line.startswith("TOKEN ")][-1].split()[1]
+
+
+def start_server(env: dict):
+    """uvicorn com um worker; devolve (processo, url) já a responder."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(url)
+    except Exception:
+        server.kill()
+        raise
+    return server, url
+
+
+def print_latencies(elapsed: float, latencies, errors):
+    ms = [value * 1000 for value in latencies]
+    print(f"   throughput {len(latencies) / elapsed:8.1f} req/s   errors {len(errors)}")
+    if ms:
+        print(f"   latency    p50={statistics.median(ms):8.1f} ms   p95={percentile(ms, 0.95):8.1f} ms   "
+              f"p99={percentile(ms, 0.99):8.1f} ms   max={max(ms):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do pool de ligações")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--reuse-db", action="store_true", help="Não recriar a BD de teste")
+    args = parser.parse_args()
+
+    env = bench_env(DB_POOL_SIZE=args.pool_size, DB_MAX_OVERFLOW=args.max_overflow)
+    token = prepare_database(env, reuse=args.reuse_db)
+
+    server, url = start_server(env)
+    try:
+        run_load(url, token, min(args.concurrency, 8), 100)  # aquecimento
+
+        print(f"\n🔥 {args.requests} x GET {ENDPOINT} ({args.concurrency} clients, "
+              f"pool_size={args.pool_size}, max_overflow={args.max_overflow}, {os.cpu_count()} CPUs)")
+        print_latencies(*run_load(url, token, args.concurrency, args.requests))
+
+        response = requests.get(url + "/health/db-pool", timeout=5)
+        if response.ok:
+            print(f"   pool       {json.dumps(response.json())}")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
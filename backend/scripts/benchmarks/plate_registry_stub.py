@@ -0,0 +1,130 @@
+"""
+Minimal local stub of the external vehicle registry (plate lookup).
+
+Answers GET ?username=...&RegistrationNumber=<plate> with the XML shape
+parsed by app.utils.vehicle_parsers. Plates starting with "XX" are unknown
+(empty vehicle data). Can delay each answer or fail with HTTP 503, and
+counts requests and TCP connections (to see keep-alive at work).
+
+Usage (standalone):
+    python -m scripts.benchmarks.plate_registry_stub --port 8090 --delay 0.2
+    BASE_URL=http://127.0.0.1:8090/ uvicorn app.main:app
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+
+def vehicle_xml(plate: str) -> str:
+    if plate.upper().startswith("XX"):
+        vehicle = {}
+    else:
+        vehicle = {
+            "ABICode": f"ABI{abs(hash(plate)) % 100000:05d}",
+            "Description": f"Stub vehicle {plate}",
+            "CarMake": {"CurrentTextValue": "Renault"},
+            "CarModel": {"CurrentTextValue": "Clio"},
+            "EngineSize": {"CurrentTextValue": "1461"},
+            "FuelType": {"CurrentTextValue": "Diesel"},
+            "NumberOfSeats": {"CurrentTextValue": "5"},
+            "Colour": "Cinzento",
+            "RegistrationDate": "15/03/2018",
+        }
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<Vehicle xmlns="http://regcheck.org.uk">'
+        f"<vehicleJson>{escape(json.dumps(vehicle))}</vehicleJson>"
+        "<vehicleData></vehicleData>"
+        "</Vehicle>"
+    )
+
+
+class _RegistryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        # Cabeçalhos e corpo são escritos em separado: sem isto o keep-alive sofre o atraso do Nagle/ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.delay:
+            time.sleep(server.delay)
+
+        if server.fail:
+            body = b"registry unavailable"
+            self.send_response(503)
+        else:
+            plate = parse_qs(urlparse(self.path).query).get("RegistrationNumber", [""])[0]
+            body = vehicle_xml(plate).encode("utf-8")
+            self.send_response(200)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PlateRegistryStub(ThreadingHTTPServer):
+    """Threaded registry stub; use .start()/.stop() or as a context manager."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        super().__init__((host, port), _RegistryHandler)
+        self.delay = delay
+        self.fail = False
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local vehicle registry stub")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait per request")
+    args = parser.parse_args()
+
+    stub = PlateRegistryStub(port=args.port, delay=args.delay)
+    print(f"Registry stub listening on {stub.url} (delay={args.delay}s). Ctrl+C to stop.")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        stub.server_close()
@@ -0,0 +1,101 @@
+"""
+Minimal local SMTP stub (aiosmtpd-style) for the email benchmarks.
+
+Speaks just enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+for smtplib, without STARTTLS/AUTH, and can delay each message to
+simulate a slow mail server. Counts connections and messages received.
+
+Usage (standalone):
+    python -m scripts.benchmarks.smtp_stub --port 8025 --delay 0.2
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self._reply("220 mecatec-smtp-stub ready")
+        in_data = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line.rstrip(b"\r\n") == b".":
+                    in_data = False
+                    if server.delay:
+                        time.sleep(server.delay)
+                    with server.lock:
+                        server.messages += 1
+                    self._reply("250 OK: queued")
+                continue
+
+            command = line.decode("utf-8", "replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self._reply("250 mecatec-smtp-stub")
+            elif command.startswith("DATA"):
+                in_data = True
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command.startswith("QUIT"):
+                self._reply("221 Bye")
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP...
+                self._reply("250 OK")
+
+    def _reply(self, text: str):
+        self.wfile.write(f"{text}\r\n".encode())
+        self.wfile.flush()
+
+
+class SmtpStub(socketserver.ThreadingTCPServer):
+    """Threaded SMTP stub; use .start()/.stop() or as a context manager."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        super().__init__((host, port), _SmtpHandler)
+        self.delay = delay
+        self.connections = 0
+        self.messages = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP stub")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait per message")
+    args = parser.parse_args()
+
+    stub = SmtpStub(port=args.port, delay=args.delay)
+    print(f"SMTP stub listening on 127.0.0.1:{stub.port} (delay={args.delay}s). Ctrl+C to stop.")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        stub.server_close()
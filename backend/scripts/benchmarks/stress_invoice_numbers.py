@@ -0,0 +1,145 @@
+"""
+Invoice Number Concurrency Check
+Fires N checkout.session.completed webhooks in parallel threads (ingest +
+background processing, as the API does) and checks that every invoice got
+a distinct number from the invoice_sequences allocator. The check runs on
+SQLite, where --block-size > 1 falls back to 1 (app.services.invoice_numbers):
+block reservation only applies to SQL Server/PostgreSQL.
+
+Usage:
+    python -m scripts.benchmarks.stress_invoice_numbers
+    python -m scripts.benchmarks.stress_invoice_numbers --webhooks 50 --block-size 10
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+import tempfile
+
+# O processamento usa o SessionLocal da aplicação: apontá-lo para uma BD
+# temporária antes de importar a app.
+BENCH_DB = Path(tempfile.gettempdir()) / "mecatec_stress_invoice_numbers.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+from scripts.benchmarks.common import make_session_factory
+from app.database import SessionLocal
+from app.models.appointment import Appointment
+from app.models.customer import Customer
+from app.models.service import Service
+from app.models.status import Status
+from app.models.invoice import Invoice
+from app.models.stripe_webhook_event import StripeWebhookEvent, STRIPE_EVENT_PROCESSED
+from app.services.stripe_webhook_service import StripeWebhookService
+from app.services.invoice_numbers import invoice_number_allocator
+
+
+def seed(session_factory, count: int):
+    db = session_factory()
+    try:
+        for name in ["Pendente", "Concluído", "Aguardando Pagamento"]:
+            db.add(Status(name=name))
+        service = Service(name="Revisão", price=100.0, labor_cost=80.0, duration_minutes=60, area="Mecânica")
+        customer = Customer(name="Cliente Teste")
+        db.add_all([service, customer])
+        db.flush()
+        appointments = [
+            Appointment(
+                appointment_date=datetime.now() - timedelta(days=i % 30),
+                customer_id=customer.id,
+                service_id=service.id,
+            )
+            for i in range(count)
+        ]
+        db.add_all(appointments)
+        db.commit()
+        return [appointment.id for appointment in appointments]
+    finally:
+        db.close()
+
+
+def webhook_payload(index: int, appointment_id: int) -> bytes:
+    return json.dumps({
+        "id": f"evt_stress_{index}",
+        "type": "checkout.session.completed",
+        "data": {"object": {
+            "id": f"cs_stress_{index}",
+            "payment_intent": f"pi_stress_{index}",
+            "metadata": {"appointment_id": str(appointment_id)},
+        }},
+    }).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concorrência na numeração das faturas")
+    parser.add_argument("--webhooks", type=int, default=50)
+    parser.add_argument("--block-size", type=int, default=1, help="INVOICE_NUMBER_BLOCK_SIZE a usar")
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(str(BENCH_DB), fresh=True)
+    appointment_ids = seed(session_factory, args.webhooks)
+    invoice_number_allocator._block_size = args.block_size
+    invoice_number_allocator.reset()
+
+    barrier = threading.Barrier(args.webhooks)
+    errors = []
+
+    def deliver(index: int, appointment_id: int):
+        barrier.wait()  # todos os webhooks chegam ao mesmo tempo
+        db = SessionLocal()
+        try:
+            service = StripeWebhookService(db)
+            db_event, _ = service.ingest(webhook_payload(index, appointment_id))
+            service.process_event(db_event.event_id)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [
+        threading.Thread(target=deliver, args=(index, appointment_id))
+        for index, appointment_id in enumerate(appointment_ids)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    db = session_factory()
+    try:
+        numbers = [number for (number,) in db.query(Invoice.invoice_number).all()]
+        processed = db.query(StripeWebhookEvent).filter(StripeWebhookEvent.status == STRIPE_EVENT_PROCESSED).count()
+        failures = [
+            (event.event_id, event.last_error)
+            for event in db.query(StripeWebhookEvent).filter(StripeWebhookEvent.status != STRIPE_EVENT_PROCESSED)
+        ]
+    finally:
+        db.close()
+    engine.dispose()
+
+    print(f"\n🧾 {args.webhooks} parallel webhooks (block size {args.block_size}) in {elapsed:.2f}s")
+    print(f"   events processed: {processed}, invoices: {len(numbers)}, distinct numbers: {len(set(numbers))}")
+    print(f"   numbers: {min(numbers, default='-')} .. {max(numbers, default='-')}")
+    for event_id, error in failures:
+        print(f"   ⚠️  {event_id}: {error}")
+    for error in errors:
+        print(f"   ⚠️  {error}")
+
+    ok = (
+        not errors
+        and processed == args.webhooks
+        and len(numbers) == args.webhooks
+        and len(set(numbers)) == len(numbers)
+    )
+    print("   ✅ all invoice numbers unique" if ok else "   ❌ duplicate or missing invoice numbers")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Stock Reservation Concurrency Check
+Fires parallel AppointmentRepository.add_part calls (one session per thread,
+as concurrent requests) against a few products with little stock, some on
+the base service and some on pending extra services (holds), then approves
+or rejects those extras in parallel. Checks afterwards that:
+- no product went negative and holds never exceed the stock,
+- stock consumed = parts of the base services + approved extras,
+- reserve_quantity = parts of extras still pending (none left),
+- every failed call was a clean INSUFFICIENT_STOCK,
+- the low-stock alerts were sent in background, one per product.
+
+--legacy runs the previous read-check-decrement in Python for comparison
+(lost updates: more parts handed out than there was stock).
+
+Usage:
+    python -m scripts.benchmarks.stress_stock
+    python -m scripts.benchmarks.stress_stock --threads 32 --calls 400 --stock 50
+    python -m scripts.benchmarks.stress_stock --legacy
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+import tempfile
+
+# add_part e os alertas usam o SessionLocal da aplicação: apontá-lo para uma
+# BD temporária antes de importar a app.
+BENCH_DB = Path(tempfile.gettempdir()) / "mecatec_stress_stock.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+from sqlalchemy import func
+
+from scripts.benchmarks.common import make_session_factory
+from app.database import SessionLocal
+from app.models.appointment import Appointment
+from app.models.appointment_extra_service import AppointmentExtraService
+from app.models.customer import Customer
+from app.models.employee import Employee
+from app.models.notificationBadge import Notification
+from app.models.order_part import OrderPart
+from app.models.product import Product
+from app.models.role import Role
+from app.models.service import Service
+from app.models.status import Status
+from app.models.user import User
+from app.crud.appointment import AppointmentRepository
+from app.crud.stock import InsufficientStockError
+from app.services.stock_alerts import stock_alerts
+
+
+def seed(session_factory, products: int, stock: int, appointments: int):
+    db = session_factory()
+    try:
+        for name in ["Pendente", "Em Reparação", "Concluído"]:
+            db.add(Status(name=name))
+        role = Role(name="Admin")
+        service = Service(name="Revisão", price=100.0, labor_cost=80.0, duration_minutes=60, area="Mecânica")
+        customer = Customer(name="Cliente Teste")
+        db.add_all([role, service, customer])
+        db.flush()
+        # Destinatário dos alertas de stock baixo
+        db.add(Employee(name="Gestor", last_name="Stock", email="gestor@stress.local", phone="0", address="-",
+                        date_of_birth=datetime(1980, 1, 1), role_id=role.id, is_manager=True, salary=0,
+                        hired_at=datetime(2020, 1, 1)))
+        db.add(User(name="Gestor", email="gestor@stress.local", password_hash="-", role="manager"))
+        db.add_all([
+            Product(part_number=f"STRESS-{i}", name=f"Peça {i}", category="Geral", quantity=stock,
+                    reserve_quantity=0, cost_value=5.0, sale_value=10.0, minimum_stock=stock // 5)
+            for i in range(products)
+        ])
+        rows = [
+            Appointment(appointment_date=datetime.now(), customer_id=customer.id, service_id=service.id)
+            for _ in range(appointments)
+        ]
+        db.add_all(rows)
+        db.flush()
+        extras = [
+            AppointmentExtraService(appointment_id=appointment.id, name="Extra", price=20.0, status="pending")
+            for appointment in rows
+        ]
+        db.add_all(extras)
+        db.commit()
+        return (
+            [product.id for product in db.query(Product.id)],
+            [(appointment.id, extra.id) for appointment, extra in zip(rows, extras)],
+        )
+    finally:
+        db.close()
+
+
+def legacy_add_part(db, appointment_id: int, product_id: int, quantity: int, extra_service_id=None):
+    """Replica da versão anterior: lê, verifica e decrementa em Python."""
+    product = db.query(Product).filter(Product.id == product_id).first()
+    if product.quantity < quantity:
+        raise InsufficientStockError(product.quantity)
+    product.quantity -= quantity
+    db.add(OrderPart(appointment_id=appointment_id, product_id=product_id, extra_service_id=extra_service_id,
+                     name=product.name, part_number=product.part_number, quantity=quantity, price=product.sale_value))
+    db.commit()
+
+
+def run_parallel(threads: int, jobs, work):
+    """Executa work(job) para todos os jobs em `threads` threads que arrancam ao mesmo tempo."""
+    barrier = threading.Barrier(threads)
+    lock = threading.Lock()
+    results = Counter()
+    errors = []
+    queue = list(jobs)
+
+    def worker():
+        barrier.wait()
+        while True:
+            with lock:
+                if not queue:
+                    return
+                job = queue.pop()
+            db = SessionLocal()
+            try:
+                work(db, job)
+                outcome = "ok"
+            except InsufficientStockError:
+                db.rollback()
+                outcome = "insufficient"
+            except Exception as e:
+                db.rollback()
+                outcome = "error"
+                errors.append(repr(e))
+            finally:
+                db.close()
+            with lock:
+                results[outcome] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return results, errors, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concorrência na saída e reserva de stock")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=300, help="Chamadas a add_part")
+    parser.add_argument("--products", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=40, help="Stock inicial de cada produto")
+    parser.add_argument("--legacy", action="store_true", help="Verificação e decremento em Python (versão anterior)")
+    args = parser.parse_args()
+
+    engine, session_factory = make_session_factory(str(BENCH_DB), fresh=True)
+    appointments = max(1, args.calls // 4)
+    product_ids, orders = seed(session_factory, args.products, args.stock, appointments)
+    rng = random.Random(11)
+
+    # Metade das peças no serviço base, metade em serviços extra pendentes (reserva)
+    jobs = []
+    for _ in range(args.calls):
+        appointment_id, extra_id = rng.choice(orders)
+        jobs.append((appointment_id, rng.choice(product_ids), rng.randint(1, 3), extra_id if rng.random() < 0.5 else None))
+
+    add_part = legacy_add_part if args.legacy else (
+        lambda db, *job: AppointmentRepository(db).add_part(*job)
+    )
+    results, errors, elapsed = run_parallel(args.threads, jobs, lambda db, job: add_part(db, *job))
+    print(f"\n📦 {args.calls} add_part calls on {args.threads} threads in {elapsed:.2f}s "
+          f"({'legacy read-check-write' if args.legacy else 'conditional UPDATE'})")
+    print(f"   ok: {results['ok']}, insufficient stock: {results['insufficient']}, other errors: {results['error']}")
+
+    decisions = [(extra_id, rng.random() < 0.6) for _, extra_id in orders]
+    if not args.legacy:
+        def decide(db, decision):
+            extra_id, approve = decision
+            repo = AppointmentRepository(db)
+            repo.approve_extra_service_request(extra_id) if approve else repo.reject_extra_service_request(extra_id)
+
+        decided, decide_errors, elapsed = run_parallel(args.threads, decisions, decide)
+        errors += decide_errors
+        print(f"   {len(decisions)} extra services approved/rejected in parallel in {elapsed:.2f}s "
+              f"(insufficient: {decided['insufficient']}, errors: {decided['error']})")
+        stock_alerts.drain(timeout=30)
+
+    db = session_factory()
+    try:
+        products = {p.id: p for p in db.query(Product).filter(Product.id.in_(product_ids))}
+        status = dict(db.query(AppointmentExtraService.id, AppointmentExtraService.status))
+        consumed, held = Counter(), Counter()
+        for product_id, extra_id, quantity in db.query(OrderPart.product_id, OrderPart.extra_service_id, OrderPart.quantity):
+            extra_status = status.get(extra_id) if extra_id else "base"
+            if args.legacy or extra_status in ("base", "approved"):
+                consumed[product_id] += quantity
+            elif extra_status == "pending":
+                held[product_id] += quantity
+        alerts = db.query(func.count(Notification.id)).filter(Notification.component == "Stock").scalar()
+    finally:
+        db.close()
+    engine.dispose()
+
+    ok = not errors and results["error"] == 0
+    for product_id, product in sorted(products.items()):
+        reserved = product.reserve_quantity or 0
+        valid = (
+            product.quantity >= 0
+            and 0 <= reserved <= product.quantity
+            and args.stock - product.quantity == consumed[product_id]
+            and reserved == held[product_id]
+        )
+        ok = ok and valid
+        print(f"   {product.part_number}: stock {args.stock} -> {product.quantity}, reserved {reserved}, "
+              f"parts consumed {consumed[product_id]}, held {held[product_id]} {'✅' if valid else '❌'}")
+    if not args.legacy:
+        low = sum(1 for product in products.values() if product.quantity <= product.minimum_stock)
+        print(f"   low-stock alerts (background): {alerts} for {low} products at/below minimum "
+              f"(checks run: {stock_alerts.stats()['checked']})")
+        ok = ok and alerts == low
+    for error in errors[:10]:
+        print(f"   ⚠️  {error}")
+
+    print("   ✅ stock invariants hold" if ok else "   ❌ stock invariants violated")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
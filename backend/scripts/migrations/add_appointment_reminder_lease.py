@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import text
+from app.database import engine
+
+
+def add_appointment_reminder_lease():
+    statements = [
+        # Lease do job de lembretes (claim em lote seguro entre processos)
+        "ALTER TABLE appointments ADD reminder_claim_token VARCHAR(32);",
+        "ALTER TABLE appointments ADD reminder_claimed_until DATETIME;",
+        "CREATE INDEX ix_appointments_reminder_claim_token ON appointments (reminder_claim_token);",
+    ]
+
+    with engine.begin() as conn:
+        for stmt in statements:
+            try:
+                conn.execute(text(stmt))
+                print(f"Executed: {stmt}")
+            except Exception as e:
+                # If column already exists or other issue, log and continue
+                print(f"Statement failed (possibly already applied): {stmt}\n  Error: {e}")
+
+
+if __name__ == "__main__":
+    add_appointment_reminder_lease()
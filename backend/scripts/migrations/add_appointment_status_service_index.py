@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import text
+from app.database import engine
+
+
+def add_appointment_status_service_index():
+    statements = [
+        # Index composto usado pelas agregações de métricas (status x serviço)
+        "CREATE INDEX ix_appointments_status_service ON appointments (status_id, service_id);",
+    ]
+
+    with engine.begin() as conn:
+        for stmt in statements:
+            try:
+                conn.execute(text(stmt))
+                print(f"Executed: {stmt}")
+            except Exception as e:
+                # If index already exists or other issue, log and continue
+                print(f"Statement failed (possibly already applied): {stmt}\n  Error: {e}")
+
+
+if __name__ == "__main__":
+    add_appointment_status_service_index()
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import text
+from app.database import engine
+
+
+def add_invoice_appointment_unique_index():
+    statements = [
+        # Uma fatura por appointment (create_invoice_from_session devolve a existente em caso de corrida).
+        # Falha se já houver appointments com mais de uma fatura: resolver esses duplicados primeiro.
+        "CREATE UNIQUE INDEX uq_invoices_appointment_id ON invoices (appointment_id);",
+    ]
+
+    with engine.begin() as conn:
+        duplicates = conn.execute(text(
+            "SELECT appointment_id, COUNT(*) FROM invoices GROUP BY appointment_id HAVING COUNT(*) > 1"
+        )).fetchall()
+        for appointment_id, count in duplicates:
+            print(f"Appointment {appointment_id} has {count} invoices")
+        for stmt in statements:
+            try:
+                conn.execute(text(stmt))
+                print(f"Executed: {stmt}")
+            except Exception as e:
+                # If index already exists or other issue, log and continue
+                print(f"Statement failed (possibly already applied): {stmt}\n  Error: {e}")
+
+
+if __name__ == "__main__":
+    add_invoice_appointment_unique_index()
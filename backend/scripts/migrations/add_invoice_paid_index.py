@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import text
+from app.database import engine
+
+
+def add_invoice_paid_index():
+    if engine.dialect.name == "mssql":
+        # Índice de cobertura: SUM(total) e appointments pagas por período sem ler a tabela
+        stmt = "CREATE INDEX ix_invoices_status_paid_at ON invoices (payment_status, paid_at) INCLUDE (total, appointment_id);"
+    else:
+        stmt = "CREATE INDEX ix_invoices_status_paid_at ON invoices (payment_status, paid_at);"
+    statements = [stmt]
+
+    with engine.begin() as conn:
+        for stmt in statements:
+            try:
+                conn.execute(text(stmt))
+                print(f"Executed: {stmt}")
+            except Exception as e:
+                # If index already exists or other issue, log and continue
+                print(f"Statement failed (possibly already applied): {stmt}\n  Error: {e}")
+
+
+if __name__ == "__main__":
+    add_invoice_paid_index()
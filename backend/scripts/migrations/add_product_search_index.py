@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+from app.models.product import PRODUCT_SEARCH_SQLITE_DDL
+from app.crud.product_search import product_search
+
+
+def add_product_search_index():
+    if engine.dialect.name == "mssql":
+        # Catálogo sem acentos ("travao" encontra "Travão"); CHANGE_TRACKING AUTO mantém o índice
+        # atualizado a cada escrita em products. KEY INDEX: a chave primária (nome gerado pelo SQL Server).
+        statements = [
+            "IF NOT EXISTS (SELECT 1 FROM sys.fulltext_catalogs WHERE name = 'products_catalog') "
+            "CREATE FULLTEXT CATALOG products_catalog WITH ACCENT_SENSITIVITY = OFF;",
+            "DECLARE @pk sysname = (SELECT name FROM sys.indexes WHERE object_id = OBJECT_ID('products') AND is_primary_key = 1); "
+            "EXEC('CREATE FULLTEXT INDEX ON products (part_number LANGUAGE 2070, name LANGUAGE 2070, "
+            "brand LANGUAGE 2070, category LANGUAGE 2070) KEY INDEX ' + @pk + "
+            "' ON products_catalog WITH CHANGE_TRACKING AUTO');",
+        ]
+    elif engine.dialect.name == "sqlite":
+        statements = list(PRODUCT_SEARCH_SQLITE_DDL)
+    else:
+        print(f"No product search index for {engine.dialect.name}: search keeps the LIKE scan.")
+        return
+
+    # DDL full-text do SQL Server não pode correr dentro de uma transação
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for stmt in statements:
+            try:
+                conn.execute(text(stmt))
+                print(f"Executed: {stmt}")
+            except Exception as e:
+                # If index already exists or other issue, log and continue
+                print(f"Statement failed (possibly already applied): {stmt}\n  Error: {e}")
+
+    if engine.dialect.name == "sqlite":
+        # Produtos já existentes (em SQL Server a criação do índice faz a população inicial)
+        db = SessionLocal()
+        try:
+            print(f"Products indexed: {product_search(db).rebuild()}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    add_product_search_index()
@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import text
+from app.database import engine
+
+
+def add_token_version():
+    statements = [
+        # Versão dos tokens (revogação de JWT sem consultar o utilizador em cada pedido)
+        "ALTER TABLE users ADD token_version INTEGER NOT NULL DEFAULT 0;",
+        'ALTER TABLE "customersAuth" ADD token_version INTEGER NOT NULL DEFAULT 0;',
+    ]
+
+    with engine.begin() as conn:
+        for stmt in statements:
+            try:
+                conn.execute(text(stmt))
+                print(f"Executed: {stmt}")
+            except Exception as e:
+                # If column already exists or other issue, log and continue
+                print(f"Statement failed (possibly already applied): {stmt}\n  Error: {e}")
+
+
+if __name__ == "__main__":
+    add_token_version()
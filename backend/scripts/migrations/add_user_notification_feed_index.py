@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import text
+from app.database import engine
+
+
+def add_user_notification_feed_index():
+    statements = [
+        # Feed paginado por keyset (user_id, created_at, id)
+        "CREATE INDEX ix_user_notifications_feed ON user_notifications (user_id, created_at, id);",
+        # O mesmo índice filtrado às não lidas (SQL Server, SQLite e PostgreSQL suportam WHERE em CREATE INDEX)
+        "CREATE INDEX ix_user_notifications_unread_feed ON user_notifications (user_id, created_at, id) WHERE read_at IS NULL;",
+    ]
+
+    with engine.begin() as conn:
+        for stmt in statements:
+            try:
+                conn.execute(text(stmt))
+                print(f"Executed: {stmt}")
+            except Exception as e:
+                # If index already exists or other issue, log and continue
+                print(f"Statement failed (possibly already applied): {stmt}\n  Error: {e}")
+
+
+if __name__ == "__main__":
+    add_user_notification_feed_index()
@@ -15,9 +15,10 @@ from app.database import SessionLocal, engine, Base
 from app.crud.customer import CustomerRepository
 from app.crud.vehicle import VehicleRepository
 from app.crud.appointment import AppointmentRepository
+from app.crud.metrics_rollup import MetricsRollupRepository
 from app.crud.employee import EmployeeRepository
 from app.crud.service import ServiceRepository
-from app.crud.user import pwd_context
+from app.crud.invoice_lines import InvoiceLineRepository, parse_line_items
 from app.core.security import get_password_hash
 from app.schemas.customer import CustomerCreate
 from app.schemas.vehicle import VehicleCreate
@@ -179,6 +180,7 @@ def create_invoice_for_appointment(db: Session, appointment: Appointment, invoic
     
     db.add(invoice)
     db.flush()
+    InvoiceLineRepository(db).add(invoice.id, parse_line_items(invoice.line_items))
     
     print(f"     ✅ Invoice object created: {invoice_number}")
     
@@ -261,7 +263,7 @@ def seed_data(db: Session):
         if existing_user:
             continue
             
-        hashed_password = pwd_context.hash("123")
+        hashed_password = get_password_hash("123")
         user = User(
             name=u["name"],
             email=u["email"],
@@ -601,6 +603,8 @@ if __name__ == "__main__":
         seed_absence_types(db)
         seed_absence_statuses(db)
         seed_data(db)
+        # Rollup de métricas: as appointments foram criadas como Pendente e o status mudado depois
+        MetricsRollupRepository(db).rebuild()
         print("Seeding products...")
         try:
             seed_products()
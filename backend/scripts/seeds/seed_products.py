@@ -7,6 +7,8 @@ sys.path.insert(0, str(backend_root))
 
 from app.database import SessionLocal
 from app.models.product import Product
+from app.crud.stock_ledger import StockLedgerRepository
+from app.crud.product_search import product_search
 from datetime import datetime
 
 
@@ -159,6 +161,10 @@ def seed_products():
             db.add(p)
             created += 1
         db.commit()
+        # Saldo inicial no ledger de stock dos produtos criados
+        StockLedgerRepository(db).open_balances()
+        # Índice de pesquisa (os produtos foram inseridos sem passar pelo repositório)
+        product_search(db).rebuild()
         print(f"Seed complete. Created {created} products.")
     except Exception as e:
         db.rollback()
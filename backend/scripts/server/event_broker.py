@@ -0,0 +1,63 @@
+"""
+Notification Event Broker (local stand-in)
+Minimal pub/sub relay for the notification push channel when the API runs
+with several uvicorn workers: every newline-delimited JSON message received
+from one worker is written to all connected workers (including the sender),
+so each worker can deliver it to the SSE clients it holds.
+
+Run it next to the API and start the workers with
+NOTIFICATION_PUBSUB_BACKEND=broker NOTIFICATION_BROKER_URL=tcp://127.0.0.1:8765.
+
+Usage:
+    python -m scripts.server.event_broker
+    python -m scripts.server.event_broker --host 127.0.0.1 --port 8765
+"""
+
+import sys
+import asyncio
+import argparse
+
+clients = set()
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    clients.add(writer)
+    peer = writer.get_extra_info("peername")
+    print(f"Worker connected: {peer} ({len(clients)} connected)")
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            for client in list(clients):
+                try:
+                    client.write(line)
+                except Exception:
+                    clients.discard(client)
+            await asyncio.gather(*(client.drain() for client in list(clients)), return_exceptions=True)
+    finally:
+        clients.discard(writer)
+        writer.close()
+        print(f"Worker disconnected: {peer} ({len(clients)} connected)")
+
+
+async def serve(host: str, port: int):
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Notification event broker listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relay de eventos de notificações entre workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,4 +23,4 @@ sys.path.insert(0, str(backend_root))
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True, timeout_graceful_shutdown=5)
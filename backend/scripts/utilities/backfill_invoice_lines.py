@@ -0,0 +1,35 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.database import SessionLocal, engine, Base
+from app.models import InvoiceLine  # noqa: F401  (regista a tabela)
+from app.crud.invoice_lines import InvoiceLineRepository
+
+
+def backfill_invoice_lines(chunk_size=1000):
+    Base.metadata.create_all(bind=engine, tables=[InvoiceLine.__table__])
+    db = SessionLocal()
+    try:
+        print(f"Backfilling invoice_lines from invoices.line_items (chunks of {chunk_size})...")
+        processed = InvoiceLineRepository(db).backfill(
+            chunk_size,
+            progress=lambda done, last_id: print(f"  {done} invoices (last id {last_id})"),
+        )
+        print(f"invoice_lines backfilled successfully: {processed} invoices.")
+    except Exception as e:
+        print(f"Error backfilling invoice_lines: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preenche invoice_lines a partir do JSON line_items das faturas existentes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Faturas por bloco (um commit por bloco)")
+    args = parser.parse_args()
+
+    backfill_invoice_lines(args.chunk_size)
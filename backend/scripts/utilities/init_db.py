@@ -0,0 +1,33 @@
+"""
+Initialize Database
+Creates missing tables and runs the seeds when the database is empty.
+Run once per deploy (and after pulling new models), instead of on every
+API boot.
+
+Usage:
+    python -m scripts.utilities.init_db
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.core.startup import StartupTimer, init_database
+
+
+if __name__ == "__main__":
+    timer = StartupTimer()
+    try:
+        with timer.phase("schema + seeds"):
+            result = init_database()
+    except Exception as e:
+        print(f"❌ Error initializing database: {e}")
+        sys.exit(1)
+    if result["seeded"]:
+        print("✅ Tables created and database seeded.")
+    else:
+        print(f"✅ Tables up to date; seeds skipped ({result['users']} users).")
+    print(timer.summary().replace("Startup:", "init_db:"))
@@ -0,0 +1,37 @@
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.database import SessionLocal, engine, Base
+from app.models import MetricsDailyRollup  # noqa: F401  (regista a tabela)
+from app.crud.metrics_rollup import MetricsRollupRepository
+
+
+def rebuild_metrics_rollup(start_day=None, end_day=None):
+    Base.metadata.create_all(bind=engine, tables=[MetricsDailyRollup.__table__])
+    db = SessionLocal()
+    try:
+        print("Rebuilding metrics_daily_rollup...")
+        rows = MetricsRollupRepository(db).rebuild(start_day, end_day)
+        print(f"Rollup rebuilt successfully: {rows} rows.")
+    except Exception as e:
+        print(f"Error rebuilding rollup: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstrói o rollup diário de métricas")
+    parser.add_argument("--start", help="Primeiro dia (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Último dia (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    rebuild_metrics_rollup(
+        datetime.strptime(args.start, "%Y-%m-%d").date() if args.start else None,
+        datetime.strptime(args.end, "%Y-%m-%d").date() if args.end else None,
+    )
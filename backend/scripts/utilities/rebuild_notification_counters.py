@@ -0,0 +1,32 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.database import SessionLocal, engine, Base
+from app.models import NotificationUnreadCounter  # noqa: F401  (regista a tabela)
+from app.crud.notification_counters import NotificationCounterRepository
+
+
+def rebuild_notification_counters(user_id=None):
+    Base.metadata.create_all(bind=engine, tables=[NotificationUnreadCounter.__table__])
+    db = SessionLocal()
+    try:
+        print("Rebuilding notification_unread_counters...")
+        rows = NotificationCounterRepository(db).rebuild(user_id)
+        print(f"Counters rebuilt successfully: {rows} rows.")
+    except Exception as e:
+        print(f"Error rebuilding counters: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstrói os contadores de notificações não lidas")
+    parser.add_argument("--user", type=int, help="Só os contadores deste utilizador")
+    args = parser.parse_args()
+
+    rebuild_notification_counters(args.user)
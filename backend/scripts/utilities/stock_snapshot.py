@@ -0,0 +1,36 @@
+import sys
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend root to path
+backend_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_root))
+
+from app.database import SessionLocal, engine, Base
+from app.models import StockMovement, StockSnapshot  # noqa: F401  (regista as tabelas)
+from app.crud.stock_ledger import StockLedgerRepository
+
+
+def stock_snapshot(date=None):
+    Base.metadata.create_all(bind=engine, tables=[StockMovement.__table__, StockSnapshot.__table__])
+    taken_at = datetime.strptime(date, "%Y-%m-%d") if date else datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    db = SessionLocal()
+    try:
+        ledger = StockLedgerRepository(db)
+        opened = ledger.open_balances()
+        print(f"Opening balances recorded: {opened} products.")
+        rows = ledger.checkpoint(taken_at)
+        print(f"Stock snapshot {taken_at:%Y-%m-%d}: {rows} products.")
+    except Exception as e:
+        print(f"Error taking stock snapshot: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Abre o ledger de stock (saldos iniciais) e cria o checkpoint do dia")
+    parser.add_argument("--date", help="Checkpoint à meia-noite desta data (YYYY-MM-DD); omissão: hoje")
+    args = parser.parse_args()
+
+    stock_snapshot(args.date)